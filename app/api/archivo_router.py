@@ -1,12 +1,15 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 
+from app.core import http_cache
 from app.db.session import get_db
 from app.schemas.archivo import ArchivoCreate, ArchivoOut, ArchivoUpdate
 from app.services.archivo_service import ArchivoService
 
 router = APIRouter()
+_LISTA = TypeAdapter(List[ArchivoOut])
 
 
 def get_service(db: Session = Depends(get_db)) -> ArchivoService:
@@ -34,11 +37,14 @@ def get_archivo(
 
 @router.get("/archivo", response_model=List[ArchivoOut])
 def list_archivo(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     service: ArchivoService = Depends(get_service),
 ):
-    return service.list(skip=skip, limit=limit)
+    return http_cache.responder(
+        request, ("archivo", skip, limit), ("archivo",), _LISTA, lambda: service.list(skip=skip, limit=limit)
+    )
 
 
 @router.put("/archivo/{id_archivo}", response_model=ArchivoOut)
@@ -67,6 +73,10 @@ def delete_archivo(
 @router.get("/archivo/por_tipo/{tipo_incapacidad_id}", response_model=List[ArchivoOut])
 def list_archivo_por_tipo(
     tipo_incapacidad_id: int,
+    request: Request,
     service: ArchivoService = Depends(get_service),
 ):
-    return service.list_by_tipo_incapacidad(tipo_incapacidad_id)
\ No newline at end of file
+    return http_cache.responder(
+        request, ("archivo_por_tipo", tipo_incapacidad_id), ("archivo", "relacion"), _LISTA,
+        lambda: service.list_by_tipo_incapacidad(tipo_incapacidad_id),
+    )
\ No newline at end of file
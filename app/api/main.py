@@ -1,17 +1,24 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.staticfiles import StaticFiles
+import logging
 import os
 from starlette.middleware.cors import CORSMiddleware
 
-from app.db.session import test_connection
+from app.db.session import test_connection, test_replica_connection
 from app.models.base import Base
 from app.models import parametro as _parametro  # noqa: F401  Ensure model import for metadata
 from app.models import tipo_incapacidad as _tipo_incapacidad  # noqa: F401  Ensure model import for metadata
 from app.models import archivo as _archivo  # noqa: F401  Ensure model import for metadata
 from app.models import relacion as _relacion  # noqa: F401  Ensure model import for metadata
 from app.models import password_reset_token as _password_reset_token  # noqa: F401  Ensure model import for metadata
-from app.db.session import engine
-from app.config.settings import get_env, DATABASE_URL
+from app.models import carga_documento as _carga_documento  # noqa: F401  Ensure model import for metadata
+from app.models import archivo_url as _archivo_url  # noqa: F401  Ensure model import for metadata
+from app.models import notificacion_correo as _notificacion_correo  # noqa: F401  Ensure model import for metadata
+from app.models import audit_log as _audit_log  # noqa: F401  Ensure model import for metadata
+from app.models import version_principal as _version_principal  # noqa: F401  Ensure model import for metadata
+from app.db.session import SessionLocal, engine
+from app.db import async_session, session as db_session
+from app.config.settings import get_env
 from app.api.v1.routers.parametro_router import router as parametro_router
 from app.api.v1.routers.parametro_hijo_router import router as parametro_hijo_router
 from app.api.v1.routers.tipo_incapacidad_router import router as tipo_incapacidad_router
@@ -19,46 +26,173 @@ from app.api.v1.routers.relacion_router import router as relacion_router
 from app.api.archivo_router import router as archivo_router
 from app.api.v1.routers.usuario_router import router as auth_router
 from app.api.v1.routers.incapacidad_router import router as incapacidad_router
-from app.db.migrate import align_usuario_table, align_incapacidad_table
+from app.api.v1.routers.audit_router import router as audit_router
+from app.db.migrate import align_usuario_table, align_incapacidad_table, align_carga_documento_table, align_indexes
+from app.db import reflection
+from app.core import http_cache, logging_config, password_hasher
+from app.core.auth_dependency import get_current_admin
+from app.repositories import parametro_hijo_catalog, relacion_matriz
+from app.services import audit_writer, email_worker, mail_transport, upload_worker
+from app.services.upload_service import UploadService
 
 
+logger = logging.getLogger(__name__)
+
+# parametro_id de los diagnósticos CIE-10 (insert_diagnosticos_mysql.sql)
+PARAMETRO_DIAGNOSTICOS = 7
+
 app = FastAPI(title="API Incapacidades")
 
 
 @app.on_event("startup")
 def on_startup() -> None:
-    print("DEBUG: ===== SERVIDOR INICIANDO =====")
+    # Primero el logging: todo lo que sigue (y los requests) escribe por la cola JSON
+    logging_config.configurar()
+    logger.info("Servidor iniciando")
     try:
         test_connection()
-        print("[OK] Base de datos conectada correctamente.")
-        print(f"[INFO] DATABASE_URL activo: {DATABASE_URL}")
+        logger.info("Base de datos conectada: %s", engine.url.render_as_string(hide_password=True))
     except Exception as exc:  # noqa: BLE001
         # No abortar la app por fallo de conexión; permitir que /health responda
-        print(f"[WARN] Falló la conexión a la base de datos: {exc}")
+        logger.warning("Falló la conexión a la base de datos: %s", exc)
+    # Réplica de lectura: si falla, los métodos @lectura fallarán hasta que vuelva
+    try:
+        if test_replica_connection():
+            logger.info("Réplica de lectura conectada (DATABASE_REPLICA_URL).")
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("Falló la conexión a la réplica de lectura: %s", exc)
     # Crear tablas si no existen
     try:
         Base.metadata.create_all(bind=engine)
     except Exception as exc:  # noqa: BLE001
-        print(f"[WARN] No fue posible crear/verificar tablas: {exc}")
+        logger.warning("No fue posible crear/verificar tablas: %s", exc)
     # Migraciones ligeras
     try:
         align_usuario_table(engine)
-        print("[OK] Migración de tabla Usuario aplicada.")
+        logger.info("Migración de tabla Usuario aplicada.")
     except Exception as exc:  # noqa: BLE001
-        print(f"[WARN] No fue posible aplicar migración Usuario: {exc}")
+        logger.warning("No fue posible aplicar migración Usuario: %s", exc)
     # Alinear incapacidad.fecha_registro sin ON UPDATE
     try:
         align_incapacidad_table(engine)
-        print("[OK] Migración de tabla Incapacidad aplicada.")
+        logger.info("Migración de tabla Incapacidad aplicada.")
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("No fue posible aplicar migración Incapacidad: %s", exc)
+    try:
+        align_carga_documento_table(engine)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("No fue posible aplicar migración CargaDocumento: %s", exc)
+    # Índices compuestos de los filtros/listados más usados
+    try:
+        report = align_indexes(engine)
+        logger.info(
+            "Índices verificados: %d creados, %d presentes, %d faltantes.",
+            len(report["created"]), len(report["present"]), len(report["missing"]),
+        )
+        for item in report["mismatched"]:
+            logger.warning(
+                "Índice %s.%s con columnas %s, se esperaba %s",
+                item["table"], item["index"], item["actual_columns"], item["columns"],
+            )
+        for item in report["unused"]:
+            logger.info("Índice sin uso registrado: %s.%s", item["table"], item["index"])
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("No fue posible alinear índices: %s", exc)
+    # Las migraciones pueden alterar columnas: descartar el esquema reflejado y recargarlo
+    reflection.invalidate(engine)
+    try:
+        reflection.warm_up(engine)
+        logger.info("Esquema reflejado en caché.")
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("No fue posible reflejar el esquema: %s", exc)
+    # Engine asíncrono de los listados de solo lectura (/mias, GET /incapacidad, /parametro_hijo)
+    estado_async = async_session.estado()
+    if estado_async["disponible"]:
+        logger.info("Engine asíncrono listo (%s).", estado_async["url"].split(":", 1)[0])
+    else:
+        logger.warning("Engine asíncrono no disponible, los listados async responderán 503: %s", estado_async["error"])
+    if estado_async["replica_error"]:
+        logger.warning("Réplica asíncrona no disponible, los listados async leen del primario: %s", estado_async["replica_error"])
+    # Catálogo de parametro_hijo e índice del autocompletado de diagnósticos (CIE-10)
+    try:
+        db = SessionLocal()
+        try:
+            parametro_hijo_catalog.get_catalogo(db).indice(PARAMETRO_DIAGNOSTICOS)
+        finally:
+            db.close()
+        logger.info("Índice de búsqueda de diagnósticos listo.")
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("No fue posible precargar el índice de diagnósticos: %s", exc)
+    try:
+        db = SessionLocal()
+        try:
+            matriz = relacion_matriz.get_matriz(db)
+        finally:
+            db.close()
+        logger.info("Matriz de documentos requeridos cargada: %d relaciones.", len(matriz.relaciones))
     except Exception as exc:  # noqa: BLE001
-        print(f"[WARN] No fue posible aplicar migración Incapacidad: {exc}")
-    print("DEBUG: ===== SERVIDOR INICIADO =====")
+        logger.warning("No fue posible precargar la matriz de documentos requeridos: %s", exc)
+    # Índice archivo_url: importar una sola vez los JSON heredados de uploads/urls
+    try:
+        db = SessionLocal()
+        try:
+            resumen = UploadService(db).importar_metadatos_json(solo_si_vacio=True)
+        finally:
+            db.close()
+        if resumen["importados"] or resumen["invalidos"]:
+            logger.info("Metadatos de archivos importados: %s", resumen)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("No fue posible importar metadatos de archivos: %s", exc)
+    # Retomar subidas a Google Drive interrumpidas por un reinicio
+    try:
+        pendientes = upload_worker.reanudar_pendientes()
+        logger.info("Cargas a Google Drive reanudadas: %s", pendientes)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("No fue posible reanudar cargas pendientes: %s", exc)
+    # Bandeja de salida de correos (notificaciones)
+    try:
+        retomados = email_worker.iniciar()
+        logger.info("Envío de correos en segundo plano iniciado (retomados: %s)", retomados)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("No fue posible iniciar el envío de correos: %s", exc)
+    logger.info("Servidor iniciado")
+
+
+@app.on_event("shutdown")
+def on_shutdown() -> None:
+    upload_worker.detener()
+    email_worker.detener()
+    mail_transport.reset()
+    # Escribir los eventos de auditoría que sigan en la cola
+    audit_writer.detener()
+    password_hasher.reset()
+    logging_config.detener()
+
+
+@app.on_event("shutdown")
+async def on_shutdown_async() -> None:
+    await async_session.dispose()
 
 
 @app.get("/health")
 def health_check() -> dict[str, str]:
     return {"status": "ok"}
 
+
+@app.get("/health/db")
+def health_db(admin = Depends(get_current_admin)) -> dict:
+    """Pools de conexiones (primario, réplica, async y async de réplica): checkouts, espera, overflow,
+    invalidaciones y ruteo."""
+    # Crea los engines asíncronos si aún no se usaron, para que sus pools aparezcan
+    estado_async = async_session.estado()
+    return {**db_session.estadisticas(), "async": estado_async}
+
+
+@app.get("/health/catalogos")
+def health_catalogos(admin = Depends(get_current_admin)) -> dict:
+    """Respuestas condicionales de catálogos: 304, servidas desde bytes en caché, generadas y versiones."""
+    return http_cache.estadisticas()
+
 # CORS
 # CORS: permite explícitamente el front en 3000
 origins_env = get_env("CORS_ORIGINS", "http://localhost:3000,http://127.0.0.1:3000, http://localhost:5173, http://127.0.0.1:5173, *")
@@ -69,6 +203,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 # Registrar routers
@@ -79,6 +214,7 @@ app.include_router(archivo_router, prefix ="/api" )
 app.include_router(relacion_router, prefix="/api")
 app.include_router(auth_router, prefix="/api")
 app.include_router(incapacidad_router, prefix="/api")
+app.include_router(audit_router, prefix="/api")
 # Upload deshabilitado
 
 
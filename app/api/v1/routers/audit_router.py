@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+from datetime import datetime
+
+from app.core.json_response import RespuestaJSON
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.db.session import get_db
+from app.core.auth_dependency import get_current_admin
+from app.services import audit_writer
+from app.services.audit_service import AuditService
+
+
+router = APIRouter(prefix="/auditoria", tags=["auditoria"])
+
+
+@router.get("", summary="Admin consulta el registro de auditoría")
+def listar_auditoria(
+    entidad: Optional[str] = Query(None, description="Tipo de entidad (incapacidad, archivo, ...)"),
+    entidad_id: Optional[int] = Query(None, description="Id de la entidad"),
+    usuario_id: Optional[int] = Query(None, description="Usuario que realizó la acción"),
+    accion: Optional[str] = Query(None, description="CREATE, UPDATE, DELETE, STATUS_CHANGE, ..."),
+    desde: Optional[datetime] = Query(None, description="Fecha mínima del evento"),
+    hasta: Optional[datetime] = Query(None, description="Fecha máxima del evento"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Cursor de la cabecera X-Next-Cursor (reemplaza a skip)"),
+    db: Session = Depends(get_db),
+    admin = Depends(get_current_admin),
+):
+    """Eventos de auditoría más recientes primero, con filtros y paginación por cursor."""
+    try:
+        result = AuditService(db).buscar(
+            entity_type=entidad,
+            entity_id=entidad_id,
+            user_id=usuario_id,
+            action=accion,
+            desde=desde,
+            hasta=hasta,
+            cursor=cursor,
+            skip=skip,
+            limit=limit,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    headers = {NEXT_CURSOR_HEADER: result["next_cursor"]} if result.get("next_cursor") else None
+    return RespuestaJSON(result["eventos"], headers=headers)
+
+
+@router.get("/estadisticas", summary="Admin consulta el estado del escritor de auditoría")
+def estadisticas_auditoria(admin = Depends(get_current_admin)):
+    """Eventos encolados, escritos, descartados por cola llena, lotes y pendientes."""
+    return audit_writer.estadisticas()
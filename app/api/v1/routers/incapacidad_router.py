@@ -1,12 +1,29 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, Form, status
-import os
+from fastapi.responses import StreamingResponse
+import logging
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
 
-from app.db.session import get_db
-from app.core.auth_dependency import get_current_employee, get_current_admin, get_current_employee_or_admin
-from app.services.incapacidad_service import IncapacidadService
+from app.db.async_session import AsyncSession, get_async_lectura_db
+from app.db.session import SessionLocal, get_db
+from app.core.json_response import RespuestaJSON, SerializadorListado
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.auth_dependency import (
+    get_current_employee,
+    get_current_admin,
+    get_current_employee_or_admin,
+    get_current_employee_or_admin_async,
+)
+from app.services.incapacidad_service import AsyncIncapacidadService, IncapacidadService
+from app.services import mail_transport
+from app.services.incapacidad_stats_service import IncapacidadStatsService
+from app.services.incapacidad_cumplimiento_service import IncapacidadCumplimientoService
+from app.services.incapacidad_export_service import (
+    CSV_MEDIA_TYPE,
+    XLSX_MEDIA_TYPE,
+    IncapacidadExportService,
+)
 from app.schemas.incapacidad import (
     IncapacidadCreateV2 as IncapacidadCreate,
     IncapacidadOut,
@@ -16,19 +33,32 @@ from app.schemas.incapacidad import (
 )
 
 
+logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/incapacidad", tags=["incapacidad"])
 
+# Listados de hasta 1000 filas: se serializan directo a bytes (response_model queda para la documentación)
+_LISTADO_EMPLEADO = SerializadorListado(IncapacidadOut)
+_LISTADO_ADMIN = SerializadorListado(IncapacidadAdminOut)
+
+
+def _cabecera_cursor(next_cursor: Optional[str]) -> Optional[dict]:
+    return {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+
 
 def get_service(db: Session = Depends(get_db)) -> IncapacidadService:
     return IncapacidadService(db)
 
 
+# Listados de solo lectura más consultados: async de punta a punta (sin threadpool)
+async def get_async_service(db: AsyncSession = Depends(get_async_lectura_db)) -> AsyncIncapacidadService:
+    return AsyncIncapacidadService(db)
+
+
 @router.post("/test-simple")
 def test_simple(
     empleado = Depends(get_current_employee),
 ):
     """Endpoint de prueba simple"""
-    print(f"DEBUG: Test simple - Usuario: {empleado.id_usuario}")
     return {"message": "Test exitoso", "user_id": empleado.id_usuario}
 
 
@@ -45,8 +75,8 @@ def subir_documento_incapacidad(
 ):
     """
     Acepta `incapacidad_id`, `archivo_id` y un archivo (pdf/png/jpg). Guarda el archivo en
-    una carpeta del servidor y crea un registro en `incapacidad_archivo` con `url_documento`
-    igual al nombre de archivo almacenado.
+    disco, registra la carga y responde de inmediato con `id_carga`; la subida a Google Drive
+    continúa en segundo plano (consultar `GET /incapacidad/archivo/carga/{id_carga}`).
     """
     try:
         return service.subir_documento_y_crear_registro(
@@ -61,6 +91,22 @@ def subir_documento_incapacidad(
         raise HTTPException(status_code=500, detail=f"Error al subir documento: {str(exc)}")
 
 
+@router.get("/archivo/carga/{id_carga}", summary="Estado de la subida de un documento a Google Drive")
+def estado_carga_documento(
+    id_carga: int,
+    service: IncapacidadService = Depends(get_service),
+    usuario = Depends(get_current_employee_or_admin),
+):
+    """`pendiente`/`subiendo` mientras se procesa, `completada` con `url_documento`, o `error`."""
+    result = service.obtener_carga(
+        id_carga=id_carga,
+        usuario_id=None if usuario.rol_id == 10 else usuario.id_usuario,
+    )
+    if not result:
+        raise HTTPException(status_code=404, detail="Carga no encontrada")
+    return result
+
+
 @router.post(
     "/",
     summary="Empleado crea una incapacidad (IDs)",
@@ -71,42 +117,37 @@ def crear_incapacidad(
     service: IncapacidadService = Depends(get_service),
     empleado = Depends(get_current_employee),
 ):
-    print(f"DEBUG: ===== INICIO CREAR INCAPACIDAD =====")
-    print(f"DEBUG: Usuario autenticado: {empleado.id_usuario}, Rol: {empleado.rol_id}")
-    print(f"DEBUG: Payload recibido: {payload}")
-    print(f"DEBUG: Payload tipo: {type(payload)}")
-    
     try:
-        print(f"DEBUG: Llamando a service.crear_incapacidad...")
-        result = service.crear_incapacidad(
+        return service.crear_incapacidad(
             usuario_id=empleado.id_usuario,
             payload=payload
         )
-        print(f"DEBUG: Incapacidad creada exitosamente: {result}")
-        return result
     except ValueError as exc:
-        print(f"DEBUG: ValueError en crear_incapacidad: {str(exc)}")
+        logger.info("Incapacidad rechazada para usuario %s: %s", empleado.id_usuario, exc)
         raise HTTPException(status_code=400, detail=str(exc))
     except Exception as exc:
-        print(f"DEBUG: Exception general en crear_incapacidad: {str(exc)}")
-        print(f"DEBUG: Tipo de excepción: {type(exc)}")
-        import traceback
-        print(f"DEBUG: Traceback completo: {traceback.format_exc()}")
+        # El servicio ya registró la traza con logger.exception
         raise HTTPException(status_code=500, detail=f"Error interno: {str(exc)}")
 
 
 @router.get("/mias", summary="Empleado lista sus incapacidades", response_model=List[IncapacidadOut])
-def listar_mias(
+async def listar_mias(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    service: IncapacidadService = Depends(get_service),
-    usuario = Depends(get_current_employee_or_admin),
+    cursor: Optional[str] = Query(None, description="Cursor de la cabecera X-Next-Cursor (reemplaza a skip)"),
+    service: AsyncIncapacidadService = Depends(get_async_service),
+    usuario = Depends(get_current_employee_or_admin_async),
 ):
-    return service.listar_mis_incapacidades(
-        usuario_id=usuario.id_usuario, 
-        skip=skip, 
-        limit=limit
-    )
+    try:
+        data, next_cursor = await service.listar_mis_incapacidades_pagina(
+            usuario_id=usuario.id_usuario, 
+            skip=skip, 
+            limit=limit,
+            cursor=cursor,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return _LISTADO_EMPLEADO.respuesta(data, headers=_cabecera_cursor(next_cursor))
 
 
 @router.get("/mias/{id_incapacidad}", summary="Empleado ve detalle de su incapacidad", response_model=IncapacidadOut)
@@ -125,7 +166,7 @@ def obtener_mi_incapacidad(
 
 
 @router.get("/", summary="Lista todas las incapacidades (empleado/admin)")
-def listar_admin(
+async def listar_admin(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     estado: Optional[int] = Query(None, description="Filtrar por estado (1=Enviado, 2=Revisado)"),
@@ -133,32 +174,141 @@ def listar_admin(
     usuario_id: Optional[int] = Query(None, description="Filtrar por empleado"),
     fecha_inicio: Optional[datetime] = Query(None, description="Fecha inicio del rango"),
     fecha_final: Optional[datetime] = Query(None, description="Fecha final del rango"),
-    service: IncapacidadService = Depends(get_service),
-    admin = Depends(get_current_employee_or_admin),
+    cursor: Optional[str] = Query(None, description="Valor next_cursor de la página anterior (reemplaza a skip)"),
+    service: AsyncIncapacidadService = Depends(get_async_service),
+    admin = Depends(get_current_employee_or_admin_async),
 ):
-    return service.listar_admin(
-        skip=skip, 
-        limit=limit, 
-        estado=estado,
-        tipo_incapacidad_id=tipo_incapacidad_id,
-        usuario_id=usuario_id,
-        fecha_inicio=fecha_inicio,
-        fecha_final=fecha_final
-    )
+    try:
+        result = await service.listar_admin(
+            skip=skip, 
+            limit=limit, 
+            estado=estado,
+            tipo_incapacidad_id=tipo_incapacidad_id,
+            usuario_id=usuario_id,
+            fecha_inicio=fecha_inicio,
+            fecha_final=fecha_final,
+            cursor=cursor,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    # Sin jsonable_encoder: la misma salida serializada con orjson
+    return RespuestaJSON(result)
 
 
 @router.get("/admin/rechazadas", summary="Admin lista incapacidades rechazadas", response_model=List[IncapacidadAdminOut])
 def listar_rechazadas(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Cursor de la cabecera X-Next-Cursor (reemplaza a skip)"),
     service: IncapacidadService = Depends(get_service),
     admin = Depends(get_current_admin),
 ):
     """Lista incapacidades rechazadas para administradores"""
-    return service.listar_admin(
-        skip=skip, 
-        limit=limit, 
-        estado=50
+    try:
+        result = service.listar_admin(
+            skip=skip, 
+            limit=limit, 
+            estado=50,
+            cursor=cursor,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return _LISTADO_ADMIN.respuesta(result["incapacidades"], headers=_cabecera_cursor(result.get("next_cursor")))
+
+
+@router.get("/admin/cumplimiento", summary="Admin lista los documentos faltantes de las incapacidades filtradas")
+def documentos_faltantes(
+    limit: int = Query(1000, ge=1, le=10000),
+    estado: Optional[int] = Query(11, description="Filtrar por estado (por defecto 11=Pendiente)"),
+    tipo_incapacidad_id: Optional[int] = Query(None, description="Filtrar por tipo de incapacidad"),
+    usuario_id: Optional[int] = Query(None, description="Filtrar por empleado"),
+    fecha_inicio: Optional[datetime] = Query(None, description="Fecha inicio del rango"),
+    fecha_final: Optional[datetime] = Query(None, description="Fecha final del rango"),
+    cursor: Optional[str] = Query(None, description="Valor next_cursor de la página anterior"),
+    admin = Depends(get_current_admin),
+):
+    """Incapacidades (por id ascendente) a las que les falta algún documento requerido por su
+    tipo, cada una con `faltantes`; una consulta por página, enviada en streaming."""
+    try:
+        despues_de = IncapacidadCumplimientoService.posicion(cursor)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    filtros = {
+        "estado": estado,
+        "tipo_incapacidad_id": tipo_incapacidad_id,
+        "usuario_id": usuario_id,
+        "fecha_inicio": fecha_inicio,
+        "fecha_final": fecha_final,
+    }
+
+    def contenido():
+        # Sesión propia, como en /export: el cuerpo se envía después de cerrar la de get_db
+        db = SessionLocal()
+        try:
+            yield from IncapacidadCumplimientoService(db).json(limit=limit, despues_de=despues_de, **filtros)
+        finally:
+            db.close()
+
+    return StreamingResponse(contenido(), media_type="application/json")
+
+
+@router.get("/stats", summary="Admin obtiene estadísticas agregadas de incapacidades")
+def estadisticas(
+    top_n: int = Query(10, ge=1, le=100, description="Cantidad de EPS y diagnósticos más frecuentes"),
+    estado: Optional[int] = Query(None, description="Filtrar por estado"),
+    tipo_incapacidad_id: Optional[int] = Query(None, description="Filtrar por tipo de incapacidad"),
+    usuario_id: Optional[int] = Query(None, description="Filtrar por empleado"),
+    fecha_inicio: Optional[datetime] = Query(None, description="Fecha inicio del rango"),
+    fecha_final: Optional[datetime] = Query(None, description="Fecha final del rango"),
+    db: Session = Depends(get_db),
+    admin = Depends(get_current_admin),
+):
+    """Conteos, días y costo estimado por estado, tipo, EPS, diagnóstico y mes."""
+    return IncapacidadStatsService(db).obtener(
+        top_n=top_n,
+        estado=estado,
+        tipo_incapacidad_id=tipo_incapacidad_id,
+        usuario_id=usuario_id,
+        fecha_inicio=fecha_inicio,
+        fecha_final=fecha_final,
+    )
+
+
+@router.get("/export", summary="Admin exporta incapacidades para nómina (CSV/XLSX)")
+def exportar(
+    formato: str = Query("csv", pattern="^(csv|xlsx)$", description="csv o xlsx"),
+    estado: Optional[int] = Query(None, description="Filtrar por estado"),
+    tipo_incapacidad_id: Optional[int] = Query(None, description="Filtrar por tipo de incapacidad"),
+    usuario_id: Optional[int] = Query(None, description="Filtrar por empleado"),
+    fecha_inicio: Optional[datetime] = Query(None, description="Fecha inicio del rango"),
+    fecha_final: Optional[datetime] = Query(None, description="Fecha final del rango"),
+    admin = Depends(get_current_admin),
+):
+    """Descarga todas las incapacidades filtradas sin cargarlas en memoria."""
+    if formato == "xlsx" and not IncapacidadExportService.xlsx_disponible():
+        raise HTTPException(status_code=501, detail="Exportación XLSX no disponible (falta openpyxl)")
+    filtros = {
+        "estado": estado,
+        "tipo_incapacidad_id": tipo_incapacidad_id,
+        "usuario_id": usuario_id,
+        "fecha_inicio": fecha_inicio,
+        "fecha_final": fecha_final,
+    }
+
+    def contenido():
+        # Sesión propia: la respuesta se sigue enviando después de cerrar la de get_db
+        db = SessionLocal()
+        try:
+            service = IncapacidadExportService(db)
+            yield from (service.xlsx(**filtros) if formato == "xlsx" else service.csv(**filtros))
+        finally:
+            db.close()
+
+    nombre = f"incapacidades_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{formato}"
+    return StreamingResponse(
+        contenido(),
+        media_type=XLSX_MEDIA_TYPE if formato == "xlsx" else CSV_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="{nombre}"'},
     )
 
 
@@ -168,9 +318,7 @@ def obtener_incapacidad_admin(
     service: IncapacidadService = Depends(get_service),
     admin = Depends(get_current_employee_or_admin),
 ):
-    print(f"DEBUG ROUTER: Endpoint obtener_incapacidad_admin llamado para ID {id_incapacidad}")
     result = service.obtener_incapacidad_admin(id_incapacidad=id_incapacidad)
-    print(f"DEBUG ROUTER: Resultado del servicio: {result}")
     if not result:
         raise HTTPException(status_code=404, detail="Incapacidad no encontrada")
     return result
@@ -240,9 +388,7 @@ def cambiar_estado(
     # Agregar advertencia si no hay credenciales SMTP y el estado es Rechazada
     warning = None
     if estado == 50:
-        smtp_username = os.getenv('SMTP_USERNAME')
-        smtp_password = os.getenv('SMTP_PASSWORD')
-        if not smtp_username or not smtp_password:
+        if not mail_transport.configuracion().configurado:
             warning = (
                 "Advertencia: No se envi correo de rechazo porque faltan credenciales SMTP. "
                 "Configure SMTP_USERNAME y SMTP_PASSWORD en el backend."
@@ -308,12 +454,10 @@ def actualizar_mia_reenviar_post(
     empleado = Depends(get_current_employee),
 ):
     """Reenvía una incapacidad rechazada a estado pendiente (solo cambia el estado, no los datos)"""
-    print(f"🔔 Recibida petición de reenvío para incapacidad {id_incapacidad}")
-    print(f"🔔 Usuario: {empleado.id_usuario}")
+    logger.debug("Reenvío de incapacidad %s por usuario %s", id_incapacidad, empleado.id_usuario)
     
     # Verificar que la incapacidad existe y pertenece al usuario
     incapacidad = service.repo.get(id_incapacidad)
-    print(f"🔔 Incapacidad obtenida: {incapacidad}")
     if not incapacidad:
         raise HTTPException(status_code=404, detail="Incapacidad no encontrada")
     
@@ -323,26 +467,11 @@ def actualizar_mia_reenviar_post(
     if incapacidad.get("estado") != 50:
         raise HTTPException(status_code=400, detail="Solo se pueden reenviar incapacidades rechazadas")
     
-    # Cambiar estado a 11 (Pendiente) y limpiar mensaje de rechazo
-    ok = service.repo.update_estado(id_incapacidad, estado=11)
+    # Cambiar estado a 11 (Pendiente), limpiar mensaje de rechazo y auditar
+    ok = service.reenviar_rechazada(id_incapacidad=id_incapacidad, usuario_id=empleado.id_usuario)
     if not ok:
         raise HTTPException(status_code=500, detail="No se pudo actualizar el estado")
     
-    # Limpiar mensaje de rechazo
-    try:
-        service.repo.update_mensaje_rechazo(id_incapacidad, "")
-    except Exception:
-        pass
-    
-    # Registrar auditoría
-    service.audit_service.log_status_change(
-        incapacidad_id=id_incapacidad,
-        user_id=empleado.id_usuario,
-        old_status=50,
-        new_status=11,
-        reason="Reenvío por empleado después de modificar documentos"
-    )
-    
     return {"ok": True, "message": "Incapacidad reenviada a revisión"}
 
 
@@ -357,8 +486,6 @@ def notify_admins_nueva_incapacidad(
     Este endpoint es llamado por el frontend después de crear una incapacidad.
     """
     try:
-        print(f"🔔 Notificando a administradores sobre incapacidad {id_incapacidad}")
-        
         # Verificar que la incapacidad existe y pertenece al usuario
         incapacidad = service.repo.get(id_incapacidad)
         if not incapacidad:
@@ -374,14 +501,14 @@ def notify_admins_nueva_incapacidad(
         )
         
         if success:
-            print(f"✅ Notificación enviada exitosamente para incapacidad {id_incapacidad}")
+            logger.info("Notificación a administradores encolada para incapacidad %s", id_incapacidad)
             return {"ok": True, "message": "Notificación enviada a administradores"}
         else:
-            print(f"⚠️ No se pudo enviar notificación para incapacidad {id_incapacidad}")
+            logger.warning("No se pudo enviar notificación para incapacidad %s", id_incapacidad)
             return {"ok": False, "message": "No se pudo enviar la notificación"}
             
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error enviando notificación: {str(e)}")
+        logger.exception("Error notificando a administradores sobre incapacidad %s", id_incapacidad)
         raise HTTPException(status_code=500, detail=f"Error interno: {str(e)}")
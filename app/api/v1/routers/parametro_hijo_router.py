@@ -1,17 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 
+from app.core import http_cache
+from app.db.async_session import AsyncSession, get_async_lectura_db
 from app.db.session import get_db
 from app.core.auth_dependency import get_current_admin
 from app.schemas.parametro_hijo import ParametroHijoCreate, ParametroHijoOut, ParametroHijoUpdate
-from app.services.parametro_hijo_service import ParametroHijoService
+from app.services.parametro_hijo_service import AsyncParametroHijoService, ParametroHijoService
 
 
 router = APIRouter(prefix="/parametro_hijo", tags=["parametro_hijo"])
+_LISTA = TypeAdapter(list[ParametroHijoOut])
 
 def get_service(db: Session = Depends(get_db)) -> ParametroHijoService:
     return ParametroHijoService(db)
 
+async def get_async_service(db: AsyncSession = Depends(get_async_lectura_db)) -> AsyncParametroHijoService:
+    return AsyncParametroHijoService(db)
+
 @router.post("", response_model=ParametroHijoOut, status_code=status.HTTP_201_CREATED)
 def create_parametro_hijo(
     payload: ParametroHijoCreate, 
@@ -20,21 +27,37 @@ def create_parametro_hijo(
 ):
     return service.create(payload)
 
+# Antes de /{id_parametro_hijo}: si no, "search" se intentaría convertir a id
+@router.get("/search", response_model=list[ParametroHijoOut])
+async def search_parametro_hijo(
+    parametro_id: int,
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(20, ge=1, le=100),
+    solo_activos: bool = True,
+    service: AsyncParametroHijoService = Depends(get_async_service),
+):
+    """Autocompletado (p. ej. diagnósticos CIE-10, parametro_id=7): prefijo de código o palabras sin tildes."""
+    return await service.buscar(parametro_id, q, limit=limit, solo_activos=solo_activos)
+
+
 @router.get("/{id_parametro_hijo}", response_model=ParametroHijoOut)
-def get_parametro(id_parametro_hijo: int, service: ParametroHijoService = Depends(get_service)):
-    result = service.get(id_parametro_hijo)
+async def get_parametro(id_parametro_hijo: int, service: AsyncParametroHijoService = Depends(get_async_service)):
+    result = await service.get(id_parametro_hijo)
     if result is None:
         raise HTTPException(status_code=404, detail="Parametro hijo no encontrado")
     return result
 
 
 @router.get("", response_model=list[ParametroHijoOut])
-def list_parametro_hijo(
+async def list_parametro_hijo(
+    request: Request,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    service: ParametroHijoService = Depends(get_service),
+    service: AsyncParametroHijoService = Depends(get_async_service),
 ):
-    return service.list(skip=skip, limit=limit)
+    return await http_cache.responder_async(
+        request, ("parametro_hijo", skip, limit), ("parametro_hijo",), _LISTA, lambda: service.list(skip=skip, limit=limit)
+    )
 
 @router.put("/{id_parametro_hijo}", response_model=ParametroHijoOut)
 def update_parametro_hijo(
@@ -62,9 +85,13 @@ def delete_parametro_hijo(
 @router.get("/papashijos/{id_parametro}", response_model=list[ParametroHijoOut])
 def papashijos( 
     id_parametro: int,
+    request: Request,
     service: ParametroHijoService = Depends(get_service)):
 
-    return service.hijospapa(id_parametro)
+    return http_cache.responder(
+        request, ("papashijos", id_parametro), ("parametro", "parametro_hijo"), _LISTA,
+        lambda: service.hijospapa(id_parametro),
+    )
 
 @router.put("/cambiar_estado/{id_parametro_hijo}", response_model=bool)
 def cambiar_estado ( 
@@ -1,12 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 
+from app.core import http_cache
 from app.db.session import get_db
 from app.schemas.parametro import ParametroCreate, ParametroOut, ParametroUpdate
 from app.services.parametro_service import ParametroService
 
 
 router = APIRouter(prefix="/parametros", tags=["parametros"])
+_LISTA = TypeAdapter(list[ParametroOut])
 
 
 def get_service(db: Session = Depends(get_db)) -> ParametroService:
@@ -28,11 +31,14 @@ def get_parametro(id_parametro: int, service: ParametroService = Depends(get_ser
 
 @router.get("", response_model=list[ParametroOut])
 def list_parametros(
+    request: Request,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     service: ParametroService = Depends(get_service),
 ):
-    return service.list(skip=skip, limit=limit)
+    return http_cache.responder(
+        request, ("parametros", skip, limit), ("parametro",), _LISTA, lambda: service.list(skip=skip, limit=limit)
+    )
 
 
 @router.put("/{id_parametro}", response_model=ParametroOut)
@@ -1,6 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 
+from app.core import http_cache
 from app.db.session import get_db
 from app.schemas.relacion import RelacionCreate, RelacionOut, RelacionWithNamesOut
 from app.schemas.archivo import ArchivoOut
@@ -8,6 +10,10 @@ from app.services.relacion_service import RelacionService
 
 
 router = APIRouter(prefix="/relacion", tags=["relacion"])
+_LISTA = TypeAdapter(list[RelacionWithNamesOut])
+_ARCHIVOS = TypeAdapter(list[ArchivoOut])
+# Las relaciones se responden con los nombres del tipo y del archivo
+_DEPENDE = ("relacion", "tipo_incapacidad", "archivo")
 
 
 def get_service(db: Session = Depends(get_db)) -> RelacionService:
@@ -16,11 +22,14 @@ def get_service(db: Session = Depends(get_db)) -> RelacionService:
 
 @router.get("", response_model=list[RelacionWithNamesOut])
 def list_relaciones(
+    request: Request,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     service: RelacionService = Depends(get_service),
 ):
-    return service.list(skip=skip, limit=limit)
+    return http_cache.responder(
+        request, ("relacion", skip, limit), _DEPENDE, _LISTA, lambda: service.list(skip=skip, limit=limit)
+    )
 
 
 @router.post("", response_model=RelacionOut, status_code=status.HTTP_201_CREATED)
@@ -46,15 +55,23 @@ def delete_relacion(
 @router.get("/por_tipo/{tipo_incapacidad_id}", response_model=list[RelacionWithNamesOut])
 def list_relacion_por_tipo(
     tipo_incapacidad_id: int,
+    request: Request,
     service: RelacionService = Depends(get_service),
 ):
-    return service.list_by_tipo_incapacidad(tipo_incapacidad_id)
+    return http_cache.responder(
+        request, ("relacion_por_tipo", tipo_incapacidad_id), _DEPENDE, _LISTA,
+        lambda: service.list_by_tipo_incapacidad(tipo_incapacidad_id),
+    )
 
 
 @router.get("/por_tipo/{tipo_incapacidad_id}/archivos", response_model=list[ArchivoOut])
 def list_archivos_por_tipo(
     tipo_incapacidad_id: int,
+    request: Request,
     service: RelacionService = Depends(get_service),
 ):
-    return service.list_archivos_by_tipo_incapacidad(tipo_incapacidad_id)
+    return http_cache.responder(
+        request, ("relacion_archivos_por_tipo", tipo_incapacidad_id), ("relacion", "archivo"), _ARCHIVOS,
+        lambda: service.list_archivos_by_tipo_incapacidad(tipo_incapacidad_id),
+    )
 
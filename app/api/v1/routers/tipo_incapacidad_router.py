@@ -1,11 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 
+from app.core import http_cache
 from app.db.session import get_db
 from app.schemas.tipo_incapacidad import TipoIncapacidadCreateV2, TipoIncapacidadOut, TipoIncapacidadUpdate
 from app.services.tipo_incapacidad import TipoIncapacidadService
 
 router = APIRouter()
+_LISTA = TypeAdapter(list[TipoIncapacidadOut])
 
 
 def get_service(db: Session = Depends(get_db)) -> TipoIncapacidadService:
@@ -33,11 +36,15 @@ def get_tipo_incapacidad(
 
 @router.get("/tipo_incapacidad", response_model=list[TipoIncapacidadOut])
 def list_tipo_incapacidad(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     service: TipoIncapacidadService = Depends(get_service),
 ):
-    return service.list(skip=skip, limit=limit)
+    return http_cache.responder(
+        request, ("tipo_incapacidad", skip, limit), ("tipo_incapacidad",), _LISTA,
+        lambda: service.list(skip=skip, limit=limit),
+    )
 
 
 @router.put("/tipo_incapacidad/{id_tipo_incapacidad}", response_model=TipoIncapacidadOut)
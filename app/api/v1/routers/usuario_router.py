@@ -20,7 +20,9 @@ from app.schemas.auth import (
 from app.services.usuario_service import UsuarioService
 from app.services.password_reset_service import PasswordResetService
 from app.core.security import decode_token
-from app.core.auth_dependency import get_current_employee
+from app.core import password_hasher
+from app.core.auth_dependency import get_current_admin, get_current_employee
+from app.core.password_hasher import HasherSaturado
 
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -34,6 +36,10 @@ def get_password_reset_service(db: Session = Depends(get_db)) -> PasswordResetSe
     return PasswordResetService(db)
 
 
+def _hasher_ocupado(exc: HasherSaturado) -> HTTPException:
+    return HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": "1"})
+
+
 @router.post("/register", response_model=UsuarioOut)
 def register(
     payload: UsuarioCreate,
@@ -43,16 +49,19 @@ def register(
         return service.register(payload)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc))
+    except HasherSaturado as exc:
+        raise _hasher_ocupado(exc)
 
 
 @router.post("/login", response_model=LoginResponse)
-def login(
+async def login(
     payload: LoginRequest,
     response: Response,
     service: UsuarioService = Depends(get_service),
 ):
+    # async: bcrypt corre en el ejecutor acotado y no retiene un hilo del threadpool
     try:
-        data = service.authenticate(payload.correo_electronico, payload.password)
+        data = await service.authenticate_async(payload.correo_electronico, payload.password)
         
         # Configurar cookie HttpOnly para refresh token
         response.set_cookie(
@@ -75,6 +84,14 @@ def login(
         )
     except ValueError as exc:
         raise HTTPException(status_code=401, detail=str(exc))
+    except HasherSaturado as exc:
+        raise _hasher_ocupado(exc)
+
+
+@router.get("/hash/estadisticas", summary="Admin consulta la cola de verificación de contraseñas")
+def estadisticas_hash(admin = Depends(get_current_admin)):
+    """Workers, pendientes, rechazos por saturación, rehash y tiempos promedio de bcrypt."""
+    return password_hasher.estadisticas()
 
 
 @router.get("/usuarios", response_model=list[UsuarioOut])
@@ -149,7 +166,6 @@ def test_post_auth(
     request: Request = None
 ):
     """Endpoint POST de prueba para verificar autenticación"""
-    print(f"DEBUG: POST test - Usuario autenticado: {empleado.id_usuario}")
     return {"message": "POST autenticación exitosa", "user_id": empleado.id_usuario}
 
 @router.get("/me", response_model=UserInfo)
@@ -240,6 +256,8 @@ def reset_password(
         )
     except HTTPException:
         raise
+    except HasherSaturado as exc:
+        raise _hasher_ocupado(exc)
     except Exception as e:
         raise HTTPException(
             status_code=500, 
@@ -2,54 +2,73 @@ from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 
+from app.db.async_session import AsyncSession, get_async_db
 from app.db.session import get_db
+from app.core import principal_cache
 from app.core.security import decode_token
-from app.repositories.usuario_repository import UsuarioRepository
+from app.repositories.usuario_repository import AsyncUsuarioRepository, UsuarioRepository
 
 
 security = HTTPBearer()
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db),
-):
-    print(f"DEBUG: Token recibido: {credentials.credentials[:20]}...")
+def _user_id(credentials: HTTPAuthorizationCredentials) -> int:
     try:
         payload = decode_token(credentials.credentials)
-        user_id = payload.get("sub")
-        print(f"DEBUG: Payload decodificado - user_id: {user_id}, payload: {payload}")
-        if user_id is None:
-            raise ValueError("sub faltante")
-    except Exception as e:
-        print(f"DEBUG: Error al decodificar token: {str(e)}")
+        return int(payload.get("sub"))
+    except Exception:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token inválido",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    repo = UsuarioRepository(db)
-    user = repo.get(int(user_id))
-    if user is None:
+
+def _validar_principal(entity):
+    if entity is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Usuario no encontrado",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
+    return principal_cache.guardar(entity)
+
+
+def _validar_activo(user):
     # Validar que el usuario esté activo
     if not user.estado:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Usuario inactivo",
         )
-    
     return user
 
 
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db),
+):
+    user_id = _user_id(credentials)
+    # Principal cacheado (id, rol, estado): sin consulta a usuario en cada request
+    user = principal_cache.get(user_id, db)
+    if user is None:
+        user = _validar_principal(UsuarioRepository(db).get(user_id))
+    return _validar_activo(user)
+
+
+async def get_current_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Como get_current_user para endpoints async: no usa el threadpool."""
+    user_id = _user_id(credentials)
+    user = await principal_cache.get_async(user_id, db)
+    if user is None:
+        user = _validar_principal(await AsyncUsuarioRepository(db).get(user_id))
+    return _validar_activo(user)
+
+
 def get_current_employee(current_user = Depends(get_current_user)):
-    print(f"DEBUG: Usuario ID: {current_user.id_usuario}, Rol: {current_user.rol_id}, Estado: {current_user.estado}")
     if current_user.rol_id != 9:
         raise HTTPException(status_code=403, detail="Acceso restringido a empleados")
     return current_user
@@ -66,3 +85,7 @@ def get_current_employee_or_admin(current_user = Depends(get_current_user)):
     if current_user.rol_id not in (9, 10):
         raise HTTPException(status_code=403, detail="Acceso restringido a empleados/administradores")
     return current_user
+
+
+async def get_current_employee_or_admin_async(current_user = Depends(get_current_user_async)):
+    return get_current_employee_or_admin(current_user)
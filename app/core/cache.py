@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class TTLCache:
+    """Caché LRU en memoria con expiración por entrada, segura entre hilos."""
+
+    def __init__(self, maxsize: int = 256, ttl: float = 30.0) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expira, valor = item
+            if expira <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return valor
+
+    def set(self, key: Hashable, valor: Any, ttl: Optional[float] = None) -> None:
+        expira = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expira, valor)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_set(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Retorna el valor cacheado o lo calcula con `factory` (fuera del lock)."""
+        marcador = object()
+        valor = self.get(key, marcador)
+        if valor is marcador:
+            valor = factory()
+            self.set(key, valor)
+        return valor
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+from app.config.settings import get_env
+from app.core.cache import TTLCache
+
+
+# Segundos que se sirve una respuesta serializada sin volver a la BD. Las escrituras locales
+# la invalidan al instante; el TTL acota cuánto tarda en verse un cambio hecho en otro nodo.
+CATALOG_HTTP_CACHE_TTL = float(get_env("CATALOG_HTTP_CACHE_TTL", "60") or 60)
+CATALOG_HTTP_CACHE_MAX = int(get_env("CATALOG_HTTP_CACHE_MAX", "512") or 512)
+# no-cache: el navegador guarda la respuesta pero revalida siempre con If-None-Match (304 barato)
+CATALOG_CACHE_CONTROL = get_env("CATALOG_CACHE_CONTROL", "private, no-cache")
+
+
+@dataclass(frozen=True)
+class RespuestaCatalogo:
+    cuerpo: bytes
+    etag: str
+
+
+_lock = threading.Lock()
+_versiones: Dict[str, int] = {}
+_stats = {"no_modificado": 0, "desde_cache": 0, "generadas": 0}
+_cache = TTLCache(maxsize=CATALOG_HTTP_CACHE_MAX, ttl=CATALOG_HTTP_CACHE_TTL)
+
+
+def invalidar(*catalogos: str) -> None:
+    """Incrementa la versión de los catálogos (llamar tras crear/modificar/eliminar)."""
+    with _lock:
+        for catalogo in catalogos:
+            _versiones[catalogo] = _versiones.get(catalogo, 0) + 1
+
+
+def version(catalogo: str) -> int:
+    return _versiones.get(catalogo, 0)
+
+
+def _clave(clave: Tuple[Hashable, ...], depende: Tuple[str, ...]) -> Tuple[Hashable, ...]:
+    # Las versiones se leen antes de consultar: una escritura concurrente deja la entrada inalcanzable
+    with _lock:
+        return (*clave, tuple(_versiones.get(c, 0) for c in depende))
+
+
+def _serializar(adapter: TypeAdapter, datos: Any) -> RespuestaCatalogo:
+    cuerpo = adapter.dump_json(adapter.validate_python(datos))
+    # ETag fuerte derivado del contenido: igual en todos los nodos con los mismos datos
+    return RespuestaCatalogo(cuerpo=cuerpo, etag=f'"{hashlib.blake2b(cuerpo, digest_size=16).hexdigest()}"')
+
+
+def _contar(clave: str) -> None:
+    with _lock:
+        _stats[clave] += 1
+
+
+def _coincide(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match usa comparación débil: W/"x" coincide con "x"
+    return any(e.strip().removeprefix("W/") == etag for e in if_none_match.split(","))
+
+
+def _responder(request: Request, entrada: RespuestaCatalogo) -> Response:
+    headers = {"ETag": entrada.etag, "Cache-Control": CATALOG_CACHE_CONTROL}
+    if _coincide(request.headers.get("if-none-match"), entrada.etag):
+        _contar("no_modificado")
+        return Response(status_code=304, headers=headers)
+    return Response(content=entrada.cuerpo, media_type="application/json", headers=headers)
+
+
+def responder(
+    request: Request,
+    clave: Tuple[Hashable, ...],
+    depende: Tuple[str, ...],
+    adapter: TypeAdapter,
+    producir: Callable[[], Any],
+) -> Response:
+    """Respuesta JSON de un catálogo con ETag, servida desde bytes ya serializados por versión.
+
+    `depende` lista los catálogos cuyo cambio invalida la respuesta; `producir` solo se
+    llama (y solo entonces se consulta la BD) si no hay bytes vigentes para esas versiones.
+    """
+    k = _clave(clave, depende)
+    entrada = _cache.get(k)
+    if entrada is None:
+        entrada = _serializar(adapter, producir())
+        _cache.set(k, entrada)
+        _contar("generadas")
+    else:
+        _contar("desde_cache")
+    return _responder(request, entrada)
+
+
+async def responder_async(
+    request: Request,
+    clave: Tuple[Hashable, ...],
+    depende: Tuple[str, ...],
+    adapter: TypeAdapter,
+    producir: Callable[[], Awaitable[Any]],
+) -> Response:
+    """Como responder, para endpoints async."""
+    k = _clave(clave, depende)
+    entrada = _cache.get(k)
+    if entrada is None:
+        entrada = _serializar(adapter, await producir())
+        _cache.set(k, entrada)
+        _contar("generadas")
+    else:
+        _contar("desde_cache")
+    return _responder(request, entrada)
+
+
+def estadisticas() -> dict:
+    with _lock:
+        return {**_stats, "versiones": dict(_versiones), "entradas": len(_cache)}
+
+
+def reset() -> None:
+    _cache.clear()
+    with _lock:
+        _versiones.clear()
+        for clave in _stats:
+            _stats[clave] = 0
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Iterable, List, Mapping, Optional, Type
+
+from fastapi import Response
+from fastapi.encoders import decimal_encoder, jsonable_encoder
+from pydantic import BaseModel, TypeAdapter
+
+from app.config.settings import get_env
+
+try:  # Serializador JSON en Rust (requirements.txt); sin él se usa json de la stdlib
+    import orjson
+except ImportError:  # pragma: no cover - depende del entorno
+    orjson = None  # type: ignore
+
+
+# Listados cuyas filas vienen del repositorio ya normalizadas: se proyectan a los campos del
+# schema y se serializan sin volver a validarlas. false para validar siempre con pydantic.
+RESPUESTAS_SIN_VALIDAR = (get_env("RESPUESTAS_SIN_VALIDAR", "true") or "true").lower() in ("1", "true", "yes")
+
+_OPCIONES = orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+
+
+def _por_defecto(valor: Any) -> Any:
+    # Mismo resultado que jsonable_encoder: Decimal como número, el resto según FastAPI
+    if isinstance(valor, Decimal):
+        return decimal_encoder(valor)
+    return jsonable_encoder(valor)
+
+
+def _decimal_texto(valor: Any) -> Any:
+    # Como pydantic al serializar un campo Decimal de un response_model
+    if isinstance(valor, Decimal):
+        return str(valor)
+    return _por_defecto(valor)
+
+
+def dumps(contenido: Any) -> bytes:
+    """JSON compacto en UTF-8, idéntico al de JSONResponse(jsonable_encoder(contenido))."""
+    if orjson is not None:
+        return orjson.dumps(contenido, default=_por_defecto, option=_OPCIONES)
+    return json.dumps(
+        jsonable_encoder(contenido), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class RespuestaJSON(Response):
+    """JSONResponse sin el paso por jsonable_encoder: devolverla directamente desde el endpoint."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+_PLANOS = (int, str, bool, float, Decimal, datetime, date, time, dict, list, type(None))
+
+
+def _tipo_plano(anotacion: Any) -> bool:
+    argumentos = getattr(anotacion, "__args__", None)
+    if argumentos:
+        # Optional[X], X | None, List[dict]
+        return all(_tipo_plano(a) for a in argumentos)
+    origen = getattr(anotacion, "__origin__", None)
+    return (origen or anotacion) in _PLANOS
+
+
+class SerializadorListado:
+    """Serializa listas de filas (dict) con la forma de `modelo`, como lo haría response_model.
+
+    Con orjson y RESPUESTAS_SIN_VALIDAR cada fila se proyecta a los campos del schema
+    (faltantes con su default) y se serializa sin validarla; si no, se valida y serializa
+    con pydantic.
+    """
+
+    def __init__(self, modelo: Type[BaseModel]) -> None:
+        self._adapter = TypeAdapter(List[modelo])
+        campos = modelo.model_fields
+        self._campos = tuple((nombre, campo.get_default(call_default_factory=True)) for nombre, campo in campos.items())
+        # Solo tipos que orjson escribe igual que pydantic; alias o tipos anidados requieren validar
+        self._proyectable = all(
+            campo.alias is None and campo.serialization_alias is None and _tipo_plano(campo.annotation)
+            for campo in campos.values()
+        )
+
+    def dump(self, filas: Iterable[Mapping[str, Any]], *, validar: Optional[bool] = None) -> bytes:
+        filas = list(filas)
+        if validar is None:
+            validar = not RESPUESTAS_SIN_VALIDAR
+        if validar or orjson is None or not self._proyectable or not all(isinstance(f, dict) for f in filas):
+            return self._adapter.dump_json(self._adapter.validate_python(filas))
+        campos = self._campos
+        return orjson.dumps(
+            [{nombre: fila.get(nombre, defecto) for nombre, defecto in campos} for fila in filas],
+            default=_decimal_texto,
+            option=_OPCIONES,
+        )
+
+    def respuesta(
+        self, filas: Iterable[Mapping[str, Any]], *, headers: Optional[Mapping[str, str]] = None
+    ) -> Response:
+        return Response(content=self.dump(filas), media_type="application/json", headers=headers)
+
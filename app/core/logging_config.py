@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import copy
+import json
+import logging
+import queue
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import IO, Optional
+
+from app.config.settings import get_env
+
+
+# Nivel global: en producción INFO, los logger.debug(...) del request path no formatean nada
+LOG_LEVEL = (get_env("LOG_LEVEL", "INFO") or "INFO").upper()
+# json (una línea por evento, para el agregador de logs) o texto (desarrollo)
+LOG_FORMAT = (get_env("LOG_FORMAT", "json") or "json").lower()
+# Cola acotada entre los hilos que loguean y el hilo que escribe: si se llena el evento se descarta
+LOG_QUEUE_MAX = int(get_env("LOG_QUEUE_MAX", "10000") or 10000)
+
+# Atributos propios de LogRecord: todo lo demás viene de extra={...}
+_ATRIBUTOS_RECORD = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "taskName"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Una línea JSON por evento: ts, nivel, logger, msg, campos de extra={...} y traza."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        datos = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for clave, valor in record.__dict__.items():
+            if clave not in _ATRIBUTOS_RECORD:
+                datos[clave] = valor
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            datos["exc"] = record.exc_text
+        if record.stack_info:
+            datos["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(datos, ensure_ascii=False, default=str)
+
+
+class _ColaNoBloqueante(QueueHandler):
+    """QueueHandler que nunca bloquea al request: con la cola llena descarta y cuenta."""
+
+    def __init__(self, cola: "queue.Queue[logging.LogRecord]") -> None:
+        super().__init__(cola)
+        self.descartados = 0
+        self._traza = logging.Formatter()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolver msg % args aquí (los argumentos pueden mutar después), pero la
+        # serialización a JSON y la escritura quedan en el hilo del listener
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self._traza.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.descartados += 1
+
+
+_handler: Optional[_ColaNoBloqueante] = None
+_listener: Optional[QueueListener] = None
+
+
+def crear_formatter(formato: str = LOG_FORMAT) -> logging.Formatter:
+    if formato == "json":
+        return JsonFormatter()
+    return logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+
+def configurar(nivel: str = LOG_LEVEL, formato: str = LOG_FORMAT, stream: Optional[IO[str]] = None) -> None:
+    """Instala en el logger raíz la cola y arranca el hilo que escribe a stdout. Idempotente."""
+    global _handler, _listener
+    if _listener is not None:
+        return
+    salida = logging.StreamHandler(stream or sys.stdout)
+    salida.setFormatter(crear_formatter(formato))
+    _handler = _ColaNoBloqueante(queue.Queue(maxsize=LOG_QUEUE_MAX))
+    _listener = QueueListener(_handler.queue, salida, respect_handler_level=True)
+    _listener.start()
+    raiz = logging.getLogger()
+    raiz.setLevel(nivel)
+    raiz.addHandler(_handler)
+
+
+def detener() -> None:
+    """Escribe lo que quede en la cola y detiene el hilo (shutdown)."""
+    global _handler, _listener
+    if _listener is None:
+        return
+    logging.getLogger().removeHandler(_handler)
+    _listener.stop()
+    _handler = None
+    _listener = None
+
+
+def estadisticas() -> dict:
+    return {
+        "nivel": logging.getLevelName(logging.getLogger().level),
+        "formato": LOG_FORMAT,
+        "activo": _listener is not None,
+        "descartados": _handler.descartados if _handler is not None else 0,
+        "en_cola": _handler.queue.qsize() if _handler is not None else 0,
+    }
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+
+# Cabecera con el cursor de la siguiente página en listados que responden una lista
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Posición de keyset: (fecha_registro, id_incapacidad)
+Keyset = Tuple[Optional[datetime], int]
+
+
+def encode_cursor(fecha_registro: Optional[datetime], id_incapacidad: int) -> str:
+    """Codifica la última fila entregada como un cursor opaco (base64 url-safe)."""
+    payload = {
+        "f": fecha_registro.isoformat() if fecha_registro is not None else None,
+        "i": int(id_incapacidad),
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Keyset:
+    """Decodifica un cursor de encode_cursor. Lanza ValueError si es inválido."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        fecha = payload.get("f")
+        return (datetime.fromisoformat(fecha) if fecha else None, int(payload["i"]))
+    except Exception:
+        raise ValueError("Cursor de paginación inválido")
+
+
+def cursor_from_row(row: dict) -> str:
+    return encode_cursor(row.get("fecha_registro"), row["id_incapacidad"])
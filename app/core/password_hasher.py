@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional, Tuple
+
+from app.config.settings import get_env
+from app.core.security import hash_password, verify_and_update_password
+
+
+# bcrypt libera el GIL: un hilo por CPU basta para ocuparlas sin tocar el threadpool de FastAPI
+PASSWORD_HASH_WORKERS = int(get_env("PASSWORD_HASH_WORKERS", "") or (os.cpu_count() or 2))
+# Verificaciones que pueden esperar turno; por encima se responde 503 de inmediato
+PASSWORD_HASH_MAX_COLA = int(get_env("PASSWORD_HASH_MAX_COLA", "64") or 64)
+
+
+class HasherSaturado(RuntimeError):
+    """Demasiadas verificaciones/hashes pendientes: el cliente debe reintentar."""
+
+
+class PasswordHasher:
+    """Ejecutor acotado para bcrypt con métricas de cola."""
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_cola: int = PASSWORD_HASH_MAX_COLA) -> None:
+        self.workers = max(1, workers)
+        self.max_cola = max(0, max_cola)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        self._pendientes = 0
+        self._en_curso = 0
+        self._stats = {"completados": 0, "rechazados": 0, "rehash": 0, "max_pendientes": 0,
+                       "espera_total_ms": 0.0, "trabajo_total_ms": 0.0}
+
+    def _enviar(self, fn: Callable, *args) -> Future:
+        with self._lock:
+            if self._pendientes >= self.workers + self.max_cola:
+                self._stats["rechazados"] += 1
+                raise HasherSaturado("Servicio de autenticación ocupado, intente de nuevo")
+            self._pendientes += 1
+            self._stats["max_pendientes"] = max(self._stats["max_pendientes"], self._pendientes)
+        encolado = time.monotonic()
+
+        def tarea():
+            inicio = time.monotonic()
+            with self._lock:
+                self._en_curso += 1
+                self._stats["espera_total_ms"] += (inicio - encolado) * 1000
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self._en_curso -= 1
+                    self._pendientes -= 1
+                    self._stats["completados"] += 1
+                    self._stats["trabajo_total_ms"] += (time.monotonic() - inicio) * 1000
+
+        try:
+            return self._executor.submit(tarea)
+        except RuntimeError:
+            with self._lock:
+                self._pendientes -= 1
+            raise
+
+    def verificar(self, password: str, hashed: str) -> "Future[Tuple[bool, Optional[str]]]":
+        """(válido, nuevo_hash): nuevo_hash viene si el esquema/costo del hash está desactualizado."""
+        return self._enviar(verify_and_update_password, password, hashed)
+
+    def hashear(self, password: str) -> "Future[str]":
+        return self._enviar(hash_password, password)
+
+    async def verificar_async(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        return await asyncio.wrap_future(self.verificar(password, hashed))
+
+    def registrar_rehash(self) -> None:
+        with self._lock:
+            self._stats["rehash"] += 1
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            completados = self._stats["completados"] or 1
+            return {
+                "workers": self.workers,
+                "max_cola": self.max_cola,
+                "pendientes": self._pendientes,
+                "en_cola": self._pendientes - self._en_curso,
+                "en_curso": self._en_curso,
+                "completados": self._stats["completados"],
+                "rechazados": self._stats["rechazados"],
+                "rehash": self._stats["rehash"],
+                "max_pendientes": self._stats["max_pendientes"],
+                "espera_promedio_ms": round(self._stats["espera_total_ms"] / completados, 2),
+                "trabajo_promedio_ms": round(self._stats["trabajo_total_ms"] / completados, 2),
+            }
+
+    def cerrar(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_hasher: Optional[PasswordHasher] = None
+_lock = threading.Lock()
+
+
+def get_hasher() -> PasswordHasher:
+    global _hasher
+    if _hasher is None:
+        with _lock:
+            if _hasher is None:
+                _hasher = PasswordHasher()
+    return _hasher
+
+
+def estadisticas() -> dict:
+    return get_hasher().estadisticas()
+
+
+def reset() -> None:
+    global _hasher
+    with _lock:
+        hasher, _hasher = _hasher, None
+    if hasher is not None:
+        hasher.cerrar()
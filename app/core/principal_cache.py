@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.config.settings import get_env
+from app.core.cache import TTLCache
+from app.models.version_principal import VersionPrincipal
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+# Vida corta: es el máximo que un cambio hecho fuera de UsuarioRepository tarda en verse
+AUTH_CACHE_TTL_SECONDS = float(get_env("AUTH_CACHE_TTL_SECONDS", "60") or 60)
+AUTH_CACHE_MAX = int(get_env("AUTH_CACHE_MAX", "10000") or 10000)
+# Cada cuánto un nodo consulta version_principal (cambios hechos en otros nodos)
+AUTH_CACHE_VERSION_SECONDS = float(get_env("AUTH_CACHE_VERSION_SECONDS", "5") or 5)
+
+logger = logging.getLogger(__name__)
+
+_VERSION_ID = 1
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Lo que las dependencias de auth necesitan del usuario autenticado."""
+    id_usuario: int
+    rol_id: Optional[int]
+    estado: bool
+
+
+_cache = TTLCache(maxsize=AUTH_CACHE_MAX, ttl=AUTH_CACHE_TTL_SECONDS)
+_lock = threading.Lock()
+_version: Optional[int] = None
+_revisado = 0.0
+_stats = {"aciertos": 0, "fallos": 0, "invalidaciones": 0}
+
+
+def _consulta_version():
+    return select(VersionPrincipal.version).where(VersionPrincipal.id == _VERSION_ID)
+
+
+def _toca_revisar() -> bool:
+    global _revisado
+    ahora = time.monotonic()
+    if ahora - _revisado < AUTH_CACHE_VERSION_SECONDS:
+        return False
+    with _lock:
+        if ahora - _revisado < AUTH_CACHE_VERSION_SECONDS:
+            return False
+        _revisado = ahora
+    return True
+
+
+def _aplicar_version(version: Optional[int], exc: Optional[Exception] = None) -> None:
+    global _version
+    if exc is not None:
+        # Sin sello no hay forma de saber si la caché sigue vigente
+        logger.warning("No fue posible leer version_principal: %s", exc)
+        _cache.clear()
+        return
+    with _lock:
+        if _version is not None and version != _version:
+            _cache.clear()
+        _version = version
+
+
+def _revisar_version(db: Session) -> None:
+    """Vacía la caché si otro nodo incrementó el sello (a lo sumo una consulta cada AUTH_CACHE_VERSION_SECONDS)."""
+    if not _toca_revisar():
+        return
+    try:
+        version = db.scalar(_consulta_version()) or 0
+    except Exception as exc:  # noqa: BLE001
+        _aplicar_version(None, exc)
+        return
+    _aplicar_version(version)
+
+
+async def _revisar_version_async(db: "AsyncSession") -> None:
+    if not _toca_revisar():
+        return
+    try:
+        version = (await db.scalar(_consulta_version())) or 0
+    except Exception as exc:  # noqa: BLE001
+        _aplicar_version(None, exc)
+        return
+    _aplicar_version(version)
+
+
+def _contar(principal: Optional[Principal]) -> Optional[Principal]:
+    with _lock:
+        _stats["aciertos" if principal is not None else "fallos"] += 1
+    return principal
+
+
+def get(id_usuario: int, db: Session) -> Optional[Principal]:
+    _revisar_version(db)
+    return _contar(_cache.get(id_usuario))
+
+
+async def get_async(id_usuario: int, db: "AsyncSession") -> Optional[Principal]:
+    await _revisar_version_async(db)
+    return _contar(_cache.get(id_usuario))
+
+
+def guardar(usuario) -> Principal:
+    principal = Principal(id_usuario=usuario.id_usuario, rol_id=usuario.rol_id, estado=bool(usuario.estado))
+    _cache.set(principal.id_usuario, principal)
+    return principal
+
+
+def invalidar(id_usuario: int, db: Session) -> None:
+    """Quita al usuario de la caché local e incrementa el sello para los demás nodos.
+
+    El incremento queda en la transacción de `db`: llamar antes del commit del cambio.
+    """
+    _cache.pop(id_usuario)
+    with _lock:
+        _stats["invalidaciones"] += 1
+    try:
+        actualizado = db.execute(
+            update(VersionPrincipal)
+            .where(VersionPrincipal.id == _VERSION_ID)
+            .values(version=VersionPrincipal.version + 1)
+        ).rowcount
+        if not actualizado:
+            db.add(VersionPrincipal(id=_VERSION_ID, version=1))
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("No fue posible incrementar version_principal: %s", exc)
+
+
+def descartar(id_usuario: int) -> None:
+    """Quita al usuario de la caché local (tras el commit, por si otro request lo recargó antes)."""
+    _cache.pop(id_usuario)
+
+
+def estadisticas() -> dict:
+    with _lock:
+        return {**_stats, "entradas": len(_cache), "version": _version}
+
+
+def reset() -> None:
+    global _version, _revisado
+    _cache.clear()
+    with _lock:
+        _version, _revisado = None, 0.0
+        for clave in _stats:
+            _stats[clave] = 0
@@ -32,6 +32,14 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         return False
 
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    """Verifica y, si el hash usa un esquema/costo desactualizado, retorna el nuevo hash (un solo bcrypt)."""
+    try:
+        return password_context.verify_and_update(plain_password, hashed_password)
+    except Exception:
+        return False, None
+
+
 def create_access_token(*, subject: str, claims: dict[str, Any] | None = None, expires_delta: Optional[timedelta] = None) -> str:
     to_encode: dict[str, Any] = {"sub": subject, "type": "access"}
     if claims:
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import threading
+from typing import Any, AsyncIterator, Optional
+
+from fastapi import Depends, HTTPException
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.config.settings import DATABASE_URL, get_env
+from app.db.pool_metrics import MetricasPool
+from app.db.session import DATABASE_REPLICA_URL, contar_ruteo, pool_kwargs, registrar_metricas
+
+try:  # Requiere greenlet (sqlalchemy[asyncio]) y un driver asíncrono: aiomysql o aiosqlite
+    from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+    from sqlalchemy.pool import AsyncAdaptedQueuePool
+except ImportError:  # pragma: no cover - depende del entorno
+    create_async_engine = None  # type: ignore
+    # Solo para las anotaciones de las dependencias (get_async_db responde 503)
+    AsyncSession = Any  # type: ignore
+
+
+# Driver síncrono -> equivalente asíncrono (misma BD que app/db/session.py)
+_DRIVERS_ASYNC = (
+    ("mysql+pymysql://", "mysql+aiomysql://"),
+    ("mysql+mysqldb://", "mysql+aiomysql://"),
+    ("mysql://", "mysql+aiomysql://"),
+    ("sqlite:///", "sqlite+aiosqlite:///"),
+)
+
+
+def _url_asincrona(url: str, variable: str) -> Optional[str]:
+    explicita = get_env(variable, "")
+    if explicita:
+        return explicita
+    for prefijo, reemplazo in _DRIVERS_ASYNC:
+        if url.startswith(prefijo):
+            return reemplazo + url[len(prefijo):]
+    return None
+
+
+def async_database_url(url: str = DATABASE_URL) -> Optional[str]:
+    """ASYNC_DATABASE_URL o la DATABASE_URL con el driver asíncrono equivalente."""
+    return _url_asincrona(url, "ASYNC_DATABASE_URL")
+
+
+def async_replica_url() -> Optional[str]:
+    """ASYNC_DATABASE_REPLICA_URL o la DATABASE_REPLICA_URL con el driver asíncrono; None sin réplica."""
+    return _url_asincrona(DATABASE_REPLICA_URL, "ASYNC_DATABASE_REPLICA_URL")
+
+
+class SesionLecturaReplica(Session):
+    """Session de las AsyncSession de get_async_lectura_db, ligada a la réplica.
+
+    Si una sentencia falla en la réplica (OperationalError), se repite en el primario y el
+    resto de la sesión sigue allí, como la sesión síncrona con @lectura.
+    """
+
+
+def _ejecutar_en_replica(orm_execute_state):
+    session = orm_execute_state.session
+    if session.info.get("sin_replica"):
+        return None
+    try:
+        result = orm_execute_state.invoke_statement()
+    except OperationalError:
+        contar_ruteo("fallback_primario")
+        session.info["sin_replica"] = True
+        session.bind = _engine.sync_engine
+        return orm_execute_state.invoke_statement()
+    contar_ruteo("replica")
+    return result
+
+
+event.listen(SesionLecturaReplica, "do_orm_execute", _ejecutar_en_replica)
+
+
+_lock = threading.Lock()
+_engine: Optional["AsyncEngine"] = None
+_sessionmaker = None
+_error: Optional[str] = None
+_replica_engine: Optional["AsyncEngine"] = None
+_replica_sessionmaker = None
+_replica_error: Optional[str] = None
+
+
+def _crear_engine(url: str, nombre: str) -> "AsyncEngine":
+    metricas = MetricasPool(nombre)
+    nuevo = create_async_engine(url, **pool_kwargs(url, metricas, base=AsyncAdaptedQueuePool))
+    metricas.instalar(nuevo.sync_engine)
+    registrar_metricas(metricas)
+    return nuevo
+
+
+def get_async_engine() -> Optional["AsyncEngine"]:
+    """Engine asíncrono (se crea en el primer uso). None si no hay driver disponible."""
+    global _engine, _sessionmaker, _error
+    if _engine is not None or _error is not None:
+        return _engine
+    with _lock:
+        if _engine is None and _error is None:
+            url = async_database_url()
+            if create_async_engine is None or url is None:
+                _error = "sqlalchemy.ext.asyncio no disponible" if url else f"sin driver asíncrono para {DATABASE_URL.split(':', 1)[0]}"
+                return None
+            try:
+                _engine = _crear_engine(url, "async")
+            except Exception as exc:  # noqa: BLE001  (driver no instalado)
+                _error = str(exc)
+                return None
+            _sessionmaker = async_sessionmaker(bind=_engine, autoflush=False, expire_on_commit=False)
+    return _engine
+
+
+def get_async_replica_engine() -> Optional["AsyncEngine"]:
+    """Engine asíncrono de la réplica de lectura. None sin réplica configurada o sin driver."""
+    global _replica_engine, _replica_sessionmaker, _replica_error
+    if _replica_engine is not None or _replica_error is not None:
+        return _replica_engine
+    # El fallback al primario necesita el engine asíncrono principal
+    if get_async_engine() is None:
+        return None
+    with _lock:
+        if _replica_engine is None and _replica_error is None:
+            url = async_replica_url()
+            if url is None:
+                _replica_error = "sin réplica configurada" if not DATABASE_REPLICA_URL else (
+                    f"sin driver asíncrono para {DATABASE_REPLICA_URL.split(':', 1)[0]}"
+                )
+                return None
+            try:
+                _replica_engine = _crear_engine(url, "async_replica")
+            except Exception as exc:  # noqa: BLE001  (driver no instalado)
+                _replica_error = str(exc)
+                return None
+            _replica_sessionmaker = async_sessionmaker(
+                bind=_replica_engine,
+                sync_session_class=SesionLecturaReplica,
+                autoflush=False,
+                expire_on_commit=False,
+            )
+    return _replica_engine
+
+
+def _sin_password(url: Optional[str]) -> Optional[str]:
+    return make_url(url).render_as_string(hide_password=True) if url else None
+
+
+def estado() -> dict:
+    get_async_engine()
+    get_async_replica_engine()
+    return {
+        "disponible": _engine is not None,
+        "url": _sin_password(async_database_url()),
+        "error": _error,
+        "replica": _replica_engine is not None,
+        "replica_error": _replica_error if DATABASE_REPLICA_URL else None,
+    }
+
+
+async def get_async_db() -> AsyncIterator["AsyncSession"]:
+    if get_async_engine() is None:
+        raise HTTPException(status_code=503, detail=f"Base de datos asíncrona no disponible: {_error}")
+    async with _sessionmaker() as db:
+        yield db
+
+
+async def get_async_lectura_db(db: "AsyncSession" = Depends(get_async_db)) -> AsyncIterator["AsyncSession"]:
+    """Como get_async_db, en la réplica si hay una configurada: solo para endpoints de lectura.
+
+    Sin réplica entrega la misma sesión de get_async_db (FastAPI la reutiliza en el request):
+    dos sesiones del mismo pool por request lo agotarían con la mitad de clientes.
+    Igual que @lectura, no usar donde se lee para luego escribir (la réplica puede ir atrasada).
+    """
+    if get_async_replica_engine() is None:
+        yield db
+        return
+    async with _replica_sessionmaker() as lectura:
+        yield lectura
+
+
+async def dispose() -> None:
+    global _engine, _sessionmaker, _error, _replica_engine, _replica_sessionmaker, _replica_error
+    with _lock:
+        engines = (_engine, _replica_engine)
+        _engine, _sessionmaker, _error = None, None, None
+        _replica_engine, _replica_sessionmaker, _replica_error = None, None, None
+    for engine in engines:
+        if engine is not None:
+            await engine.dispose()
@@ -1,4 +1,4 @@
-from sqlalchemy import text
+from sqlalchemy import bindparam, text
 from sqlalchemy.engine import Engine
 
 
@@ -134,3 +134,127 @@ def align_incapacidad_table(engine: Engine) -> None:
                 )
             )
 
+
+def align_carga_documento_table(engine: Engine) -> None:
+    """Agrega carga_documento.sesion_drive (URI de subida reanudable) si la tabla ya existía sin ella."""
+    if not _is_mysql(engine):
+        return
+    table = "carga_documento"
+    if not column_exists(engine, table, "id_carga") or column_exists(engine, table, "sesion_drive"):
+        return
+    with engine.begin() as conn:
+        conn.execute(text(f"ALTER TABLE `{table}` ADD COLUMN `sesion_drive` VARCHAR(1000) NULL AFTER `error`"))
+
+
+# Índices compuestos por tabla para los caminos de acceso más usados:
+# - listados paginados por cursor (fecha_registro DESC, id_incapacidad DESC) con filtros
+#   por estado, tipo y usuario (list_all_with_details / list_by_user)
+# - filtros por rango de fechas (fecha_inicio / fecha_final)
+# - búsqueda de documentos por (incapacidad_id, archivo_id) en cada subida
+INDEX_SPECS: dict[str, dict[str, tuple[str, ...]]] = {
+    "incapacidad": {
+        "ix_incapacidad_fecha_registro_id": ("fecha_registro", "id_incapacidad"),
+        "ix_incapacidad_usuario_fecha_registro_id": ("usuario_id", "fecha_registro", "id_incapacidad"),
+        "ix_incapacidad_estado_fecha_registro_id": ("estado", "fecha_registro", "id_incapacidad"),
+        "ix_incapacidad_tipo_fecha_registro_id": ("tipo_incapacidad_id", "fecha_registro", "id_incapacidad"),
+        "ix_incapacidad_estado_fechas": ("estado", "fecha_inicio", "fecha_final"),
+    },
+    "incapacidad_archivo": {
+        "ix_incapacidad_archivo_incapacidad_archivo": ("incapacidad_id", "archivo_id"),
+    },
+}
+
+
+def table_indexes(engine: Engine, table_name: str) -> dict[str, tuple[str, ...]]:
+    """Índices existentes de la tabla: nombre -> columnas en orden (SEQ_IN_INDEX)."""
+    sql = text(
+        """
+        SELECT INDEX_NAME, COLUMN_NAME
+        FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE()
+          AND TABLE_NAME = :table
+        ORDER BY INDEX_NAME, SEQ_IN_INDEX
+        """
+    )
+    result: dict[str, list[str]] = {}
+    with engine.connect() as conn:
+        for iname, col in conn.execute(sql, {"table": table_name}):
+            result.setdefault(iname, []).append(col)
+    return {k: tuple(v) for k, v in result.items()}
+
+
+def _covered_by(cols: tuple[str, ...], existing: dict[str, tuple[str, ...]]) -> str | None:
+    # Un índice existente cubre el acceso si sus primeras columnas coinciden en orden
+    for iname, icols in existing.items():
+        if tuple(c.lower() for c in icols[:len(cols)]) == tuple(c.lower() for c in cols):
+            return iname
+    return None
+
+
+def unused_indexes(engine: Engine, table_names) -> list[dict]:
+    """
+    Índices sin lecturas desde el arranque del servidor según performance_schema.
+    Devuelve lista vacía si performance_schema no está disponible o no hay permisos.
+    """
+    sql = text(
+        """
+        SELECT OBJECT_NAME, INDEX_NAME
+        FROM performance_schema.table_io_waits_summary_by_index_usage
+        WHERE OBJECT_SCHEMA = DATABASE()
+          AND OBJECT_NAME IN :tables
+          AND INDEX_NAME IS NOT NULL
+          AND INDEX_NAME <> 'PRIMARY'
+          AND COUNT_STAR = 0
+        ORDER BY OBJECT_NAME, INDEX_NAME
+        """
+    ).bindparams(bindparam("tables", expanding=True))
+    try:
+        with engine.connect() as conn:
+            rows = conn.execute(sql, {"tables": list(table_names)}).all()
+    except Exception:
+        return []
+    return [{"table": r[0], "index": r[1]} for r in rows]
+
+
+def align_indexes(engine: Engine, *, create: bool = True) -> dict:
+    """
+    Crea (si faltan) y verifica los índices de INDEX_SPECS.
+    - Aplica solo en MySQL/MariaDB
+    - Idempotente: consulta information_schema.STATISTICS antes de crear; un índice con
+      otro nombre pero las mismas columnas iniciales se considera equivalente
+    - Con create=False solo reporta
+
+    Retorna un reporte con índices creados, presentes, faltantes, con nombre reservado
+    pero columnas distintas ("mismatched") y no usados según performance_schema.
+    """
+    report: dict = {"created": [], "present": [], "missing": [], "mismatched": [], "unused": []}
+    if not _is_mysql(engine):
+        return report
+
+    for table, specs in INDEX_SPECS.items():
+        existing = table_indexes(engine, table)
+        if not existing:
+            # Tabla inexistente (o sin índices visibles): nada que alinear
+            continue
+        for iname, cols in specs.items():
+            entry = {"table": table, "index": iname, "columns": list(cols)}
+            if iname in existing and existing[iname] != cols:
+                entry["actual_columns"] = list(existing[iname])
+                report["mismatched"].append(entry)
+                continue
+            covering = _covered_by(cols, existing)
+            if covering:
+                entry["covered_by"] = covering
+                report["present"].append(entry)
+                continue
+            if not create or not all(column_exists(engine, table, c) for c in cols):
+                report["missing"].append(entry)
+                continue
+            col_list = ", ".join(f"`{c}`" for c in cols)
+            with engine.begin() as conn:
+                conn.execute(text(f"CREATE INDEX `{iname}` ON `{table}` ({col_list})"))
+            existing[iname] = cols
+            report["created"].append(entry)
+
+    report["unused"] = unused_indexes(engine, INDEX_SPECS.keys())
+    return report
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Dict, Optional, Type
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import Pool, QueuePool
+
+
+class MetricasPool:
+    """Contadores de un pool: checkouts, espera por conexión, overflow e invalidaciones."""
+
+    def __init__(self, nombre: str) -> None:
+        self.nombre = nombre
+        self.pool: Optional[Pool] = None
+        self._lock = threading.Lock()
+        self._stats = {
+            "checkouts": 0,
+            "checkins": 0,
+            "conexiones_nuevas": 0,
+            "invalidaciones": 0,
+            "invalidaciones_suaves": 0,
+            "timeouts": 0,
+            "esperas_lentas": 0,
+            "espera_total_ms": 0.0,
+            "espera_max_ms": 0.0,
+            "overflow_max": 0,
+        }
+
+    def instalar(self, engine) -> None:
+        """Conecta los eventos del pool del engine (sync o `AsyncEngine.sync_engine`)."""
+        event.listen(engine, "checkout", self._checkout)
+        event.listen(engine, "checkin", self._checkin)
+        event.listen(engine, "connect", self._connect)
+        event.listen(engine, "invalidate", self._invalidate)
+        event.listen(engine, "soft_invalidate", self._soft_invalidate)
+        self.pool = engine.pool
+
+    def _sumar(self, clave: str, n: int = 1) -> None:
+        with self._lock:
+            self._stats[clave] += n
+
+    def _checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        self._sumar("checkouts")
+
+    def _checkin(self, dbapi_connection, connection_record) -> None:
+        self._sumar("checkins")
+
+    def _connect(self, dbapi_connection, connection_record) -> None:
+        self._sumar("conexiones_nuevas")
+
+    def _invalidate(self, dbapi_connection, connection_record, exception) -> None:
+        self._sumar("invalidaciones")
+
+    def _soft_invalidate(self, dbapi_connection, connection_record, exception) -> None:
+        self._sumar("invalidaciones_suaves")
+
+    def registrar_espera(self, segundos: float, overflow: int, *, timeout: bool = False) -> None:
+        ms = segundos * 1000.0
+        with self._lock:
+            self._stats["espera_total_ms"] += ms
+            self._stats["espera_max_ms"] = max(self._stats["espera_max_ms"], ms)
+            # Más de 10 ms esperando conexión = el pool se quedó corto
+            if ms > 10:
+                self._stats["esperas_lentas"] += 1
+            if timeout:
+                self._stats["timeouts"] += 1
+            self._stats["overflow_max"] = max(self._stats["overflow_max"], overflow)
+
+    def estadisticas(self) -> Dict[str, object]:
+        with self._lock:
+            datos = dict(self._stats)
+        pedidos = datos["checkouts"] + datos["timeouts"]
+        datos["espera_promedio_ms"] = round(datos["espera_total_ms"] / pedidos, 3) if pedidos else 0.0
+        datos["espera_total_ms"] = round(datos["espera_total_ms"], 3)
+        datos["espera_max_ms"] = round(datos["espera_max_ms"], 3)
+        pool = self.pool
+        if isinstance(pool, QueuePool):
+            datos.update(
+                tamano=pool.size(),
+                en_uso=pool.checkedout(),
+                libres=pool.checkedin(),
+                overflow=max(0, pool.overflow()),
+                timeout_s=pool.timeout(),
+            )
+        return datos
+
+
+def pool_medido(base: Type[QueuePool], metricas: MetricasPool) -> Type[QueuePool]:
+    """Subclase de `base` que mide cuánto espera cada checkout por una conexión libre.
+
+    Las métricas van como atributo de clase: `Pool.recreate()` (dispose, invalidación
+    masiva) crea la instancia nueva con la misma clase y sigue sumando en ellas.
+    """
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            conexion = base._do_get(self)
+        except PoolTimeoutError:
+            metricas.registrar_espera(time.perf_counter() - inicio, max(0, self.overflow()), timeout=True)
+            raise
+        metricas.registrar_espera(time.perf_counter() - inicio, max(0, self.overflow()))
+        return conexion
+
+    return type(f"{base.__name__}Medido", (base,), {"_do_get": _do_get, "metricas": metricas})
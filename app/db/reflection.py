@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import threading
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import MetaData, Table
+from sqlalchemy.engine import Engine
+
+
+# Tablas que se reflejan al arrancar; el resto se refleja bajo demanda
+DEFAULT_TABLES = (
+    "incapacidad",
+    "incapacidad_archivo",
+    "usuario",
+    "tipo_incapacidad",
+)
+
+_lock = threading.RLock()
+_registry: Dict[Engine, MetaData] = {}
+
+
+def _metadata_for(engine: Engine) -> MetaData:
+    metadata = _registry.get(engine)
+    if metadata is None:
+        with _lock:
+            metadata = _registry.get(engine)
+            if metadata is None:
+                metadata = MetaData()
+                _registry[engine] = metadata
+    return metadata
+
+
+def get_tables(engine: Engine, names: Iterable[str]) -> Dict[str, Table]:
+    """Devuelve las tablas reflejadas para el engine, reflejando solo las que falten.
+
+    El registro es compartido por todo el proceso: la primera llamada consulta el
+    esquema y las siguientes devuelven los mismos objetos Table sin ir a la BD.
+    """
+    names = list(names)
+    metadata = _metadata_for(engine)
+    missing = [n for n in names if n not in metadata.tables]
+    if missing:
+        with _lock:
+            missing = [n for n in names if n not in metadata.tables]
+            if missing:
+                metadata.reflect(bind=engine, only=missing)
+    return {n: metadata.tables[n] for n in names}
+
+
+def get_table(engine: Engine, name: str) -> Table:
+    return get_tables(engine, [name])[name]
+
+
+def warm_up(engine: Engine, names: Iterable[str] = DEFAULT_TABLES) -> None:
+    """Refleja de una vez las tablas más usadas (se invoca en el arranque)."""
+    get_tables(engine, names)
+
+
+def invalidate(engine: Optional[Engine] = None) -> None:
+    """Descarta el esquema reflejado; obligatorio tras alterar tablas (migraciones).
+
+    Sin engine se limpia el registro completo.
+    """
+    with _lock:
+        if engine is None:
+            _registry.clear()
+        else:
+            _registry.pop(engine, None)
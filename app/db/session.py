@@ -1,16 +1,177 @@
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
+import functools
+import threading
+from collections.abc import Iterator
+from typing import Dict, Optional
 
-from app.config.settings import DATABASE_URL
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.sql.dml import UpdateBase
 
+from app.config.settings import DATABASE_URL, get_env
+from app.db.pool_metrics import MetricasPool, pool_medido
 
-# Timeout corto para evitar bloqueos en arranque si la BD no responde
-engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,
-    connect_args={"connect_timeout": 5} if DATABASE_URL.startswith("mysql+") else {},
-)
-SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+# Pool de conexiones (por proceso: con N workers de uvicorn se abren hasta N * (size + overflow))
+DB_POOL_SIZE = int(get_env("DB_POOL_SIZE", "5") or 5)
+DB_MAX_OVERFLOW = int(get_env("DB_MAX_OVERFLOW", "10") or 10)
+# Segundos que un request espera una conexión libre antes de fallar
+DB_POOL_TIMEOUT = float(get_env("DB_POOL_TIMEOUT", "30") or 30)
+# Reciclar antes del wait_timeout de MySQL / proxies que cortan conexiones inactivas (-1 = nunca)
+DB_POOL_RECYCLE = int(get_env("DB_POOL_RECYCLE", "1800") or 1800)
+DB_POOL_PRE_PING = (get_env("DB_POOL_PRE_PING", "true") or "true").lower() in ("1", "true", "yes")
+# Réplica de lectura opcional (mismo esquema): recibe los métodos marcados con @lectura
+DATABASE_REPLICA_URL = get_env("DATABASE_REPLICA_URL", "")
+
+
+def _memoria(url: str) -> bool:
+    # SQLite en memoria usa SingletonThreadPool: no acepta tamaño/overflow/timeout
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:")
+
+
+def pool_kwargs(url: str, metricas: Optional[MetricasPool] = None, base=QueuePool) -> dict:
+    """Argumentos de pool para create_engine/create_async_engine según la configuración."""
+    kwargs = {
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        # Timeout corto para evitar bloqueos en arranque si la BD no responde
+        "connect_args": {"connect_timeout": 5} if url.startswith("mysql+") else {},
+    }
+    if _memoria(url):
+        return kwargs
+    kwargs.update(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+    if metricas is not None:
+        kwargs["poolclass"] = pool_medido(base, metricas)
+    return kwargs
+
+
+_metricas: Dict[str, MetricasPool] = {}
+
+
+def registrar_metricas(metricas: MetricasPool) -> None:
+    """Incluye un pool en estadisticas() (p. ej. el del engine asíncrono)."""
+    _metricas[metricas.nombre] = metricas
+
+
+def _crear_engine(url: str, nombre: str):
+    metricas = MetricasPool(nombre)
+    nuevo = create_engine(url, **pool_kwargs(url, metricas))
+    metricas.instalar(nuevo)
+    registrar_metricas(metricas)
+    return nuevo
+
+
+engine = _crear_engine(DATABASE_URL, "primario")
+replica_engine = _crear_engine(DATABASE_REPLICA_URL, "replica") if DATABASE_REPLICA_URL else None
+
+_ruteo_lock = threading.Lock()
+_ruteo = {"replica": 0, "primario_tras_escritura": 0, "fallback_primario": 0}
+
+
+def contar_ruteo(clave: str) -> None:
+    with _ruteo_lock:
+        _ruteo[clave] += 1
+
+
+def _es_escritura(clause) -> bool:
+    if isinstance(clause, UpdateBase):
+        return True
+    # SELECT ... FOR UPDATE bloquea filas: solo tiene sentido en el primario
+    return getattr(clause, "_for_update_arg", None) is not None
+
+
+class RoutingSession(Session):
+    """Session que envía a la réplica las consultas hechas dentro de métodos @lectura.
+
+    Lectura de lo propio: en cuanto la sesión escribe (flush o DML), todo lo que
+    sigue en ella va al primario para no leer de una réplica atrasada.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if (
+            replica_engine is not None
+            and self.info.get("lecturas")
+            and not self.info.get("sin_replica")
+            and not self._flushing
+            and not _es_escritura(clause)
+        ):
+            if self.info.get("escribio"):
+                contar_ruteo("primario_tras_escritura")
+            else:
+                contar_ruteo("replica")
+                self.info["uso_replica"] = True
+                return replica_engine
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+
+SessionLocal = sessionmaker(bind=engine, class_=RoutingSession, autocommit=False, autoflush=False)
+
+
+def _marcar_escritura(session, *args) -> None:
+    session.info["escribio"] = True
+
+
+def _marcar_dml(orm_execute_state) -> None:
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["escribio"] = True
+
+
+event.listen(RoutingSession, "after_flush", _marcar_escritura)
+event.listen(RoutingSession, "do_orm_execute", _marcar_dml)
+
+
+def lectura(metodo):
+    """Marca un método de repositorio de solo lectura: sin réplica configurada no cambia nada.
+
+    No usar en lecturas que preceden a una escritura (validar y luego actualizar):
+    la réplica puede ir atrasada respecto del primario. Si la réplica no responde,
+    la sesión repite la lectura en el primario y no vuelve a usarla.
+    """
+
+    @functools.wraps(metodo)
+    def envoltura(self, *args, **kwargs):
+        # Los generadores se consumen en el primer intento: materializarlos para poder repetir
+        args = tuple(list(a) if isinstance(a, Iterator) else a for a in args)
+        info = self.db.info
+        info["lecturas"] = info.get("lecturas", 0) + 1
+        try:
+            return metodo(self, *args, **kwargs)
+        except OperationalError:
+            if not info.pop("uso_replica", False) or info.get("escribio"):
+                raise
+            # Sesión sin escrituras: descartar la transacción de la réplica y reintentar
+            contar_ruteo("fallback_primario")
+            info["sin_replica"] = True
+            self.db.rollback()
+            return metodo(self, *args, **kwargs)
+        finally:
+            info["lecturas"] -= 1
+
+    return envoltura
+
+
+def estadisticas() -> dict:
+    with _ruteo_lock:
+        ruteo = dict(_ruteo)
+    return {
+        "config": {
+            "pool_size": DB_POOL_SIZE,
+            "max_overflow": DB_MAX_OVERFLOW,
+            "pool_timeout": DB_POOL_TIMEOUT,
+            "pool_recycle": DB_POOL_RECYCLE,
+            "pre_ping": DB_POOL_PRE_PING,
+            "replica": replica_engine is not None,
+        },
+        "pools": {nombre: m.estadisticas() for nombre, m in _metricas.items()},
+        "ruteo": ruteo,
+    }
 
 
 def test_connection() -> None:
@@ -19,11 +180,18 @@ def test_connection() -> None:
         connection.execute(text("SELECT 1"))
 
 
+def test_replica_connection() -> bool:
+    """Ping a la réplica; False si no hay réplica configurada."""
+    if replica_engine is None:
+        return False
+    with replica_engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+    return True
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
-
-
@@ -0,0 +1,27 @@
+from sqlalchemy import DateTime, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+
+from app.models.base import Base
+
+
+class ArchivoUrl(Base):
+    """URL pública y metadatos de un archivo subido (antes uploads/urls/{archivo_id}.json)."""
+    __tablename__ = "archivo_url"
+
+    archivo_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    file_path: Mapped[str] = mapped_column(String(500), nullable=False)
+    file_size: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    url: Mapped[str] = mapped_column(String(500), nullable=False)
+    fecha_subida: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=func.now())
+
+    def to_dict(self) -> dict:
+        return {
+            "archivo_id": self.archivo_id,
+            "user_id": self.user_id,
+            "file_path": self.file_path,
+            "file_size": self.file_size,
+            "url": self.url,
+            "fecha_subida": self.fecha_subida.isoformat() if self.fecha_subida else None,
+        }
@@ -0,0 +1,26 @@
+from sqlalchemy import JSON, BigInteger, DateTime, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+
+from app.models.base import Base
+
+
+class AuditLog(Base):
+    """Evento de auditoría (escrito por lotes en segundo plano por audit_writer)."""
+    __tablename__ = "audit_log"
+    __table_args__ = (
+        # Consultas por entidad, por usuario y por rango de fechas (más recientes primero)
+        Index("ix_audit_entidad_fecha", "entidad", "entidad_id", "fecha"),
+        Index("ix_audit_usuario_fecha", "usuario_id", "fecha"),
+        Index("ix_audit_fecha", "fecha"),
+    )
+
+    id_audit: Mapped[int] = mapped_column(
+        BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True
+    )
+    fecha: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    accion: Mapped[str] = mapped_column(String(50), nullable=False)
+    entidad: Mapped[str] = mapped_column(String(50), nullable=False)
+    entidad_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    usuario_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    detalles: Mapped[dict | None] = mapped_column(JSON, nullable=True)
@@ -0,0 +1,34 @@
+from sqlalchemy import DateTime, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+
+from app.models.base import Base
+
+
+# Estados de una carga a Google Drive
+CARGA_PENDIENTE = "pendiente"
+CARGA_SUBIENDO = "subiendo"
+CARGA_COMPLETADA = "completada"
+CARGA_ERROR = "error"
+
+
+class CargaDocumento(Base):
+    """Documento recibido y guardado en disco, pendiente de subir a Google Drive."""
+    __tablename__ = "carga_documento"
+
+    id_carga: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    incapacidad_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    archivo_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    usuario_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    ruta_local: Mapped[str] = mapped_column(String(500), nullable=False)
+    nombre: Mapped[str] = mapped_column(String(255), nullable=False)
+    mime_type: Mapped[str] = mapped_column(String(100), nullable=False)
+    tamano: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    estado: Mapped[str] = mapped_column(String(20), nullable=False, default=CARGA_PENDIENTE, index=True)
+    intentos: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # URI de la subida reanudable en curso (para retomarla tras un fallo o reinicio)
+    sesion_drive: Mapped[str | None] = mapped_column(String(1000), nullable=True)
+    url_documento: Mapped[str | None] = mapped_column(String(500), nullable=True)
+    error: Mapped[str | None] = mapped_column(String(500), nullable=True)
+    fecha_creacion: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=func.now())
+    fecha_actualizacion: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=func.now(), onupdate=func.now())
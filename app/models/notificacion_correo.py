@@ -0,0 +1,38 @@
+from sqlalchemy import DateTime, Index, Integer, String, Text, UniqueConstraint, func
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+
+from app.models.base import Base
+
+
+# Estados de un correo en la bandeja de salida
+CORREO_PENDIENTE = "pendiente"
+CORREO_ENVIANDO = "enviando"
+CORREO_ENVIADO = "enviado"
+CORREO_ERROR = "error"
+
+
+class NotificacionCorreo(Base):
+    """Correo pendiente de envío (bandeja de salida procesada por email_worker)."""
+    __tablename__ = "notificacion_correo"
+    __table_args__ = (
+        # Un mismo evento de una incapacidad se envía una sola vez a cada destinatario. El evento
+        # nombra la transición (p.ej. incapacidad_rechazada#2 para el segundo rechazo), así solo
+        # se descartan los reintentos de esa misma transición
+        UniqueConstraint("incapacidad_id", "evento", "destinatario", name="uq_notificacion_evento_destinatario"),
+        Index("ix_notificacion_estado_proximo", "estado", "proximo_intento"),
+    )
+
+    id_notificacion: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    incapacidad_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    evento: Mapped[str] = mapped_column(String(50), nullable=False)
+    destinatario: Mapped[str] = mapped_column(String(150), nullable=False)
+    asunto: Mapped[str] = mapped_column(String(255), nullable=False)
+    html: Mapped[str] = mapped_column(Text, nullable=False)
+    texto: Mapped[str | None] = mapped_column(Text, nullable=True)
+    estado: Mapped[str] = mapped_column(String(20), nullable=False, default=CORREO_PENDIENTE)
+    intentos: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    proximo_intento: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=func.now())
+    error: Mapped[str | None] = mapped_column(String(500), nullable=True)
+    fecha_creacion: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=func.now())
+    fecha_envio: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
@@ -0,0 +1,16 @@
+from sqlalchemy import Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class VersionPrincipal(Base):
+    """Sello global de versión de usuarios (fila única id=1).
+
+    Se incrementa al cambiar estado/datos de un usuario; cada nodo lo compara
+    periódicamente para vaciar su caché de principales (app/core/principal_cache.py).
+    """
+    __tablename__ = "version_principal"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
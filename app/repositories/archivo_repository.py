@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 
 from app.models.archivo import Archivo
 from app.models.relacion import Relacion
+from app.db.session import lectura
 
 
 class ArchivoRepository:
@@ -28,6 +29,7 @@ class ArchivoRepository:
     def obtener_id(self, id_archivo: int) -> Archivo | None:
         return self.get(id_archivo)
 
+    @lectura
     def list(self, *, skip: int = 0, limit: int = 100) -> List[Archivo]:
         return (
             self.db.query(Archivo)  # type: ignore[attr-defined]
@@ -36,6 +38,7 @@ class ArchivoRepository:
             .all()
         )
 
+    @lectura
     def list_by_tipo_incapacidad(self, tipo_incapacidad_id: int) -> List[Archivo]:
         return (
             self.db.query(Archivo)  # type: ignore[attr-defined]
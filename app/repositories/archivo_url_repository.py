@@ -0,0 +1,51 @@
+from datetime import datetime
+from typing import Iterable, List
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.archivo_url import ArchivoUrl
+from app.db.session import lectura
+
+
+class ArchivoUrlRepository:
+    def __init__(self, db: Session) -> None:
+        self.db = db
+
+    # Create / Update
+    def guardar(self, *, archivo_id: int, user_id: int, file_path: str, file_size: int, url: str,
+                fecha_subida: datetime | None = None, commit: bool = True) -> ArchivoUrl:
+        entity = self.db.merge(ArchivoUrl(
+            archivo_id=archivo_id,
+            user_id=user_id,
+            file_path=file_path,
+            file_size=file_size or 0,
+            url=url,
+            fecha_subida=fecha_subida or datetime.now(),
+        ))
+        if commit:
+            self.db.commit()
+        else:
+            self.db.flush()
+        return entity
+
+    def guardar_lote(self, registros: Iterable[dict]) -> int:
+        """Inserta varios registros nuevos en una sola transacción (importación)."""
+        entities = [ArchivoUrl(**data) for data in registros]
+        self.db.add_all(entities)
+        self.db.commit()
+        return len(entities)
+
+    # Read
+    def get(self, archivo_id: int) -> ArchivoUrl | None:
+        return self.db.get(ArchivoUrl, archivo_id)
+
+    @lectura
+    def list_by_user(self, user_id: int) -> List[ArchivoUrl]:
+        stmt = select(ArchivoUrl).where(ArchivoUrl.user_id == user_id).order_by(ArchivoUrl.archivo_id)
+        return list(self.db.scalars(stmt))
+
+    def ids_existentes(self) -> set[int]:
+        return set(self.db.scalars(select(ArchivoUrl.archivo_id)))
+
+    def vacio(self) -> bool:
+        return self.db.scalars(select(ArchivoUrl.archivo_id).limit(1)).first() is None
@@ -0,0 +1,52 @@
+from datetime import datetime
+from typing import List, Optional, Tuple
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Session
+
+from app.models.audit_log import AuditLog
+from app.db.session import lectura
+
+
+class AuditLogRepository:
+    def __init__(self, db: Session) -> None:
+        self.db = db
+
+    # Read
+    @lectura
+    def buscar(
+        self,
+        *,
+        entidad: Optional[str] = None,
+        entidad_id: Optional[int] = None,
+        usuario_id: Optional[int] = None,
+        accion: Optional[str] = None,
+        desde: Optional[datetime] = None,
+        hasta: Optional[datetime] = None,
+        despues_de: Optional[Tuple[datetime, int]] = None,
+        skip: int = 0,
+        limit: int = 100,
+    ) -> List[AuditLog]:
+        """Eventos más recientes primero. `despues_de` = (fecha, id_audit) del último entregado (keyset)."""
+        stmt = select(AuditLog)
+        if entidad is not None:
+            stmt = stmt.where(AuditLog.entidad == entidad)
+        if entidad_id is not None:
+            stmt = stmt.where(AuditLog.entidad_id == entidad_id)
+        if usuario_id is not None:
+            stmt = stmt.where(AuditLog.usuario_id == usuario_id)
+        if accion is not None:
+            stmt = stmt.where(AuditLog.accion == accion)
+        if desde is not None:
+            stmt = stmt.where(AuditLog.fecha >= desde)
+        if hasta is not None:
+            stmt = stmt.where(AuditLog.fecha <= hasta)
+        if despues_de is not None:
+            fecha, id_audit = despues_de
+            stmt = stmt.where(or_(
+                AuditLog.fecha < fecha,
+                and_(AuditLog.fecha == fecha, AuditLog.id_audit < id_audit),
+            ))
+        elif skip:
+            stmt = stmt.offset(skip)
+        stmt = stmt.order_by(AuditLog.fecha.desc(), AuditLog.id_audit.desc()).limit(limit)
+        return list(self.db.scalars(stmt))
@@ -0,0 +1,109 @@
+from datetime import timedelta
+from typing import List
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.models.carga_documento import CargaDocumento, CARGA_PENDIENTE, CARGA_SUBIENDO
+from app.db.session import lectura
+
+
+class CargaDocumentoRepository:
+    def __init__(self, db: Session) -> None:
+        self.db = db
+
+    # Create
+    def create(self, *, incapacidad_id: int, archivo_id: int, usuario_id: int, ruta_local: str,
+               nombre: str, mime_type: str, tamano: int) -> CargaDocumento:
+        entity = CargaDocumento(
+            incapacidad_id=incapacidad_id,
+            archivo_id=archivo_id,
+            usuario_id=usuario_id,
+            ruta_local=ruta_local,
+            nombre=nombre,
+            mime_type=mime_type,
+            tamano=tamano,
+            estado=CARGA_PENDIENTE,
+            intentos=0,
+        )
+        self.db.add(entity)
+        self.db.commit()
+        self.db.refresh(entity)
+        return entity
+
+    # Read
+    def get(self, id_carga: int) -> CargaDocumento | None:
+        return self.db.get(CargaDocumento, id_carga)
+
+    @lectura
+    def list_by_incapacidad(self, incapacidad_id: int) -> List[CargaDocumento]:
+        return (
+            self.db.query(CargaDocumento)  # type: ignore[attr-defined]
+            .filter(CargaDocumento.incapacidad_id == incapacidad_id)
+            .order_by(CargaDocumento.id_carga.desc())
+            .all()
+        )
+
+    def ultima_para(self, incapacidad_id: int, archivo_id: int) -> CargaDocumento | None:
+        return (
+            self.db.query(CargaDocumento)  # type: ignore[attr-defined]
+            .filter(
+                CargaDocumento.incapacidad_id == incapacidad_id,
+                CargaDocumento.archivo_id == archivo_id,
+            )
+            .order_by(CargaDocumento.id_carga.desc())
+            .first()
+        )
+
+    def list_ids_pendientes(self) -> List[int]:
+        """Cargas esperando subida (nuevas, entre reintentos o liberadas por liberar_vencidas)."""
+        rows = (
+            self.db.query(CargaDocumento.id_carga)  # type: ignore[attr-defined]
+            .filter(CargaDocumento.estado == CARGA_PENDIENTE)
+            .order_by(CargaDocumento.id_carga)
+            .all()
+        )
+        return [r.id_carga for r in rows]
+
+    # Update
+    def reclamar(self, id_carga: int) -> CargaDocumento | None:
+        """Pasa la carga de 'pendiente' a 'subiendo' y suma un intento, solo si sigue pendiente.
+
+        UPDATE condicional: entre varios procesos (workers de uvicorn) que intentan la misma
+        carga, solo uno obtiene rowcount == 1 y la sube. Retorna la carga reclamada o None.
+        """
+        result = self.db.execute(
+            update(CargaDocumento)
+            .where(CargaDocumento.id_carga == id_carga, CargaDocumento.estado == CARGA_PENDIENTE)
+            .values(estado=CARGA_SUBIENDO, intentos=CargaDocumento.intentos + 1)
+            .execution_options(synchronize_session=False)
+        )
+        self.db.commit()
+        if result.rowcount != 1:
+            return None
+        return self.db.get(CargaDocumento, id_carga, populate_existing=True)
+
+    def liberar_vencidas(self, lease_seconds: float) -> int:
+        """Devuelve a 'pendiente' las cargas 'subiendo' sin actividad en `lease_seconds`
+        (el proceso que las reclamó terminó sin completarlas).
+
+        fecha_actualizacion la pone la BD (func.now()): el corte se calcula con su reloj.
+        """
+        antes_de = self.db.scalar(select(func.now())) - timedelta(seconds=lease_seconds)
+        result = self.db.execute(
+            update(CargaDocumento)
+            .where(CargaDocumento.estado == CARGA_SUBIENDO, CargaDocumento.fecha_actualizacion < antes_de)
+            .values(estado=CARGA_PENDIENTE)
+            .execution_options(synchronize_session=False)
+        )
+        self.db.commit()
+        return result.rowcount or 0
+
+    def update(self, id_carga: int, **values) -> CargaDocumento | None:
+        entity = self.get(id_carga)
+        if entity is None:
+            return None
+        for key, value in values.items():
+            setattr(entity, key, value)
+        self.db.commit()
+        self.db.refresh(entity)
+        return entity
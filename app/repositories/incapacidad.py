@@ -1,23 +1,215 @@
 from __future__ import annotations
 
-from typing import Any, Iterable, Optional, List
-from sqlalchemy import MetaData, Table, insert, select, update, and_, delete
+import logging
+from itertools import groupby
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, Optional, List
+from sqlalchemy import Table, Numeric, cast, extract, func, insert, select, update, and_, or_, delete
 from sqlalchemy.orm import Session
 from datetime import datetime
 from decimal import Decimal
 
+from app.db import reflection
+from app.core.pagination import Keyset
+from app.db.session import lectura
+from app.repositories import relacion_matriz
 
-class IncapacidadRepository:
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+# Columnas de la incapacidad en cada elemento de iter_documentos_faltantes
+_COLUMNAS_FALTANTES = ("id_incapacidad", "usuario_id", "tipo_incapacidad_id", "estado", "fecha_inicio", "fecha_final")
+
+
+class _ConsultasIncapacidad:
+    """Construcción de consultas compartida por IncapacidadRepository y AsyncIncapacidadRepository."""
+
+    def _reflejar(self, bind) -> None:
+        # Tablas reflejadas una sola vez por engine (registro compartido del proceso)
+        self._bind_reflexion = bind
+        tables = reflection.get_tables(bind, ["incapacidad", "incapacidad_archivo"])
+        self.t_incapacidad: Table = tables["incapacidad"]
+        self.t_incapacidad_archivo: Table = tables["incapacidad_archivo"]
+
+    def _paginar(self, stmt, *, skip: int, limit: int, after: Optional[Keyset] = None):
+        """Orden estable (fecha_registro DESC, id_incapacidad DESC) paginado por keyset u OFFSET.
+
+        Con `after` (última fila de la página anterior) se ignora `skip` y la consulta
+        recorre el índice desde esa posición, sin saltar ni repetir filas cuando llegan
+        registros nuevos. Las filas sin fecha_registro van al final (NULL es el menor valor
+        en MySQL), así que siguen a cualquier cursor con fecha.
+        """
+        t = self.t_incapacidad
+        if after is not None:
+            fecha, last_id = after
+            if fecha is None:
+                stmt = stmt.where(and_(t.c.fecha_registro.is_(None), t.c.id_incapacidad < last_id))
+            else:
+                stmt = stmt.where(or_(
+                    t.c.fecha_registro < fecha,
+                    and_(t.c.fecha_registro == fecha, t.c.id_incapacidad < last_id),
+                    t.c.fecha_registro.is_(None),
+                ))
+        else:
+            stmt = stmt.offset(skip)
+        return stmt.order_by(t.c.fecha_registro.desc(), t.c.id_incapacidad.desc()).limit(limit)
+
+    def _condiciones(self, *,
+                     estado: Optional[int] = None,
+                     tipo_incapacidad_id: Optional[int] = None,
+                     usuario_id: Optional[int] = None,
+                     fecha_inicio: Optional[datetime] = None,
+                     fecha_final: Optional[datetime] = None) -> list:
+        """Filtros comunes de listados, estadísticas y exportaciones."""
+        conditions = []
+        if estado is not None:
+            conditions.append(self.t_incapacidad.c.estado == estado)
+        if tipo_incapacidad_id is not None:
+            conditions.append(self.t_incapacidad.c.tipo_incapacidad_id == tipo_incapacidad_id)
+        if usuario_id is not None:
+            conditions.append(self.t_incapacidad.c.usuario_id == usuario_id)
+        if fecha_inicio is not None:
+            conditions.append(self.t_incapacidad.c.fecha_inicio >= fecha_inicio)
+        if fecha_final is not None:
+            conditions.append(self.t_incapacidad.c.fecha_final <= fecha_final)
+        return conditions
+
+    def _select_by_user(self, usuario_id: int, *, skip: int, limit: int, after: Optional[Keyset]):
+        return self._paginar(
+            select(self.t_incapacidad).where(self.t_incapacidad.c.usuario_id == usuario_id),
+            skip=skip,
+            limit=limit,
+            after=after,
+        )
+
+    def _select_with_details(self, *extra_usuario: str):
+        """SELECT de incapacidad con JOIN a usuario y tipo_incapacidad (nombres como columnas)."""
+        # Tablas adicionales desde el registro compartido
+        tables = reflection.get_tables(self._bind_reflexion, ["usuario", "tipo_incapacidad"])
+        t_usuario = tables["usuario"]
+        t_tipo_incapacidad = tables["tipo_incapacidad"]
+        
+        # Query con JOINs
+        return select(
+            self.t_incapacidad,
+            t_usuario.c.nombre_completo.label("usuario_nombre"),
+            *(t_usuario.c[col].label(f"usuario_{col}") for col in extra_usuario),
+            t_tipo_incapacidad.c.nombre.label("tipo_nombre")
+        ).select_from(
+            self.t_incapacidad
+            .join(t_usuario, self.t_incapacidad.c.usuario_id == t_usuario.c.id_usuario)
+            .join(t_tipo_incapacidad, self.t_incapacidad.c.tipo_incapacidad_id == t_tipo_incapacidad.c.id_tipo_incapacidad)
+        )
+
+    def _select_listado_detalle(self, *,
+                                skip: int,
+                                limit: int,
+                                after: Optional[Keyset],
+                                **filtros):
+        stmt = self._select_with_details()
+        conditions = self._condiciones(**filtros)
+        if conditions:
+            stmt = stmt.where(and_(*conditions))
+        return self._paginar(stmt, skip=skip, limit=limit, after=after)
+
+    @staticmethod
+    def _combinar_detalle(rows) -> list[dict]:
+        # Combinar datos
+        result = []
+        for row in rows:
+            inc_data = dict(row)
+            # Agregar información de usuario y tipo
+            usuario_nombre_val = inc_data.pop("usuario_nombre", None)
+            tipo_nombre_val = inc_data.pop("tipo_nombre", None)
+            
+            # Mantener campo anidado para compatibilidad
+            inc_data["usuario"] = {"nombre_completo": usuario_nombre_val}
+            # Exponer nombre directamente a nivel raíz para el frontend
+            inc_data["usuario_nombre"] = usuario_nombre_val
+            
+            # Agregar información del tipo de incapacidad
+            inc_data["tipo_incapacidad"] = {"nombre": tipo_nombre_val}
+            inc_data["tipo_nombre"] = tipo_nombre_val  # También exponer directamente
+            
+            # Mantener usuario_id como entero (no reemplazar) para cumplir schema
+            result.append(inc_data)
+            
+        return result
+
+    def _select_archivo_ids(self, ids: set):
+        t = self.t_incapacidad_archivo
+        return select(t.c.incapacidad_id, t.c.archivo_id).where(t.c.incapacidad_id.in_(ids))
+
+    def _select_documentos_faltantes(self, *, limit: int, despues_de: Optional[int] = None, **filtros):
+        """Una fila por (incapacidad, archivo requerido sin subir), para `limit` incapacidades.
+
+        Anti-join incapacidad ⨝ relacion ▷ incapacidad_archivo; la página (incapacidades con
+        algún faltante, por id ascendente desde `despues_de`) es una tabla derivada de la
+        misma sentencia.
+        """
+        tables = reflection.get_tables(self._bind_reflexion, ["relacion", "archivo"])
+        t, t_ia = self.t_incapacidad, self.t_incapacidad_archivo
+        t_relacion, t_archivo = tables["relacion"], tables["archivo"]
+
+        requeridos = t.join(t_relacion, t_relacion.c.tipo_incapacidad_id == t.c.tipo_incapacidad_id)
+        sin_subir = ~select(t_ia.c.archivo_id).where(
+            t_ia.c.incapacidad_id == t.c.id_incapacidad,
+            t_ia.c.archivo_id == t_relacion.c.archivo_id,
+        ).exists()
+        conditions = self._condiciones(**filtros)
+        if despues_de is not None:
+            conditions.append(t.c.id_incapacidad > despues_de)
+        pagina = (
+            select(t.c.id_incapacidad)
+            .select_from(requeridos)
+            .where(sin_subir, *conditions)
+            .distinct()
+            .order_by(t.c.id_incapacidad)
+            .limit(limit)
+            .subquery("pagina")
+        )
+        return (
+            select(
+                t.c.id_incapacidad,
+                t.c.usuario_id,
+                t.c.tipo_incapacidad_id,
+                t.c.estado,
+                t.c.fecha_inicio,
+                t.c.fecha_final,
+                t_relacion.c.archivo_id,
+                t_archivo.c.nombre.label("archivo_nombre"),
+            )
+            .select_from(
+                requeridos
+                .join(pagina, pagina.c.id_incapacidad == t.c.id_incapacidad)
+                .outerjoin(t_archivo, t_archivo.c.id_archivo == t_relacion.c.archivo_id)
+            )
+            .where(sin_subir)
+            .order_by(t.c.id_incapacidad, t_relacion.c.archivo_id)
+        )
+
+    @staticmethod
+    def _agrupar_faltantes(rows) -> Iterator[dict]:
+        """Agrupa las filas de _select_documentos_faltantes: una incapacidad con su lista `faltantes`."""
+        for _, grupo in groupby(rows, key=lambda row: row["id_incapacidad"]):
+            primera, *resto = grupo
+            item = {k: primera[k] for k in _COLUMNAS_FALTANTES}
+            item["faltantes"] = [
+                {"archivo_id": row["archivo_id"], "nombre": row["archivo_nombre"]}
+                for row in (primera, *resto)
+            ]
+            yield item
+
+    @staticmethod
+    def _cumplimiento(pares: list, matriz: relacion_matriz.MatrizRelacion, subidos: dict[int, set[int]]) -> dict[int, List[dict]]:
+        return {inc_id: matriz.cumplimiento(tipo_id, subidos.get(inc_id, set())) for inc_id, tipo_id in pares}
+
+
+class IncapacidadRepository(_ConsultasIncapacidad):
     def __init__(self, db: Session) -> None:
         self.db = db
-        self._metadata = MetaData()
-        # Reflejar tablas existentes sin definir modelos ORM
-        self._metadata.reflect(bind=self.db.bind, only=[
-            "incapacidad",
-            "incapacidad_archivo",
-        ])
-        self.t_incapacidad: Table = self._metadata.tables["incapacidad"]
-        self.t_incapacidad_archivo: Table = self._metadata.tables["incapacidad_archivo"]
+        self._reflejar(self.db.get_bind())
 
     def create(self, *, 
                tipo_incapacidad_id: int, 
@@ -51,12 +243,7 @@ class IncapacidadRepository:
         existing_cols = set(self.t_incapacidad.c.keys())
         filtered_values = {k: v for k, v in all_values.items() if k in existing_cols}
 
-        # Debug de columnas existentes y valores a insertar
-        try:
-            print(f"DEBUG: incapacidad columns -> {sorted(existing_cols)}")
-            print(f"DEBUG: incapacidad insert keys -> {sorted(filtered_values.keys())}")
-        except Exception:
-            pass
+        logger.debug("incapacidad insert: columnas=%s claves=%s", existing_cols, filtered_values.keys())
 
         stmt = (
             insert(self.t_incapacidad)
@@ -66,10 +253,9 @@ class IncapacidadRepository:
             result = self.db.execute(stmt)
         except Exception as exc:
             # Reintento con columnas mínimas si hay error de columnas no consumidas
-            print(f"DEBUG: Insert falló ({type(exc)}): {exc}")
             minimal_keys = {"tipo_incapacidad_id", "usuario_id", "fecha_inicio", "fecha_final", "dias", "estado"}
             minimal_values = {k: v for k, v in all_values.items() if k in minimal_keys and k in existing_cols}
-            print(f"DEBUG: reintentando insert con claves -> {sorted(minimal_values.keys())}")
+            logger.warning("Insert de incapacidad falló (%s), reintentando con claves %s", exc, sorted(minimal_values))
             stmt_min = (
                 insert(self.t_incapacidad)
                 .values(**minimal_values)
@@ -141,8 +327,7 @@ class IncapacidadRepository:
             except Exception:
                 values["salario"] = str(salario)
 
-        print(f"DEBUG: incapacidad create_by_ids -> keys {sorted(values.keys())}")
-        print(f"DEBUG: incapacidad create_by_ids -> values {values}")
+        logger.debug("incapacidad create_by_ids: %s", values)
 
         stmt = insert(self.t_incapacidad).values(**values)
         result = self.db.execute(stmt)
@@ -169,51 +354,30 @@ class IncapacidadRepository:
         row = self.db.execute(stmt).mappings().first()
         return dict(row) if row else None
 
+    @lectura
     def get_with_documents(self, id_incapacidad: int) -> Optional[dict]:
         """Obtiene incapacidad con sus documentos asociados"""
-        print(f"DEBUG REPO: Columnas disponibles en t_incapacidad: {list(self.t_incapacidad.c.keys())}")
         stmt = select(self.t_incapacidad).where(self.t_incapacidad.c.id_incapacidad == id_incapacidad)
         inc = self.db.execute(stmt).mappings().first()
         if not inc:
             return None
         
         result = dict(inc)
-        print(f"DEBUG REPO: Datos obtenidos de BD: {result}")
-        
-        # Obtener documentos asociados
-        # Usar una consulta directa para debug
-        from sqlalchemy import text
-        raw_query = text(f"SELECT * FROM incapacidad_archivo WHERE incapacidad_id = {id_incapacidad}")
-        raw_docs = self.db.execute(raw_query).mappings().all()
-        print(f"DEBUG REPO: Consulta raw SQL para incapacidad {id_incapacidad}")
-        print(f"DEBUG REPO: SQL: SELECT * FROM incapacidad_archivo WHERE incapacidad_id = {id_incapacidad}")
-        print(f"DEBUG REPO: Documentos RAW encontrados: {len(raw_docs)}")
-        print(f"DEBUG REPO: Detalles RAW: {[dict(doc) for doc in raw_docs]}")
-        
-        # Limpiar cache de SQLAlchemy antes de consultar
-        self.db.expire_all()
-        
+        # Core select sobre la tabla: no pasa por el identity map, no hace falta expire_all()
         docs_stmt = select(self.t_incapacidad_archivo).where(
             self.t_incapacidad_archivo.c.incapacidad_id == id_incapacidad
         )
-        docs = self.db.execute(docs_stmt).mappings().all()
-        print(f"DEBUG REPO: Documentos SQLAlchemy encontrados para incapacidad {id_incapacidad}: {len(docs)}")
-        print(f"DEBUG REPO: Detalles SQLAlchemy: {[dict(doc) for doc in docs]}")
-        result['documentos'] = [dict(doc) for doc in docs]
-        
+        result['documentos'] = [dict(doc) for doc in self.db.execute(docs_stmt).mappings()]
+        logger.debug("incapacidad %s: %d documentos", id_incapacidad, len(result['documentos']))
         return result
 
-    def list_by_user(self, usuario_id: int, *, skip: int = 0, limit: int = 100) -> list[dict]:
-        stmt = (
-            select(self.t_incapacidad)
-            .where(self.t_incapacidad.c.usuario_id == usuario_id)
-            .offset(skip)
-            .limit(limit)
-            .order_by(self.t_incapacidad.c.fecha_registro.desc())
-        )
+    @lectura
+    def list_by_user(self, usuario_id: int, *, skip: int = 0, limit: int = 100, after: Optional[Keyset] = None) -> list[dict]:
+        stmt = self._select_by_user(usuario_id, skip=skip, limit=limit, after=after)
         rows = self.db.execute(stmt).mappings().all()
         return [dict(r) for r in rows]
 
+    @lectura
     def list_all(self, *, 
                  skip: int = 0, 
                  limit: int = 100, 
@@ -221,28 +385,25 @@ class IncapacidadRepository:
                  tipo_incapacidad_id: Optional[int] = None,
                  usuario_id: Optional[int] = None,
                  fecha_inicio: Optional[datetime] = None,
-                 fecha_final: Optional[datetime] = None) -> list[dict]:
+                 fecha_final: Optional[datetime] = None,
+                 after: Optional[Keyset] = None) -> list[dict]:
         stmt = select(self.t_incapacidad)
         
-        conditions = []
-        if estado is not None:
-            conditions.append(self.t_incapacidad.c.estado == estado)
-        if tipo_incapacidad_id is not None:
-            conditions.append(self.t_incapacidad.c.tipo_incapacidad_id == tipo_incapacidad_id)
-        if usuario_id is not None:
-            conditions.append(self.t_incapacidad.c.usuario_id == usuario_id)
-        if fecha_inicio is not None:
-            conditions.append(self.t_incapacidad.c.fecha_inicio >= fecha_inicio)
-        if fecha_final is not None:
-            conditions.append(self.t_incapacidad.c.fecha_final <= fecha_final)
-            
+        conditions = self._condiciones(
+            estado=estado,
+            tipo_incapacidad_id=tipo_incapacidad_id,
+            usuario_id=usuario_id,
+            fecha_inicio=fecha_inicio,
+            fecha_final=fecha_final,
+        )
         if conditions:
             stmt = stmt.where(and_(*conditions))
             
-        stmt = stmt.offset(skip).limit(limit).order_by(self.t_incapacidad.c.fecha_registro.desc())
+        stmt = self._paginar(stmt, skip=skip, limit=limit, after=after)
         rows = self.db.execute(stmt).mappings().all()
         return [dict(r) for r in rows]
 
+    @lectura
     def list_all_with_details(self, *, 
                              skip: int = 0, 
                              limit: int = 100, 
@@ -250,63 +411,140 @@ class IncapacidadRepository:
                              tipo_incapacidad_id: Optional[int] = None,
                              usuario_id: Optional[int] = None,
                              fecha_inicio: Optional[datetime] = None,
-                             fecha_final: Optional[datetime] = None) -> list[dict]:
+                             fecha_final: Optional[datetime] = None,
+                             after: Optional[Keyset] = None) -> list[dict]:
         """Lista incapacidades con información de usuario y tipo de incapacidad"""
-        # Reflejar tablas adicionales
-        self._metadata.reflect(bind=self.db.bind, only=["usuario", "tipo_incapacidad"])
-        t_usuario = self._metadata.tables["usuario"]
-        t_tipo_incapacidad = self._metadata.tables["tipo_incapacidad"]
-        
-        # Query con JOINs
-        stmt = select(
-            self.t_incapacidad,
-            t_usuario.c.nombre_completo.label("usuario_nombre"),
-            t_tipo_incapacidad.c.nombre.label("tipo_nombre")
-        ).select_from(
-            self.t_incapacidad
-            .join(t_usuario, self.t_incapacidad.c.usuario_id == t_usuario.c.id_usuario)
-            .join(t_tipo_incapacidad, self.t_incapacidad.c.tipo_incapacidad_id == t_tipo_incapacidad.c.id_tipo_incapacidad)
+        stmt = self._select_listado_detalle(
+            skip=skip,
+            limit=limit,
+            after=after,
+            estado=estado,
+            tipo_incapacidad_id=tipo_incapacidad_id,
+            usuario_id=usuario_id,
+            fecha_inicio=fecha_inicio,
+            fecha_final=fecha_final,
+        )
+        rows = self.db.execute(stmt).mappings().all()
+        return self._combinar_detalle(rows)
+
+    def iter_with_details(self, *,
+                          estado: Optional[int] = None,
+                          tipo_incapacidad_id: Optional[int] = None,
+                          usuario_id: Optional[int] = None,
+                          fecha_inicio: Optional[datetime] = None,
+                          fecha_final: Optional[datetime] = None,
+                          batch_size: int = 1000) -> Iterator[dict]:
+        """Recorre con cursor del servidor las incapacidades filtradas (mismos filtros que
+        list_all_with_details), de `batch_size` en `batch_size` filas.
+
+        Mientras el generador está abierto la conexión queda ocupada por el cursor: no
+        ejecutar otras consultas en la misma sesión hasta agotarlo o cerrarlo.
+        """
+        stmt = self._select_with_details("numero_identificacion")
+        conditions = self._condiciones(
+            estado=estado,
+            tipo_incapacidad_id=tipo_incapacidad_id,
+            usuario_id=usuario_id,
+            fecha_inicio=fecha_inicio,
+            fecha_final=fecha_final,
         )
-        
-        conditions = []
-        if estado is not None:
-            conditions.append(self.t_incapacidad.c.estado == estado)
-        if tipo_incapacidad_id is not None:
-            conditions.append(self.t_incapacidad.c.tipo_incapacidad_id == tipo_incapacidad_id)
-        if usuario_id is not None:
-            conditions.append(self.t_incapacidad.c.usuario_id == usuario_id)
-        if fecha_inicio is not None:
-            conditions.append(self.t_incapacidad.c.fecha_inicio >= fecha_inicio)
-        if fecha_final is not None:
-            conditions.append(self.t_incapacidad.c.fecha_final <= fecha_final)
-            
         if conditions:
             stmt = stmt.where(and_(*conditions))
-            
-        stmt = stmt.offset(skip).limit(limit).order_by(self.t_incapacidad.c.fecha_registro.desc())
-        rows = self.db.execute(stmt).mappings().all()
-        
-        # Combinar datos
-        result = []
-        for row in rows:
-            inc_data = dict(row)
-            # Agregar información de usuario y tipo
-            usuario_nombre_val = inc_data.pop("usuario_nombre", None)
-            tipo_nombre_val = inc_data.pop("tipo_nombre", None)
-            
-            # Mantener campo anidado para compatibilidad
-            inc_data["usuario"] = {"nombre_completo": usuario_nombre_val}
-            # Exponer nombre directamente a nivel raíz para el frontend
-            inc_data["usuario_nombre"] = usuario_nombre_val
-            
-            # Agregar información del tipo de incapacidad
-            inc_data["tipo_incapacidad"] = {"nombre": tipo_nombre_val}
-            inc_data["tipo_nombre"] = tipo_nombre_val  # También exponer directamente
-            
-            # Mantener usuario_id como entero (no reemplazar) para cumplir schema
-            result.append(inc_data)
-            
-        return result
+        stmt = stmt.order_by(self.t_incapacidad.c.fecha_registro, self.t_incapacidad.c.id_incapacidad)
+        result = self.db.execute(
+            stmt, execution_options={"stream_results": True, "yield_per": batch_size}
+        ).mappings()
+        try:
+            for row in result:
+                yield dict(row)
+        finally:
+            result.close()
+
+    def iter_documentos_faltantes(self, *,
+                                  limit: int,
+                                  despues_de: Optional[int] = None,
+                                  estado: Optional[int] = None,
+                                  tipo_incapacidad_id: Optional[int] = None,
+                                  usuario_id: Optional[int] = None,
+                                  fecha_inicio: Optional[datetime] = None,
+                                  fecha_final: Optional[datetime] = None,
+                                  batch_size: int = 1000) -> Iterator[dict]:
+        """Hasta `limit` incapacidades filtradas (id ascendente, después de `despues_de`) a las
+        que les falta algún documento requerido, cada una con su lista `faltantes`.
+
+        Una sola consulta, leída con cursor del servidor: igual que en iter_with_details, no
+        ejecutar otras consultas en la sesión mientras el generador esté abierto.
+        """
+        stmt = self._select_documentos_faltantes(
+            limit=limit,
+            despues_de=despues_de,
+            estado=estado,
+            tipo_incapacidad_id=tipo_incapacidad_id,
+            usuario_id=usuario_id,
+            fecha_inicio=fecha_inicio,
+            fecha_final=fecha_final,
+        )
+        result = self.db.execute(
+            stmt, execution_options={"stream_results": True, "yield_per": batch_size}
+        ).mappings()
+        try:
+            yield from self._agrupar_faltantes(result)
+        finally:
+            result.close()
+
+    @lectura
+    def estadisticas(self, *,
+                     top_n: int = 10,
+                     estado: Optional[int] = None,
+                     tipo_incapacidad_id: Optional[int] = None,
+                     usuario_id: Optional[int] = None,
+                     fecha_inicio: Optional[datetime] = None,
+                     fecha_final: Optional[datetime] = None) -> dict:
+        """Agregados con GROUP BY en la BD (sin traer filas a Python).
+
+        Retorna listas de dicts por estado, por tipo, top-N por EPS y por diagnóstico y
+        serie mensual (según fecha_inicio). Cada grupo trae `total`, `dias` y `costo`
+        (salario / 30 * dias). Los nombres se resuelven en el servicio.
+        """
+        t = self.t_incapacidad
+        conditions = self._condiciones(
+            estado=estado,
+            tipo_incapacidad_id=tipo_incapacidad_id,
+            usuario_id=usuario_id,
+            fecha_inicio=fecha_inicio,
+            fecha_final=fecha_final,
+        )
+        # salario es VARCHAR en la BD: '' se trata como NULL antes de convertir
+        salario = cast(func.nullif(t.c.salario, ""), Numeric(15, 2))
+        metricas = (
+            func.count().label("total"),
+            func.coalesce(func.sum(t.c.dias), 0).label("dias"),
+            func.coalesce(func.sum(salario / 30 * t.c.dias), 0).label("costo"),
+        )
+
+        def agrupar(*cols, order_by=None, limit=None) -> list[dict]:
+            stmt = select(*cols, *metricas)
+            if conditions:
+                stmt = stmt.where(and_(*conditions))
+            stmt = stmt.group_by(*cols)
+            if order_by is not None:
+                stmt = stmt.order_by(*order_by)
+            if limit is not None:
+                stmt = stmt.limit(limit)
+            return [dict(r) for r in self.db.execute(stmt).mappings().all()]
+
+        top = (func.count().desc(),)
+        anio = extract("year", t.c.fecha_inicio).label("anio")
+        mes = extract("month", t.c.fecha_inicio).label("mes")
+        return {
+            "por_estado": agrupar(t.c.estado),
+            "por_tipo": agrupar(t.c.tipo_incapacidad_id),
+            "por_eps": agrupar(t.c.Eps_id, order_by=top, limit=top_n) if "Eps_id" in t.c else [],
+            "por_diagnostico": (
+                agrupar(t.c.diagnostico_id, order_by=top, limit=top_n) if "diagnostico_id" in t.c else []
+            ),
+            "mensual": agrupar(anio, mes, order_by=(anio, mes)),
+        }
 
     def update_estado(self, id_incapacidad: int, *, estado: int) -> bool:
         # Preservar fecha_registro: leer valor actual y no permitir que cambie
@@ -437,32 +675,37 @@ class IncapacidadRepository:
         row = self.db.execute(sel).mappings().first()
         return dict(row) if row else None
 
+    @lectura
     def get_documentos_cumplimiento(self, incapacidad_id: int, tipo_incapacidad_id: int) -> List[dict]:
         """Obtiene el estado de cumplimiento de documentos requeridos"""
-        # Obtener documentos requeridos por el tipo
-        from app.repositories.relacion_repository import RelacionRepository
-        rel_repo = RelacionRepository(self.db)
-        requeridos = rel_repo.list_by_tipo_incapacidad(tipo_incapacidad_id=tipo_incapacidad_id)
-        requeridos_ids = {rel.archivo_id for rel in requeridos}
-        
-        # Obtener documentos subidos
-        docs_stmt = select(self.t_incapacidad_archivo).where(
-            self.t_incapacidad_archivo.c.incapacidad_id == incapacidad_id
-        )
-        docs_subidos = self.db.execute(docs_stmt).mappings().all()
-        subidos_ids = {doc['archivo_id'] for doc in docs_subidos}
-        
-        # Calcular cumplimiento
-        cumplimiento = []
-        for req_id in requeridos_ids:
-            cumplimiento.append({
-                'archivo_id': req_id,
-                'requerido': True,
-                'subido': req_id in subidos_ids,
-                'completo': req_id in subidos_ids
-            })
-            
-        return cumplimiento
+        return self.get_documentos_cumplimiento_batch(
+            [(incapacidad_id, tipo_incapacidad_id)]
+        ).get(incapacidad_id, [])
+
+    @lectura
+    def list_archivo_ids_by_incapacidades(self, incapacidad_ids: Iterable[int]) -> dict[int, set[int]]:
+        """archivo_id subidos por incapacidad para un conjunto de incapacidades (una consulta)."""
+        ids = {i for i in incapacidad_ids if i is not None}
+        if not ids:
+            return {}
+        subidos: dict[int, set[int]] = {}
+        for inc_id, archivo_id in self.db.execute(self._select_archivo_ids(ids)):
+            subidos.setdefault(inc_id, set()).add(archivo_id)
+        return subidos
+
+    @lectura
+    def get_documentos_cumplimiento_batch(self, pares: Iterable[tuple[int, int]]) -> dict[int, List[dict]]:
+        """Cumplimiento de documentos para varias incapacidades.
+
+        `pares` son tuplas (incapacidad_id, tipo_incapacidad_id). Los documentos requeridos salen
+        de la matriz de relaciones en memoria; solo se consultan los archivos subidos de todas
+        las incapacidades (una consulta), independientemente del número de filas.
+        """
+        pares = list(pares)
+        if not pares:
+            return {}
+        subidos = self.list_archivo_ids_by_incapacidades(inc_id for inc_id, _ in pares)
+        return self._cumplimiento(pares, relacion_matriz.get_matriz(self.db), subidos)
 
     def update_formulario(self, id_incapacidad: int, *, 
                           fecha_inicio: Optional[datetime] = None,
@@ -573,13 +816,6 @@ class IncapacidadRepository:
 
     def update_archivo_url(self, incapacidad_id: int, archivo_id: int, url_documento: str) -> bool:
         """Actualiza la URL del documento en incapacidad_archivo"""
-        print(f"DEBUG UPDATE: Actualizando archivo - incapacidad_id: {incapacidad_id}, archivo_id: {archivo_id}")
-        print(f"DEBUG UPDATE: Nueva URL: {url_documento}")
-        
-        # Verificar si existe el registro antes de actualizar
-        existing = self.get_archivo_by_ids(incapacidad_id, archivo_id)
-        print(f"DEBUG UPDATE: Registro existente: {existing}")
-        
         stmt = (
             update(self.t_incapacidad_archivo)
             .where(
@@ -589,11 +825,56 @@ class IncapacidadRepository:
             .values(url_documento=url_documento)
         )
         result = self.db.execute(stmt)
-        print(f"DEBUG UPDATE: Filas afectadas: {result.rowcount}")
         self.db.commit()
-        
-        # Verificar después de actualizar
-        updated = self.get_archivo_by_ids(incapacidad_id, archivo_id)
-        print(f"DEBUG UPDATE: Registro después de actualizar: {updated}")
-        
+        logger.debug(
+            "incapacidad_archivo (%s, %s) -> %s: %s filas", incapacidad_id, archivo_id, url_documento, result.rowcount
+        )
         return result.rowcount > 0
+
+
+class AsyncIncapacidadRepository(_ConsultasIncapacidad):
+    """Lecturas de los listados con AsyncSession (mismas consultas que IncapacidadRepository)."""
+
+    def __init__(self, db: "AsyncSession") -> None:
+        self.db = db
+        # Las tablas se reflejan con el engine síncrono (mismo esquema; la reflexión no es async)
+        from app.db.session import engine
+        self._reflejar(engine)
+
+    async def list_by_user(self, usuario_id: int, *, skip: int = 0, limit: int = 100, after: Optional[Keyset] = None) -> list[dict]:
+        stmt = self._select_by_user(usuario_id, skip=skip, limit=limit, after=after)
+        rows = (await self.db.execute(stmt)).mappings().all()
+        return [dict(r) for r in rows]
+
+    async def list_all_with_details(self, *,
+                                    skip: int = 0,
+                                    limit: int = 100,
+                                    estado: Optional[int] = None,
+                                    tipo_incapacidad_id: Optional[int] = None,
+                                    usuario_id: Optional[int] = None,
+                                    fecha_inicio: Optional[datetime] = None,
+                                    fecha_final: Optional[datetime] = None,
+                                    after: Optional[Keyset] = None) -> list[dict]:
+        stmt = self._select_listado_detalle(
+            skip=skip,
+            limit=limit,
+            after=after,
+            estado=estado,
+            tipo_incapacidad_id=tipo_incapacidad_id,
+            usuario_id=usuario_id,
+            fecha_inicio=fecha_inicio,
+            fecha_final=fecha_final,
+        )
+        rows = (await self.db.execute(stmt)).mappings().all()
+        return self._combinar_detalle(rows)
+
+    async def get_documentos_cumplimiento_batch(self, pares: Iterable[tuple[int, int]]) -> dict[int, List[dict]]:
+        pares = list(pares)
+        if not pares:
+            return {}
+        matriz = await relacion_matriz.get_matriz_async(self.db)
+        ids = {inc_id for inc_id, _ in pares if inc_id is not None}
+        subidos: dict[int, set[int]] = {}
+        for inc_id, archivo_id in (await self.db.execute(self._select_archivo_ids(ids))).all():
+            subidos.setdefault(inc_id, set()).add(archivo_id)
+        return self._cumplimiento(pares, matriz, subidos)
@@ -0,0 +1,117 @@
+from datetime import datetime
+from typing import List
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.db.session import lectura
+from app.models.notificacion_correo import (
+    NotificacionCorreo,
+    CORREO_ENVIANDO,
+    CORREO_PENDIENTE,
+)
+
+
+class NotificacionCorreoRepository:
+    def __init__(self, db: Session) -> None:
+        self.db = db
+
+    # Create
+    def encolar(self, *, incapacidad_id: int, evento: str, destinatario: str, asunto: str,
+                html: str, texto: str | None = None) -> NotificacionCorreo | None:
+        """Agrega el correo a la bandeja de salida. Retorna None si ya estaba encolado."""
+        if self.get_por_evento(incapacidad_id, evento, destinatario) is not None:
+            return None
+        entity = NotificacionCorreo(
+            incapacidad_id=incapacidad_id,
+            evento=evento,
+            destinatario=destinatario,
+            asunto=asunto,
+            html=html,
+            texto=texto,
+            estado=CORREO_PENDIENTE,
+            intentos=0,
+            proximo_intento=datetime.now(),
+        )
+        self.db.add(entity)
+        try:
+            self.db.commit()
+        except IntegrityError:
+            # Otro request encoló el mismo evento entre la consulta y el insert
+            self.db.rollback()
+            return None
+        self.db.refresh(entity)
+        return entity
+
+    # Read
+    def get(self, id_notificacion: int) -> NotificacionCorreo | None:
+        return self.db.get(NotificacionCorreo, id_notificacion)
+
+    def get_por_evento(self, incapacidad_id: int, evento: str, destinatario: str) -> NotificacionCorreo | None:
+        stmt = select(NotificacionCorreo).where(
+            NotificacionCorreo.incapacidad_id == incapacidad_id,
+            NotificacionCorreo.evento == evento,
+            NotificacionCorreo.destinatario == destinatario,
+        )
+        return self.db.scalars(stmt).first()
+
+    def contar_eventos(self, incapacidad_id: int, prefijo: str) -> int:
+        """Eventos distintos de la incapacidad que empiezan por `prefijo` (p.ej. rechazos numerados)."""
+        stmt = select(func.count(func.distinct(NotificacionCorreo.evento))).where(
+            NotificacionCorreo.incapacidad_id == incapacidad_id,
+            NotificacionCorreo.evento.like(f"{prefijo}%"),
+        )
+        return self.db.scalar(stmt) or 0
+
+    @lectura
+    def list_by_incapacidad(self, incapacidad_id: int) -> List[NotificacionCorreo]:
+        stmt = (
+            select(NotificacionCorreo)
+            .where(NotificacionCorreo.incapacidad_id == incapacidad_id)
+            .order_by(NotificacionCorreo.id_notificacion)
+        )
+        return list(self.db.scalars(stmt))
+
+    # Update
+    def reclamar(self, limite: int) -> List[NotificacionCorreo]:
+        """Marca como 'enviando' y retorna hasta `limite` correos pendientes cuyo turno llegó."""
+        stmt = (
+            select(NotificacionCorreo)
+            .where(
+                NotificacionCorreo.estado == CORREO_PENDIENTE,
+                NotificacionCorreo.proximo_intento <= datetime.now(),
+            )
+            .order_by(NotificacionCorreo.proximo_intento, NotificacionCorreo.id_notificacion)
+            .limit(limite)
+            .with_for_update(skip_locked=True)
+        )
+        entities = list(self.db.scalars(stmt))
+        for entity in entities:
+            entity.estado = CORREO_ENVIANDO
+        self.db.commit()
+        return entities
+
+    def liberar_en_curso(self) -> int:
+        """Devuelve a 'pendiente' los correos que quedaron 'enviando' (p.ej. por reinicio)."""
+        result = self.db.execute(
+            update(NotificacionCorreo)
+            .where(NotificacionCorreo.estado == CORREO_ENVIANDO)
+            .values(estado=CORREO_PENDIENTE)
+        )
+        self.db.commit()
+        return result.rowcount or 0
+
+    def proximo_intento(self) -> datetime | None:
+        stmt = select(NotificacionCorreo.proximo_intento).where(
+            NotificacionCorreo.estado == CORREO_PENDIENTE
+        ).order_by(NotificacionCorreo.proximo_intento).limit(1)
+        return self.db.scalars(stmt).first()
+
+    def update(self, id_notificacion: int, **values) -> NotificacionCorreo | None:
+        entity = self.get(id_notificacion)
+        if entity is None:
+            return None
+        for key, value in values.items():
+            setattr(entity, key, value)
+        self.db.commit()
+        return entity
@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.config.settings import get_env
+from app.models.parametro_hijo import ParametroHijo
+from app.repositories.parametro_hijo_search import IndiceBusqueda
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+# Segundos antes de recargar aunque no haya escrituras locales (cambios hechos por otros nodos)
+CATALOG_TTL_SECONDS = float(get_env("PARAMETRO_HIJO_CACHE_TTL", "300") or 300)
+
+
+@dataclass(frozen=True)
+class ParametroHijoItem:
+    """Copia inmutable de una fila de parametro_hijo (mismos atributos que el modelo)."""
+    id_parametrohijo: int
+    parametro_id: int
+    nombre: str
+    descripcion: Optional[str]
+    estado: bool
+
+
+def _normalizar(nombre: str) -> str:
+    # Equivalente a LOWER(nombre) = LOWER(?) de la consulta original
+    return nombre.casefold()
+
+
+class CatalogoParametroHijo:
+    """Snapshot del catálogo con índices por id, por nombre y por parametro_id."""
+
+    def __init__(self, items: List[ParametroHijoItem], *, version: int) -> None:
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.por_id: Dict[int, ParametroHijoItem] = {}
+        self.por_nombre: Dict[str, ParametroHijoItem] = {}
+        self.por_parametro_nombre: Dict[Tuple[int, str], ParametroHijoItem] = {}
+        por_parametro: Dict[int, List[ParametroHijoItem]] = {}
+        for item in items:
+            self.por_id[item.id_parametrohijo] = item
+            clave = _normalizar(item.nombre or "")
+            # Ante nombres repetidos conservar el de menor id (como .first() por PK)
+            self.por_nombre.setdefault(clave, item)
+            self.por_parametro_nombre.setdefault((item.parametro_id, clave), item)
+            por_parametro.setdefault(item.parametro_id, []).append(item)
+        self.por_parametro: Dict[int, Tuple[ParametroHijoItem, ...]] = {
+            k: tuple(v) for k, v in por_parametro.items()
+        }
+        # Índices de búsqueda por parametro_id, construidos en la primera búsqueda
+        self._indices: Dict[int, IndiceBusqueda] = {}
+
+    def obtener(self, id_parametro_hijo: int) -> Optional[ParametroHijoItem]:
+        return self.por_id.get(id_parametro_hijo)
+
+    def buscar_nombre(self, nombre: str, parametro_id: Optional[int] = None) -> Optional[ParametroHijoItem]:
+        clave = _normalizar(nombre)
+        if parametro_id is None:
+            return self.por_nombre.get(clave)
+        return self.por_parametro_nombre.get((parametro_id, clave))
+
+    def hijos(self, parametro_id: int) -> Tuple[ParametroHijoItem, ...]:
+        return self.por_parametro.get(parametro_id, ())
+
+    def indice(self, parametro_id: int) -> IndiceBusqueda:
+        indice = self._indices.get(parametro_id)
+        if indice is None:
+            # Dos hilos pueden construirlo a la vez: ambos resultados son iguales
+            indice = self._indices.setdefault(parametro_id, IndiceBusqueda.construir(self.hijos(parametro_id)))
+        return indice
+
+    def buscar(self, parametro_id: int, consulta: str, *, limit: int = 20, solo_activos: bool = True) -> List[ParametroHijoItem]:
+        return self.indice(parametro_id).buscar(consulta, limit=limit, solo_activos=solo_activos)
+
+    def con_cambio(
+        self, id_parametro_hijo: int, item: Optional[ParametroHijoItem], *, version: int
+    ) -> "CatalogoParametroHijo":
+        """Snapshot nuevo con un ítem creado/modificado (o eliminado si item es None).
+
+        Los índices de búsqueda ya construidos se actualizan con el delta en lugar de
+        reconstruirse; el TTL sigue contando desde la última carga completa.
+        """
+        anterior = self.por_id.get(id_parametro_hijo)
+        items = dict(self.por_id)
+        items.pop(id_parametro_hijo, None)
+        if item is not None:
+            items[item.id_parametrohijo] = item
+        nuevo = CatalogoParametroHijo(sorted(items.values(), key=lambda i: i.id_parametrohijo), version=version)
+        nuevo.loaded_at = self.loaded_at
+        for parametro_id, indice in list(self._indices.items()):
+            quitar = [anterior] if anterior is not None and anterior.parametro_id == parametro_id else []
+            agregar = [item] if item is not None and item.parametro_id == parametro_id else []
+            nuevo._indices[parametro_id] = indice.con_cambios(quitar=quitar, agregar=agregar) if quitar or agregar else indice
+        return nuevo
+
+    def heredar_indices(self, anterior: Optional["CatalogoParametroHijo"]) -> None:
+        """Reutiliza los índices de un snapshot anterior cuyos hijos no cambiaron (recarga por TTL)."""
+        if anterior is None:
+            return
+        for parametro_id, indice in list(anterior._indices.items()):
+            if self.hijos(parametro_id) == anterior.hijos(parametro_id):
+                self._indices.setdefault(parametro_id, indice)
+
+    def expirado(self) -> bool:
+        return (time.monotonic() - self.loaded_at) > CATALOG_TTL_SECONDS
+
+
+_lock = threading.Lock()
+_version = 0
+_snapshot: Optional[CatalogoParametroHijo] = None
+
+
+def _consulta():
+    return select(
+        ParametroHijo.id_parametrohijo,
+        ParametroHijo.parametro_id,
+        ParametroHijo.nombre,
+        ParametroHijo.descripcion,
+        ParametroHijo.estado,
+    ).order_by(ParametroHijo.id_parametrohijo)
+
+
+def item_de(row) -> ParametroHijoItem:
+    """ParametroHijoItem a partir de una fila o de una instancia del modelo."""
+    return ParametroHijoItem(
+        id_parametrohijo=row.id_parametrohijo,
+        parametro_id=row.parametro_id,
+        nombre=row.nombre,
+        descripcion=row.descripcion,
+        estado=bool(row.estado),
+    )
+
+
+def _construir(rows, version: int) -> CatalogoParametroHijo:
+    return CatalogoParametroHijo([item_de(row) for row in rows], version=version)
+
+
+def _cargar(db: Session, version: int) -> CatalogoParametroHijo:
+    return _construir(db.execute(_consulta()), version)
+
+
+def _vigente() -> Optional[CatalogoParametroHijo]:
+    snap = _snapshot
+    if snap is not None and snap.version == _version and not snap.expirado():
+        return snap
+    return None
+
+
+def get_catalogo(db: Session) -> CatalogoParametroHijo:
+    """Devuelve el snapshot vigente, recargándolo si cambió la versión o venció el TTL."""
+    global _snapshot
+    snap = _vigente()
+    if snap is not None:
+        return snap
+    with _lock:
+        snap = _snapshot
+        if snap is None or snap.version != _version or snap.expirado():
+            nuevo = _cargar(db, _version)
+            nuevo.heredar_indices(snap)
+            _snapshot = snap = nuevo
+        return snap
+
+
+async def get_catalogo_async(db: "AsyncSession") -> CatalogoParametroHijo:
+    """Como get_catalogo, cargando con una sesión asíncrona (sin bloquear el event loop)."""
+    global _snapshot
+    snap = _vigente()
+    if snap is not None:
+        return snap
+    # La consulta no puede hacerse bajo el lock de hilos: se admite una carga duplicada ocasional
+    version = _version
+    snap = _construir((await db.execute(_consulta())).all(), version)
+    snap.heredar_indices(_snapshot)
+    with _lock:
+        if _snapshot is None or _snapshot.version != _version or _snapshot.expirado():
+            _snapshot = snap
+    return snap
+
+
+def invalidate() -> None:
+    """Incrementa la versión; el siguiente acceso recarga el catálogo."""
+    global _version
+    with _lock:
+        _version += 1
+
+
+def aplicar(id_parametro_hijo: int, item: Optional[ParametroHijoItem]) -> None:
+    """Registra una escritura local ya confirmada (item None = eliminado).
+
+    Si hay un snapshot vigente se deriva uno nuevo con el cambio (sin ir a la BD ni
+    reconstruir los índices de búsqueda); si no, equivale a invalidate().
+    """
+    global _version, _snapshot
+    with _lock:
+        snap = _snapshot
+        vigente = snap is not None and snap.version == _version and not snap.expirado()
+        _version += 1
+        if vigente:
+            _snapshot = snap.con_cambio(id_parametro_hijo, item, version=_version)
+
+
+def version() -> int:
+    return _version
@@ -1,8 +1,14 @@
-from typing import List
+from typing import TYPE_CHECKING, List
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 
 from app.models.parametro_hijo import ParametroHijo
+from app.repositories import parametro_hijo_catalog
+from app.repositories.parametro_hijo_catalog import ParametroHijoItem
+from app.db.session import lectura
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
 
 
 class ParametroHijoRepository:
@@ -14,12 +20,14 @@ class ParametroHijoRepository:
         self.db.add(hijo)
         self.db.commit()
         self.db.refresh(hijo)
+        parametro_hijo_catalog.aplicar(hijo.id_parametrohijo, parametro_hijo_catalog.item_de(hijo))
         return hijo
 
 
     def obtener_id(self, id_parametro_hijo: int) -> ParametroHijo | None:
         return self.db.get(ParametroHijo, id_parametro_hijo)
 
+    @lectura
     def list(self, *, skip: int = 0, limit: int = 1000) -> List[ParametroHijo]:
         return (
             self.db.query(ParametroHijo)  # type: ignore[attr-defined]
@@ -42,6 +50,7 @@ class ParametroHijoRepository:
             hijo.estado = estado
         self.db.commit()
         self.db.refresh(hijo)
+        parametro_hijo_catalog.aplicar(hijo.id_parametrohijo, parametro_hijo_catalog.item_de(hijo))
         return hijo
   
 
@@ -51,6 +60,7 @@ class ParametroHijoRepository:
             return False
         self.db.delete(hijo)
         self.db.commit()
+        parametro_hijo_catalog.aplicar(id_parametro_hijo, None)
         return True
 
     def papa(self, parametro_id: int) -> List[ParametroHijo]:
@@ -67,17 +77,55 @@ class ParametroHijoRepository:
         hijo.estado = not hijo.estado
         self.db.commit()
         self.db.refresh(hijo)
+        parametro_hijo_catalog.aplicar(hijo.id_parametrohijo, parametro_hijo_catalog.item_de(hijo))
         return True
 
-    # Búsquedas auxiliares
-    def find_by_nombre_exact(self, nombre: str) -> ParametroHijo | None:
+    # Búsquedas auxiliares (servidas desde el catálogo en memoria)
+    def obtener_id_cacheado(self, id_parametro_hijo: int) -> ParametroHijoItem | None:
+        """
+        Igual que obtener_id pero desde el catálogo en memoria (solo lectura).
+        """
+        if id_parametro_hijo is None:
+            return None
+        return parametro_hijo_catalog.get_catalogo(self.db).obtener(id_parametro_hijo)
+
+    def find_by_nombre_exact(self, nombre: str, parametro_id: int | None = None) -> ParametroHijoItem | None:
         """
         Busca un ParametroHijo por nombre con comparación exacta case-insensitive.
+        Opcionalmente restringe la búsqueda a un parametro_id.
         """
         if not isinstance(nombre, str) or not nombre:
             return None
-        return (
-            self.db.query(ParametroHijo)  # type: ignore[attr-defined]
-            .filter(func.lower(ParametroHijo.nombre) == func.lower(nombre))
-            .first()
-        )
+        return parametro_hijo_catalog.get_catalogo(self.db).buscar_nombre(nombre, parametro_id)
+
+    def hijos_cacheados(self, parametro_id: int) -> List[ParametroHijoItem]:
+        """Hijos de un parámetro desde el catálogo en memoria."""
+        return list(parametro_hijo_catalog.get_catalogo(self.db).hijos(parametro_id))
+
+
+class AsyncParametroHijoRepository:
+    """Lecturas de ParametroHijoRepository con AsyncSession (el catálogo en memoria es el mismo)."""
+
+    def __init__(self, db: "AsyncSession") -> None:
+        self.db = db
+
+    async def obtener_id(self, id_parametro_hijo: int) -> ParametroHijo | None:
+        return await self.db.get(ParametroHijo, id_parametro_hijo)
+
+    async def list(self, *, skip: int = 0, limit: int = 1000) -> List[ParametroHijo]:
+        stmt = select(ParametroHijo).offset(skip).limit(limit)
+        return list((await self.db.scalars(stmt)).all())
+
+    async def papa(self, parametro_id: int) -> List[ParametroHijo]:
+        stmt = select(ParametroHijo).where(ParametroHijo.parametro_id == parametro_id)
+        return list((await self.db.scalars(stmt)).all())
+
+    async def catalogo(self) -> parametro_hijo_catalog.CatalogoParametroHijo:
+        return await parametro_hijo_catalog.get_catalogo_async(self.db)
+
+    async def hijos_cacheados(self, parametro_id: int) -> List[ParametroHijoItem]:
+        return list((await self.catalogo()).hijos(parametro_id))
+
+    async def buscar(self, parametro_id: int, consulta: str, *, limit: int = 20, solo_activos: bool = True) -> List[ParametroHijoItem]:
+        """Autocompletado sobre el índice en memoria del catálogo (código y palabras sin tildes)."""
+        return (await self.catalogo()).buscar(parametro_id, consulta, limit=limit, solo_activos=solo_activos)
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import heapq
+import re
+import unicodedata
+from bisect import bisect_left, insort
+from typing import TYPE_CHECKING, Dict, Iterable, List, Set, Tuple
+
+if TYPE_CHECKING:
+    from app.repositories.parametro_hijo_catalog import ParametroHijoItem
+
+
+_NO_ALFANUMERICO = re.compile(r"[^0-9a-z]+")
+# Tope de la clave de rango: mayor que cualquier carácter de un texto normalizado
+_FIN = "\uffff"
+
+
+def normalizar_texto(texto: str) -> str:
+    """Minúsculas sin tildes: 'Infección' -> 'infeccion'."""
+    descompuesto = unicodedata.normalize("NFKD", texto or "")
+    return "".join(c for c in descompuesto if not unicodedata.combining(c)).casefold()
+
+
+def palabras(texto: str) -> List[str]:
+    return [p for p in _NO_ALFANUMERICO.split(normalizar_texto(texto)) if p]
+
+
+def clave_codigo(texto: str) -> str:
+    # 'A00.0', 'a00 0' y 'A000' son el mismo código CIE-10
+    return _NO_ALFANUMERICO.sub("", normalizar_texto(texto))
+
+
+def _rango(arreglo: List[Tuple[str, int]], prefijo: str) -> Tuple[int, int]:
+    return bisect_left(arreglo, (prefijo,)), bisect_left(arreglo, (prefijo + _FIN,))
+
+
+class IndiceBusqueda:
+    """Índice de búsqueda de los hijos de un parametro_id (p. ej. los ~12k diagnósticos CIE-10).
+
+    - `codigos`: (código normalizado, id) ordenado; los prefijos se resuelven con bisect.
+    - `tokens`: (palabra normalizada, id) de nombre y descripción, ordenado; cada palabra
+      de la consulta es prefijo de alguna palabra del ítem ("fieb tifo").
+    Inmutable: los cambios producen un índice nuevo (con_cambios) sin volver a tokenizar todo.
+    """
+
+    def __init__(
+        self,
+        items: Dict[int, "ParametroHijoItem"],
+        codigos: List[Tuple[str, int]],
+        tokens: List[Tuple[str, int]],
+        palabras_item: Dict[int, Tuple[str, ...]],
+    ) -> None:
+        self.items = items
+        self.codigos = codigos
+        self.tokens = tokens
+        self.palabras_item = palabras_item
+
+    @classmethod
+    def construir(cls, items: Iterable["ParametroHijoItem"]) -> "IndiceBusqueda":
+        indice = cls({}, [], [], {})
+        for item in items:
+            indice._agregar(item)
+        indice.codigos.sort()
+        indice.tokens.sort()
+        return indice
+
+    def _entradas(self, item: "ParametroHijoItem") -> Tuple[Tuple[str, int], List[Tuple[str, int]], Tuple[str, ...]]:
+        id_ = item.id_parametrohijo
+        nombre = palabras(item.nombre or "")
+        # Texto con el que se ordena: la descripción (diagnósticos) o el nombre (EPS, servicios...)
+        texto = tuple(palabras(item.descripcion)) if item.descripcion else tuple(nombre)
+        tokens = [(p, id_) for p in set(nombre).union(texto)]
+        return (clave_codigo(item.nombre or ""), id_), tokens, texto
+
+    def _agregar(self, item: "ParametroHijoItem", *, ordenado: bool = False) -> None:
+        codigo, tokens, texto = self._entradas(item)
+        self.items[item.id_parametrohijo] = item
+        self.palabras_item[item.id_parametrohijo] = texto
+        if ordenado:
+            insort(self.codigos, codigo)
+            for token in tokens:
+                insort(self.tokens, token)
+        else:
+            self.codigos.append(codigo)
+            self.tokens.extend(tokens)
+
+    def _quitar(self, item: "ParametroHijoItem") -> None:
+        codigo, tokens, _ = self._entradas(item)
+        self.items.pop(item.id_parametrohijo, None)
+        self.palabras_item.pop(item.id_parametrohijo, None)
+        for arreglo, entradas in ((self.codigos, [codigo]), (self.tokens, tokens)):
+            for entrada in entradas:
+                i = bisect_left(arreglo, entrada)
+                if i < len(arreglo) and arreglo[i] == entrada:
+                    del arreglo[i]
+
+    def con_cambios(
+        self, *, quitar: Iterable["ParametroHijoItem"] = (), agregar: Iterable["ParametroHijoItem"] = ()
+    ) -> "IndiceBusqueda":
+        """Copia del índice con ítems quitados/agregados (solo se tokenizan los que cambian)."""
+        nuevo = IndiceBusqueda(dict(self.items), list(self.codigos), list(self.tokens), dict(self.palabras_item))
+        for item in quitar:
+            nuevo._quitar(item)
+        for item in agregar:
+            nuevo._agregar(item, ordenado=True)
+        return nuevo
+
+    def _por_palabra(self, prefijo: str) -> Set[int]:
+        inicio, fin = _rango(self.tokens, prefijo)
+        return {id_ for _, id_ in self.tokens[inicio:fin]}
+
+    def buscar(self, consulta: str, *, limit: int = 20, solo_activos: bool = True) -> List["ParametroHijoItem"]:
+        """Hasta `limit` ítems: código exacto, luego prefijo de código, luego coincidencia por palabras."""
+        clave = clave_codigo(consulta)
+        if not clave or limit <= 0:
+            return []
+
+        resultado: List["ParametroHijoItem"] = []
+        vistos: Set[int] = set()
+        # 1) Código: el arreglo ordenado deja el código exacto primero y el resto en orden de código
+        inicio, fin = _rango(self.codigos, clave)
+        for _, id_ in self.codigos[inicio:fin]:
+            item = self.items[id_]
+            if solo_activos and not item.estado:
+                continue
+            resultado.append(item)
+            vistos.add(id_)
+            if len(resultado) >= limit:
+                return resultado
+
+        # 2) Palabras: todas las de la consulta deben ser prefijo de alguna palabra del ítem
+        consulta_palabras = palabras(consulta)
+        if not consulta_palabras:
+            return resultado
+        conjuntos = sorted((self._por_palabra(p) for p in set(consulta_palabras)), key=len)
+        candidatos = conjuntos[0].intersection(*conjuntos[1:]) - vistos
+        if solo_activos:
+            candidatos = {id_ for id_ in candidatos if self.items[id_].estado}
+
+        primera = consulta_palabras[0]
+        exactas = set(consulta_palabras)
+
+        def orden(id_: int):
+            texto = self.palabras_item[id_]
+            return (
+                # El texto empieza por lo buscado ("fiebre" -> "FIEBRE TIFOIDEA" antes que "OTRAS FIEBRES")
+                0 if texto and texto[0].startswith(primera) else 1,
+                -len(exactas.intersection(texto)),
+                len(texto),
+                self.items[id_].nombre or "",
+            )
+
+        resultado.extend(self.items[id_] for id_ in heapq.nsmallest(limit - len(resultado), candidatos, key=orden))
+        return resultado
@@ -2,6 +2,7 @@ from typing import List
 from sqlalchemy.orm import Session
 
 from app.models.parametro import Parametro
+from app.db.session import lectura
 
 
 class ParametroRepository:
@@ -20,6 +21,7 @@ class ParametroRepository:
     def get(self, id_parametro: int) -> Parametro | None:
         return self.db.get(Parametro, id_parametro)
 
+    @lectura
     def list(self, *, skip: int = 0, limit: int = 100) -> List[Parametro]:
         return (
             self.db.query(Parametro)  # type: ignore[attr-defined]
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, AbstractSet, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.config.settings import get_env
+from app.models.archivo import Archivo
+from app.models.relacion import Relacion
+from app.models.tipo_incapacidad import TipoIncapacidad
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+# Segundos antes de recargar aunque no haya escrituras locales (cambios hechos por otros nodos)
+RELACION_CACHE_TTL = float(get_env("RELACION_CACHE_TTL", "300") or 300)
+
+
+@dataclass(frozen=True)
+class ArchivoItem:
+    """Copia inmutable de un archivo requerido (mismos atributos que el modelo)."""
+    id_archivo: int
+    nombre: str
+    descripcion: Optional[str]
+    estado: bool
+
+
+@dataclass(frozen=True)
+class RelacionItem:
+    tipo_incapacidad_id: int
+    tipo_incapacidad_nombre: Optional[str]
+    archivo_id: int
+    archivo_nombre: Optional[str]
+
+    def como_dict(self) -> dict:
+        return {
+            "tipo_incapacidad_id": self.tipo_incapacidad_id,
+            "tipo_incapacidad_nombre": self.tipo_incapacidad_nombre,
+            "archivo_id": self.archivo_id,
+            "archivo_nombre": self.archivo_nombre,
+        }
+
+
+class MatrizRelacion:
+    """Snapshot de la matriz tipo_incapacidad -> archivos requeridos, con nombres resueltos.
+
+    Inmutable: una escritura publica un snapshot nuevo y los lectores siguen usando el
+    que ya tenían. Los listados y el cumplimiento de documentos no consultan la BD.
+    """
+
+    def __init__(
+        self,
+        pares: Iterable[Tuple[int, int]],
+        tipos: Dict[int, str],
+        archivos: Dict[int, ArchivoItem],
+        *,
+        version: int,
+    ) -> None:
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.archivos = archivos
+        relaciones = []
+        for tipo_id, archivo_id in sorted(set(pares)):
+            archivo = archivos.get(archivo_id)
+            relaciones.append(RelacionItem(tipo_id, tipos.get(tipo_id), archivo_id, archivo.nombre if archivo else None))
+        self.relaciones: Tuple[RelacionItem, ...] = tuple(relaciones)
+        por_tipo: Dict[int, List[RelacionItem]] = {}
+        for rel in self.relaciones:
+            por_tipo.setdefault(rel.tipo_incapacidad_id, []).append(rel)
+        self.por_tipo: Dict[int, Tuple[RelacionItem, ...]] = {k: tuple(v) for k, v in por_tipo.items()}
+        self._requeridos: Dict[int, FrozenSet[int]] = {
+            k: frozenset(r.archivo_id for r in v) for k, v in self.por_tipo.items()
+        }
+
+    def listar(self, *, skip: int = 0, limit: int = 1000) -> List[dict]:
+        return [r.como_dict() for r in self.relaciones[skip:skip + limit]]
+
+    def de_tipo(self, tipo_incapacidad_id: int) -> List[dict]:
+        return [r.como_dict() for r in self.por_tipo.get(tipo_incapacidad_id, ())]
+
+    def archivos_de(self, tipo_incapacidad_id: int) -> List[ArchivoItem]:
+        # Como el JOIN con archivo: se omiten relaciones a archivos inexistentes
+        return [
+            self.archivos[r.archivo_id]
+            for r in self.por_tipo.get(tipo_incapacidad_id, ())
+            if r.archivo_id in self.archivos
+        ]
+
+    def requeridos(self, tipo_incapacidad_id: int) -> List[int]:
+        return [r.archivo_id for r in self.por_tipo.get(tipo_incapacidad_id, ())]
+
+    def faltantes(self, tipo_incapacidad_id: int, subidos: AbstractSet[int]) -> FrozenSet[int]:
+        return self._requeridos.get(tipo_incapacidad_id, frozenset()) - subidos
+
+    def cumplimiento(self, tipo_incapacidad_id: int, subidos: AbstractSet[int]) -> List[dict]:
+        """Estado de cada documento requerido por el tipo (mismo formato que documentos_cumplimiento)."""
+        return [
+            {
+                "archivo_id": r.archivo_id,
+                "requerido": True,
+                "subido": r.archivo_id in subidos,
+                "completo": r.archivo_id in subidos,
+            }
+            for r in self.por_tipo.get(tipo_incapacidad_id, ())
+        ]
+
+    def expirado(self) -> bool:
+        return (time.monotonic() - self.loaded_at) > RELACION_CACHE_TTL
+
+
+_lock = threading.Lock()
+_version = 0
+_snapshot: Optional[MatrizRelacion] = None
+
+
+def _consultas():
+    relacionados = select(Relacion.archivo_id)
+    tipos = select(Relacion.tipo_incapacidad_id)
+    # archivo también guarda los documentos subidos: solo se cargan los que aparecen en relacion
+    return (
+        select(Relacion.tipo_incapacidad_id, Relacion.archivo_id),
+        select(TipoIncapacidad.id_tipo_incapacidad, TipoIncapacidad.nombre)
+        .where(TipoIncapacidad.id_tipo_incapacidad.in_(tipos)),
+        select(Archivo.id_archivo, Archivo.nombre, Archivo.descripcion, Archivo.estado)
+        .where(Archivo.id_archivo.in_(relacionados)),
+    )
+
+
+def _construir(pares, tipos, archivos, version: int) -> MatrizRelacion:
+    return MatrizRelacion(
+        [(t, a) for t, a in pares],
+        {id_: nombre for id_, nombre in tipos},
+        {a.id_archivo: ArchivoItem(a.id_archivo, a.nombre, a.descripcion, bool(a.estado)) for a in archivos},
+        version=version,
+    )
+
+
+def _vigente() -> Optional[MatrizRelacion]:
+    snap = _snapshot
+    if snap is not None and snap.version == _version and not snap.expirado():
+        return snap
+    return None
+
+
+def get_matriz(db: Session) -> MatrizRelacion:
+    """Devuelve el snapshot vigente, recargándolo si cambió la versión o venció el TTL (3 consultas)."""
+    global _snapshot
+    snap = _vigente()
+    if snap is not None:
+        return snap
+    with _lock:
+        snap = _snapshot
+        if snap is None or snap.version != _version or snap.expirado():
+            _snapshot = snap = _construir(*(db.execute(q).all() for q in _consultas()), _version)
+        return snap
+
+
+async def get_matriz_async(db: "AsyncSession") -> MatrizRelacion:
+    """Como get_matriz, cargando con una sesión asíncrona (sin bloquear el event loop)."""
+    global _snapshot
+    snap = _vigente()
+    if snap is not None:
+        return snap
+    # La consulta no puede hacerse bajo el lock de hilos: se admite una carga duplicada ocasional
+    version = _version
+    snap = _construir(*[(await db.execute(q)).all() for q in _consultas()], version)
+    with _lock:
+        if _snapshot is None or _snapshot.version != _version or _snapshot.expirado():
+            _snapshot = snap
+    return snap
+
+
+def invalidate() -> None:
+    """Incrementa la versión; el siguiente acceso recarga la matriz."""
+    global _version
+    with _lock:
+        _version += 1
+
+
+def recargar(db: Session) -> MatrizRelacion:
+    """Tras una escritura confirmada en relacion/archivo/tipo_incapacidad: publica la matriz nueva.
+
+    Se carga en el request que escribió; los lectores pasan del snapshot anterior al nuevo
+    sin ver estados intermedios ni esperar la recarga.
+    """
+    invalidate()
+    return get_matriz(db)
+
+
+def version() -> int:
+    return _version
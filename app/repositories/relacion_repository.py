@@ -1,8 +1,9 @@
-from typing import List
+from typing import Iterable, List
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 
 from app.models.relacion import Relacion
+from app.db.session import lectura
 
 
 class RelacionRepository:
@@ -10,6 +11,7 @@ class RelacionRepository:
         self.db = db
 
     # Read
+    @lectura
     def list(self, *, skip: int = 0, limit: int = 1000) -> List[Relacion]:
         return (
             self.db.query(Relacion)  # type: ignore[attr-defined]
@@ -62,9 +64,21 @@ class RelacionRepository:
         return True
 
     # Read by tipo_incapacidad_id
+    @lectura
     def list_by_tipo_incapacidad(self, *, tipo_incapacidad_id: int) -> List[Relacion]:
         return (
             self.db.query(Relacion)
             .filter(Relacion.tipo_incapacidad_id == tipo_incapacidad_id)
             .all()
         )
+
+    @lectura
+    def list_by_tipos_incapacidad(self, tipo_incapacidad_ids: Iterable[int]) -> List[Relacion]:
+        ids = {t for t in tipo_incapacidad_ids if t is not None}
+        if not ids:
+            return []
+        return (
+            self.db.query(Relacion)
+            .filter(Relacion.tipo_incapacidad_id.in_(ids))
+            .all()
+        )
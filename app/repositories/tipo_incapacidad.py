@@ -1,7 +1,12 @@
-from typing import List
+from typing import TYPE_CHECKING, Iterable, List
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.models.tipo_incapacidad import TipoIncapacidad
+from app.db.session import lectura
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
 
 
 class TipoIncapacidadRepository:
@@ -23,6 +28,19 @@ class TipoIncapacidadRepository:
     def obtener_id(self, id_tipo_incapacidad: int) -> TipoIncapacidad | None:
         return self.get(id_tipo_incapacidad)
 
+    @lectura
+    def get_many(self, ids: Iterable[int]) -> dict[int, TipoIncapacidad]:
+        ids = {i for i in ids if i is not None}
+        if not ids:
+            return {}
+        rows = (
+            self.db.query(TipoIncapacidad)  # type: ignore[attr-defined]
+            .filter(TipoIncapacidad.id_tipo_incapacidad.in_(ids))
+            .all()
+        )
+        return {r.id_tipo_incapacidad: r for r in rows}
+
+    @lectura
     def list(self, *, skip: int = 0, limit: int = 100) -> List[TipoIncapacidad]:
         return (
             self.db.query(TipoIncapacidad)  # type: ignore[attr-defined]
@@ -58,3 +76,13 @@ class TipoIncapacidadRepository:
         return True
 
 
+class AsyncTipoIncapacidadRepository:
+    def __init__(self, db: "AsyncSession") -> None:
+        self.db = db
+
+    async def get_many(self, ids: Iterable[int]) -> dict[int, TipoIncapacidad]:
+        ids = {i for i in ids if i is not None}
+        if not ids:
+            return {}
+        stmt = select(TipoIncapacidad).where(TipoIncapacidad.id_tipo_incapacidad.in_(ids))
+        return {r.id_tipo_incapacidad: r for r in (await self.db.scalars(stmt)).all()}
@@ -1,9 +1,14 @@
-from typing import Optional, List
+from typing import TYPE_CHECKING, Optional, List, Iterable
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select
 
 
+from app.core import principal_cache
 from app.models.usuario import Usuario
+from app.db.session import lectura
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
 
 
 class UsuarioRepository:
@@ -13,6 +18,19 @@ class UsuarioRepository:
     def get(self, id_usuario: int) -> Usuario | None:
         return self.db.get(Usuario, id_usuario)
 
+    @lectura
+    def get_nombres(self, ids: Iterable[int]) -> dict[int, str]:
+        """Nombre completo por id_usuario para un conjunto de ids en una sola consulta."""
+        ids = {i for i in ids if i is not None}
+        if not ids:
+            return {}
+        rows = (
+            self.db.query(Usuario.id_usuario, Usuario.nombre_completo)  # type: ignore[attr-defined]
+            .filter(Usuario.id_usuario.in_(ids))
+            .all()
+        )
+        return {r.id_usuario: r.nombre_completo for r in rows}
+
     def get_by_email(self, correo_electronico: str) -> Usuario | None:
         # Comparación normalizada: TRIM + LOWER en DB vs valor normalizado en app
         correo_norm = (correo_electronico or "").strip().lower()
@@ -53,6 +71,7 @@ class UsuarioRepository:
         self.db.refresh(entity)
         return entity
 
+    @lectura
     def list(self, *, skip: int = 0, limit: int = 1000) -> List[Usuario]:
         return (
             self.db.query(Usuario)  # type: ignore[attr-defined]
@@ -66,6 +85,16 @@ class UsuarioRepository:
         if entity is None:
             return False
         entity.estado = estado
+        principal_cache.invalidar(id_usuario, self.db)
+        self.db.commit()
+        principal_cache.descartar(id_usuario)
+        return True
+
+    def set_password(self, id_usuario: int, password_hashed: str) -> bool:
+        entity = self.get(id_usuario)
+        if entity is None:
+            return False
+        entity.password = password_hashed
         self.db.commit()
         return True
 
@@ -85,5 +114,29 @@ class UsuarioRepository:
             entity.correo_electronico = correo_electronico
         if telefono is not None:
             entity.telefono = telefono
+        principal_cache.invalidar(id_usuario, self.db)
         self.db.commit()
+        principal_cache.descartar(id_usuario)
         return True
+
+
+class AsyncUsuarioRepository:
+    """Lecturas de UsuarioRepository con AsyncSession (las escrituras siguen en la versión síncrona)."""
+
+    def __init__(self, db: "AsyncSession") -> None:
+        self.db = db
+
+    async def get(self, id_usuario: int) -> Usuario | None:
+        return await self.db.get(Usuario, id_usuario)
+
+    async def get_nombres(self, ids: Iterable[int]) -> dict[int, str]:
+        ids = {i for i in ids if i is not None}
+        if not ids:
+            return {}
+        stmt = select(Usuario.id_usuario, Usuario.nombre_completo).where(Usuario.id_usuario.in_(ids))
+        return {r.id_usuario: r.nombre_completo for r in (await self.db.execute(stmt)).all()}
+
+    async def get_by_email(self, correo_electronico: str) -> Usuario | None:
+        correo_norm = (correo_electronico or "").strip().lower()
+        stmt = select(Usuario).where(func.lower(func.trim(Usuario.correo_electronico)) == correo_norm).limit(1)
+        return (await self.db.scalars(stmt)).first()
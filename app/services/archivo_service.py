@@ -1,16 +1,20 @@
 from typing import List
 from sqlalchemy.orm import Session
 
+from app.core import http_cache
+from app.repositories import relacion_matriz
 from app.models.archivo import Archivo
 from app.repositories.archivo_repository import ArchivoRepository
 from app.schemas.archivo import ArchivoCreate, ArchivoOut, ArchivoUpdate
 
 class ArchivoService:
     def __init__(self, db: Session) -> None:
+        self.db = db
         self.repoin = ArchivoRepository(db)
         
     def create(self, payload: ArchivoCreate) -> ArchivoOut:
         entity = self.repoin.create(payload)
+        http_cache.invalidar("archivo")
         return ArchivoOut.model_validate(entity)
 
     def get(self, id_archivo: int) -> ArchivoOut | None:
@@ -28,11 +32,25 @@ class ArchivoService:
             descripcion=payload.descripcion,
             estado=payload.estado,
         )
-        return None if entity is None else ArchivoOut.model_validate(entity)
+        if entity is None:
+            return None
+        http_cache.invalidar("archivo")
+        self._actualizar_matriz(id_archivo)
+        return ArchivoOut.model_validate(entity)
 
     def delete(self, id_archivo: int) -> bool:
-        return self.repoin.delete(id_archivo)
+        eliminado = self.repoin.delete(id_archivo)
+        if eliminado:
+            # Por si la BD elimina en cascada sus relaciones
+            http_cache.invalidar("archivo", "relacion")
+            self._actualizar_matriz(id_archivo)
+        return eliminado
+
+    def _actualizar_matriz(self, id_archivo: int) -> None:
+        # Solo los archivos requeridos por algún tipo están en la matriz (no los documentos subidos)
+        if id_archivo in relacion_matriz.get_matriz(self.db).archivos:
+            relacion_matriz.recargar(self.db)
 
     def list_by_tipo_incapacidad(self, tipo_incapacidad_id: int) -> List[ArchivoOut]:
-        items = self.repoin.list_by_tipo_incapacidad(tipo_incapacidad_id)
+        items = relacion_matriz.get_matriz(self.db).archivos_de(tipo_incapacidad_id)
         return [ArchivoOut.model_validate(x) for x in items]
\ No newline at end of file
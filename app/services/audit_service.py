@@ -6,6 +6,10 @@ from sqlalchemy.orm import Session
 from datetime import datetime
 from enum import Enum
 
+from app.core.pagination import decode_cursor, encode_cursor
+from app.repositories.audit_log_repository import AuditLogRepository
+from app.services import audit_writer
+
 
 class AuditAction(str, Enum):
     CREATE = "CREATE"
@@ -20,6 +24,42 @@ class AuditService:
         self.db = db
         self.logger = logging.getLogger(__name__)
 
+    def _registrar(self, *, action: str, entity_type: str, entity_id: Optional[int], user_id: Optional[int],
+                   details: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Encola el evento para audit_log (escritura por lotes en segundo plano) y lo retorna
+        en el formato usado por los logs.
+        """
+        fecha = datetime.now()
+        audit_writer.registrar({
+            "fecha": fecha,
+            "accion": action,
+            "entidad": entity_type,
+            "entidad_id": entity_id,
+            "usuario_id": user_id,
+            "detalles": details,
+        })
+        return {
+            "timestamp": fecha.isoformat(),
+            "action": action,
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            "user_id": user_id,
+            "details": details,
+        }
+
+    @staticmethod
+    def _to_dict(entry) -> Dict[str, Any]:
+        return {
+            "id": entry.id_audit,
+            "timestamp": entry.fecha.isoformat() if entry.fecha else None,
+            "action": entry.accion,
+            "entity_type": entry.entidad,
+            "entity_id": entry.entidad_id,
+            "user_id": entry.usuario_id,
+            "details": entry.detalles or {},
+        }
+
     def log_incapacity_action(self, 
                             action: AuditAction,
                             incapacidad_id: int,
@@ -29,17 +69,14 @@ class AuditService:
         Registra una acción de auditoría en una incapacidad.
         """
         try:
-            audit_entry = {
-                "timestamp": datetime.now().isoformat(),
-                "action": action.value,
-                "entity_type": "incapacidad",
-                "entity_id": incapacidad_id,
-                "user_id": user_id,
-                "details": details or {}
-            }
+            audit_entry = self._registrar(
+                action=action.value,
+                entity_type="incapacidad",
+                entity_id=incapacidad_id,
+                user_id=user_id,
+                details=details or {}
+            )
             
-            # Por ahora, solo loggeamos la auditoría
-            # En un entorno real, guardarías en una tabla de auditoría
             self.logger.info(f"AUDIT: {audit_entry}")
             
             return True
@@ -57,18 +94,17 @@ class AuditService:
         Registra la subida de un archivo.
         """
         try:
-            audit_entry = {
-                "timestamp": datetime.now().isoformat(),
-                "action": AuditAction.CREATE.value,
-                "entity_type": "archivo",
-                "entity_id": file_id,
-                "user_id": user_id,
-                "details": {
+            audit_entry = self._registrar(
+                action=AuditAction.CREATE.value,
+                entity_type="archivo",
+                entity_id=file_id,
+                user_id=user_id,
+                details={
                     "filename": filename,
                     "file_size": file_size,
                     "file_type": "PDF"
                 }
-            }
+            )
             
             self.logger.info(f"AUDIT FILE UPLOAD: {audit_entry}")
             return True
@@ -85,17 +121,16 @@ class AuditService:
         Registra cambios administrativos en una incapacidad.
         """
         try:
-            audit_entry = {
-                "timestamp": datetime.now().isoformat(),
-                "action": AuditAction.UPDATE.value,
-                "entity_type": "incapacidad_administrativa",
-                "entity_id": incapacidad_id,
-                "user_id": admin_id,
-                "details": {
+            audit_entry = self._registrar(
+                action=AuditAction.UPDATE.value,
+                entity_type="incapacidad_administrativa",
+                entity_id=incapacidad_id,
+                user_id=admin_id,
+                details={
                     "changes": changes,
                     "admin_action": True
                 }
-            }
+            )
             
             self.logger.info(f"AUDIT ADMIN CHANGE: {audit_entry}")
             return True
@@ -116,20 +151,19 @@ class AuditService:
         try:
             status_names = {1: "Enviado", 2: "Revisado", 3: "Aprobado", 4: "Rechazado"}
             
-            audit_entry = {
-                "timestamp": datetime.now().isoformat(),
-                "action": AuditAction.STATUS_CHANGE.value,
-                "entity_type": "incapacidad",
-                "entity_id": incapacidad_id,
-                "user_id": user_id,
-                "details": {
+            audit_entry = self._registrar(
+                action=AuditAction.STATUS_CHANGE.value,
+                entity_type="incapacidad",
+                entity_id=incapacidad_id,
+                user_id=user_id,
+                details={
                     "old_status": old_status,
                     "new_status": new_status,
                     "old_status_name": status_names.get(old_status, f"Estado {old_status}"),
                     "new_status_name": status_names.get(new_status, f"Estado {new_status}"),
                     "reason": reason
                 }
-            }
+            )
             
             self.logger.info(f"AUDIT STATUS CHANGE: {audit_entry}")
             return True
@@ -147,9 +181,10 @@ class AuditService:
         Obtiene historial de auditoría para una entidad específica.
         """
         try:
-            # Por ahora, retornamos una lista vacía
-            # En un entorno real, consultarías la tabla de auditoría
-            return []
+            entries = AuditLogRepository(self.db).buscar(
+                entidad=entity_type, entidad_id=entity_id, skip=skip, limit=limit
+            )
+            return [self._to_dict(e) for e in entries]
             
         except Exception as e:
             self.logger.error(f"Error al obtener historial de auditoría: {str(e)}")
@@ -163,13 +198,48 @@ class AuditService:
         Obtiene historial de auditoría para un usuario específico.
         """
         try:
-            # Por ahora, retornamos una lista vacía
-            return []
+            entries = AuditLogRepository(self.db).buscar(usuario_id=user_id, skip=skip, limit=limit)
+            return [self._to_dict(e) for e in entries]
             
         except Exception as e:
             self.logger.error(f"Error al obtener historial de usuario: {str(e)}")
             return []
 
+    def buscar(self,
+               *,
+               entity_type: Optional[str] = None,
+               entity_id: Optional[int] = None,
+               user_id: Optional[int] = None,
+               action: Optional[str] = None,
+               desde: Optional[datetime] = None,
+               hasta: Optional[datetime] = None,
+               cursor: Optional[str] = None,
+               skip: int = 0,
+               limit: int = 100) -> Dict[str, Any]:
+        """
+        Consulta audit_log con filtros por entidad, usuario, acción y rango de fechas.
+        Retorna {"eventos": [...], "next_cursor": str | None}. Lanza ValueError si el cursor es inválido.
+        """
+        despues_de = None
+        if cursor:
+            fecha, id_audit = decode_cursor(cursor)
+            if fecha is None:
+                raise ValueError("Cursor de paginación inválido")
+            despues_de = (fecha, id_audit)
+        entries = AuditLogRepository(self.db).buscar(
+            entidad=entity_type,
+            entidad_id=entity_id,
+            usuario_id=user_id,
+            accion=action,
+            desde=desde,
+            hasta=hasta,
+            despues_de=despues_de,
+            skip=skip,
+            limit=limit,
+        )
+        next_cursor = encode_cursor(entries[-1].fecha, entries[-1].id_audit) if len(entries) == limit else None
+        return {"eventos": [self._to_dict(e) for e in entries], "next_cursor": next_cursor}
+
     def log_notification_sent(self,
                             notification_type: str,
                             recipient_id: int,
@@ -179,18 +249,17 @@ class AuditService:
         Registra el envío de una notificación.
         """
         try:
-            audit_entry = {
-                "timestamp": datetime.now().isoformat(),
-                "action": "NOTIFICATION_SENT",
-                "entity_type": "notificacion",
-                "entity_id": entity_id,
-                "user_id": sender_id,
-                "details": {
+            audit_entry = self._registrar(
+                action="NOTIFICATION_SENT",
+                entity_type="notificacion",
+                entity_id=entity_id,
+                user_id=sender_id,
+                details={
                     "notification_type": notification_type,
                     "recipient_id": recipient_id,
                     "sender_id": sender_id
                 }
-            }
+            )
             
             self.logger.info(f"AUDIT NOTIFICATION: {audit_entry}")
             return True
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import json
+import logging
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert
+
+from app.config.settings import get_env
+from app.db.session import engine
+from app.models.audit_log import AuditLog
+
+
+# Se escribe un lote cada AUDIT_BATCH_SIZE eventos o cada AUDIT_FLUSH_MS, lo que ocurra primero
+AUDIT_BATCH_SIZE = int(get_env("AUDIT_BATCH_SIZE", "200") or 200)
+AUDIT_FLUSH_MS = float(get_env("AUDIT_FLUSH_MS", "500") or 500)
+# Cola acotada: si la BD no da abasto el request espera como máximo AUDIT_ENQUEUE_TIMEOUT_MS
+# y luego el evento se descarta (queda en el log de la aplicación y en el contador "descartados")
+AUDIT_QUEUE_MAX = int(get_env("AUDIT_QUEUE_MAX", "10000") or 10000)
+AUDIT_ENQUEUE_TIMEOUT_MS = float(get_env("AUDIT_ENQUEUE_TIMEOUT_MS", "0") or 0)
+# Reintentos de un lote cuando falla el INSERT (la cola sigue llenándose mientras tanto)
+AUDIT_MAX_REINTENTOS = int(get_env("AUDIT_MAX_REINTENTOS", "3") or 3)
+# Los descartes se reportan como un resumen cada AUDIT_AVISO_DESCARTES_S como máximo
+AUDIT_AVISO_DESCARTES_S = 1.0
+
+logger = logging.getLogger(__name__)
+
+
+class AuditWriter:
+    """Escritor en segundo plano: acumula eventos y los inserta en audit_log por lotes."""
+
+    def __init__(
+        self,
+        bind=engine,
+        *,
+        batch_size: int = AUDIT_BATCH_SIZE,
+        flush_ms: float = AUDIT_FLUSH_MS,
+        queue_max: int = AUDIT_QUEUE_MAX,
+        enqueue_timeout_ms: float = AUDIT_ENQUEUE_TIMEOUT_MS,
+        max_reintentos: int = AUDIT_MAX_REINTENTOS,
+    ) -> None:
+        self.bind = bind
+        self.batch_size = max(1, batch_size)
+        self.flush_s = flush_ms / 1000.0
+        self.enqueue_timeout_s = enqueue_timeout_ms / 1000.0
+        self.max_reintentos = max_reintentos
+        self._cola: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=queue_max)
+        self._hilo: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._vaciado = threading.Condition(self._lock)
+        self._stats = {"encolados": 0, "escritos": 0, "descartados": 0, "lotes": 0, "errores": 0}
+        self._sin_reportar = 0
+        self._ultimo_aviso = 0.0
+
+    # ---------------- request path -----------------
+    def registrar(self, evento: Dict[str, Any]) -> bool:
+        """Encola un evento sin esperar a la BD. Retorna False si se descartó por cola llena."""
+        self._asegurar_hilo()
+        try:
+            if self.enqueue_timeout_s > 0:
+                self._cola.put(evento, timeout=self.enqueue_timeout_s)
+            else:
+                self._cola.put_nowait(evento)
+        except queue.Full:
+            # Con la BD lenta se descartan muchos eventos seguidos: un resumen por segundo
+            # en lugar de una línea por evento (no saturar la cola de logging)
+            with self._lock:
+                self._stats["descartados"] += 1
+                self._sin_reportar += 1
+            self._avisar_descartes()
+            return False
+        with self._lock:
+            self._stats["encolados"] += 1
+        return True
+
+    def estadisticas(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, "pendientes": self._cola.qsize(), "capacidad": self._cola.maxsize}
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Espera a que se escriba todo lo encolado hasta ahora (pruebas/apagado)."""
+        limite = time.monotonic() + timeout
+        with self._vaciado:
+            objetivo = self._stats["encolados"]
+            while self._stats["escritos"] + self._stats["errores"] < objetivo:
+                restante = limite - time.monotonic()
+                if restante <= 0 or self._hilo is None or not self._hilo.is_alive():
+                    return False
+                self._vaciado.wait(restante)
+        return True
+
+    def _avisar_descartes(self, forzar: bool = False) -> None:
+        with self._lock:
+            ahora = time.monotonic()
+            if not self._sin_reportar or (not forzar and ahora - self._ultimo_aviso < AUDIT_AVISO_DESCARTES_S):
+                return
+            descartados, self._sin_reportar = self._sin_reportar, 0
+            self._ultimo_aviso = ahora
+        logger.warning("AUDIT: %s eventos descartados (cola llena)", descartados)
+
+    def detener(self, timeout: float = 5.0) -> None:
+        with self._lock:
+            hilo, self._hilo = self._hilo, None
+        if hilo is None:
+            return
+        # Marca de fin: el hilo escribe lo pendiente y termina
+        try:
+            self._cola.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        hilo.join(timeout)
+        self._avisar_descartes(forzar=True)
+
+    # ---------------- hilo escritor -----------------
+    def _asegurar_hilo(self) -> None:
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        with self._lock:
+            if self._hilo is None or not self._hilo.is_alive():
+                self._hilo = threading.Thread(target=self._bucle, name="audit-writer", daemon=True)
+                self._hilo.start()
+
+    def _bucle(self) -> None:
+        fin = False
+        while not fin:
+            lote: List[Dict[str, Any]] = []
+            evento = self._cola.get()
+            if evento is None:
+                break
+            lote.append(evento)
+            limite = time.monotonic() + self.flush_s
+            while len(lote) < self.batch_size:
+                restante = limite - time.monotonic()
+                try:
+                    evento = self._cola.get(timeout=restante) if restante > 0 else self._cola.get_nowait()
+                except queue.Empty:
+                    break
+                if evento is None:
+                    fin = True
+                    break
+                lote.append(evento)
+            self._escribir(lote)
+            # Reportar descartes pendientes aunque ya no lleguen más eventos
+            self._avisar_descartes()
+
+    def _escribir(self, lote: List[Dict[str, Any]]) -> None:
+        # Los detalles pueden traer fechas/decimales: convertir a JSON aquí y no en el request.
+        # Un evento que no se puede serializar se descarta sin tumbar el hilo ni el lote.
+        validos = []
+        for evento in lote:
+            try:
+                if evento.get("detalles") is not None:
+                    evento["detalles"] = json.loads(json.dumps(evento["detalles"], default=str))
+            except (TypeError, ValueError) as exc:
+                logger.error("AUDIT descartado (detalles no serializables: %s): %r", exc, evento)
+                with self._vaciado:
+                    self._stats["errores"] += 1
+                    self._vaciado.notify_all()
+                continue
+            validos.append(evento)
+        lote = validos
+        if not lote:
+            return
+        for intento in range(1, self.max_reintentos + 1):
+            try:
+                with self.bind.begin() as conn:
+                    conn.execute(insert(AuditLog.__table__), lote)
+                with self._vaciado:
+                    self._stats["escritos"] += len(lote)
+                    self._stats["lotes"] += 1
+                    self._vaciado.notify_all()
+                return
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("AUDIT: fallo al escribir lote de %s eventos (intento %s/%s): %s",
+                               len(lote), intento, self.max_reintentos, exc)
+                if intento < self.max_reintentos:
+                    time.sleep(min(0.2 * 2 ** (intento - 1), 5.0))
+        # Último recurso: dejar los eventos en el log de la aplicación
+        for evento in lote:
+            logger.error("AUDIT no persistido: %s", evento)
+        with self._vaciado:
+            self._stats["errores"] += len(lote)
+            self._vaciado.notify_all()
+
+
+_writer: Optional[AuditWriter] = None
+_lock = threading.Lock()
+
+
+def get_writer() -> AuditWriter:
+    global _writer
+    if _writer is None:
+        with _lock:
+            if _writer is None:
+                _writer = AuditWriter()
+    return _writer
+
+
+def registrar(evento: Dict[str, Any]) -> bool:
+    return get_writer().registrar(evento)
+
+
+def estadisticas() -> Dict[str, int]:
+    return get_writer().estadisticas()
+
+
+def detener(timeout: float = 5.0) -> None:
+    global _writer
+    with _lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.detener(timeout)
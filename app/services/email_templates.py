@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import os
+import threading
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+
+from app.config.settings import get_env
+
+try:  # Dependencia para las plantillas de correo (requirements.txt)
+    import jinja2
+except ImportError:  # pragma: no cover - depende del entorno
+    jinja2 = None  # type: ignore
+
+
+# Plantillas por evento: <evento>.asunto.txt, <evento>.html y <evento>.txt
+PLANTILLAS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "templates", "email")
+# Con true se vuelven a compilar las plantillas modificadas en disco sin reiniciar (solo un stat por uso)
+EMAIL_TEMPLATES_AUTO_RELOAD = (get_env("EMAIL_TEMPLATES_AUTO_RELOAD", "false") or "false").lower() in ("1", "true", "yes")
+
+
+def _o(valor, defecto=""):
+    """Filtro `o`: usa `defecto` si el valor falta, es None o vacío (0 y False se conservan)."""
+    if jinja2 is not None and isinstance(valor, jinja2.Undefined):
+        return defecto
+    return defecto if valor is None or valor == "" else valor
+
+
+@dataclass(frozen=True)
+class CorreoRenderizado:
+    asunto: str
+    html: str
+    texto: str
+
+
+class PlantillasCorreo:
+    """Plantillas Jinja2 compiladas una sola vez por proceso (caché del Environment)."""
+
+    def __init__(self, directorio: str = PLANTILLAS_DIR, *, auto_reload: bool = EMAIL_TEMPLATES_AUTO_RELOAD) -> None:
+        if jinja2 is None:
+            raise RuntimeError("jinja2 no está instalado; es necesario para las plantillas de correo")
+        self.directorio = directorio
+        loader = jinja2.FileSystemLoader(directorio)
+        # Solo las partes .html se escapan (el texto plano y el asunto van tal cual)
+        autoescape = jinja2.select_autoescape(enabled_extensions=("html",), default_for_string=False)
+        self.env_html = jinja2.Environment(
+            loader=loader, autoescape=autoescape, auto_reload=auto_reload, undefined=jinja2.ChainableUndefined,
+        )
+        self.env_texto = jinja2.Environment(
+            loader=loader, autoescape=False, auto_reload=auto_reload, undefined=jinja2.ChainableUndefined,
+            keep_trailing_newline=False,
+        )
+        for env in (self.env_html, self.env_texto):
+            env.filters["o"] = _o
+
+    def eventos(self) -> List[str]:
+        return sorted(
+            nombre[: -len(".asunto.txt")]
+            for nombre in os.listdir(self.directorio)
+            if nombre.endswith(".asunto.txt")
+        )
+
+    def _plantillas(self, evento: str):
+        return (
+            self.env_texto.get_template(f"{evento}.asunto.txt"),
+            self.env_html.get_template(f"{evento}.html"),
+            self.env_texto.get_template(f"{evento}.txt"),
+        )
+
+    def renderizar(self, evento: str, contexto: dict) -> CorreoRenderizado:
+        return self.renderizar_lote(evento, contexto, [{}])[0]
+
+    def renderizar_lote(self, evento: str, comun: dict, por_destinatario: Iterable[dict]) -> List[CorreoRenderizado]:
+        """Renderiza una variante por destinatario: `comun` se combina con el contexto de cada uno."""
+        asunto, html, texto = self._plantillas(evento)
+        correos = []
+        for extra in por_destinatario:
+            contexto = {**comun, **extra} if extra else comun
+            correos.append(CorreoRenderizado(
+                asunto=" ".join(asunto.render(contexto).split()),
+                html=html.render(contexto),
+                texto=texto.render(contexto),
+            ))
+        return correos
+
+
+_plantillas: Optional[PlantillasCorreo] = None
+_lock = threading.Lock()
+
+
+def get_plantillas() -> PlantillasCorreo:
+    global _plantillas
+    if _plantillas is None:
+        with _lock:
+            if _plantillas is None:
+                _plantillas = PlantillasCorreo()
+    return _plantillas
+
+
+def renderizar(evento: str, contexto: dict) -> CorreoRenderizado:
+    return get_plantillas().renderizar(evento, contexto)
+
+
+def renderizar_lote(evento: str, comun: dict, por_destinatario: Iterable[dict]) -> List[CorreoRenderizado]:
+    return get_plantillas().renderizar_lote(evento, comun, por_destinatario)
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import logging
+import smtplib
+import threading
+from datetime import datetime, timedelta
+from typing import Optional
+
+from app.config.settings import get_env
+from app.db.session import SessionLocal
+from app.models.notificacion_correo import (
+    CORREO_ENVIADO,
+    CORREO_ERROR,
+    CORREO_PENDIENTE,
+    NotificacionCorreo,
+)
+from app.repositories.notificacion_correo_repository import NotificacionCorreoRepository
+from app.services import mail_transport
+
+
+SMTP_LOTE = int(get_env("SMTP_LOTE", "50") or 50)
+SMTP_MAX_INTENTOS = int(get_env("SMTP_MAX_INTENTOS", "5") or 5)
+# Espera antes del reintento n: base * 2**(n-1) segundos
+SMTP_RETRY_BASE_SECONDS = float(get_env("SMTP_RETRY_BASE_SECONDS", "30") or 30)
+# Revisión periódica de reintentos programados aunque nadie encole
+SMTP_POLL_SECONDS = float(get_env("SMTP_POLL_SECONDS", "30") or 30)
+
+logger = logging.getLogger(__name__)
+
+_hilo: Optional[threading.Thread] = None
+_despertar = threading.Event()
+_detener = threading.Event()
+_lock = threading.Lock()
+
+
+def iniciar() -> int:
+    """Arranca el hilo de envío (al iniciar el servidor). Retorna los correos retomados."""
+    global _hilo
+    db = SessionLocal()
+    try:
+        retomados = NotificacionCorreoRepository(db).liberar_en_curso()
+    finally:
+        db.close()
+    with _lock:
+        if _hilo is None or not _hilo.is_alive():
+            _detener.clear()
+            _hilo = threading.Thread(target=_bucle, name="correo-outbox", daemon=True)
+            _hilo.start()
+    _despertar.set()
+    return retomados
+
+
+def despertar() -> None:
+    """Avisa al hilo de envío que hay correos nuevos en la bandeja."""
+    _despertar.set()
+
+
+def detener(timeout: float = 5.0) -> None:
+    global _hilo
+    with _lock:
+        hilo, _hilo = _hilo, None
+    _detener.set()
+    _despertar.set()
+    if hilo is not None:
+        hilo.join(timeout)
+
+
+def _bucle() -> None:
+    while not _detener.is_set():
+        _despertar.wait(SMTP_POLL_SECONDS)
+        _despertar.clear()
+        try:
+            # Vaciar la bandeja por lotes mientras haya correos listos
+            while not _detener.is_set() and procesar_lote():
+                pass
+        except Exception:  # noqa: BLE001
+            logger.exception("Error procesando la bandeja de correos")
+
+
+def procesar_lote(limite: int = SMTP_LOTE) -> int:
+    """Envía hasta `limite` correos pendientes con el transporte SMTP compartido.
+
+    Usa su propia sesión (corre fuera del request). Retorna cuántos correos procesó.
+    """
+    db = SessionLocal()
+    try:
+        repo = NotificacionCorreoRepository(db)
+        correos = repo.reclamar(limite)
+        if not correos:
+            return 0
+        if not mail_transport.configuracion().configurado:
+            # Sin configuración SMTP solo se registra (mismo comportamiento que _send_email)
+            for correo in correos:
+                logger.warning("⚠️ SMTP no configurado; simulando envío a %s: %s", correo.destinatario, correo.asunto)
+                repo.update(correo.id_notificacion, estado=CORREO_ENVIADO, fecha_envio=datetime.now(), error=None)
+            return len(correos)
+
+        for correo in correos:
+            try:
+                mail_transport.enviar_correo(
+                    to_email=correo.destinatario,
+                    subject=correo.asunto,
+                    html_content=correo.html,
+                    text_content=correo.texto,
+                )
+            except (smtplib.SMTPException, OSError) as exc:
+                _fallo(repo, correo, exc)
+                continue
+            repo.update(correo.id_notificacion, estado=CORREO_ENVIADO, intentos=correo.intentos + 1,
+                        fecha_envio=datetime.now(), error=None)
+            logger.info("Correo %s enviado a %s", correo.id_notificacion, correo.destinatario)
+        return len(correos)
+    finally:
+        db.close()
+
+
+def _fallo(repo: NotificacionCorreoRepository, correo: NotificacionCorreo, exc: Exception) -> None:
+    intentos = correo.intentos + 1
+    logger.warning("Correo %s a %s: intento %s/%s falló: %s",
+                   correo.id_notificacion, correo.destinatario, intentos, SMTP_MAX_INTENTOS, exc)
+    if intentos >= SMTP_MAX_INTENTOS:
+        repo.update(correo.id_notificacion, estado=CORREO_ERROR, intentos=intentos, error=str(exc)[:500])
+        return
+    espera = SMTP_RETRY_BASE_SECONDS * 2 ** (intentos - 1)
+    repo.update(
+        correo.id_notificacion,
+        estado=CORREO_PENDIENTE,
+        intentos=intentos,
+        error=str(exc)[:500],
+        proximo_intento=datetime.now() + timedelta(seconds=espera),
+    )
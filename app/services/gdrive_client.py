@@ -0,0 +1,355 @@
+from __future__ import annotations
+
+import io
+import json
+import logging
+import os
+import threading
+import time
+from typing import BinaryIO, Callable, Dict, Optional
+from urllib.parse import urlparse
+
+from app.config.settings import get_env
+
+# Google Drive SDK
+try:
+    from google.auth.credentials import AnonymousCredentials
+    from google.auth.transport.requests import Request
+    from google.oauth2 import service_account
+    from google.oauth2.credentials import Credentials as OAuthCredentials
+    from google_auth_oauthlib.flow import Flow
+    from googleapiclient.discovery import build as gbuild, build_from_document
+    from googleapiclient.discovery_cache import get_static_doc
+    from googleapiclient.errors import HttpError
+    from googleapiclient.http import MediaIoBaseUpload
+except Exception:
+    AnonymousCredentials = None
+    Request = None
+    service_account = None
+    OAuthCredentials = None
+    Flow = None
+    gbuild = None
+    build_from_document = None
+    get_static_doc = None
+    HttpError = None
+    MediaIoBaseUpload = None
+
+
+SCOPES = [
+    "https://www.googleapis.com/auth/drive",
+    "https://www.googleapis.com/auth/drive.file",
+]
+FOLDER_MIME_TYPE = "application/vnd.google-apps.folder"
+
+logger = logging.getLogger(__name__)
+
+# Segundos que se recuerda una verificación de disponibilidad exitosa
+GDRIVE_CHECK_TTL_SECONDS = float(get_env("GDRIVE_CHECK_TTL", "300") or 300)
+# Tamaño de bloque de las subidas reanudables (Drive exige múltiplos de 256 KB)
+_BLOQUE_MINIMO = 256 * 1024
+GDRIVE_CHUNK_SIZE = max(1, int(get_env("GDRIVE_CHUNK_SIZE", str(1024 * 1024)) or 0) // _BLOQUE_MINIMO) * _BLOQUE_MINIMO
+# Reintentos por petición (5xx/errores de red) y fallos seguidos tolerados en una subida por bloques
+GDRIVE_NUM_RETRIES = int(get_env("GDRIVE_NUM_RETRIES", "3") or 3)
+GDRIVE_REANUDACIONES = int(get_env("GDRIVE_REANUDACIONES", "5") or 5)
+# Segundos antes de reintentar construir el cliente tras un fallo de configuración
+GDRIVE_RETRY_SECONDS = float(get_env("GDRIVE_RETRY_SECONDS", "60") or 60)
+
+
+class DriveClient:
+    """Cliente de Drive compartido por todo el proceso.
+
+    Las credenciales y el documento de descubrimiento se cargan una sola vez. Como los
+    objetos de googleapiclient (httplib2) no son seguros entre hilos, cada hilo obtiene su
+    propio servicio construido desde el documento en memoria (sin red ni disco).
+    """
+
+    def __init__(self, credentials, *, api_endpoint: str = "") -> None:
+        self.credentials = credentials
+        self.api_endpoint = api_endpoint
+        self._discovery = self._cargar_discovery(api_endpoint)
+        self._local = threading.local()
+        self._refresh_lock = threading.Lock()
+        self._folder_lock = threading.Lock()
+        self._folder_ids: Dict[str, str] = {}
+        self._verificado_hasta = 0.0
+
+    @staticmethod
+    def _cargar_discovery(api_endpoint: str) -> Optional[dict]:
+        # Documento empaquetado con googleapiclient, parseado una sola vez
+        raw = get_static_doc("drive", "v3") if get_static_doc else None
+        if not raw:
+            return None
+        doc = json.loads(raw)
+        if api_endpoint:
+            # Las subidas de media usan rootUrl: apuntarlo también al endpoint alterno
+            parts = urlparse(api_endpoint)
+            doc["rootUrl"] = f"{parts.scheme}://{parts.netloc}/"
+        return doc
+
+    def _build(self):
+        client_options = {"api_endpoint": self.api_endpoint} if self.api_endpoint else None
+        if self._discovery:
+            return build_from_document(self._discovery, credentials=self.credentials, client_options=client_options)
+        return gbuild("drive", "v3", credentials=self.credentials, client_options=client_options, cache_discovery=False)
+
+    def _asegurar_token(self) -> None:
+        # Un solo hilo renueva el token; los demás esperan y reutilizan el nuevo
+        if self.credentials.valid:
+            return
+        with self._refresh_lock:
+            if not self.credentials.valid:
+                self.credentials.refresh(Request())
+
+    def service(self):
+        """Servicio de Drive del hilo actual (con token vigente)."""
+        self._asegurar_token()
+        service = getattr(self._local, "service", None)
+        if service is None:
+            service = self._local.service = self._build()
+        return service
+
+    def folder_id(self, nombre: str, configurado: str = "") -> str:
+        """Id de la carpeta destino: el configurado, o el buscado/creado por nombre (memorizado)."""
+        if configurado:
+            return configurado
+        cached = self._folder_ids.get(nombre)
+        if cached:
+            return cached
+        with self._folder_lock:
+            cached = self._folder_ids.get(nombre)
+            if cached:
+                return cached
+            service = self.service()
+            q = f"mimeType='{FOLDER_MIME_TYPE}' and name='{nombre}' and trashed=false"
+            res = service.files().list(q=q, fields="files(id,name)").execute()
+            files = res.get("files", [])
+            if files:
+                folder_id = files[0]["id"]
+            else:
+                folder = service.files().create(
+                    body={"name": nombre, "mimeType": FOLDER_MIME_TYPE}, fields="id"
+                ).execute()
+                folder_id = folder.get("id")
+            if folder_id:
+                self._folder_ids[nombre] = folder_id
+            return folder_id or ""
+
+    def subir(self, fh: BinaryIO, *, nombre: str, mime_type: str, carpeta_id: str = "",
+              sesion: Optional[str] = None,
+              on_sesion: Optional[Callable[[Optional[str]], None]] = None) -> str:
+        """Sube el contenido de `fh` (leído por bloques), lo hace público con enlace y retorna la URL.
+
+        Archivos de hasta GDRIVE_CHUNK_SIZE van en una sola petición; los mayores por subida
+        reanudable. `sesion` es la URI de una subida interrumpida a retomar y `on_sesion`
+        recibe la URI nueva (para persistirla) o None si hubo que reiniciar.
+        """
+        service = self.service()
+        fh.seek(0, io.SEEK_END)
+        tamano = fh.tell()
+        fh.seek(0)
+        resumable = tamano > GDRIVE_CHUNK_SIZE
+        body = {"name": nombre}
+        if carpeta_id:
+            body["parents"] = [carpeta_id]
+
+        def crear_request():
+            media = MediaIoBaseUpload(fh, mimetype=mime_type, chunksize=GDRIVE_CHUNK_SIZE, resumable=resumable)
+            return service.files().create(
+                body=body,
+                media_body=media,
+                fields="id,webViewLink,webContentLink",
+                supportsAllDrives=True,  # Habilitar soporte para Shared Drives
+            )
+
+        # Subir archivo directamente al Drive (o Shared Drive)
+        if resumable:
+            file = self._subir_por_bloques(crear_request, sesion=sesion, on_sesion=on_sesion)
+        else:
+            file = crear_request().execute(num_retries=GDRIVE_NUM_RETRIES)
+        file_id = file.get("id")
+
+        # Hacer público con enlace
+        try:
+            service.permissions().create(
+                fileId=file_id,
+                body={"type": "anyone", "role": "reader"},
+                supportsAllDrives=True,
+            ).execute(num_retries=GDRIVE_NUM_RETRIES)
+        except Exception as e:
+            logger.warning("Archivo subido pero no se pudo hacer público: %s", e)
+
+        # Preferir webViewLink
+        return file.get("webViewLink") or file.get("webContentLink") or f"https://drive.google.com/file/d/{file_id}/view"
+
+    def _subir_por_bloques(self, crear_request, *, sesion: Optional[str],
+                           on_sesion: Optional[Callable[[Optional[str]], None]]) -> dict:
+        request = crear_request()
+        # Retomar una sesión (o seguir tras un fallo) empieza preguntando a Drive qué recibió
+        consultar = bool(sesion)
+        if sesion:
+            request.resumable_uri = sesion
+        notificada = sesion
+        fallos = 0
+        response = None
+        while response is None:
+            try:
+                if consultar:
+                    response = _consultar_progreso(request)
+                    consultar = False
+                    if response is not None:
+                        break
+                # Sin reintentos internos: googleapiclient reenviaría el bloque con el stream ya
+                # consumido. Tras un fallo se consulta el progreso y se sigue desde ahí.
+                _, response = request.next_chunk(num_retries=0)
+                fallos = 0
+            except HttpError as e:
+                status = getattr(e.resp, "status", 0)
+                if status in (404, 410) and request.resumable_uri:
+                    # Sesión vencida o desconocida: empezar de nuevo
+                    request = crear_request()
+                    consultar = False
+                    notificada = None
+                    if on_sesion:
+                        on_sesion(None)
+                    continue
+                if (status < 500 and status != 429) or fallos >= GDRIVE_REANUDACIONES:
+                    raise
+                consultar = bool(request.resumable_uri)
+                fallos += 1
+                time.sleep(min(0.5 * 2 ** fallos, 30))
+            except (OSError, ConnectionError):
+                if not request.resumable_uri or fallos >= GDRIVE_REANUDACIONES:
+                    raise
+                # Error de red a mitad de la subida: continuar desde lo confirmado por Drive
+                consultar = True
+                fallos += 1
+                time.sleep(min(0.5 * 2 ** fallos, 30))
+            if on_sesion and request.resumable_uri and request.resumable_uri != notificada:
+                notificada = request.resumable_uri
+                on_sesion(notificada)
+        return response
+
+    def verificar(self, carpeta_id: str) -> bool:
+        """Comprueba que la carpeta destino es accesible; el resultado positivo se memoriza."""
+        if time.monotonic() < self._verificado_hasta:
+            return True
+        self.service().files().get(fileId=carpeta_id, fields="id", supportsAllDrives=True).execute()
+        self._verificado_hasta = time.monotonic() + GDRIVE_CHECK_TTL_SECONDS
+        return True
+
+
+def _consultar_progreso(request) -> Optional[dict]:
+    """Consulta de estado del protocolo reanudable: PUT vacío con Content-Range: bytes */<total>.
+
+    Con 308 la cabecera Range (bytes=0-N) indica lo confirmado; el siguiente next_chunk lee
+    el stream desde resumable_progress = N + 1. Con 200/201 la subida ya había terminado y
+    se retorna el archivo creado.
+    """
+    resp, content = request.http.request(
+        request.resumable_uri,
+        method="PUT",
+        body=b"",
+        headers={"Content-Length": "0", "Content-Range": f"bytes */{request.resumable.size()}"},
+    )
+    if resp.status in (200, 201):
+        return request.postproc(resp, content)
+    if resp.status != 308:
+        raise HttpError(resp, content, uri=request.resumable_uri)
+    rango = resp.get("range")
+    request.resumable_progress = int(rango.rsplit("-", 1)[1]) + 1 if rango else 0
+    return None
+
+
+def _credenciales():
+    """Credenciales desde Service Account, token OAuth2 guardado o (solo con endpoint alterno) anónimas."""
+    service_account_json = get_env("GDRIVE_SERVICE_ACCOUNT_JSON", "google_service_account.json")
+    oauth_json = get_env("GDRIVE_OAUTH_JSON", "")
+    token_json = get_env("GDRIVE_TOKEN_JSON", "token.json")
+
+    # Intentar usar Service Account primero
+    if service_account_json and os.path.exists(service_account_json):
+        try:
+            logger.info("Usando Service Account para Google Drive")
+            return service_account.Credentials.from_service_account_file(service_account_json, scopes=SCOPES)
+        except Exception as e:
+            logger.warning("Error con Service Account: %s", e)
+
+    # Fallback a OAuth2 con token guardado
+    if oauth_json and os.path.exists(token_json):
+        try:
+            creds = OAuthCredentials.from_authorized_user_file(token_json, SCOPES)
+        except Exception:
+            creds = None
+        if creds and not creds.valid and creds.expired and creds.refresh_token:
+            try:
+                creds.refresh(Request())
+                # Guardar token renovado para futuras sesiones
+                with open(token_json, "w") as token:
+                    token.write(creds.to_json())
+            except Exception:
+                creds = None
+        if creds and creds.valid:
+            logger.info("Usando token OAuth2 para Google Drive")
+            return creds
+
+    if oauth_json and Flow:
+        # La autorización inicial es interactiva: mostrar la URL y no bloquear el servidor
+        try:
+            if os.path.exists(oauth_json):
+                with open(oauth_json, "r", encoding="utf-8") as f:
+                    client_config = json.load(f)
+            else:
+                client_config = json.loads(oauth_json)
+            flow = Flow.from_client_config(client_config, SCOPES)
+            flow.redirect_uri = "http://localhost:8000/auth/callback"
+            auth_url, _ = flow.authorization_url(prompt="consent")
+            logger.warning("Autorización de Google Drive pendiente, abre esta URL en tu navegador: %s", auth_url)
+        except Exception as e:
+            logger.warning("Error preparando autenticación OAuth2: %s", e)
+
+    # Servidor Drive alterno (p.ej. fake_drive_server.py en pruebas)
+    if get_env("GDRIVE_API_ENDPOINT", "") and AnonymousCredentials:
+        return AnonymousCredentials()
+    return None
+
+
+_client: Optional[DriveClient] = None
+_fallo_hasta = 0.0
+_lock = threading.Lock()
+
+
+def get_client() -> Optional[DriveClient]:
+    """Cliente compartido; None si Drive no está configurado o las librerías no están instaladas."""
+    global _client, _fallo_hasta
+    if _client is not None:
+        return _client
+    with _lock:
+        if _client is not None:
+            return _client
+        if time.monotonic() < _fallo_hasta:
+            return None
+        if not (build_from_document and MediaIoBaseUpload and Request):
+            logger.warning("Librerías de Google Drive no disponibles")
+            _fallo_hasta = time.monotonic() + GDRIVE_RETRY_SECONDS
+            return None
+        try:
+            credentials = _credenciales()
+            if credentials is None:
+                logger.warning("No se encontraron credenciales válidas para Google Drive")
+                _fallo_hasta = time.monotonic() + GDRIVE_RETRY_SECONDS
+                return None
+            _client = DriveClient(credentials, api_endpoint=get_env("GDRIVE_API_ENDPOINT", ""))
+            logger.info("Cliente de Google Drive inicializado")
+        except Exception as e:
+            logger.warning("Error inicializando Google Drive: %s", e)
+            _fallo_hasta = time.monotonic() + GDRIVE_RETRY_SECONDS
+            return None
+    return _client
+
+
+def reset() -> None:
+    """Descarta el cliente compartido (p.ej. tras cambiar credenciales)."""
+    global _client, _fallo_hasta
+    with _lock:
+        _client = None
+        _fallo_hasta = 0.0
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from typing import Iterator, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core import json_response
+from app.core.pagination import decode_cursor, encode_cursor
+from app.repositories.incapacidad import IncapacidadRepository
+
+
+# Incapacidades por bloque escrito en la respuesta
+CHUNK_INCAPACIDADES = 500
+
+
+class IncapacidadCumplimientoService:
+    """Documentos requeridos que faltan en las incapacidades filtradas (JSON en streaming)."""
+
+    def __init__(self, db: Session) -> None:
+        self.db = db
+        self.repo = IncapacidadRepository(db)
+
+    @staticmethod
+    def posicion(cursor: Optional[str]) -> Optional[int]:
+        """id_incapacidad del cursor (el listado va por id ascendente). ValueError si es inválido."""
+        return decode_cursor(cursor)[1] if cursor else None
+
+    def json(self, *, limit: int, despues_de: Optional[int] = None, **filtros) -> Iterator[bytes]:
+        """{"incapacidades": [...], "next_cursor": ...} en bloques de CHUNK_INCAPACIDADES.
+
+        Se pide una incapacidad de más para saber si hay otra página; el cursor se escribe
+        al final porque solo se conoce después de recorrer la página.
+        """
+        yield b'{"incapacidades":['
+        bloque, escritas, ultimo, next_cursor = [], 0, None, None
+        for item in self.repo.iter_documentos_faltantes(limit=limit + 1, despues_de=despues_de, **filtros):
+            if escritas + len(bloque) == limit:
+                next_cursor = encode_cursor(None, ultimo)
+                break
+            bloque.append(json_response.dumps(item))
+            ultimo = item["id_incapacidad"]
+            if len(bloque) == CHUNK_INCAPACIDADES:
+                yield (b"," if escritas else b"") + b",".join(bloque)
+                escritas += len(bloque)
+                bloque = []
+        if bloque:
+            yield (b"," if escritas else b"") + b",".join(bloque)
+        yield b'],"next_cursor":' + json_response.dumps(next_cursor) + b"}"
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Dict, List
+
+from sqlalchemy.orm import Session
+
+from app.repositories import parametro_hijo_catalog
+from app.repositories.incapacidad import AsyncIncapacidadRepository, IncapacidadRepository
+from app.repositories.parametro_hijo_catalog import CatalogoParametroHijo
+from app.repositories.parametro_hijo_repository import AsyncParametroHijoRepository
+from app.repositories.tipo_incapacidad import AsyncTipoIncapacidadRepository, TipoIncapacidadRepository
+from app.repositories.usuario_repository import AsyncUsuarioRepository, UsuarioRepository
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+# Columnas de texto heredadas -> columna de id que resuelven
+_CAMPOS_TEXTO = (
+    ("diagnostico", "diagnostico_id"),
+    ("eps_afiliado", "eps_afiliado_id"),
+    ("servicio", "servicio_id"),
+)
+
+
+# ---------------- Aplicación (sin BD; compartida por las versiones sync y async) -----------------
+def _pares(rows: List[Dict[str, Any]]) -> list:
+    return [
+        (row["id_incapacidad"], row.get("tipo_incapacidad_id"))
+        for row in rows
+        if row.get("id_incapacidad") is not None
+    ]
+
+
+def _aplicar_cumplimiento(rows: List[Dict[str, Any]], cumplimiento: dict) -> None:
+    for row in rows:
+        row["documentos_cumplimiento"] = cumplimiento.get(row.get("id_incapacidad"), [])
+
+
+def _buscar(catalogo: CatalogoParametroHijo, nombre: Any):
+    # Mismo criterio que ParametroHijoRepository.find_by_nombre_exact
+    if not isinstance(nombre, str) or not nombre:
+        return None
+    return catalogo.buscar_nombre(nombre)
+
+
+def _obtener(catalogo: CatalogoParametroHijo, id_parametro_hijo: Any):
+    return catalogo.obtener(id_parametro_hijo) if id_parametro_hijo is not None else None
+
+
+def _aplicar_ids_por_nombre(rows: List[Dict[str, Any]], catalogo: CatalogoParametroHijo) -> None:
+    for row in rows:
+        for campo, campo_id in _CAMPOS_TEXTO:
+            if row.get(campo):
+                found = _buscar(catalogo, row[campo])
+                row[campo_id] = found.id_parametrohijo if found else None
+        if row.get("clase"):
+            found = _buscar(catalogo, row["clase"])
+            found_id = found.id_parametrohijo if found else None
+            if not row.get("clase_id"):
+                row["clase_id"] = found_id
+            row["causa_id"] = found_id
+
+
+def _nombre(catalogo: CatalogoParametroHijo, id_parametro_hijo: Any, texto: Any) -> Any:
+    if id_parametro_hijo:
+        found = _obtener(catalogo, id_parametro_hijo)
+        return found.nombre if found else texto
+    return texto or "No especificado"
+
+
+def _aplicar_nombres_parametros(rows: List[Dict[str, Any]], catalogo: CatalogoParametroHijo) -> None:
+    for row in rows:
+        eps_id = row.get("eps_afiliado_id") or row.get("Eps_id")
+        row["eps_afiliado_nombre"] = _nombre(catalogo, eps_id, row.get("eps_afiliado"))
+        row["servicio_nombre"] = _nombre(catalogo, row.get("servicio_id"), row.get("servicio"))
+        row["diagnostico_nombre"] = _nombre(catalogo, row.get("diagnostico_id"), row.get("diagnostico"))
+        causa_id = row.get("causa_incapacidad_id")
+        if causa_id:
+            found = _obtener(catalogo, causa_id)
+            row["clase_nombre"] = found.nombre if found else row.get("clase")
+        else:
+            row["clase_nombre"] = row.get("clase")
+
+
+def _aplicar_tipos(rows: List[Dict[str, Any]], tipos: dict) -> None:
+    for row in rows:
+        tipo_id = row.get("tipo_incapacidad_id")
+        if not tipo_id:
+            row["tipo_incapacidad_nombre"] = "Tipo no especificado"
+            row["tipo_incapacidad"] = {"id_tipo_incapacidad": None, "nombre": "Tipo no especificado"}
+            continue
+        tipo = tipos.get(tipo_id)
+        if tipo:
+            row["tipo_incapacidad_nombre"] = tipo.nombre
+            row["tipo_incapacidad"] = {
+                "id_tipo_incapacidad": tipo.id_tipo_incapacidad,
+                "nombre": tipo.nombre,
+                "descripcion": tipo.descripcion
+            }
+        else:
+            row["tipo_incapacidad_nombre"] = f"Tipo {tipo_id}"
+            row["tipo_incapacidad"] = {"id_tipo_incapacidad": tipo_id, "nombre": f"Tipo {tipo_id}"}
+
+
+def _aplicar_revisores(rows: List[Dict[str, Any]], nombres: dict) -> None:
+    for row in rows:
+        revisor_id = row.get("usuario_revisor_id")
+        row["usuario_revisor_nombre"] = nombres.get(revisor_id) if revisor_id else None
+
+
+class IncapacidadEnricher:
+    """Completa una página de incapacidades con datos derivados usando consultas por conjunto.
+
+    Cada etapa hace un número fijo de consultas (o ninguna, si usa el catálogo en memoria)
+    sin importar cuántas filas tenga la página.
+    """
+
+    def __init__(self, db: Session, repo: IncapacidadRepository | None = None) -> None:
+        self.db = db
+        self.repo = repo or IncapacidadRepository(db)
+        self.tipo_repo = TipoIncapacidadRepository(db)
+        self.usuario_repo = UsuarioRepository(db)
+
+    def _catalogo(self) -> CatalogoParametroHijo:
+        return parametro_hijo_catalog.get_catalogo(self.db)
+
+    # ---------------- Etapas -----------------
+    def documentos_cumplimiento(self, rows: List[Dict[str, Any]]) -> None:
+        """Agrega `documentos_cumplimiento` (2 consultas para toda la página)."""
+        _aplicar_cumplimiento(rows, self.repo.get_documentos_cumplimiento_batch(_pares(rows)))
+
+    def ids_por_nombre(self, rows: List[Dict[str, Any]]) -> None:
+        """Resuelve ids de parametro_hijo para filas que guardan diagnóstico/EPS/servicio/clase como texto."""
+        _aplicar_ids_por_nombre(rows, self._catalogo())
+
+    def nombres_parametros(self, rows: List[Dict[str, Any]]) -> None:
+        """Agrega eps_afiliado_nombre, servicio_nombre, diagnostico_nombre y clase_nombre."""
+        _aplicar_nombres_parametros(rows, self._catalogo())
+
+    def tipos(self, rows: List[Dict[str, Any]]) -> None:
+        """Agrega tipo_incapacidad_nombre y el objeto tipo_incapacidad (1 consulta)."""
+        _aplicar_tipos(rows, self.tipo_repo.get_many(row.get("tipo_incapacidad_id") for row in rows))
+
+    def revisores(self, rows: List[Dict[str, Any]]) -> None:
+        """Agrega usuario_revisor_nombre (1 consulta)."""
+        _aplicar_revisores(rows, self.usuario_repo.get_nombres(row.get("usuario_revisor_id") for row in rows))
+
+    # ---------------- Pipelines -----------------
+    def enriquecer_empleado(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        self.documentos_cumplimiento(rows)
+        self.ids_por_nombre(rows)
+        return rows
+
+    def enriquecer_admin(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        self.tipos(rows)
+        self.nombres_parametros(rows)
+        self.revisores(rows)
+        return rows
+
+
+class AsyncIncapacidadEnricher:
+    """Mismas etapas que IncapacidadEnricher con consultas sobre AsyncSession."""
+
+    def __init__(self, db: "AsyncSession", repo: AsyncIncapacidadRepository | None = None) -> None:
+        self.db = db
+        self.repo = repo or AsyncIncapacidadRepository(db)
+        self.param_hijo_repo = AsyncParametroHijoRepository(db)
+        self.tipo_repo = AsyncTipoIncapacidadRepository(db)
+        self.usuario_repo = AsyncUsuarioRepository(db)
+
+    async def enriquecer_empleado(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        _aplicar_cumplimiento(rows, await self.repo.get_documentos_cumplimiento_batch(_pares(rows)))
+        _aplicar_ids_por_nombre(rows, await self.param_hijo_repo.catalogo())
+        return rows
+
+    async def enriquecer_admin(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        _aplicar_tipos(rows, await self.tipo_repo.get_many(row.get("tipo_incapacidad_id") for row in rows))
+        _aplicar_nombres_parametros(rows, await self.param_hijo_repo.catalogo())
+        _aplicar_revisores(rows, await self.usuario_repo.get_nombres(row.get("usuario_revisor_id") for row in rows))
+        return rows
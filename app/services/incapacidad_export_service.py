@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import csv
+import io
+import tempfile
+from datetime import date, datetime
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.repositories import parametro_hijo_catalog
+from app.repositories.incapacidad import IncapacidadRepository
+
+# Excel (opcional)
+try:
+    from openpyxl import Workbook
+except Exception:
+    Workbook = None
+
+
+# Filas por lote leído del cursor y por bloque escrito en la respuesta
+BATCH_SIZE = 1000
+CHUNK_ROWS = 500
+XLSX_READ_BYTES = 64 * 1024
+
+CSV_MEDIA_TYPE = "text/csv; charset=utf-8"
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def _fecha(valor: Any) -> Any:
+    if isinstance(valor, datetime):
+        return valor.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(valor, date):
+        return valor.isoformat()
+    return valor
+
+
+class IncapacidadExportService:
+    """Exportación de incapacidades para nómina (CSV/XLSX en streaming)."""
+
+    def __init__(self, db: Session) -> None:
+        self.db = db
+        self.repo = IncapacidadRepository(db)
+
+    @staticmethod
+    def xlsx_disponible() -> bool:
+        return Workbook is not None
+
+    def _columnas(self) -> List[Tuple[str, Callable[[dict], Any]]]:
+        # El catálogo se carga antes de abrir el cursor: durante el streaming la
+        # conexión no admite otras consultas
+        catalogo = parametro_hijo_catalog.get_catalogo(self.db)
+
+        def nombre(*claves: str) -> Callable[[dict], Optional[str]]:
+            def resolver(row: dict) -> Optional[str]:
+                for clave in claves:
+                    valor = row.get(clave)
+                    if valor is None:
+                        continue
+                    item = catalogo.obtener(valor) if isinstance(valor, int) else None
+                    return item.nombre if item else str(valor)
+                return None
+            return resolver
+
+        return [
+            ("id_incapacidad", lambda r: r.get("id_incapacidad")),
+            ("fecha_registro", lambda r: _fecha(r.get("fecha_registro"))),
+            ("empleado", lambda r: r.get("usuario_nombre")),
+            ("identificacion", lambda r: r.get("usuario_numero_identificacion")),
+            ("tipo_incapacidad", lambda r: r.get("tipo_nombre")),
+            ("estado", nombre("estado")),
+            ("fecha_inicio", lambda r: _fecha(r.get("fecha_inicio"))),
+            ("fecha_final", lambda r: _fecha(r.get("fecha_final"))),
+            ("dias", lambda r: r.get("dias")),
+            ("eps", nombre("Eps_id", "eps_afiliado")),
+            ("diagnostico", nombre("diagnostico_id", "diagnostico")),
+            ("servicio", nombre("servicio_id", "servicio")),
+            ("causa", nombre("causa_incapacidad_id")),
+            ("salario", lambda r: r.get("salario") or None),
+            ("clase_administrativa", lambda r: r.get("clase_administrativa")),
+            ("numero_radicado", lambda r: r.get("numero_radicado")),
+            ("fecha_radicado", lambda r: _fecha(r.get("fecha_radicado"))),
+            ("paga", lambda r: None if r.get("paga") is None else ("SI" if r.get("paga") else "NO")),
+            ("estado_administrativo", lambda r: r.get("estado_administrativo")),
+        ]
+
+    def filas(self, **filtros) -> Iterator[list]:
+        """Encabezado y luego una lista de valores por incapacidad (en orden de registro)."""
+        columnas = self._columnas()
+        yield [titulo for titulo, _ in columnas]
+        for row in self.repo.iter_with_details(batch_size=BATCH_SIZE, **filtros):
+            yield [valor(row) for _, valor in columnas]
+
+    def csv(self, **filtros) -> Iterator[bytes]:
+        """CSV en bloques de CHUNK_ROWS filas (UTF-8 con BOM para Excel)."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        buffer.write("\ufeff")
+        for n, fila in enumerate(self.filas(**filtros), start=1):
+            writer.writerow(fila)
+            if n % CHUNK_ROWS == 0:
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+
+    def xlsx(self, **filtros) -> Iterator[bytes]:
+        """XLSX con openpyxl en modo write_only (las filas van a disco, no a memoria)."""
+        if Workbook is None:
+            raise RuntimeError("La exportación XLSX requiere el paquete openpyxl")
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("incapacidades")
+        for fila in self.filas(**filtros):
+            ws.append(fila)
+        with tempfile.TemporaryFile() as tmp:
+            wb.save(tmp)
+            tmp.seek(0)
+            while True:
+                bloque = tmp.read(XLSX_READ_BYTES)
+                if not bloque:
+                    break
+                yield bloque
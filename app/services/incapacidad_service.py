@@ -1,21 +1,32 @@
 from __future__ import annotations
 
-from typing import List, Optional, Any, Dict
+import logging
+from typing import TYPE_CHECKING, List, Optional, Any, Dict
 from sqlalchemy.orm import Session
 from datetime import datetime
 from decimal import Decimal, InvalidOperation
 
-from app.repositories.incapacidad import IncapacidadRepository
+from app.repositories.incapacidad import AsyncIncapacidadRepository, IncapacidadRepository
 from app.repositories.archivo_repository import ArchivoRepository
-from app.repositories.relacion_repository import RelacionRepository
-from app.repositories.parametro_hijo_repository import ParametroHijoRepository
+from app.repositories import relacion_matriz
+from app.repositories.parametro_hijo_repository import AsyncParametroHijoRepository, ParametroHijoRepository
+from app.repositories.carga_documento_repository import CargaDocumentoRepository
 from app.schemas.incapacidad import IncapacidadCreate, IncapacidadAdministrativaUpdate, IncapacidadFormularioUpdate
 from app.services.upload_service import UploadService
+from app.services import upload_worker
 from fastapi import UploadFile
 import os
 import uuid
 from app.services.notification_service import NotificationService
 from app.services.audit_service import AuditService, AuditAction
+from app.services.incapacidad_enrichment import AsyncIncapacidadEnricher, IncapacidadEnricher
+from app.services import incapacidad_stats_service
+from app.core.pagination import cursor_from_row, decode_cursor
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
 
 
 class IncapacidadService:
@@ -23,13 +34,15 @@ class IncapacidadService:
         self.db = db
         self.repo = IncapacidadRepository(db)
         self.archivo_repo = ArchivoRepository(db)
-        self.rel_repo = RelacionRepository(db)
         self.param_hijo_repo = ParametroHijoRepository(db)
         self.upload_service = UploadService(db)
+        self.carga_repo = CargaDocumentoRepository(db)
         self.notification_service = NotificationService(db)
         self.audit_service = AuditService(db)
+        self.enricher = IncapacidadEnricher(db, repo=self.repo)
 
-    def _normalize_incapacidad_row(self, row: Dict[str, Any]) -> Dict[str, Any]:
+    @staticmethod
+    def _normalize_incapacidad_row(row: Dict[str, Any]) -> Dict[str, Any]:
         if not isinstance(row, dict):
             return row
         # Normalizar salario: la BD lo guarda como VARCHAR y puede venir ''
@@ -54,43 +67,22 @@ class IncapacidadService:
         Retorna True si está disponible, False si no.
         """
         try:
-            print("🔍 Validando disponibilidad de Google Drive...")
-            
-            # Verificar configuración básica
-            if not self.upload_service.gdrive_service_account_json and not self.upload_service.gdrive_oauth_json:
-                print("❌ No hay credenciales de Google Drive configuradas")
-                return False
-            
-            # Intentar configurar Google Drive
-            if not self.upload_service._ensure_gdrive():
-                print("❌ No se pudo configurar Google Drive")
-                return False
-            
-            # Hacer una prueba de subida con un archivo pequeño
-            test_content = b"Test de Google Drive - " + str(datetime.now()).encode()
-            test_filename = f"test_gdrive_{uuid.uuid4().hex[:8]}.txt"
-            
-            print(f"🧪 Probando subida a Google Drive con archivo de prueba...")
-            test_url = self.upload_service._gdrive_upload(
-                test_content,
-                original_name=test_filename,
-                mime_type="text/plain"
-            )
-            
-            if test_url:
-                print(f"✅ Google Drive funcionando correctamente: {test_url}")
-                return True
-            else:
-                print("❌ La prueba de subida a Google Drive falló")
+            # Cliente compartido + verificación memorizada de la carpeta destino
+            # (antes se subía un archivo de prueba en cada creación)
+            if not self.upload_service.verificar_gdrive():
+                logger.warning("No se pudo configurar Google Drive")
                 return False
+            return True
                 
         except Exception as e:
-            print(f"❌ Error validando Google Drive: {str(e)}")
+            logger.warning("Error validando Google Drive: %s", e)
             return False
 
     def subir_documento_y_crear_registro(self, *, usuario_id: int, incapacidad_id: int, archivo_id: int, file: UploadFile) -> dict:
-        """Guarda un archivo (pdf/png/jpg) SOLO en Google Drive y crea registro en incapacidad_archivo.
-        url_documento almacenará la URL de Google Drive.
+        """Guarda el archivo (pdf/png/jpg) en disco y registra la carga; la subida a Google Drive
+        la hace en segundo plano upload_worker, que luego reemplaza url_documento por la URL de Drive.
+        Si el documento aún no existía, el registro de incapacidad_archivo queda con una URL
+        provisional (pendiente://carga/<id>) hasta que termine la carga.
         """
         # Validar existencia de FK para evitar errores de integridad
         if not self.repo.get(incapacidad_id):
@@ -103,102 +95,92 @@ class IncapacidadService:
         if content_type not in allowed:
             raise ValueError("Formato no permitido. Use PDF, PNG o JPG")
 
-        # Leer contenido del archivo
-        content = file.file.read()
-        
         # Nombre único conservando extensión
         ext = ".pdf" if content_type == "application/pdf" else (".png" if content_type == "image/png" else ".jpg")
         filename = f"{uuid.uuid4()}{ext}"
 
-        # Subir SOLO a Google Drive
-        gdrive_url = None
+        # Guardar en disco local (sin esperar a Google Drive)
+        ruta_local, tamano = self.upload_service.guardar_temporal(file, extension=ext)
         try:
-            print(f"📤 Subiendo archivo a Google Drive: {filename}")
-            if self.upload_service._ensure_gdrive():
-                gdrive_url = self.upload_service._gdrive_upload(
-                    content, 
-                    original_name=filename, 
-                    mime_type=content_type
-                )
-                if gdrive_url:
-                    print(f"✅ Archivo subido exitosamente a Google Drive: {gdrive_url}")
-                else:
-                    print(f"❌ Error: No se pudo subir a Google Drive")
-                    raise ValueError("No se pudo subir el archivo a Google Drive")
-            else:
-                print(f"❌ Error: No se pudo configurar Google Drive")
-                raise ValueError("No se pudo configurar Google Drive")
-        except Exception as e:
-            print(f"❌ Error subiendo a Google Drive: {str(e)}")
-            raise ValueError(f"Error al subir archivo a Google Drive: {str(e)}")
+            carga = self.carga_repo.create(
+                incapacidad_id=incapacidad_id,
+                archivo_id=archivo_id,
+                usuario_id=usuario_id,
+                ruta_local=ruta_local,
+                nombre=filename,
+                mime_type=content_type,
+                tamano=tamano,
+            )
+        except Exception:
+            os.remove(ruta_local)
+            raise
 
         # Verificar si ya existe un archivo para esta incapacidad y archivo_id
         existing = self.repo.get_archivo_by_ids(incapacidad_id=incapacidad_id, archivo_id=archivo_id)
-        print(f"DEBUG SERVICE: Verificando archivo existente para incapacidad_id={incapacidad_id}, archivo_id={archivo_id}")
-        print(f"DEBUG SERVICE: Archivo existente: {existing}")
-        
         if existing:
-            print(f"DEBUG SERVICE: ⚠️ Archivo EXISTENTE encontrado, procediendo a ACTUALIZAR...")
-            # Actualizar registro existente
-            updated = self.repo.update_archivo_url(
-                incapacidad_id=incapacidad_id,
-                archivo_id=archivo_id,
-                url_documento=gdrive_url
-            )
-            if not updated:
-                print(f"DEBUG SERVICE: ❌ Error: No se pudo actualizar el registro")
-                raise ValueError("No se pudo actualizar el registro de incapacidad_archivo")
-            print(f"DEBUG SERVICE: ✅ Archivo actualizado exitosamente")
-            created = self.repo.get_archivo_by_ids(incapacidad_id=incapacidad_id, archivo_id=archivo_id)
+            # Se conserva la URL anterior hasta que la nueva esté en Drive
+            created = existing
         else:
-            print(f"DEBUG SERVICE: ✅ Archivo NO existe, procediendo a CREAR nuevo registro...")
-            # Crear nuevo registro en BD con la URL de Google Drive
             created = self.repo.add_archivo_with_filename(
                 incapacidad_id=incapacidad_id,
                 archivo_id=archivo_id,
-                filename=gdrive_url,  # Guardar la URL de Google Drive en lugar del nombre local
+                filename=upload_worker.URL_PENDIENTE.format(id_carga=carga.id_carga),
             )
-            print(f"DEBUG SERVICE: ✅ Nuevo archivo creado: {created}")
         if not created:
             raise ValueError("No se pudo crear el registro de incapacidad_archivo")
 
+        upload_worker.encolar(carga.id_carga)
+
         # Auditoría simple
         self.audit_service.log_file_upload(
             file_id=created.get("archivo_id", 0),
             user_id=usuario_id,
             filename=filename,
-            file_size=len(content) if content else 0,
+            file_size=tamano,
         )
 
         return {
             "id_incapacidad_archivo": created.get("id_incapacidad_archivo") or created.get("id"),
             "incapacidad_id": created.get("incapacidad_id"),
             "archivo_id": created.get("archivo_id"),
-            "url_documento": gdrive_url,  # URL de Google Drive
-            "gdrive_url": gdrive_url,    # URL de Google Drive (para compatibilidad)
+            "url_documento": created.get("url_documento"),
+            "gdrive_url": None,          # Disponible al completar la carga (ver estado_carga)
             "fecha_subida": created.get("fecha_subida"),
+            "id_carga": carga.id_carga,
+            "estado_carga": carga.estado,
+        }
+
+    def obtener_carga(self, *, id_carga: int, usuario_id: Optional[int] = None) -> Optional[dict]:
+        """Estado de una carga a Drive. Si se indica usuario_id, solo la del propio empleado."""
+        carga = self.carga_repo.get(id_carga)
+        if carga is None or (usuario_id is not None and carga.usuario_id != usuario_id):
+            return None
+        return {
+            "id_carga": carga.id_carga,
+            "incapacidad_id": carga.incapacidad_id,
+            "archivo_id": carga.archivo_id,
+            "estado": carga.estado,
+            "intentos": carga.intentos,
+            "url_documento": carga.url_documento,
+            "error": carga.error,
+            "fecha_creacion": carga.fecha_creacion,
+            "fecha_actualizacion": carga.fecha_actualizacion,
         }
 
     def _documentos_requeridos_ids(self, tipo_incapacidad_id: int) -> List[int]:
-        relaciones = self.rel_repo.list_by_tipo_incapacidad(tipo_incapacidad_id=tipo_incapacidad_id)
-        return [rel.archivo_id for rel in relaciones]
+        return relacion_matriz.get_matriz(self.db).requeridos(tipo_incapacidad_id)
 
     def crear_incapacidad(self, *, usuario_id: int, payload: IncapacidadCreate) -> dict:
         try:
-            print(f"DEBUG: Iniciando creación de incapacidad para usuario {usuario_id}")
-            print(f"DEBUG: Payload recibido: {payload}")
+            logger.debug("Creando incapacidad para usuario %s: %s", usuario_id, payload)
             
             # VALIDACIÓN CRÍTICA: Verificar que Google Drive esté disponible
-            print(f"🔍 Validando disponibilidad de Google Drive antes de crear incapacidad...")
             if not self.validar_google_drive_disponible():
                 error_msg = "No se puede crear la incapacidad: Google Drive no está disponible para guardar los archivos"
-                print(f"❌ {error_msg}")
+                logger.warning(error_msg)
                 raise ValueError(error_msg)
             
-            print(f"✅ Google Drive validado correctamente, procediendo con la creación...")
-            
             # Crear usando las columnas exactas de la BD según el esquema real
-            print(f"DEBUG: Creando incapacidad en BD (columnas reales)...")
             inc = self.repo.create_by_ids(
                 tipo_incapacidad_id=payload.tipo_incapacidad_id,
                 usuario_id=usuario_id,
@@ -213,7 +195,8 @@ class IncapacidadService:
                 salario_id=None,                       # No se usa por ahora
                 salario=str(payload.salario),          # Guardar en columna 'salario' (varchar en BD)
             )
-            print(f"DEBUG: Incapacidad creada: {inc}")
+            logger.debug("Incapacidad creada: %s", inc)
+            incapacidad_stats_service.invalidate()
 
             # Normalizar claves a las esperadas por los esquemas de salida
             if isinstance(inc, dict):
@@ -228,7 +211,6 @@ class IncapacidadService:
             # (Eliminado) Asociación de documentos
             
             # Registrar auditoría
-            print(f"DEBUG: Registrando auditoría...")
             self.audit_service.log_incapacity_action(
                 action=AuditAction.CREATE,
                 incapacidad_id=inc["id_incapacidad"],
@@ -240,12 +222,9 @@ class IncapacidadService:
                     "archivos_count": 0
                 }
             )
-            print(f"DEBUG: Auditoría registrada")
             
             # Notificar al administrador
-            print(f"DEBUG: Enviando notificación...")
             self.notification_service.notify_new_incapacity(inc["id_incapacidad"])
-            print(f"DEBUG: Notificación enviada")
             
             # Resolver IDs y eliminar campos de texto para respuesta
             if inc.get("diagnostico"):
@@ -267,58 +246,52 @@ class IncapacidadService:
 
             return self._normalize_incapacidad_row(inc)
             
-        except Exception as e:
-            print(f"DEBUG: Error en crear_incapacidad: {str(e)}")
-            print(f"DEBUG: Tipo de error: {type(e)}")
-            import traceback
-            print(f"DEBUG: Traceback: {traceback.format_exc()}")
+        except ValueError:
+            raise
+        except Exception:
+            logger.exception("Error creando incapacidad para usuario %s", usuario_id)
             raise
 
+    @staticmethod
+    def _pagina(rows: List[dict], limit: int) -> tuple[List[dict], Optional[str]]:
+        """Recorta la fila extra pedida al repositorio y calcula el cursor de la siguiente página."""
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, cursor_from_row(rows[-1])
+
     def listar_mis_incapacidades(self, *, usuario_id: int, skip: int = 0, limit: int = 100) -> List[dict]:
         """Lista incapacidades del empleado sin mostrar estados ni campos administrativos"""
-        data = self.repo.list_by_user(usuario_id, skip=skip, limit=limit)
+        data, _ = self.listar_mis_incapacidades_pagina(usuario_id=usuario_id, skip=skip, limit=limit)
+        return data
+
+    def listar_mis_incapacidades_pagina(self, *, usuario_id: int, skip: int = 0, limit: int = 100,
+                                        cursor: Optional[str] = None) -> tuple[List[dict], Optional[str]]:
+        """Igual que listar_mis_incapacidades, paginando por cursor; retorna (filas, next_cursor)."""
+        after = decode_cursor(cursor) if cursor else None
+        data, next_cursor = self._pagina(
+            self.repo.list_by_user(usuario_id, skip=skip, limit=limit + 1, after=after),
+            limit,
+        )
+        data = self._preparar_empleado(data)
+        # Cumplimiento de documentos e ids por nombre resueltos en bloque para toda la página
+        self.enricher.enriquecer_empleado(data)
+        return self._depurar_empleado(data), next_cursor
+
+    @classmethod
+    def _preparar_empleado(cls, data: List[dict]) -> List[dict]:
         # Normalizar filas
-        data = [self._normalize_incapacidad_row(dict(row)) for row in data]
+        data = [cls._normalize_incapacidad_row(dict(row)) for row in data]
         
-        # Agregar información de cumplimiento de documentos
+        # Alinear nombre de la columna de causa a 'causa_id'
         for row in data:
-            # Alinear nombre de la columna de causa a 'causa_id'
             if row.get("causa_id") is None and row.get("causa_incapacidad_id") is not None:
                 row["causa_id"] = row.get("causa_incapacidad_id")
-            cumplimiento = self.repo.get_documentos_cumplimiento(
-                row["id_incapacidad"], 
-                row["tipo_incapacidad_id"]
-            )
-            row["documentos_cumplimiento"] = cumplimiento
-
-            # Resolver IDs para diagnostico, eps, servicio y clase si están por nombre
-            if row.get("diagnostico") and not row.get("diagnostico_id"):
-                found = self.param_hijo_repo.find_by_nombre_exact(row["diagnostico"])
-                row["diagnostico_id"] = getattr(found, "id_parametrohijo", None) if found else None
-            if row.get("eps_afiliado") and not row.get("eps_afiliado_id"):
-                found = self.param_hijo_repo.find_by_nombre_exact(row["eps_afiliado"])
-                row["eps_afiliado_id"] = getattr(found, "id_parametrohijo", None) if found else None
-            if row.get("servicio") and not row.get("servicio_id"):
-                found = self.param_hijo_repo.find_by_nombre_exact(row["servicio"])
-                row["servicio_id"] = getattr(found, "id_parametrohijo", None) if found else None
-            if row.get("clase") and not row.get("clase_id"):
-                found = self.param_hijo_repo.find_by_nombre_exact(row["clase"])
-                row["clase_id"] = getattr(found, "id_parametrohijo", None) if found else None
-            
-            # Resolver IDs y eliminar campos de texto
-            if row.get("diagnostico"):
-                found = self.param_hijo_repo.find_by_nombre_exact(row["diagnostico"])
-                row["diagnostico_id"] = getattr(found, "id_parametrohijo", None) if found else None
-            if row.get("eps_afiliado"):
-                found = self.param_hijo_repo.find_by_nombre_exact(row["eps_afiliado"])
-                row["eps_afiliado_id"] = getattr(found, "id_parametrohijo", None) if found else None
-            if row.get("servicio"):
-                found = self.param_hijo_repo.find_by_nombre_exact(row["servicio"])
-                row["servicio_id"] = getattr(found, "id_parametrohijo", None) if found else None
-            if row.get("clase"):
-                found = self.param_hijo_repo.find_by_nombre_exact(row["clase"])
-                row["causa_id"] = getattr(found, "id_parametrohijo", None) if found else None
+        return data
 
+    @staticmethod
+    def _depurar_empleado(data: List[dict]) -> List[dict]:
+        for row in data:
             for k in ("diagnostico", "eps_afiliado", "servicio", "clase"):
                 row.pop(k, None)
 
@@ -354,12 +327,9 @@ class IncapacidadService:
         if inc.get("Eps_id") is None and inc.get("eps_afiliado_id") is not None:
             inc["Eps_id"] = inc.get("eps_afiliado_id")
             
-        # Agregar cumplimiento de documentos
-        cumplimiento = self.repo.get_documentos_cumplimiento(
-            inc["id_incapacidad"], 
-            inc["tipo_incapacidad_id"]
-        )
-        inc["documentos_cumplimiento"] = cumplimiento
+        # Cumplimiento de documentos: requeridos (matriz en memoria) contra los documentos ya leídos
+        subidos = {doc.get("archivo_id") for doc in inc.get("documentos", [])}
+        inc["documentos_cumplimiento"] = relacion_matriz.get_matriz(self.db).cumplimiento(inc["tipo_incapacidad_id"], subidos)
         
         # Resolver IDs para diagnostico, eps, servicio y clase si están por nombre
         if inc.get("diagnostico"):
@@ -401,112 +371,73 @@ class IncapacidadService:
                     tipo_incapacidad_id: Optional[int] = None,
                     usuario_id: Optional[int] = None,
                     fecha_inicio: Optional[datetime] = None,
-                    fecha_final: Optional[datetime] = None) -> List[dict]:
+                    fecha_final: Optional[datetime] = None,
+                    cursor: Optional[str] = None) -> dict:
         """Lista todas las incapacidades con filtros para administrador"""
-        print(f"DEBUG: listar_admin llamado con estado={estado}, skip={skip}, limit={limit}")
+        after = decode_cursor(cursor) if cursor else None
         data = self.repo.list_all_with_details(
             skip=skip, 
-            limit=limit, 
+            limit=limit + 1, 
             estado=estado,
             tipo_incapacidad_id=tipo_incapacidad_id,
             usuario_id=usuario_id,
             fecha_inicio=fecha_inicio,
-            fecha_final=fecha_final
+            fecha_final=fecha_final,
+            after=after,
         )
-        print(f"DEBUG: Datos obtenidos del repositorio: {len(data)} registros")
-        if data:
-            print(f"DEBUG: Primer registro: {data[0]}")
-            print(f"DEBUG: Campos del primer registro: {list(data[0].keys())}")
-        
+        data, next_cursor = self._pagina(data, limit)
         normalized_data = [self._normalize_incapacidad_row(dict(row)) for row in data]
         
-        # Resolver nombres de tipos de incapacidad para cada registro
-        for inc in normalized_data:
-            if inc.get("tipo_incapacidad_id"):
-                from app.repositories.tipo_incapacidad import TipoIncapacidadRepository
-                tipo_repo = TipoIncapacidadRepository(self.db)
-                tipo = tipo_repo.obtener_id(inc["tipo_incapacidad_id"])
-                if tipo:
-                    inc["tipo_incapacidad_nombre"] = tipo.nombre
-                    inc["tipo_incapacidad"] = {
-                        "id_tipo_incapacidad": tipo.id_tipo_incapacidad,
-                        "nombre": tipo.nombre,
-                        "descripcion": tipo.descripcion
-                    }
-                else:
-                    inc["tipo_incapacidad_nombre"] = f"Tipo {inc['tipo_incapacidad_id']}"
-                    inc["tipo_incapacidad"] = {"id_tipo_incapacidad": inc["tipo_incapacidad_id"], "nombre": f"Tipo {inc['tipo_incapacidad_id']}"}
-            else:
-                inc["tipo_incapacidad_nombre"] = "Tipo no especificado"
-                inc["tipo_incapacidad"] = {"id_tipo_incapacidad": None, "nombre": "Tipo no especificado"}
+        # Resolver tipos, nombres de parámetros y revisores en bloque para toda la página
+        self.enricher.enriquecer_admin(normalized_data)
         
+        self._alias_mensaje_rechazo(normalized_data)
+        # Mantener usuario_id como entero; el frontend debe usar usuario_nombre para mostrar
+        # Agregar estados de incapacidad disponibles para el frontend (catálogo en memoria)
+        try:
+            estados_disponibles = self.param_hijo_repo.hijos_cacheados(6)
+        except Exception as e:
+            logger.warning("Error al consultar estados de incapacidad: %s", e)
+            estados_disponibles = []
+        logger.debug(
+            "listar_admin estado=%s skip=%s limit=%s: %d incapacidades", estado, skip, limit, len(normalized_data)
+        )
+        return self._respuesta_admin(normalized_data, estados_disponibles, next_cursor)
+
+    @staticmethod
+    def _alias_mensaje_rechazo(rows: List[dict]) -> None:
         # Alinear y exponer mensaje_rechazo si existe con diferentes nombres
-        for row in normalized_data:
+        for row in rows:
             if 'mensaje_rechazo' not in row:
                 if 'motivo_rechazo' in row:
                     row['mensaje_rechazo'] = row.get('motivo_rechazo')
                 elif 'mensaje' in row:
                     row['mensaje_rechazo'] = row.get('mensaje')
-        # Mantener usuario_id como entero; el frontend debe usar usuario_nombre para mostrar
-        print(f"DEBUG: Datos normalizados: {len(normalized_data)} registros")
-        if normalized_data:
-            print(f"DEBUG: Primer registro normalizado: {normalized_data[0]}")
-            print(f"DEBUG: Campos del primer registro normalizado: {list(normalized_data[0].keys())}")
-        
-        # Agregar estados de incapacidad disponibles para el frontend
-        print(f"DEBUG: Iniciando consulta de estados con parametro_id=6")
-        
-        try:
-            # Consulta SQL directa para asegurar que funcione
-            from sqlalchemy import text
-            query = text("SELECT id_parametrohijo, nombre, descripcion FROM parametro_hijo WHERE parametro_id = 6")
-            result = self.db.execute(query)
-            estados_disponibles = result.fetchall()
-            
-            print(f"DEBUG: Consulta SQL ejecutada exitosamente")
-            print(f"DEBUG: Estados encontrados para parametro_id=6: {len(estados_disponibles)}")
-            
-            if estados_disponibles:
-                for i, estado in enumerate(estados_disponibles):
-                    print(f"DEBUG: Estado {i+1} - ID: {estado.id_parametrohijo}, Nombre: {estado.nombre}, Descripcion: {estado.descripcion}")
-            else:
-                print(f"DEBUG: No se encontraron estados para parametro_id=6")
-                
-        except Exception as e:
-            print(f"DEBUG: Error al consultar estados: {e}")
-            print(f"DEBUG: Tipo de error: {type(e)}")
-            estados_disponibles = []
-        
-        estados_data = []
-        for estado in estados_disponibles:
-            estados_data.append({
+
+    @staticmethod
+    def _respuesta_admin(rows: List[dict], estados_disponibles, next_cursor: Optional[str]) -> dict:
+        estados_data = [
+            {
                 "id_parametrohijo": estado.id_parametrohijo,
                 "nombre": estado.nombre,
                 "descripcion": estado.descripcion
-            })
-        
-        print(f"DEBUG: Estados_data preparados: {estados_data}")
+            }
+            for estado in estados_disponibles
+        ]
         
         # Crear respuesta con datos y estados disponibles
-        response_data = {
-            "incapacidades": normalized_data,
-            "estados_disponibles": estados_data
+        return {
+            "incapacidades": rows,
+            "estados_disponibles": estados_data,
+            "next_cursor": next_cursor
         }
-        
-        print(f"DEBUG: Respuesta final preparada con {len(normalized_data)} incapacidades y {len(estados_data)} estados")
-        return response_data
 
     def obtener_incapacidad_admin(self, *, id_incapacidad: int) -> Optional[dict]:
         """Obtiene detalle completo de incapacidad para administrador"""
-        print(f"DEBUG: obtener_incapacidad_admin llamado para ID {id_incapacidad}")
         inc = self.repo.get_with_documents(id_incapacidad)
-        print(f"DEBUG: Datos obtenidos del repositorio: {inc}")
-        print(f"DEBUG: Campos disponibles en inc: {list(inc.keys()) if inc else 'None'}")
         inc = self._normalize_incapacidad_row(inc) if inc else inc
-        print(f"DEBUG: Datos después de normalización: {inc}")
-        print(f"DEBUG: Campos después de normalización: {list(inc.keys()) if inc else 'None'}")
         if not inc:
-            print(f"DEBUG: No se encontró incapacidad con ID {id_incapacidad}")
+            logger.debug("No se encontró incapacidad con ID %s", id_incapacidad)
             return None
             
         # Alinear nombre de la columna de causa a 'causa_id'
@@ -532,50 +463,36 @@ class IncapacidadService:
             inc["causa_id"] = getattr(found, "id_parametrohijo", None) if found else None
         
         # Resolver nombres desde IDs para mostrar en el frontend
-        print(f"DEBUG: Iniciando resolución de nombres...")
-        print(f"DEBUG: eps_afiliado_id={inc.get('eps_afiliado_id')}, eps_afiliado={inc.get('eps_afiliado')}")
-        print(f"DEBUG: servicio_id={inc.get('servicio_id')}, servicio={inc.get('servicio')}")
-        print(f"DEBUG: diagnostico_id={inc.get('diagnostico_id')}, diagnostico={inc.get('diagnostico')}")
-        
         # Resolver EPS
         eps_id = inc.get("eps_afiliado_id") or inc.get("Eps_id")
         if eps_id:
-            found = self.param_hijo_repo.obtener_id(eps_id)
+            found = self.param_hijo_repo.obtener_id_cacheado(eps_id)
             inc["eps_afiliado_nombre"] = found.nombre if found else inc.get("eps_afiliado")
-            print(f"DEBUG EPS: eps_id={eps_id}, found={found}, nombre={found.nombre if found else inc.get('eps_afiliado')}")
         elif inc.get("eps_afiliado"):
             inc["eps_afiliado_nombre"] = inc.get("eps_afiliado")
-            print(f"DEBUG EPS: No hay eps_id, usando eps_afiliado={inc.get('eps_afiliado')}")
         else:
             inc["eps_afiliado_nombre"] = "No especificado"
-            print(f"DEBUG EPS: No hay datos de EPS disponibles")
             
         # Resolver Servicio
         if inc.get("servicio_id"):
-            found = self.param_hijo_repo.obtener_id(inc["servicio_id"])
+            found = self.param_hijo_repo.obtener_id_cacheado(inc["servicio_id"])
             inc["servicio_nombre"] = found.nombre if found else inc.get("servicio")
-            print(f"DEBUG SERVICIO: servicio_id={inc['servicio_id']}, found={found}, nombre={found.nombre if found else inc.get('servicio')}")
         elif inc.get("servicio"):
             inc["servicio_nombre"] = inc.get("servicio")
-            print(f"DEBUG SERVICIO: No hay servicio_id, usando servicio={inc.get('servicio')}")
         else:
             inc["servicio_nombre"] = "No especificado"
-            print(f"DEBUG SERVICIO: No hay datos de servicio disponibles")
             
         # Resolver Diagnóstico
         if inc.get("diagnostico_id"):
-            found = self.param_hijo_repo.obtener_id(inc["diagnostico_id"])
+            found = self.param_hijo_repo.obtener_id_cacheado(inc["diagnostico_id"])
             inc["diagnostico_nombre"] = found.nombre if found else inc.get("diagnostico")
-            print(f"DEBUG DIAGNOSTICO: diagnostico_id={inc['diagnostico_id']}, found={found}, nombre={found.nombre if found else inc.get('diagnostico')}")
         elif inc.get("diagnostico"):
             inc["diagnostico_nombre"] = inc.get("diagnostico")
-            print(f"DEBUG DIAGNOSTICO: No hay diagnostico_id, usando diagnostico={inc.get('diagnostico')}")
         else:
             inc["diagnostico_nombre"] = "No especificado"
-            print(f"DEBUG DIAGNOSTICO: No hay datos de diagnóstico disponibles")
             
         if inc.get("causa_incapacidad_id"):
-            found = self.param_hijo_repo.obtener_id(inc["causa_incapacidad_id"])
+            found = self.param_hijo_repo.obtener_id_cacheado(inc["causa_incapacidad_id"])
             inc["clase_nombre"] = found.nombre if found else inc.get("clase")
         else:
             inc["clase_nombre"] = inc.get("clase")
@@ -621,7 +538,7 @@ class IncapacidadService:
         # Mantener campos de texto como respaldo
         # for k in ("diagnostico", "eps_afiliado", "servicio", "clase"):
         #     inc.pop(k, None)
-        print(f"DEBUG: Datos finales devueltos: {inc}")
+        logger.debug("Detalle admin de incapacidad %s: %s", id_incapacidad, inc)
         return inc
 
     def marcar_revisada(self, *, id_incapacidad: int) -> bool:
@@ -635,6 +552,7 @@ class IncapacidadService:
         success = self.repo.update_estado(id_incapacidad, estado=12)  # 12 = Revisado (parametro_hijo)
         
         if success:
+            incapacidad_stats_service.invalidate()
             # Registrar auditoría
             self.audit_service.log_status_change(
                 incapacidad_id=id_incapacidad,
@@ -664,6 +582,7 @@ class IncapacidadService:
         
         # Registrar auditoría y notificar
         if success:
+            incapacidad_stats_service.invalidate()
             # Auditoría de cambios administrativos
             changes = {}
             if payload.clase_administrativa is not None:
@@ -722,6 +641,7 @@ class IncapacidadService:
         
         # Registrar auditoría si la actualización fue exitosa
         if success:
+            incapacidad_stats_service.invalidate()
             # Auditoría de cambios del formulario
             changes = {}
             if payload.fecha_inicio is not None:
@@ -772,6 +692,7 @@ class IncapacidadService:
             return False
         # Reinicia estado a pendiente y limpia mensaje de rechazo
         self.repo.update_estado(id_incapacidad, estado=11)
+        incapacidad_stats_service.invalidate()
         try:
             self.repo.update_mensaje_rechazo(id_incapacidad, "")
         except Exception:
@@ -785,6 +706,25 @@ class IncapacidadService:
         )
         return True
 
+    def reenviar_rechazada(self, *, id_incapacidad: int, usuario_id: int) -> bool:
+        """Empleado reenvía su incapacidad rechazada (50) a pendiente (11) sin cambiar los datos."""
+        if not self.repo.update_estado(id_incapacidad, estado=11):
+            return False
+        incapacidad_stats_service.invalidate()
+        # Limpiar mensaje de rechazo
+        try:
+            self.repo.update_mensaje_rechazo(id_incapacidad, "")
+        except Exception:
+            pass
+        self.audit_service.log_status_change(
+            incapacidad_id=id_incapacidad,
+            user_id=usuario_id,
+            old_status=50,
+            new_status=11,
+            reason="Reenvío por empleado después de modificar documentos"
+        )
+        return True
+
     def cambiar_estado(self, *, id_incapacidad: int, nuevo_estado: int, admin_id: int, mensaje_rechazo: str = None) -> bool:
         """Cambia el estado de una incapacidad"""
         # Obtener estado actual para auditoría
@@ -800,6 +740,7 @@ class IncapacidadService:
             success = self.repo.update_mensaje_rechazo(id_incapacidad, mensaje_rechazo)
         
         if success:
+            incapacidad_stats_service.invalidate()
             # Registrar auditoría
             self.audit_service.log_status_change(
                 incapacidad_id=id_incapacidad,
@@ -811,14 +752,15 @@ class IncapacidadService:
             
             # Enviar notificación según el tipo de cambio
             if nuevo_estado == 50:  # Rechazada
-                print(f"DEBUG: Enviando notificación de rechazo para incapacidad {id_incapacidad}")
+                logger.debug("Notificando rechazo de incapacidad %s", id_incapacidad)
                 self.notification_service.notify_incapacity_rejected(
                     incapacidad_id=id_incapacidad,
                     admin_id=admin_id,
-                    motivo_rechazo=mensaje_rechazo
+                    motivo_rechazo=mensaje_rechazo,
+                    repetido=old_status == 50,
                 )
             elif nuevo_estado == 12:  # Revisada/Realizada
-                print(f"DEBUG: Enviando notificación de revisión para incapacidad {id_incapacidad}")
+                logger.debug("Notificando revisión de incapacidad %s", id_incapacidad)
                 self.notification_service.notify_incapacity_reviewed(
                     incapacidad_id=id_incapacidad,
                     admin_id=admin_id
@@ -834,6 +776,7 @@ class IncapacidadService:
             return False
         ok = self.repo.delete(id_incapacidad)
         if ok:
+            incapacidad_stats_service.invalidate()
             self.audit_service.log_incapacity_action(
                 action=AuditAction.DELETE,
                 incapacidad_id=id_incapacidad,
@@ -842,3 +785,59 @@ class IncapacidadService:
             )
         return ok
 
+
+class AsyncIncapacidadService:
+    """Listados de solo lectura sobre AsyncSession (/mias y GET / del administrador).
+
+    Misma respuesta que IncapacidadService; las escrituras siguen en la versión síncrona.
+    """
+
+    def __init__(self, db: "AsyncSession") -> None:
+        self.db = db
+        self.repo = AsyncIncapacidadRepository(db)
+        self.param_hijo_repo = AsyncParametroHijoRepository(db)
+        self.enricher = AsyncIncapacidadEnricher(db, repo=self.repo)
+
+    async def listar_mis_incapacidades_pagina(self, *, usuario_id: int, skip: int = 0, limit: int = 100,
+                                              cursor: Optional[str] = None) -> tuple[List[dict], Optional[str]]:
+        after = decode_cursor(cursor) if cursor else None
+        data, next_cursor = IncapacidadService._pagina(
+            await self.repo.list_by_user(usuario_id, skip=skip, limit=limit + 1, after=after),
+            limit,
+        )
+        data = IncapacidadService._preparar_empleado(data)
+        await self.enricher.enriquecer_empleado(data)
+        return IncapacidadService._depurar_empleado(data), next_cursor
+
+    async def listar_admin(self, *,
+                           skip: int = 0,
+                           limit: int = 100,
+                           estado: Optional[int] = None,
+                           tipo_incapacidad_id: Optional[int] = None,
+                           usuario_id: Optional[int] = None,
+                           fecha_inicio: Optional[datetime] = None,
+                           fecha_final: Optional[datetime] = None,
+                           cursor: Optional[str] = None) -> dict:
+        after = decode_cursor(cursor) if cursor else None
+        data, next_cursor = IncapacidadService._pagina(
+            await self.repo.list_all_with_details(
+                skip=skip,
+                limit=limit + 1,
+                estado=estado,
+                tipo_incapacidad_id=tipo_incapacidad_id,
+                usuario_id=usuario_id,
+                fecha_inicio=fecha_inicio,
+                fecha_final=fecha_final,
+                after=after,
+            ),
+            limit,
+        )
+        rows = [IncapacidadService._normalize_incapacidad_row(dict(row)) for row in data]
+        await self.enricher.enriquecer_admin(rows)
+        IncapacidadService._alias_mensaje_rechazo(rows)
+        try:
+            estados_disponibles = await self.param_hijo_repo.hijos_cacheados(6)
+        except Exception as e:
+            logger.warning("Error al consultar estados de incapacidad: %s", e)
+            estados_disponibles = []
+        return IncapacidadService._respuesta_admin(rows, estados_disponibles, next_cursor)
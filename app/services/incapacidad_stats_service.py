@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import threading
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.config.settings import get_env
+from app.core.cache import TTLCache
+from app.repositories import parametro_hijo_catalog
+from app.repositories.incapacidad import IncapacidadRepository
+from app.repositories.tipo_incapacidad import TipoIncapacidadRepository
+
+
+# Resultados por combinación de filtros; se invalidan al escribir incapacidades
+STATS_CACHE_TTL_SECONDS = float(get_env("INCAPACIDAD_STATS_CACHE_TTL", "60") or 60)
+_cache = TTLCache(maxsize=128, ttl=STATS_CACHE_TTL_SECONDS)
+_lock = threading.Lock()
+# Parte de la clave: un cálculo que empezó antes de invalidar guarda su resultado bajo la
+# versión anterior, que ya nadie consulta (get_or_set calcula fuera del lock del caché)
+_version = 0
+
+
+def invalidate() -> None:
+    """Descarta las estadísticas cacheadas (llamar tras crear/modificar incapacidades)."""
+    global _version
+    with _lock:
+        _version += 1
+    _cache.clear()
+
+
+def _numero(valor: Any) -> float:
+    if valor is None:
+        return 0.0
+    if isinstance(valor, Decimal):
+        return float(valor.quantize(Decimal("0.01")))
+    return round(float(valor), 2)
+
+
+class IncapacidadStatsService:
+    def __init__(self, db: Session) -> None:
+        self.db = db
+        self.repo = IncapacidadRepository(db)
+        self.tipo_repo = TipoIncapacidadRepository(db)
+
+    def obtener(self, *,
+                top_n: int = 10,
+                estado: Optional[int] = None,
+                tipo_incapacidad_id: Optional[int] = None,
+                usuario_id: Optional[int] = None,
+                fecha_inicio: Optional[datetime] = None,
+                fecha_final: Optional[datetime] = None) -> Dict[str, Any]:
+        """Estadísticas agregadas para el tablero de administración (cacheadas por filtros)."""
+        filtros = {
+            "estado": estado,
+            "tipo_incapacidad_id": tipo_incapacidad_id,
+            "usuario_id": usuario_id,
+            "fecha_inicio": fecha_inicio,
+            "fecha_final": fecha_final,
+        }
+        clave = (_version, top_n, *filtros.values())
+        return _cache.get_or_set(clave, lambda: self._calcular(top_n=top_n, filtros=filtros))
+
+    def _calcular(self, *, top_n: int, filtros: Dict[str, Any]) -> Dict[str, Any]:
+        raw = self.repo.estadisticas(top_n=top_n, **filtros)
+        catalogo = parametro_hijo_catalog.get_catalogo(self.db)
+
+        def nombre_parametro(id_hijo: Optional[int]) -> Optional[str]:
+            item = catalogo.obtener(id_hijo) if id_hijo is not None else None
+            return item.nombre if item else None
+
+        def grupo(fila: dict, clave: str, nombre: Optional[str], salida: Optional[str] = None) -> dict:
+            return {
+                salida or clave: fila[clave],
+                "nombre": nombre,
+                "total": int(fila["total"] or 0),
+                "dias": int(fila["dias"] or 0),
+                "costo": _numero(fila["costo"]),
+            }
+
+        tipos = self.tipo_repo.get_many(f["tipo_incapacidad_id"] for f in raw["por_tipo"])
+        por_estado = [grupo(f, "estado", nombre_parametro(f["estado"])) for f in raw["por_estado"]]
+        por_tipo = [
+            grupo(f, "tipo_incapacidad_id", getattr(tipos.get(f["tipo_incapacidad_id"]), "nombre", None))
+            for f in raw["por_tipo"]
+        ]
+        por_eps = [
+            grupo(f, "Eps_id", nombre_parametro(f["Eps_id"]), salida="eps_afiliado_id") for f in raw["por_eps"]
+        ]
+        por_diagnostico = [
+            grupo(f, "diagnostico_id", nombre_parametro(f["diagnostico_id"])) for f in raw["por_diagnostico"]
+        ]
+        mensual = [
+            {
+                "periodo": f"{int(f['anio']):04d}-{int(f['mes']):02d}" if f["anio"] is not None else None,
+                "total": int(f["total"] or 0),
+                "dias": int(f["dias"] or 0),
+                "costo": _numero(f["costo"]),
+            }
+            for f in raw["mensual"]
+        ]
+        return {
+            "total": sum(g["total"] for g in por_estado),
+            "dias": sum(g["dias"] for g in por_estado),
+            "costo": round(sum(g["costo"] for g in por_estado), 2),
+            "por_estado": por_estado,
+            "por_tipo": por_tipo,
+            "por_eps": por_eps,
+            "por_diagnostico": por_diagnostico,
+            "mensual": mensual,
+            "generado": datetime.utcnow().isoformat(),
+        }
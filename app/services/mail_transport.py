@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import logging
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Iterator, Optional
+
+from app.config.settings import get_env
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ConfiguracionSMTP:
+    server: str
+    port: int
+    username: str
+    password: str
+    from_email: str
+    starttls: bool
+    timeout: float
+    # Conexiones autenticadas que se mantienen abiertas
+    pool_size: int
+    # Límite de envíos por minuto del proveedor (0 = sin límite)
+    max_por_minuto: int
+    # Una conexión inactiva más de este tiempo se valida con NOOP antes de usarla
+    noop_segundos: float
+    # Una conexión inactiva más de este tiempo se cierra (los servidores cortan las ociosas)
+    max_inactiva_segundos: float
+
+    @property
+    def configurado(self) -> bool:
+        return bool(self.username and self.password)
+
+
+def _bool(valor: str) -> bool:
+    return valor.strip().lower() in ("1", "true", "yes", "si", "sí")
+
+
+def _leer_configuracion() -> ConfiguracionSMTP:
+    username = get_env("SMTP_USERNAME", "") or ""
+    return ConfiguracionSMTP(
+        server=get_env("SMTP_SERVER", "smtp.gmail.com") or "smtp.gmail.com",
+        port=int(get_env("SMTP_PORT", "587") or 587),
+        username=username,
+        password=get_env("SMTP_PASSWORD", "") or "",
+        from_email=get_env("FROM_EMAIL", username) or username,
+        starttls=_bool(get_env("SMTP_STARTTLS", "true") or "true"),
+        timeout=float(get_env("SMTP_TIMEOUT", "30") or 30),
+        pool_size=max(1, int(get_env("SMTP_POOL_SIZE", "2") or 2)),
+        max_por_minuto=max(0, int(get_env("SMTP_MAX_POR_MINUTO", "0") or 0)),
+        noop_segundos=float(get_env("SMTP_NOOP_SEGUNDOS", "30") or 30),
+        max_inactiva_segundos=float(get_env("SMTP_MAX_INACTIVA_SEGUNDOS", "240") or 240),
+    )
+
+
+def construir_mensaje(*, to_email: str, subject: str, html_content: str, text_content: Optional[str] = None,
+                      from_email: str = "") -> MIMEMultipart:
+    msg = MIMEMultipart("alternative")
+    msg["Subject"] = subject
+    msg["From"] = from_email
+    msg["To"] = to_email
+    if text_content:
+        msg.attach(MIMEText(text_content, "plain", "utf-8"))
+    msg.attach(MIMEText(html_content, "html", "utf-8"))
+    return msg
+
+
+class _Limitador:
+    """Cubeta de fichas: como máximo `por_minuto` envíos por minuto, con ráfagas de hasta ese tamaño."""
+
+    def __init__(self, por_minuto: int) -> None:
+        self.capacidad = float(por_minuto)
+        self.fichas = float(por_minuto)
+        self.tasa = por_minuto / 60.0
+        self.ultimo = time.monotonic()
+        self.lock = threading.Lock()
+
+    def esperar(self) -> None:
+        while True:
+            with self.lock:
+                ahora = time.monotonic()
+                self.fichas = min(self.capacidad, self.fichas + (ahora - self.ultimo) * self.tasa)
+                self.ultimo = ahora
+                if self.fichas >= 1:
+                    self.fichas -= 1
+                    return
+                espera = (1 - self.fichas) / self.tasa
+            time.sleep(espera)
+
+
+class _Conexion:
+    def __init__(self, smtp: smtplib.SMTP) -> None:
+        self.smtp = smtp
+        self.usada = time.monotonic()
+
+
+class MailTransport:
+    """Pool de conexiones SMTP autenticadas compartido por el proceso."""
+
+    def __init__(self, config: ConfiguracionSMTP) -> None:
+        self.config = config
+        self._libres: list[_Conexion] = []
+        self._abiertas = 0
+        self._cond = threading.Condition()
+        self._limitador = _Limitador(config.max_por_minuto) if config.max_por_minuto else None
+        # Contadores para diagnóstico/benchmarks
+        self.handshakes = 0
+        self.enviados = 0
+
+    def _conectar(self) -> _Conexion:
+        config = self.config
+        smtp = smtplib.SMTP(config.server, config.port, timeout=config.timeout)
+        try:
+            if config.starttls:
+                smtp.starttls()
+            smtp.login(config.username, config.password)
+        except Exception:
+            smtp.close()
+            raise
+        with self._cond:
+            self.handshakes += 1
+        return _Conexion(smtp)
+
+    def _sana(self, conexion: _Conexion) -> bool:
+        inactiva = time.monotonic() - conexion.usada
+        if inactiva > self.config.max_inactiva_segundos:
+            return False
+        if inactiva > self.config.noop_segundos:
+            try:
+                return conexion.smtp.noop()[0] == 250
+            except (smtplib.SMTPException, OSError):
+                return False
+        return True
+
+    def _adquirir(self) -> _Conexion:
+        while True:
+            with self._cond:
+                while not self._libres and self._abiertas >= self.config.pool_size:
+                    self._cond.wait()
+                if self._libres:
+                    conexion = self._libres.pop()
+                else:
+                    self._abiertas += 1
+                    conexion = None
+            if conexion is None:
+                try:
+                    return self._conectar()
+                except Exception:
+                    with self._cond:
+                        self._abiertas -= 1
+                        self._cond.notify()
+                    raise
+            # NOOP fuera del lock: no bloquear a otros hilos mientras responde el servidor
+            if self._sana(conexion):
+                return conexion
+            self._liberar(conexion, reutilizable=False)
+
+    def _liberar(self, conexion: _Conexion, *, reutilizable: bool) -> None:
+        with self._cond:
+            if reutilizable:
+                conexion.usada = time.monotonic()
+                self._libres.append(conexion)
+            else:
+                self._abiertas -= 1
+            self._cond.notify()
+        if not reutilizable:
+            _cerrar(conexion.smtp)
+
+    @contextmanager
+    def conexion(self) -> Iterator[smtplib.SMTP]:
+        """Conexión autenticada del pool; se descarta si la operación falla a nivel de conexión."""
+        conexion = self._adquirir()
+        reutilizable = False
+        try:
+            yield conexion.smtp
+            reutilizable = True
+        except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError):
+            # Rechazo del mensaje: la conexión sigue siendo válida
+            reutilizable = True
+            raise
+        finally:
+            self._liberar(conexion, reutilizable=reutilizable)
+
+    def enviar(self, msg) -> None:
+        """Envía un mensaje por una conexión del pool. Lanza la excepción SMTP si falla."""
+        if self._limitador is not None:
+            self._limitador.esperar()
+        try:
+            with self.conexion() as smtp:
+                smtp.send_message(msg)
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            # El servidor cerró la conexión reutilizada antes de aceptar el mensaje: una reconexión
+            with self.conexion() as smtp:
+                smtp.send_message(msg)
+        with self._cond:
+            self.enviados += 1
+
+    def cerrar(self) -> None:
+        with self._cond:
+            libres, self._libres = self._libres, []
+            self._abiertas -= len(libres)
+        for conexion in libres:
+            _cerrar(conexion.smtp)
+
+
+def _cerrar(smtp: smtplib.SMTP) -> None:
+    try:
+        smtp.quit()
+    except Exception:  # noqa: BLE001
+        smtp.close()
+
+
+_config: Optional[ConfiguracionSMTP] = None
+_transport: Optional[MailTransport] = None
+_lock = threading.Lock()
+
+
+def configuracion() -> ConfiguracionSMTP:
+    """Configuración SMTP leída una sola vez por proceso."""
+    global _config
+    if _config is None:
+        with _lock:
+            if _config is None:
+                _config = _leer_configuracion()
+    return _config
+
+
+def get_transport() -> MailTransport:
+    global _transport
+    if _transport is None:
+        with _lock:
+            if _transport is None:
+                _transport = MailTransport(configuracion())
+    return _transport
+
+
+def enviar_correo(*, to_email: str, subject: str, html_content: str, text_content: Optional[str] = None) -> None:
+    """Construye y envía un correo con el transporte compartido. Lanza la excepción si falla."""
+    transport = get_transport()
+    transport.enviar(construir_mensaje(
+        to_email=to_email,
+        subject=subject,
+        html_content=html_content,
+        text_content=text_content,
+        from_email=transport.config.from_email,
+    ))
+
+
+def reset() -> None:
+    """Cierra el pool y vuelve a leer la configuración en el próximo uso (pruebas)."""
+    global _config, _transport
+    with _lock:
+        transport, _transport, _config = _transport, None, None
+    if transport is not None:
+        transport.cerrar()
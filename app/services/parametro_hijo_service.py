@@ -1,11 +1,16 @@
-from typing import List
+from typing import TYPE_CHECKING, List
 from sqlalchemy.orm import Session
 
+from app.core import http_cache
 from app.repositories.parametro_repository import ParametroRepository
-from app.repositories.parametro_hijo_repository import ParametroHijoRepository
+from app.repositories.parametro_hijo_repository import AsyncParametroHijoRepository, ParametroHijoRepository
 from app.schemas.parametro_hijo import ParametroHijoCreate, ParametroHijoOut, ParametroHijoUpdate
 from app.models.parametro_hijo import ParametroHijo
 
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
 class ParametroHijoService:
     def __init__(self, db: Session) -> None:
         self.repo = ParametroRepository(db)
@@ -22,6 +27,7 @@ class ParametroHijoService:
             descripcion=payload.descripcion,
             estado=payload.estado,
         )
+        http_cache.invalidar("parametro_hijo")
         return ParametroHijoOut.model_validate(hijo)
 
     def get(self, id_parametro_hijo: int) -> ParametroHijoOut | None:
@@ -45,10 +51,16 @@ class ParametroHijoService:
             descripcion=payload.descripcion,
             estado=payload.estado,
         )
-        return None if entity is None else ParametroHijoOut.model_validate(entity)
+        if entity is None:
+            return None
+        http_cache.invalidar("parametro_hijo")
+        return ParametroHijoOut.model_validate(entity)
 
     def delete(self, id_parametro_hijo: int) -> bool:
-        return self.repohijo.delete(id_parametro_hijo)
+        eliminado = self.repohijo.delete(id_parametro_hijo)
+        if eliminado:
+            http_cache.invalidar("parametro_hijo")
+        return eliminado
 
     def hijospapa(self, id_parametro: int) -> List[ParametroHijoOut]:
         entity = self.repo.get(id_parametro)
@@ -58,6 +70,26 @@ class ParametroHijoService:
         return [ParametroHijoOut.model_validate(x) for x in hijos]
 
     def cambiar_estado(self, id_parametro_hijo: int) -> bool:
-        return self.repohijo.cambiar_estado(id_parametro_hijo)
+        cambiado = self.repohijo.cambiar_estado(id_parametro_hijo)
+        if cambiado:
+            http_cache.invalidar("parametro_hijo")
+        return cambiado
+
+
+class AsyncParametroHijoService:
+    """Lecturas de ParametroHijoService sobre AsyncSession."""
 
+    def __init__(self, db: "AsyncSession") -> None:
+        self.repohijo = AsyncParametroHijoRepository(db)
 
+    async def get(self, id_parametro_hijo: int) -> ParametroHijoOut | None:
+        hijo = await self.repohijo.obtener_id(id_parametro_hijo)
+        return None if hijo is None else ParametroHijoOut.model_validate(hijo)
+
+    async def list(self, skip: int = 0, limit: int = 100) -> List[ParametroHijoOut]:
+        items = await self.repohijo.list(skip=skip, limit=limit)
+        return [ParametroHijoOut.model_validate(x) for x in items]
+
+    async def buscar(self, parametro_id: int, q: str, *, limit: int = 20, solo_activos: bool = True) -> List[ParametroHijoOut]:
+        items = await self.repohijo.buscar(parametro_id, q, limit=limit, solo_activos=solo_activos)
+        return [ParametroHijoOut.model_validate(x) for x in items]
@@ -1,6 +1,7 @@
 from typing import List
 from sqlalchemy.orm import Session
 
+from app.core import http_cache
 from app.repositories.parametro_repository import ParametroRepository
 from app.schemas.parametro import ParametroCreate, ParametroOut, ParametroUpdate
 
@@ -15,6 +16,7 @@ class ParametroService:
             descripcion=payload.descripcion,
             estado=payload.estado,
         )
+        http_cache.invalidar("parametro")
         return ParametroOut.model_validate(entity)
 
     def get(self, id_parametro: int) -> ParametroOut | None:
@@ -32,7 +34,14 @@ class ParametroService:
             descripcion=payload.descripcion,
             estado=payload.estado,
         )
-        return None if entity is None else ParametroOut.model_validate(entity)
+        if entity is None:
+            return None
+        http_cache.invalidar("parametro")
+        return ParametroOut.model_validate(entity)
 
     def delete(self, id_parametro: int) -> bool:
-        return self.repo.delete(id_parametro)
+        eliminado = self.repo.delete(id_parametro)
+        if eliminado:
+            # Por si la BD elimina en cascada los hijos
+            http_cache.invalidar("parametro", "parametro_hijo")
+        return eliminado
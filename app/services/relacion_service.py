@@ -1,6 +1,8 @@
 from typing import List
 from sqlalchemy.orm import Session
 
+from app.core import http_cache
+from app.repositories import relacion_matriz
 from app.repositories.relacion_repository import RelacionRepository
 from app.schemas.relacion import RelacionCreate, RelacionOut, RelacionWithNamesOut
 from app.schemas.archivo import ArchivoOut
@@ -10,26 +12,17 @@ from app.repositories.archivo_repository import ArchivoRepository
 
 class RelacionService:
     def __init__(self, db: Session) -> None:
+        self.db = db
         self.repo = RelacionRepository(db)
         self.tipo_repo = TipoIncapacidadRepository(db)
         self.archivo_repo = ArchivoRepository(db)
 
     # 1) Obtener todos los objetos, con opción de validar si existen
     def list(self, *, skip: int = 0, limit: int = 100, raise_if_empty: bool = False) -> List[RelacionOut]:
-        items = self.repo.list(skip=skip, limit=limit)
-        if raise_if_empty and not items:
+        # Nombres ya resueltos en la matriz en memoria
+        result = relacion_matriz.get_matriz(self.db).listar(skip=skip, limit=limit)
+        if raise_if_empty and not result:
             raise LookupError("No existen relaciones registradas")
-        # Enriquecer con nombres
-        result: List[dict] = []
-        for x in items:
-            tipo = self.tipo_repo.get(x.tipo_incapacidad_id)
-            arch = self.archivo_repo.get(x.archivo_id)
-            result.append({
-                "tipo_incapacidad_id": x.tipo_incapacidad_id,
-                "tipo_incapacidad_nombre": getattr(tipo, "nombre", None) if tipo else None,
-                "archivo_id": x.archivo_id,
-                "archivo_nombre": getattr(arch, "nombre", None) if arch else None,
-            })
         return result
 
     # 2) Crear un objeto relacion
@@ -47,30 +40,26 @@ class RelacionService:
             tipo_incapacidad_id=payload.tipo_incapacidad_id,
             archivo_id=payload.archivo_id,
         )
+        http_cache.invalidar("relacion")
+        relacion_matriz.recargar(self.db)
         return RelacionOut.model_validate(entity)
 
     # 3) Eliminar un objeto relacion por (tipo_incapacidad_id, archivo_id)
     def delete(self, tipo_incapacidad_id: int, archivo_id: int) -> bool:
-        return self.repo.delete(tipo_incapacidad_id=tipo_incapacidad_id, archivo_id=archivo_id)
+        eliminado = self.repo.delete(tipo_incapacidad_id=tipo_incapacidad_id, archivo_id=archivo_id)
+        if eliminado:
+            http_cache.invalidar("relacion")
+            relacion_matriz.recargar(self.db)
+        return eliminado
 
     # 4) Obtener todos los objetos con el mismo tipo_incapacidad_id
     def list_by_tipo_incapacidad(self, tipo_incapacidad_id: int, *, raise_if_empty: bool = False) -> List[RelacionOut]:
-        items = self.repo.list_by_tipo_incapacidad(tipo_incapacidad_id=tipo_incapacidad_id)
-        if raise_if_empty and not items:
+        result = relacion_matriz.get_matriz(self.db).de_tipo(tipo_incapacidad_id)
+        if raise_if_empty and not result:
             raise LookupError("No existen relaciones para el tipo_incapacidad_id proporcionado")
-        result: List[dict] = []
-        for x in items:
-            tipo = self.tipo_repo.get(x.tipo_incapacidad_id)
-            arch = self.archivo_repo.get(x.archivo_id)
-            result.append({
-                "tipo_incapacidad_id": x.tipo_incapacidad_id,
-                "tipo_incapacidad_nombre": getattr(tipo, "nombre", None) if tipo else None,
-                "archivo_id": x.archivo_id,
-                "archivo_nombre": getattr(arch, "nombre", None) if arch else None,
-            })
         return result
 
     # 5) Obtener lista de archivos asociados a un tipo_incapacidad_id
     def list_archivos_by_tipo_incapacidad(self, tipo_incapacidad_id: int) -> List[ArchivoOut]:
-        archivos = self.archivo_repo.list_by_tipo_incapacidad(tipo_incapacidad_id)
+        archivos = relacion_matriz.get_matriz(self.db).archivos_de(tipo_incapacidad_id)
         return [ArchivoOut.model_validate(a) for a in archivos]
\ No newline at end of file
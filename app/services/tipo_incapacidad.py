@@ -1,12 +1,15 @@
 from typing import List
 from sqlalchemy.orm import Session
 
+from app.core import http_cache
+from app.repositories import relacion_matriz
 from app.models.tipo_incapacidad import TipoIncapacidad
 from app.repositories.tipo_incapacidad import TipoIncapacidadRepository
 from app.schemas.tipo_incapacidad import TipoIncapacidadCreate, TipoIncapacidadOut, TipoIncapacidadUpdate
 
 class TipoIncapacidadService:
     def __init__(self, db: Session) -> None:
+        self.db = db
         self.repoin = TipoIncapacidadRepository(db)
         
     def create(self, payload: TipoIncapacidadCreate) -> TipoIncapacidadOut:
@@ -15,6 +18,7 @@ class TipoIncapacidadService:
             descripcion=payload.descripcion,
             estado=payload.estado,
         )
+        http_cache.invalidar("tipo_incapacidad")
         return TipoIncapacidadOut.model_validate(entity)
 
     def get(self, id_tipo_incapacidad: int) -> TipoIncapacidadOut | None:
@@ -32,7 +36,17 @@ class TipoIncapacidadService:
             descripcion=payload.descripcion,
             estado=payload.estado,
         )
-        return None if entity is None else TipoIncapacidadOut.model_validate(entity)
+        if entity is None:
+            return None
+        http_cache.invalidar("tipo_incapacidad")
+        # Nombre del tipo en la matriz de relaciones
+        relacion_matriz.recargar(self.db)
+        return TipoIncapacidadOut.model_validate(entity)
 
     def delete(self, id_tipo_incapacidad: int) -> bool:
-        return self.repoin.delete(id_tipo_incapacidad)
\ No newline at end of file
+        eliminado = self.repoin.delete(id_tipo_incapacidad)
+        if eliminado:
+            # Por si la BD elimina en cascada sus relaciones
+            http_cache.invalidar("tipo_incapacidad", "relacion")
+            relacion_matriz.recargar(self.db)
+        return eliminado
\ No newline at end of file
@@ -1,42 +1,39 @@
 from __future__ import annotations
 
+import io
+import json
+import logging
 import os
+import shutil
 import uuid
 from typing import List, Optional
 from fastapi import UploadFile
 from sqlalchemy.orm import Session
 from datetime import datetime
 
+from app.core import http_cache
 from app.repositories.archivo_repository import ArchivoRepository
+from app.repositories.archivo_url_repository import ArchivoUrlRepository
 from app.repositories.incapacidad import IncapacidadRepository
 from app.schemas.archivo import ArchivoCreate, ArchivoOut
 from app.services.audit_service import AuditService
 from app.config.settings import get_env
+from app.services import gdrive_client
 
-# Google Drive SDK
-try:
-    from google.oauth2.credentials import Credentials as OAuthCredentials
-    from google_auth_oauthlib.flow import Flow
-    from google.auth.transport.requests import Request
-    from google.oauth2 import service_account
-    from googleapiclient.discovery import build as gbuild
-    from googleapiclient.http import MediaInMemoryUpload
-except Exception:
-    OAuthCredentials = None
-    Flow = None
-    Request = None
-    service_account = None
-    gbuild = None
-    MediaInMemoryUpload = None
+# Copia a disco en bloques de 1 MB (no se carga el archivo completo en memoria)
+SPOOL_CHUNK_SIZE = 1024 * 1024
 
+logger = logging.getLogger(__name__)
 
 class UploadService:
     def __init__(self, db: Session) -> None:
         self.db = db
         self.archivo_repo = ArchivoRepository(db)
+        self.url_repo = ArchivoUrlRepository(db)
         self.incapacidad_repo = IncapacidadRepository(db)
         self.audit_service = AuditService(db)
         self.upload_dir = "uploads"
+        # JSON heredados por archivo; solo se leen al importar (importar_metadatos_json)
         self.urls_dir = os.path.join(self.upload_dir, "urls")
         self.max_file_size = 10 * 1024 * 1024  # 10MB
         # Configuración Drive
@@ -45,11 +42,12 @@ class UploadService:
         self.gdrive_service_account_json = get_env("GDRIVE_SERVICE_ACCOUNT_JSON", "google_service_account.json")
         self.gdrive_oauth_json = get_env("GDRIVE_OAUTH_JSON", "")
         self.gdrive_token_json = get_env("GDRIVE_TOKEN_JSON", "token.json")
+        # Cliente compartido (gdrive_client) y servicio del hilo actual, resueltos en _ensure_gdrive
+        self._gdrive = None
         self._gdrive_service = None
         
         # Crear directorio de uploads si no existe
         os.makedirs(self.upload_dir, exist_ok=True)
-        os.makedirs(self.urls_dir, exist_ok=True)
 
     def upload_pdf(self, *, file: UploadFile, user_id: int, description: str = None) -> int:
         """
@@ -65,29 +63,22 @@ class UploadService:
         file_path = os.path.join(self.upload_dir, unique_filename)
         
         try:
-            # Leer contenido del archivo
-            content = file.file.read()
-            
-            # Validar que el contenido sea realmente un PDF
-            if not self._is_valid_pdf(content):
+            # Validar que el contenido sea realmente un PDF (solo inicio y final del archivo)
+            if not self._is_valid_pdf(self._muestra(file.file)):
                 raise ValueError("El archivo no es un PDF válido")
             
             # Subir a Google Drive si hay credenciales; si no, guardar local
             public_url = None
             if self._ensure_gdrive():
                 try:
-                    public_url = self._gdrive_upload(content, original_name=(file.filename or "documento.pdf"), mime_type="application/pdf")
-                    if public_url:
-                        print(f"✅ Archivo subido a Google Drive: {public_url}")
-                    else:
-                        print("⚠️  Falló subida a Google Drive, usando almacenamiento local")
+                    public_url = self._gdrive_upload_stream(file.file, original_name=(file.filename or "documento.pdf"), mime_type="application/pdf")
+                    if not public_url:
+                        logger.warning("Falló subida a Google Drive, usando almacenamiento local")
                 except Exception as e:
-                    print(f"⚠️  Error subiendo a Google Drive: {str(e)}")
-                    print("📁 Usando almacenamiento local como fallback")
+                    logger.warning("Error subiendo a Google Drive, usando almacenamiento local: %s", e)
             
             if not public_url:
-                with open(file_path, "wb") as f:
-                    f.write(content)
+                self._guardar_local(file.file, file_path)
             
             # Crear registro en base de datos
             archivo_data = ArchivoCreate(
@@ -97,6 +88,7 @@ class UploadService:
             )
             
             archivo = self.archivo_repo.create(archivo_data)
+            http_cache.invalidar("archivo")
             
             # Guardar información adicional del archivo físico
             # Guardar metadatos con URL pública (Drive o local)
@@ -132,6 +124,28 @@ class UploadService:
         )
         return inserted[0] if inserted else None
 
+    @staticmethod
+    def _muestra(fh, *, cabeza: int = 1024, cola: int = 1024) -> bytes:
+        """Primeros y últimos bytes del archivo (o todo si es pequeño) para validar firmas
+        sin cargarlo completo. Deja el archivo posicionado al inicio."""
+        fh.seek(0, os.SEEK_END)
+        tamano = fh.tell()
+        fh.seek(0)
+        if tamano <= cabeza + cola:
+            muestra = fh.read()
+        else:
+            muestra = fh.read(cabeza)
+            fh.seek(tamano - cola)
+            muestra += fh.read(cola)
+        fh.seek(0)
+        return muestra
+
+    @staticmethod
+    def _guardar_local(fh, file_path: str) -> None:
+        fh.seek(0)
+        with open(file_path, "wb") as f:
+            shutil.copyfileobj(fh, f, SPOOL_CHUNK_SIZE)
+
     def _is_valid_pdf(self, content: bytes) -> bool:
         """
         Valida que el contenido sea realmente un PDF.
@@ -163,32 +177,27 @@ class UploadService:
         file_path = os.path.join(self.upload_dir, unique_filename)
 
         try:
-            content = file.file.read()
-
-            if not self._is_valid_png(content):
+            if not self._is_valid_png(self._muestra(file.file)):
                 raise ValueError("El archivo no es un PNG válido")
 
             public_url = None
             if self._ensure_gdrive():
                 try:
-                    public_url = self._gdrive_upload(content, original_name=(file.filename or f"imagen{file_extension}"), mime_type="image/png")
-                    if public_url:
-                        print(f"✅ Imagen subida a Google Drive: {public_url}")
-                    else:
-                        print("⚠️  Falló subida a Google Drive, usando almacenamiento local")
+                    public_url = self._gdrive_upload_stream(file.file, original_name=(file.filename or f"imagen{file_extension}"), mime_type="image/png")
+                    if not public_url:
+                        logger.warning("Falló subida a Google Drive, usando almacenamiento local")
                 except Exception as e:
-                    print(f"⚠️  Error subiendo a Google Drive: {str(e)}")
-                    print("📁 Usando almacenamiento local como fallback")
+                    logger.warning("Error subiendo a Google Drive, usando almacenamiento local: %s", e)
             
             if not public_url:
-                with open(file_path, "wb") as f:
-                    f.write(content)
+                self._guardar_local(file.file, file_path)
 
             archivo = self.archivo_repo.create(ArchivoCreate(
                 nombre=file.filename or f"imagen_{datetime.now().strftime('%Y%m%d_%H%M%S')}{file_extension}",
                 descripcion=description or f"Imagen PNG subida por usuario {user_id}",
                 estado=True
             ))
+            http_cache.invalidar("archivo")
 
             if public_url:
                 self._save_file_metadata_with_url(archivo.id_archivo, public_url, file.size, user_id)
@@ -217,147 +226,71 @@ class UploadService:
 
     def _save_file_metadata(self, archivo_id: int, file_path: str, file_size: int, user_id: int):
         """
-        Guarda un JSON por archivo en uploads/urls con la URL y metadatos básicos.
+        Registra en el índice archivo_url la ruta local y su URL pública.
         """
-        try:
-            public_url = f"/uploads/{archivo_id}{os.path.splitext(file_path)[1]}" if os.path.splitext(file_path)[1] else f"/uploads/{archivo_id}"
-            metadata = {
-                "archivo_id": archivo_id,
-                "user_id": user_id,
-                "file_path": file_path,
-                "file_size": file_size or 0,
-                "url": public_url,
-                "fecha_subida": datetime.now().isoformat(),
-            }
-            meta_file = os.path.join(self.urls_dir, f"{archivo_id}.json")
-            # Escribir como JSON (sin depender de imports adicionales)
-            import json
-            with open(meta_file, "w", encoding="utf-8") as f:
-                json.dump(metadata, f, ensure_ascii=False, indent=2)
-        except Exception:
-            # No interrumpir el flujo de subida si falla el guardado de metadatos
-            pass
+        ext = os.path.splitext(file_path)[1]
+        public_url = f"/uploads/{archivo_id}{ext}" if ext else f"/uploads/{archivo_id}"
+        self._guardar_url(archivo_id, file_path, public_url, file_size, user_id)
 
     def _save_file_metadata_with_url(self, archivo_id: int, public_url: str, file_size: int, user_id: int):
+        self._guardar_url(archivo_id, public_url, public_url, file_size, user_id)
+
+    def _guardar_url(self, archivo_id: int, file_path: str, public_url: str, file_size: int, user_id: int):
+        # No interrumpir el flujo de subida si falla el guardado de metadatos. El savepoint
+        # revierte solo el upsert y deja intacto el resto de la transacción del request.
         try:
-            metadata = {
-                "archivo_id": archivo_id,
-                "user_id": user_id,
-                "file_path": public_url,
-                "file_size": file_size or 0,
-                "url": public_url,
-                "fecha_subida": datetime.now().isoformat(),
-            }
-            meta_file = os.path.join(self.urls_dir, f"{archivo_id}.json")
-            import json
-            with open(meta_file, "w", encoding="utf-8") as f:
-                json.dump(metadata, f, ensure_ascii=False, indent=2)
+            with self.db.begin_nested():
+                self.url_repo.guardar(
+                    archivo_id=archivo_id,
+                    user_id=user_id,
+                    file_path=file_path,
+                    file_size=file_size or 0,
+                    url=public_url,
+                    commit=False,
+                )
         except Exception:
-            pass
+            logger.exception("No se pudo registrar la URL del archivo %s", archivo_id)
+            return
+        self.db.commit()
+
+    def guardar_temporal(self, file: UploadFile, *, extension: str) -> tuple[str, int]:
+        """
+        Copia el archivo recibido a uploads/pendientes y retorna (ruta, tamaño en bytes).
+        """
+        spool_dir = os.path.join(self.upload_dir, "pendientes")
+        os.makedirs(spool_dir, exist_ok=True)
+        ruta = os.path.join(spool_dir, f"{uuid.uuid4()}{extension}")
+        file.file.seek(0)
+        with open(ruta, "wb") as destino:
+            shutil.copyfileobj(file.file, destino, SPOOL_CHUNK_SIZE)
+            tamano = destino.tell()
+        return ruta, tamano
+
+    def subir_archivo_local_drive(self, ruta: str, *, original_name: str, mime_type: str,
+                                  sesion: str | None = None, on_sesion=None) -> str | None:
+        """Sube a Google Drive (por bloques) un archivo guardado en disco. Retorna la URL pública o None.
+        `sesion`/`on_sesion` permiten retomar una subida reanudable interrumpida (ver DriveClient.subir).
+        """
+        with open(ruta, "rb") as f:
+            return self._gdrive_upload_stream(
+                f, original_name=original_name, mime_type=mime_type, sesion=sesion, on_sesion=on_sesion
+            )
 
     # ---------------- Google Drive helpers -----------------
     def _ensure_gdrive(self) -> bool:
+        """Obtiene el cliente de Drive compartido por el proceso y la carpeta destino."""
         if self._gdrive_service is not None:
             return True
-        try:
-            if not (service_account and gbuild and MediaInMemoryUpload):
-                print("❌ Librerías de Google Drive no disponibles")
-                return False
-            
-            # Intentar usar Service Account primero
-            if self.gdrive_service_account_json and os.path.exists(self.gdrive_service_account_json):
-                try:
-                    print("🔑 Usando Service Account para Google Drive...")
-                    scopes = [
-                        "https://www.googleapis.com/auth/drive",
-                        "https://www.googleapis.com/auth/drive.file",
-                    ]
-                    
-                    credentials = service_account.Credentials.from_service_account_file(
-                        self.gdrive_service_account_json, 
-                        scopes=scopes
-                    )
-                    
-                    # Crear servicio de Google Drive
-                    self._gdrive_service = gbuild("drive", "v3", credentials=credentials)
-                    
-                    # Asegurar carpeta
-                    self._ensure_folder()
-                    print("✅ Google Drive configurado correctamente con Service Account")
-                    return True
-                    
-                except Exception as e:
-                    print(f"❌ Error con Service Account: {str(e)}")
-                    self._gdrive_service = None
-            
-            # Fallback a OAuth2 si Service Account falla
-            if self.gdrive_oauth_json:
-                print("🔑 Intentando autenticación OAuth2...")
-                if not (OAuthCredentials and Flow and Request):
-                    print("❌ Librerías OAuth2 no disponibles")
-                    return False
-                
-                import json
-                
-                # Leer credenciales OAuth2
-                if os.path.exists(self.gdrive_oauth_json):
-                    with open(self.gdrive_oauth_json, 'r', encoding='utf-8') as f:
-                        client_config = json.load(f)
-                else:
-                    client_config = json.loads(self.gdrive_oauth_json)
-                
-                # Configurar scopes
-                scopes = [
-                    "https://www.googleapis.com/auth/drive",
-                    "https://www.googleapis.com/auth/drive.file",
-                ]
-                
-                # Verificar si ya tenemos un token guardado
-                creds = None
-                if os.path.exists(self.gdrive_token_json):
-                    try:
-                        creds = OAuthCredentials.from_authorized_user_file(self.gdrive_token_json, scopes)
-                    except Exception:
-                        creds = None
-                
-                # Si no hay credenciales válidas, necesitamos autenticación
-                if not creds or not creds.valid:
-                    if creds and creds.expired and creds.refresh_token:
-                        try:
-                            creds.refresh(Request())
-                        except Exception:
-                            creds = None
-                    
-                    if not creds:
-                        print("🔑 Iniciando proceso de autenticación OAuth2...")
-                        flow = Flow.from_client_config(client_config, scopes)
-                        flow.redirect_uri = 'http://localhost:8000/auth/callback'
-                        
-                        # Generar URL de autorización
-                        auth_url, _ = flow.authorization_url(prompt='consent')
-                        print(f"🌐 Abre esta URL en tu navegador: {auth_url}")
-                        print("📋 Después de autorizar, copia el código de autorización aquí")
-                        
-                        # Por ahora, retornar False para evitar bloqueo
-                        return False
-                
-                # Crear servicio de Google Drive
-                self._gdrive_service = gbuild("drive", "v3", credentials=creds)
-                
-                # Guardar token para futuras sesiones
-                with open(self.gdrive_token_json, 'w') as token:
-                    token.write(creds.to_json())
-                
-                # Asegurar carpeta
-                self._ensure_folder()
-                print("✅ Google Drive configurado correctamente con OAuth2")
-                return True
-            
-            print("❌ No se encontraron credenciales válidas para Google Drive")
+        client = gdrive_client.get_client()
+        if client is None:
             return False
-            
+        try:
+            self._gdrive = client
+            self._gdrive_service = client.service()
+            self._ensure_folder()
+            return True
         except Exception as e:
-            print(f"❌ Error inicializando Google Drive: {str(e)}")
+            logger.warning("Error inicializando Google Drive: %s", e)
             self._gdrive_service = None
             return False
 
@@ -365,61 +298,43 @@ class UploadService:
         if not self._gdrive_service:
             return
         try:
-            if self.gdrive_folder_id:
-                return
-            # Buscar carpeta por nombre
-            q = f"mimeType='application/vnd.google-apps.folder' and name='{self.gdrive_folder_name}' and trashed=false"
-            res = self._gdrive_service.files().list(q=q, fields="files(id,name)").execute()
-            files = res.get("files", [])
-            if files:
-                self.gdrive_folder_id = files[0]["id"]
-                return
-            # Crear si no existe
-            file_metadata = {
-                'name': self.gdrive_folder_name,
-                'mimeType': 'application/vnd.google-apps.folder'
-            }
-            folder = self._gdrive_service.files().create(body=file_metadata, fields='id').execute()
-            self.gdrive_folder_id = folder.get('id')
+            # Memorizado en el cliente compartido: solo se busca/crea una vez por proceso
+            self.gdrive_folder_id = self._gdrive.folder_id(self.gdrive_folder_name, self.gdrive_folder_id)
         except Exception:
             pass
 
     def _gdrive_upload(self, content: bytes, *, original_name: str, mime_type: str) -> str | None:
+        return self._gdrive_upload_stream(io.BytesIO(content), original_name=original_name, mime_type=mime_type)
+
+    def _gdrive_upload_stream(self, fh, *, original_name: str, mime_type: str,
+                              sesion: str | None = None, on_sesion=None) -> str | None:
         try:
             if not self._gdrive_service:
                 return None
-            media = MediaInMemoryUpload(content, mimetype=mime_type, resumable=False)
-            body = { 'name': original_name }
-            if self.gdrive_folder_id:
-                body['parents'] = [self.gdrive_folder_id]
-            
-            # Subir archivo directamente al Drive (o Shared Drive)
-            file = self._gdrive_service.files().create(
-                body=body, 
-                media_body=media, 
-                fields='id,webViewLink,webContentLink',
-                supportsAllDrives=True  # Habilitar soporte para Shared Drives
-            ).execute()
-            
-            file_id = file.get('id')
-            
-            # Hacer público con enlace
-            try:
-                self._gdrive_service.permissions().create(
-                    fileId=file_id, 
-                    body={'type':'anyone','role':'reader'},
-                    supportsAllDrives=True  # Habilitar soporte para Shared Drives
-                ).execute()
-                print(f"✅ Archivo {original_name} subido a Google Drive exitosamente")
-            except Exception as e:
-                print(f"⚠️  Archivo subido pero no se pudo hacer público: {str(e)}")
-            
-            # Preferir webViewLink
-            return file.get('webViewLink') or file.get('webContentLink') or f"https://drive.google.com/file/d/{file_id}/view"
+            url = self._gdrive.subir(
+                fh,
+                nombre=original_name,
+                mime_type=mime_type,
+                carpeta_id=self.gdrive_folder_id,
+                sesion=sesion,
+                on_sesion=on_sesion,
+            )
+            logger.debug("Archivo %s subido a Google Drive: %s", original_name, url)
+            return url
         except Exception as e:
-            print(f"Error en _gdrive_upload: {str(e)}")
+            logger.warning("Error subiendo %s a Google Drive: %s", original_name, e)
             return None
 
+    def verificar_gdrive(self) -> bool:
+        """Verifica (con resultado memorizado) que la carpeta de Drive es accesible."""
+        if not self._ensure_gdrive() or not self.gdrive_folder_id:
+            return False
+        try:
+            return self._gdrive.verificar(self.gdrive_folder_id)
+        except Exception as e:
+            logger.warning("Google Drive no responde: %s", e)
+            return False
+
     def get_file_info(self, file_id: int, user_id: int) -> Optional[dict]:
         """
         Obtiene información de un archivo subido por el usuario.
@@ -512,34 +427,51 @@ class UploadService:
             "all_valid": len(invalid_files) == 0
         }
 
-    # Nuevos helpers para leer metadatos/urls
+    # Nuevos helpers para leer metadatos/urls (índice archivo_url)
     def get_file_url_metadata(self, archivo_id: int) -> Optional[dict]:
-        meta_file = os.path.join(self.urls_dir, f"{archivo_id}.json")
-        if not os.path.exists(meta_file):
-            return None
-        try:
-            import json
-            with open(meta_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            return data
-        except Exception:
-            return None
+        registro = self.url_repo.get(archivo_id)
+        return registro.to_dict() if registro else None
 
     def list_user_urls(self, user_id: int) -> List[dict]:
-        import json
-        results: List[dict] = []
-        try:
-            for name in os.listdir(self.urls_dir):
-                if not name.endswith(".json"):
-                    continue
-                path = os.path.join(self.urls_dir, name)
-                try:
-                    with open(path, "r", encoding="utf-8") as f:
-                        data = json.load(f)
-                    if data.get("user_id") == user_id:
-                        results.append(data)
-                except Exception:
-                    continue
-        except FileNotFoundError:
-            return []
-        return results
+        return [r.to_dict() for r in self.url_repo.list_by_user(user_id)]
+
+    def importar_metadatos_json(self, *, solo_si_vacio: bool = False) -> dict:
+        """
+        Importa al índice archivo_url los JSON heredados de uploads/urls.
+        Idempotente: los archivo_id ya indexados se omiten. Retorna conteos de importados,
+        omitidos e inválidos.
+        """
+        resumen = {"importados": 0, "omitidos": 0, "invalidos": 0}
+        if not os.path.isdir(self.urls_dir) or (solo_si_vacio and not self.url_repo.vacio()):
+            return resumen
+        existentes = self.url_repo.ids_existentes()
+        lote: List[dict] = []
+        for name in sorted(os.listdir(self.urls_dir)):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.urls_dir, name), "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                archivo_id = int(data["archivo_id"])
+                registro = {
+                    "archivo_id": archivo_id,
+                    "user_id": int(data["user_id"]),
+                    "file_path": str(data.get("file_path") or data.get("url") or ""),
+                    "file_size": int(data.get("file_size") or 0),
+                    "url": str(data.get("url") or data.get("file_path") or ""),
+                    "fecha_subida": datetime.fromisoformat(data["fecha_subida"]) if data.get("fecha_subida") else datetime.now(),
+                }
+            except Exception:
+                resumen["invalidos"] += 1
+                continue
+            if archivo_id in existentes:
+                resumen["omitidos"] += 1
+                continue
+            existentes.add(archivo_id)
+            lote.append(registro)
+            if len(lote) >= 500:
+                resumen["importados"] += self.url_repo.guardar_lote(lote)
+                lote = []
+        if lote:
+            resumen["importados"] += self.url_repo.guardar_lote(lote)
+        return resumen
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+
+from app.config.settings import get_env
+from app.db.session import SessionLocal
+from app.models.carga_documento import (
+    CARGA_COMPLETADA,
+    CARGA_ERROR,
+    CARGA_PENDIENTE,
+)
+from app.repositories.carga_documento_repository import CargaDocumentoRepository
+from app.repositories.incapacidad import IncapacidadRepository
+
+
+UPLOAD_WORKERS = int(get_env("UPLOAD_WORKERS", "4") or 4)
+UPLOAD_MAX_INTENTOS = int(get_env("UPLOAD_MAX_INTENTOS", "3") or 3)
+# Espera antes del reintento n: base * 2**(n-1) segundos
+UPLOAD_RETRY_BASE_SECONDS = float(get_env("UPLOAD_RETRY_BASE_SECONDS", "2") or 2)
+# Una carga 'subiendo' sin actividad en este tiempo se considera abandonada (proceso caído) y
+# vuelve a 'pendiente'. Debe superar la duración de la subida más larga.
+UPLOAD_LEASE_SECONDS = float(get_env("UPLOAD_LEASE_SECONDS", "1800") or 1800)
+
+# url_documento provisional mientras el archivo no está en Drive
+URL_PENDIENTE = "pendiente://carga/{id_carga}"
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_barrido: Optional[threading.Timer] = None
+_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS, thread_name_prefix="carga-drive")
+        return _executor
+
+
+def encolar(id_carga: int) -> Future:
+    """Programa la subida a Drive de una carga ya registrada en BD."""
+    return _get_executor().submit(procesar, id_carga)
+
+
+def reanudar_pendientes() -> int:
+    """Libera las cargas con el lease vencido y encola las pendientes. Retorna cuántas.
+
+    Se ejecuta al iniciar el servidor y luego cada UPLOAD_LEASE_SECONDS. Varios procesos
+    pueden encolar la misma carga: procesar la sube solo en el que gana reclamar.
+    """
+    db = SessionLocal()
+    try:
+        repo = CargaDocumentoRepository(db)
+        liberadas = repo.liberar_vencidas(UPLOAD_LEASE_SECONDS)
+        if liberadas:
+            logger.warning("Cargas 'subiendo' sin actividad devueltas a pendiente: %s", liberadas)
+        ids = repo.list_ids_pendientes()
+    finally:
+        db.close()
+    for id_carga in ids:
+        encolar(id_carga)
+    _programar_barrido()
+    return len(ids)
+
+
+def _programar_barrido() -> None:
+    global _barrido
+    with _lock:
+        if _barrido is not None:
+            _barrido.cancel()
+        _barrido = threading.Timer(UPLOAD_LEASE_SECONDS, _barrer)
+        _barrido.daemon = True
+        _barrido.start()
+
+
+def _barrer() -> None:
+    try:
+        reanudar_pendientes()
+    except Exception:  # noqa: BLE001
+        logger.exception("Error revisando cargas pendientes")
+        _programar_barrido()
+
+
+def detener(wait: bool = False) -> None:
+    global _executor, _barrido
+    with _lock:
+        executor, _executor = _executor, None
+        barrido, _barrido = _barrido, None
+    if barrido is not None:
+        barrido.cancel()
+    if executor is not None:
+        executor.shutdown(wait=wait, cancel_futures=not wait)
+
+
+def procesar(id_carga: int) -> Optional[str]:
+    """Sube el archivo de la carga a Drive con reintentos y reemplaza url_documento.
+
+    Usa su propia sesión (corre fuera del request). Retorna el estado final, o el actual
+    si otro proceso ya reclamó la carga.
+    """
+    # Import diferido: upload_service importa el SDK de Google al cargarse
+    from app.services.upload_service import UploadService
+
+    db = SessionLocal()
+    try:
+        repo = CargaDocumentoRepository(db)
+        upload_service = UploadService(db)
+        while True:
+            # Solo el proceso que pasa la carga de 'pendiente' a 'subiendo' la sube
+            carga = repo.reclamar(id_carga)
+            if carga is None:
+                actual = repo.get(id_carga)
+                return actual.estado if actual else None
+            intento = carga.intentos
+            if intento > UPLOAD_MAX_INTENTOS:
+                repo.update(id_carga, estado=CARGA_ERROR)
+                return CARGA_ERROR
+            try:
+                if not upload_service._ensure_gdrive():
+                    raise RuntimeError("Google Drive no está disponible")
+                url = upload_service.subir_archivo_local_drive(
+                    carga.ruta_local,
+                    original_name=carga.nombre,
+                    mime_type=carga.mime_type,
+                    sesion=carga.sesion_drive,
+                    on_sesion=lambda uri: repo.update(id_carga, sesion_drive=uri),
+                )
+                if not url:
+                    raise RuntimeError("No se pudo subir el archivo a Google Drive")
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("Carga %s: intento %s/%s falló: %s", id_carga, intento, UPLOAD_MAX_INTENTOS, exc)
+                if intento >= UPLOAD_MAX_INTENTOS:
+                    # El archivo local se conserva para reintentar manualmente
+                    repo.update(id_carga, estado=CARGA_ERROR, error=str(exc)[:500])
+                    return CARGA_ERROR
+                repo.update(id_carga, estado=CARGA_PENDIENTE, error=str(exc)[:500])
+                time.sleep(UPLOAD_RETRY_BASE_SECONDS * 2 ** (intento - 1))
+                continue
+
+            _publicar_url(db, carga, url)
+            repo.update(id_carga, estado=CARGA_COMPLETADA, url_documento=url, error=None, sesion_drive=None)
+            try:
+                os.remove(carga.ruta_local)
+            except OSError:
+                pass
+            logger.info("Carga %s subida a Google Drive: %s", id_carga, url)
+            return CARGA_COMPLETADA
+    except Exception:  # noqa: BLE001
+        logger.exception("Error procesando carga %s", id_carga)
+        return None
+    finally:
+        db.close()
+
+
+def _publicar_url(db, carga, url: str) -> None:
+    """Reemplaza url_documento salvo que exista una carga más reciente del mismo documento."""
+    repo = CargaDocumentoRepository(db)
+    ultima = repo.ultima_para(carga.incapacidad_id, carga.archivo_id)
+    if ultima is not None and ultima.id_carga != carga.id_carga and ultima.estado != CARGA_ERROR:
+        return
+    IncapacidadRepository(db).update_archivo_url(
+        incapacidad_id=carga.incapacidad_id,
+        archivo_id=carga.archivo_id,
+        url_documento=url,
+    )
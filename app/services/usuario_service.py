@@ -1,18 +1,21 @@
+import logging
 from typing import List, Optional
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.repositories.usuario_repository import UsuarioRepository
 from app.repositories.parametro_hijo_repository import ParametroHijoRepository
 from app.schemas.usuario import UsuarioCreate, UsuarioOut
+from app.core import password_hasher
 from app.core.security import (
-    hash_password, 
-    verify_password, 
     create_access_token, 
     create_refresh_token,
     validate_refresh_token,
     create_tokens_from_refresh_token
 )
 
+logger = logging.getLogger(__name__)
+
 
 class UsuarioService:
     def __init__(self, db: Session) -> None:
@@ -31,32 +34,54 @@ class UsuarioService:
             cargo_interno_id=payload.cargo_interno,
             correo_electronico=payload.correo_electronico,
             telefono=getattr(payload, 'telefono', None),
-            password_hashed=hash_password(payload.password),
+            password_hashed=password_hasher.get_hasher().hashear(payload.password).result(),
             rol_id=payload.rol_id,
             estado=payload.estado,
         )
         return UsuarioOut.model_validate(entity)
 
     def authenticate(self, correo_electronico: str, password: str) -> dict:
+        user = self._buscar_para_login(correo_electronico)
+        # La verificación corre en el ejecutor acotado de bcrypt (HasherSaturado si está lleno)
+        is_valid, nuevo_hash = password_hasher.get_hasher().verificar(password, user.password).result()
+        return self._completar_login(user, is_valid, nuevo_hash)
+
+    async def authenticate_async(self, correo_electronico: str, password: str) -> dict:
+        """Igual que authenticate, sin ocupar el threadpool de FastAPI mientras corre bcrypt."""
+        user = await run_in_threadpool(self._buscar_para_login, correo_electronico, liberar=True)
+        is_valid, nuevo_hash = await password_hasher.get_hasher().verificar_async(password, user.password)
+        return await run_in_threadpool(self._completar_login, user, is_valid, nuevo_hash)
+
+    def _buscar_para_login(self, correo_electronico: str, *, liberar: bool = False):
         # Normalizar correo para evitar discrepancias por espacios/mayúsculas
         correo_norm = (correo_electronico or "").strip().lower()
         user = self.repo.get_by_email(correo_norm)
         if user is None:
-            print(f"[AUTH] No existe usuario con email: {correo_norm}")
+            logger.info("Login fallido: no existe usuario con email %s", correo_norm)
             raise ValueError("Credenciales inválidas")
+        if liberar:
+            # No retener una conexión del pool mientras el login espera turno para bcrypt
+            self.repo.db.expunge(user)
+            self.repo.db.rollback()
+        return user
+
+    def _completar_login(self, user, is_valid: bool, nuevo_hash: Optional[str]) -> dict:
         # Cualquier excepción/verificación fallida se trata como credenciales inválidas
-        try:
-            is_valid = verify_password(password, user.password)
-        except Exception as e:
-            print(f"[AUTH] Error verificando password: {e}")
-            is_valid = False
         if not is_valid:
-            print(f"[AUTH] Password inválido para: {user.correo_electronico}")
+            logger.info("Login fallido: password inválido para %s", user.correo_electronico)
             raise ValueError("Credenciales inválidas")
+
+        # Hash con esquema/costo desactualizado (p.ej. bcrypt puro): guardar el recalculado
+        if nuevo_hash:
+            try:
+                self.repo.set_password(user.id_usuario, nuevo_hash)
+                password_hasher.get_hasher().registrar_rehash()
+            except Exception as e:
+                logger.warning("No fue posible actualizar el hash de %s: %s", user.correo_electronico, e)
         
         # Validar que el usuario esté activo
         if not bool(user.estado):
-            print(f"[AUTH] Usuario inactivo: {user.correo_electronico}")
+            logger.info("Login fallido: usuario inactivo %s", user.correo_electronico)
             raise ValueError("Usuario inactivo")
 
         # Validar roles permitidos (solo 9 y 10)
@@ -66,7 +91,7 @@ class UsuarioService:
         except Exception:
             user_role_id = None
         if user_role_id not in allowed_roles:
-            print(f"[AUTH] Rol no autorizado: {user.rol_id} para {user.correo_electronico}")
+            logger.info("Login fallido: rol no autorizado %s para %s", user.rol_id, user.correo_electronico)
             raise ValueError("Rol no autorizado")
         
         # Crear access token y refresh token
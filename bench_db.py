@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Utilidades compartidas por los scripts benchmark_*.py: esquema SQLite mínimo
+equivalente al de MySQL, datos sintéticos y contador de consultas.
+"""
+
+import os
+import random
+import tempfile
+from datetime import datetime, timedelta
+
+
+def configurar_database_url() -> str:
+    """Usa DATABASE_URL si existe; si no, una BD SQLite temporal."""
+    if not os.getenv("DATABASE_URL"):
+        path = os.path.join(tempfile.mkdtemp(), "bench.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    return os.environ["DATABASE_URL"]
+
+
+ESQUEMA_SQLITE = [
+    "CREATE TABLE IF NOT EXISTS parametro (id_parametro INTEGER PRIMARY KEY, nombre VARCHAR(150), descripcion VARCHAR(255), estado BOOLEAN)",
+    "CREATE TABLE IF NOT EXISTS parametro_hijo (id_parametrohijo INTEGER PRIMARY KEY, parametro_id INTEGER, nombre VARCHAR(150), descripcion VARCHAR(255), estado BOOLEAN)",
+    "CREATE TABLE IF NOT EXISTS usuario (id_usuario INTEGER PRIMARY KEY, nombre_completo VARCHAR(150), numero_identificacion VARCHAR(150), "
+    "tipo_identificacion_id INTEGER, tipo_empleador_id INTEGER, cargo_interno_id INTEGER, correo_electronico VARCHAR(150), "
+    "telefono VARCHAR(30), password VARCHAR(150), rol_id INTEGER, estado BOOLEAN)",
+    "CREATE TABLE IF NOT EXISTS tipo_incapacidad (id_tipo_incapacidad INTEGER PRIMARY KEY, nombre VARCHAR(150), descripcion VARCHAR(255), estado BOOLEAN)",
+    "CREATE TABLE IF NOT EXISTS archivo (id_archivo INTEGER PRIMARY KEY, nombre VARCHAR(150), descripcion VARCHAR(255), estado BOOLEAN)",
+    "CREATE TABLE IF NOT EXISTS relacion (tipo_incapacidad_id INTEGER, archivo_id INTEGER, PRIMARY KEY (tipo_incapacidad_id, archivo_id))",
+    "CREATE TABLE IF NOT EXISTS incapacidad (id_incapacidad INTEGER PRIMARY KEY, tipo_incapacidad_id INTEGER, usuario_id INTEGER, "
+    "causa_incapacidad_id INTEGER, fecha_inicio DATETIME, fecha_final DATETIME, dias INTEGER, Eps_id INTEGER, servicio_id INTEGER, "
+    "diagnostico_id INTEGER, salario VARCHAR(50), estado INTEGER, fecha_registro DATETIME, clase_administrativa VARCHAR(50), "
+    "numero_radicado VARCHAR(100), fecha_radicado DATETIME, paga BOOLEAN, estado_administrativo VARCHAR(100), "
+    "usuario_revisor_id INTEGER, mensaje_rechazo VARCHAR(500))",
+    "CREATE TABLE IF NOT EXISTS incapacidad_archivo (id_incapacidad_archivo INTEGER PRIMARY KEY, incapacidad_id INTEGER, "
+    "archivo_id INTEGER, url_documento VARCHAR(500), fecha_subida DATETIME)",
+]
+
+
+def crear_esquema(engine) -> None:
+    from sqlalchemy import text
+    if not engine.dialect.name.startswith("sqlite"):
+        return
+    with engine.begin() as conn:
+        for ddl in ESQUEMA_SQLITE:
+            conn.execute(text(ddl))
+
+
+def _dt(valor: datetime) -> str:
+    # Formato de almacenamiento de DATETIME de SQLAlchemy en SQLite (comparaciones por texto)
+    return valor.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+def poblar(engine, *, incapacidades: int = 1000, usuarios: int = 50, diagnosticos: int = 500, seed: int = 7) -> None:
+    """Carga datos sintéticos (solo SQLite)."""
+    from sqlalchemy import text
+    if not engine.dialect.name.startswith("sqlite"):
+        return
+    rnd = random.Random(seed)
+    base = datetime(2025, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM incapacidad_archivo"))
+        conn.execute(text("DELETE FROM incapacidad"))
+        conn.execute(text("DELETE FROM relacion"))
+        conn.execute(text("DELETE FROM archivo"))
+        conn.execute(text("DELETE FROM tipo_incapacidad"))
+        conn.execute(text("DELETE FROM usuario"))
+        conn.execute(text("DELETE FROM parametro_hijo"))
+        hijos = [{"id": i, "p": 6, "n": f"Estado {i}"} for i in (11, 12, 40, 44, 50)]
+        hijos += [{"id": 100 + i, "p": 4, "n": f"EPS {i}"} for i in range(20)]
+        hijos += [{"id": 200 + i, "p": 5, "n": f"Servicio {i}"} for i in range(20)]
+        hijos += [{"id": 1000 + i, "p": 7, "n": f"A{i:03d} Diagnóstico {i}"} for i in range(diagnosticos)]
+        conn.execute(
+            text("INSERT INTO parametro_hijo (id_parametrohijo, parametro_id, nombre, descripcion, estado) VALUES (:id, :p, :n, NULL, 1)"),
+            hijos,
+        )
+        conn.execute(
+            text("INSERT INTO usuario (id_usuario, nombre_completo, numero_identificacion, correo_electronico, password, rol_id, estado) "
+                 "VALUES (:id, :n, :id, :e, 'x', :r, 1)"),
+            [{"id": i, "n": f"Usuario {i}", "e": f"u{i}@example.com", "r": 10 if i <= 3 else 9} for i in range(1, usuarios + 1)],
+        )
+        conn.execute(
+            text("INSERT INTO tipo_incapacidad (id_tipo_incapacidad, nombre, descripcion, estado) VALUES (:id, :n, NULL, 1)"),
+            [{"id": i, "n": f"Tipo {i}"} for i in range(1, 6)],
+        )
+        conn.execute(
+            text("INSERT INTO archivo (id_archivo, nombre, descripcion, estado) VALUES (:id, :n, NULL, 1)"),
+            [{"id": i, "n": f"Documento {i}"} for i in range(1, 8)],
+        )
+        conn.execute(
+            text("INSERT INTO relacion (tipo_incapacidad_id, archivo_id) VALUES (:t, :a)"),
+            [{"t": t, "a": a} for t in range(1, 6) for a in range(1, 8) if (t + a) % 2 == 0],
+        )
+        filas = []
+        for i in range(1, incapacidades + 1):
+            inicio = base + timedelta(days=rnd.randint(0, 364))
+            dias = rnd.randint(1, 15)
+            filas.append({
+                "id": i, "t": rnd.randint(1, 5), "u": rnd.randint(1, usuarios),
+                "fi": _dt(inicio), "ff": _dt(inicio + timedelta(days=dias)), "d": dias,
+                "eps": 100 + rnd.randint(0, 19), "srv": 200 + rnd.randint(0, 19),
+                "diag": 1000 + rnd.randint(0, diagnosticos - 1), "sal": str(rnd.randint(1300000, 9000000)),
+                "e": rnd.choice((11, 12, 40, 44, 50)), "fr": _dt(inicio + timedelta(hours=rnd.randint(0, 48))),
+                "rev": rnd.choice((None, 1, 2, 3)),
+            })
+        conn.execute(
+            text("INSERT INTO incapacidad (id_incapacidad, tipo_incapacidad_id, usuario_id, fecha_inicio, fecha_final, dias, "
+                 "Eps_id, servicio_id, diagnostico_id, salario, estado, fecha_registro, usuario_revisor_id) "
+                 "VALUES (:id, :t, :u, :fi, :ff, :d, :eps, :srv, :diag, :sal, :e, :fr, :rev)"),
+            filas,
+        )
+        conn.execute(
+            text("INSERT INTO incapacidad_archivo (incapacidad_id, archivo_id, url_documento, fecha_subida) VALUES (:i, :a, :u, :f)"),
+            [{"i": i, "a": a, "u": f"https://drive.example/{i}/{a}", "f": _dt(base)}
+             for i in range(1, incapacidades + 1) for a in range(1, 8) if rnd.random() < 0.4],
+        )
+
+
+class ContadorConsultas:
+    """Cuenta las sentencias SQL ejecutadas sobre un engine mientras está activo."""
+
+    def __init__(self, engine) -> None:
+        self.engine = engine
+        self.total = 0
+
+    def _on_execute(self, *args, **kwargs) -> None:
+        self.total += 1
+
+    def __enter__(self) -> "ContadorConsultas":
+        from sqlalchemy import event
+        self.total = 0
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        from sqlalchemy import event
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Benchmark: throughput de GET /api/incapacidad/mias con el endpoint async
+(AsyncSession, app/db/async_session.py) frente a la versión sync anterior
+(SessionLocal en el threadpool de Starlette), con 50, 200 y 500 clientes concurrentes.
+
+La versión sync se monta en /bench/mias-sync con el mismo servicio y dependencias
+que tenía el endpoint. Con SQLite (aiosqlite) los resultados son orientativos: el
+beneficio real aparece con MySQL (aiomysql), donde cada consulta espera red.
+
+Cada combinación (versión, clientes) corre en un proceso aparte con --limite-s
+segundos como máximo. La versión sync puede quedar bloqueada: las dependencias
+sync y el endpoint compiten por los 40 hilos del threadpool mientras las sesiones
+retienen conexiones del pool (5 + 10); en ese caso se reporta "bloqueado".
+
+Uso:
+    python benchmark_async.py [--niveles 50,200,500] [--por-cliente 3] [--limite-s 60]
+    DATABASE_URL=mysql+pymysql://... python benchmark_async.py
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import List, Optional
+
+from bench_db import configurar_database_url, crear_esquema, poblar
+
+configurar_database_url()
+
+import httpx
+from fastapi import Depends, Query
+
+from app.api.main import app
+from app.api.v1.routers.incapacidad_router import get_service
+from app.core.auth_dependency import get_current_employee_or_admin
+from app.core.security import create_access_token
+from app.db import async_session
+from app.db.session import engine
+from app.models.version_principal import VersionPrincipal
+from app.schemas.incapacidad import IncapacidadOut
+from app.services.incapacidad_service import IncapacidadService
+
+
+@app.get("/bench/mias-sync", response_model=List[IncapacidadOut])
+def mias_sync(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    service: IncapacidadService = Depends(get_service),
+    usuario=Depends(get_current_employee_or_admin),
+):
+    data, _ = service.listar_mis_incapacidades_pagina(usuario_id=usuario.id_usuario, skip=skip, limit=limit, cursor=cursor)
+    return data
+
+
+USUARIOS = 50
+RUTAS = {"sync": "/bench/mias-sync", "async": "/api/incapacidad/mias"}
+
+
+def _cliente_http() -> httpx.AsyncClient:
+    # Las excepciones de la app (p. ej. TimeoutError del pool) cuentan como errores 500
+    transporte = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    return httpx.AsyncClient(transport=transporte, base_url="http://bench", timeout=300)
+
+
+async def nivel(ruta: str, clientes: int, por_cliente: int) -> dict:
+    tokens = [{"Authorization": f"Bearer {create_access_token(subject=str(4 + i % USUARIOS))}"} for i in range(clientes)]
+    latencias: List[float] = []
+    errores = 0
+
+    async with _cliente_http() as client:
+        async def cliente(i: int) -> None:
+            nonlocal errores
+            for _ in range(por_cliente):
+                inicio = time.perf_counter()
+                r = await client.get(f"{ruta}?limit=20", headers=tokens[i])
+                if r.status_code == 200:
+                    latencias.append(time.perf_counter() - inicio)
+                else:
+                    errores += 1
+
+        inicio = time.perf_counter()
+        await asyncio.gather(*(cliente(i) for i in range(clientes)))
+        total = time.perf_counter() - inicio
+    await async_session.dispose()
+    latencias.sort()
+    return {
+        "rps": len(latencias) / total,
+        "p50": statistics.median(latencias) * 1000 if latencias else 0.0,
+        "p99": latencias[min(len(latencias) - 1, int(len(latencias) * 0.99))] * 1000 if latencias else 0.0,
+        "errores": errores,
+    }
+
+
+async def verificar() -> None:
+    async with _cliente_http() as client:
+        h = {"Authorization": f"Bearer {create_access_token(subject='4')}"}
+        a = (await client.get(f"{RUTAS['async']}?limit=20", headers=h)).json()
+        s = (await client.get(f"{RUTAS['sync']}?limit=20", headers=h)).json()
+    await async_session.dispose()
+    print(f"🔎 Respuestas idénticas: {a == s} ({len(a)} filas)")
+
+
+def medir(version: str, clientes: int, por_cliente: int, limite_s: float) -> Optional[dict]:
+    """Corre un nivel en un proceso nuevo (un bloqueo del pool no contamina el siguiente)."""
+    comando = [sys.executable, os.path.abspath(__file__), "--medir", version,
+               "--clientes", str(clientes), "--por-cliente", str(por_cliente)]
+    try:
+        salida = subprocess.run(comando, capture_output=True, text=True, timeout=limite_s, env=os.environ.copy())
+    except subprocess.TimeoutExpired:
+        return None
+    for linea in reversed(salida.stdout.splitlines()):
+        if linea.startswith("{"):
+            return json.loads(linea)
+    raise RuntimeError(f"Sin resultado de {version}/{clientes}: {salida.stderr[-2000:]}")
+
+
+def _fila(r: Optional[dict], limite_s: float) -> str:
+    if r is None:
+        return f"{'bloqueado >' + format(limite_s, '.0f') + 's':>28}"
+    extra = f" ({r['errores']} err)" if r["errores"] else ""
+    return f"{r['rps']:>10.0f} {r['p50']:>8.1f} {r['p99']:>8.1f}{extra}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Throughput sync vs async de /mias")
+    parser.add_argument("--niveles", default="50,200,500")
+    parser.add_argument("--por-cliente", type=int, default=3)
+    parser.add_argument("--limite-s", type=float, default=60.0, help="Tiempo máximo por nivel")
+    parser.add_argument("--medir", choices=sorted(RUTAS), help=argparse.SUPPRESS)
+    parser.add_argument("--clientes", type=int, default=50, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.medir:
+        print(json.dumps(asyncio.run(nivel(RUTAS[args.medir], args.clientes, args.por_cliente))))
+        return
+
+    crear_esquema(engine)
+    VersionPrincipal.__table__.create(bind=engine, checkfirst=True)
+    poblar(engine, incapacidades=5000, usuarios=USUARIOS + 3)
+    print(f"Engine asíncrono: {async_session.estado()}")
+    asyncio.run(verificar())
+    print(f"{'clientes':>9} | {'sync req/s':>10} {'p50 ms':>8} {'p99 ms':>8} | {'async req/s':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    for clientes in (int(n) for n in args.niveles.split(",")):
+        rs = medir("sync", clientes, args.por_cliente, args.limite_s)
+        ra = medir("async", clientes, args.por_cliente, args.limite_s)
+        print(f"{clientes:>9} | {_fila(rs, args.limite_s)} | {_fila(ra, args.limite_s)}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
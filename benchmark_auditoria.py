@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Benchmark: costo en el request de AuditService con inserción síncrona (un INSERT +
+commit por evento) frente al escritor por lotes de app/services/audit_writer.py.
+
+También verifica:
+- que los eventos se agrupan en pocos lotes,
+- la contrapresión: con una BD lenta y cola pequeña el request no se bloquea
+  más de AUDIT_ENQUEUE_TIMEOUT_MS y los excedentes se cuentan como descartados,
+- que las consultas por entidad/usuario/rango y el cursor devuelven lo escrito.
+
+Uso:
+    python benchmark_auditoria.py
+"""
+
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from bench_db import configurar_database_url, crear_esquema
+
+configurar_database_url()
+
+from sqlalchemy import insert
+
+from app.db.session import SessionLocal, engine
+from app.models import password_reset_token as _password_reset_token  # noqa: F401  Registrar relaciones de Usuario
+from app.models import usuario as _usuario  # noqa: F401
+from app.models.audit_log import AuditLog
+from app.services import audit_writer
+from app.services.audit_service import AuditAction, AuditService
+from app.services.audit_writer import AuditWriter
+
+
+EVENTOS = 2000
+
+
+def _percentil(valores: list, p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+
+def _evento(i: int) -> dict:
+    return {
+        "fecha": datetime(2025, 1, 1) + timedelta(seconds=i),
+        "accion": AuditAction.UPDATE.value,
+        "entidad": "incapacidad",
+        "entidad_id": i % 50,
+        "usuario_id": i % 7,
+        "detalles": {"i": i, "fecha": datetime(2025, 1, 1)},
+    }
+
+
+def limpiar() -> None:
+    with engine.begin() as conn:
+        conn.execute(AuditLog.__table__.delete())
+
+
+def sincrono() -> list:
+    # Lo que costaría persistir en el request: un INSERT + commit por evento
+    tiempos = []
+    for i in range(EVENTOS):
+        evento = _evento(i)
+        evento["detalles"] = {"i": i}
+        inicio = time.perf_counter()
+        with engine.begin() as conn:
+            conn.execute(insert(AuditLog.__table__), [evento])
+        tiempos.append(time.perf_counter() - inicio)
+    return tiempos
+
+
+def por_lotes() -> tuple:
+    writer = AuditWriter(engine, batch_size=200, flush_ms=100)
+    db = SessionLocal()
+    service = AuditService(db)
+    # Reemplaza el singleton para que AuditService use este escritor
+    audit_writer._writer = writer
+    tiempos = []
+    try:
+        for i in range(EVENTOS):
+            inicio = time.perf_counter()
+            service.log_incapacity_action(
+                action=AuditAction.UPDATE, incapacidad_id=i % 50, user_id=i % 7, details={"i": i},
+            )
+            tiempos.append(time.perf_counter() - inicio)
+        escrito = writer.flush(10)
+        return tiempos, escrito, writer.estadisticas()
+    finally:
+        db.close()
+        audit_writer.detener()
+
+
+class _BDLenta:
+    """Envuelve el engine y demora cada transacción (simula una BD saturada)."""
+
+    def __init__(self, demora: float) -> None:
+        self.demora = demora
+
+    def begin(self):
+        time.sleep(self.demora)
+        return engine.begin()
+
+
+def contrapresion() -> tuple:
+    writer = AuditWriter(_BDLenta(0.2), batch_size=20, flush_ms=10, queue_max=50, enqueue_timeout_ms=5)
+    tiempos = []
+    for i in range(500):
+        inicio = time.perf_counter()
+        writer.registrar(_evento(i))
+        tiempos.append(time.perf_counter() - inicio)
+    writer.detener(30)
+    return tiempos, writer.estadisticas()
+
+
+def consultas() -> list:
+    limpiar()
+    writer = AuditWriter(engine, batch_size=100, flush_ms=20)
+    for i in range(500):
+        writer.registrar(_evento(i))
+    assert writer.flush(10)
+    writer.detener()
+    db = SessionLocal()
+    errores = []
+    try:
+        service = AuditService(db)
+        historial = service.get_audit_history("incapacidad", 3, limit=1000)
+        if len(historial) != 10 or any(e["entity_id"] != 3 for e in historial):
+            errores.append(f"historial por entidad: {len(historial)} eventos")
+        if historial and historial[0]["details"]["fecha"] != "2025-01-01 00:00:00":
+            errores.append("detalles no serializados en el escritor")
+        por_usuario = service.get_user_audit_history(2, limit=1000)
+        if len(por_usuario) != len([i for i in range(500) if i % 7 == 2]):
+            errores.append(f"historial por usuario: {len(por_usuario)} eventos")
+        rango = service.buscar(desde=datetime(2025, 1, 1, 0, 1), hasta=datetime(2025, 1, 1, 0, 2), limit=1000)
+        if len(rango["eventos"]) != 61:
+            errores.append(f"rango de fechas: {len(rango['eventos'])} eventos")
+        # Recorrer todo con cursor: sin repetidos ni huecos
+        vistos, cursor = [], None
+        while True:
+            pagina = service.buscar(cursor=cursor, limit=37)
+            vistos.extend(e["id"] for e in pagina["eventos"])
+            cursor = pagina["next_cursor"]
+            if not cursor:
+                break
+        if len(vistos) != 500 or len(set(vistos)) != 500:
+            errores.append(f"cursor: {len(vistos)} vistos, {len(set(vistos))} únicos")
+    finally:
+        db.close()
+    return errores
+
+
+def main() -> None:
+    crear_esquema(engine)
+    AuditLog.__table__.create(bind=engine, checkfirst=True)
+
+    t_sync = sincrono()
+    limpiar()
+    t_lote, escrito, stats = por_lotes()
+    print(f"📝 {EVENTOS} eventos de auditoría")
+    print(f"   síncrono  : p50 {statistics.median(t_sync) * 1e6:8.1f} µs  p99 {_percentil(t_sync, 0.99) * 1e6:8.1f} µs por evento")
+    print(f"   por lotes : p50 {statistics.median(t_lote) * 1e6:8.1f} µs  p99 {_percentil(t_lote, 0.99) * 1e6:8.1f} µs por evento")
+    print(f"   escritos={stats['escritos']} lotes={stats['lotes']} descartados={stats['descartados']} (flush ok={escrito})")
+
+    t_cp, stats_cp = contrapresion()
+    print("🐢 BD lenta (200 ms por lote), cola de 50, espera máxima 5 ms")
+    print(f"   registrar: máx {max(t_cp) * 1000:.1f} ms  encolados={stats_cp['encolados']} "
+          f"descartados={stats_cp['descartados']} escritos={stats_cp['escritos']}")
+
+    errores = consultas()
+    print("🔎 Consultas:", "OK" if not errores else errores)
+
+
+if __name__ == "__main__":
+    main()
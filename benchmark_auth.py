@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark: consultas y latencia de GET /api/incapacidad/mias con y sin la caché
+de principales (app/core/principal_cache.py) en get_current_user.
+
+También verifica la invalidación:
+- UsuarioRepository.set_estado bloquea al usuario en el request siguiente,
+- un cambio hecho por "otro nodo" (UPDATE directo + incremento de version_principal)
+  se aplica tras AUTH_CACHE_VERSION_SECONDS.
+
+Uso:
+    python benchmark_auth.py
+"""
+
+import os
+import statistics
+import time
+
+from bench_db import ContadorConsultas, configurar_database_url, crear_esquema, poblar
+
+configurar_database_url()
+os.environ.setdefault("AUTH_CACHE_VERSION_SECONDS", "0.5")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.api.main import app
+from app.core import principal_cache
+from app.core.security import create_access_token
+from app.db import async_session
+from app.db.session import SessionLocal, engine
+from app.models.version_principal import VersionPrincipal
+from app.repositories.usuario_repository import UsuarioRepository
+
+
+REQUESTS = 300
+USUARIO = 10
+
+
+def medir(client: TestClient, headers: dict, *, cache: bool) -> tuple:
+    tiempos = []
+    # /mias corre sobre el engine asíncrono: contar en ambos
+    motor_async = async_session.get_async_engine().sync_engine
+    with ContadorConsultas(engine) as contador, ContadorConsultas(motor_async) as contador_async:
+        for _ in range(REQUESTS):
+            if not cache:
+                principal_cache.descartar(USUARIO)
+            inicio = time.perf_counter()
+            r = client.get("/api/incapacidad/mias?limit=10", headers=headers)
+            tiempos.append(time.perf_counter() - inicio)
+            assert r.status_code == 200, r.text
+    return tiempos, (contador.total + contador_async.total) / REQUESTS
+
+
+def main() -> None:
+    crear_esquema(engine)
+    VersionPrincipal.__table__.create(bind=engine, checkfirst=True)
+    poblar(engine, incapacidades=2000)
+    client = TestClient(app)
+    headers = {"Authorization": f"Bearer {create_access_token(subject=str(USUARIO))}"}
+
+    client.get("/api/incapacidad/mias?limit=10", headers=headers)  # calentar
+    t_sin, q_sin = medir(client, headers, cache=False)
+    principal_cache.reset()
+    t_con, q_con = medir(client, headers, cache=True)
+    print(f"🔐 GET /mias x{REQUESTS}")
+    print(f"   sin caché : {q_sin:.2f} consultas/request  p50 {statistics.median(t_sin) * 1000:.2f} ms")
+    print(f"   con caché : {q_con:.2f} consultas/request  p50 {statistics.median(t_con) * 1000:.2f} ms")
+    print(f"   {principal_cache.estadisticas()}")
+
+    # Invalidación local inmediata
+    db = SessionLocal()
+    try:
+        UsuarioRepository(db).set_estado(USUARIO, False)
+        bloqueado = client.get("/api/incapacidad/mias", headers=headers).status_code
+        UsuarioRepository(db).set_estado(USUARIO, True)
+        reactivado = client.get("/api/incapacidad/mias", headers=headers).status_code
+    finally:
+        db.close()
+    print(f"🚫 set_estado local: inactivo -> {bloqueado}, reactivado -> {reactivado}")
+
+    # Cambio desde otro nodo: solo se ve el sello de versión
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE usuario SET estado = 0 WHERE id_usuario = :u"), {"u": USUARIO})
+        conn.execute(text("UPDATE version_principal SET version = version + 1 WHERE id = 1"))
+    inmediato = client.get("/api/incapacidad/mias", headers=headers).status_code
+    time.sleep(principal_cache.AUTH_CACHE_VERSION_SECONDS + 0.1)
+    tras_sello = client.get("/api/incapacidad/mias", headers=headers).status_code
+    print(f"🌐 cambio en otro nodo: inmediato -> {inmediato}, "
+          f"tras {principal_cache.AUTH_CACHE_VERSION_SECONDS}s -> {tras_sello}")
+
+    ok = q_con < q_sin and bloqueado == 403 and reactivado == 200 and tras_sello == 403
+    print("✅ OK" if ok else "❌ Falló la verificación")
+
+
+if __name__ == "__main__":
+    main()
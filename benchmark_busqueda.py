@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Benchmark: autocompletado de diagnósticos CIE-10 (parametro_id = 7).
+
+Carga los ~12k diagnósticos de insert_diagnosticos_mysql.sql y compara:
+- GET /api/parametro_hijo/papashijos/7 (lo que descargaba el formulario: todo el catálogo),
+- GET /api/parametro_hijo/search?parametro_id=7&q=...&limit=20 (índice en memoria,
+  app/repositories/parametro_hijo_search.py).
+
+Verifica el orden (código exacto primero, prefijos de código, palabras sin tildes)
+y que crear/editar/eliminar un diagnóstico actualiza el índice sin recargarlo de la BD
+(y que la recarga periódica por TTL reutiliza el índice si los diagnósticos no cambiaron).
+
+Uso:
+    python benchmark_busqueda.py [--repeticiones 200]
+"""
+
+import argparse
+import asyncio
+import re
+import statistics
+import time
+
+from bench_db import ContadorConsultas, configurar_database_url, crear_esquema, poblar
+
+configurar_database_url()
+
+import httpx
+from sqlalchemy import text
+
+from app.api.main import app
+from app.db import async_session
+from app.db.session import SessionLocal, engine
+from app.repositories import parametro_hijo_catalog
+from app.repositories.parametro_hijo_repository import ParametroHijoRepository
+
+DIAGNOSTICOS = 7
+_FILA = re.compile(r"\(7, '((?:[^']|'')*)', '((?:[^']|'')*)', (\d)\)")
+CONSULTAS = ["A01", "a00.9", "fiebre tifo", "infeccion salmonella", "colera", "J45", "diabetes mellitus", "fractura femur"]
+
+
+def cargar_cie10() -> int:
+    with open("insert_diagnosticos_mysql.sql", encoding="utf-8") as f:
+        filas = [
+            {"id": 100000 + i, "n": n.replace("''", "'"), "d": d.replace("''", "'"), "e": int(e)}
+            for i, (n, d, e) in enumerate(_FILA.findall(f.read()))
+        ]
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM parametro"))
+        conn.execute(text("DELETE FROM parametro_hijo WHERE parametro_id = 7"))
+        conn.execute(text("INSERT INTO parametro (id_parametro, nombre, descripcion, estado) VALUES (7, 'Diagnósticos', NULL, 1)"))
+        conn.execute(
+            text("INSERT INTO parametro_hijo (id_parametrohijo, parametro_id, nombre, descripcion, estado) VALUES (:id, 7, :n, :d, :e)"),
+            filas,
+        )
+    parametro_hijo_catalog.invalidate()
+    return len(filas)
+
+
+def _cliente() -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+
+
+async def medir(repeticiones: int) -> None:
+    async with _cliente() as client:
+        inicio = time.perf_counter()
+        r = await client.get(f"/api/parametro_hijo/papashijos/{DIAGNOSTICOS}")
+        papashijos_ms = (time.perf_counter() - inicio) * 1000
+        print(f"📦 papashijos/7: {len(r.json())} filas, {len(r.content) / 1024:.0f} KB, {papashijos_ms:.1f} ms")
+
+        # Primera búsqueda tras invalidar: recarga el catálogo (el índice se hereda si no cambió)
+        parametro_hijo_catalog.invalidate()
+        inicio = time.perf_counter()
+        await client.get("/api/parametro_hijo/search", params={"parametro_id": DIAGNOSTICOS, "q": "a"})
+        print(f"🏗️  primera búsqueda tras invalidar (recarga del catálogo): {(time.perf_counter() - inicio) * 1000:.1f} ms")
+
+        for q in CONSULTAS:
+            tiempos, tamano = [], 0
+            for _ in range(repeticiones):
+                inicio = time.perf_counter()
+                r = await client.get("/api/parametro_hijo/search", params={"parametro_id": DIAGNOSTICOS, "q": q, "limit": 20})
+                tiempos.append((time.perf_counter() - inicio) * 1000)
+                tamano = len(r.content)
+            hits = r.json()
+            tiempos.sort()
+            primero = f"{hits[0]['nombre']} {hits[0]['descripcion'][:40]}" if hits else "-"
+            print(f"🔎 q={q!r:<24} {len(hits):>2} hits {tamano / 1024:>5.1f} KB  p50 {statistics.median(tiempos):.2f} ms  "
+                  f"p99 {tiempos[int(len(tiempos) * 0.99) - 1]:.2f} ms  -> {primero}")
+    await async_session.dispose()
+
+
+async def verificar_orden() -> None:
+    async with _cliente() as client:
+        async def buscar(q: str, **extra):
+            r = await client.get("/api/parametro_hijo/search", params={"parametro_id": DIAGNOSTICOS, "q": q, **extra})
+            assert r.status_code == 200, r.text
+            return r.json()
+
+        hits = await buscar("A01")
+        assert hits[0]["nombre"] == "A01" or hits[0]["nombre"].startswith("A01"), hits[:2]
+        assert all(h["nombre"].startswith("A01") for h in hits[:5]), [h["nombre"] for h in hits[:5]]
+        assert (await buscar("a00.9"))[0]["nombre"] == "A009"
+        # Sin tildes en la consulta encuentra 'INFECCIÓN'
+        assert any("INFECCIÓN" in h["descripcion"] for h in await buscar("infeccion salmonella"))
+        assert (await buscar("fiebre tifo"))[0]["descripcion"].startswith("FIEBRE TIFOIDEA")
+        assert len(await buscar("colera", limit=3)) == 3
+        assert (await client.get("/api/parametro_hijo/search", params={"parametro_id": 7})).status_code == 422
+    await async_session.dispose()
+    print("✅ orden: código exacto/prefijo primero, luego palabras sin tildes")
+
+
+def verificar_incremental() -> None:
+    db = SessionLocal()
+    try:
+        repo = ParametroHijoRepository(db)
+        catalogo = parametro_hijo_catalog.get_catalogo(db)
+        catalogo.indice(DIAGNOSTICOS)
+        with ContadorConsultas(engine) as contador:
+            nuevo = repo.create(parametro_id=DIAGNOSTICOS, nombre="ZZ01", descripcion="DIAGNÓSTICO DE PRUEBA ÚNICO", estado=True)
+            escrituras = contador.total
+            assert [i.nombre for i in parametro_hijo_catalog.get_catalogo(db).buscar(DIAGNOSTICOS, "prueba unico")] == ["ZZ01"]
+            repo.update(nuevo.id_parametrohijo, parametro_id=None, nombre="ZZ02", descripcion=None, estado=None)
+            assert parametro_hijo_catalog.get_catalogo(db).buscar(DIAGNOSTICOS, "ZZ01") == []
+            assert parametro_hijo_catalog.get_catalogo(db).buscar(DIAGNOSTICOS, "ZZ02")[0].id_parametrohijo == nuevo.id_parametrohijo
+            repo.cambiar_estado(nuevo.id_parametrohijo)
+            assert parametro_hijo_catalog.get_catalogo(db).buscar(DIAGNOSTICOS, "ZZ02") == []
+            assert parametro_hijo_catalog.get_catalogo(db).buscar(DIAGNOSTICOS, "ZZ02", solo_activos=False)
+            repo.delete(nuevo.id_parametrohijo)
+            assert parametro_hijo_catalog.get_catalogo(db).buscar(DIAGNOSTICOS, "ZZ02", solo_activos=False) == []
+            total = contador.total
+        # Solo las sentencias de las escrituras: el catálogo no se volvió a leer completo
+        assert parametro_hijo_catalog.get_catalogo(db).loaded_at == catalogo.loaded_at
+        # Recarga por TTL (cambios de otros nodos): sin cambios en los diagnósticos se reutiliza el índice
+        vigente = parametro_hijo_catalog.get_catalogo(db)
+        indice = vigente.indice(DIAGNOSTICOS)
+        vigente.loaded_at -= parametro_hijo_catalog.CATALOG_TTL_SECONDS + 1
+        recargado = parametro_hijo_catalog.get_catalogo(db)
+        assert recargado is not vigente and recargado.indice(DIAGNOSTICOS) is indice
+    finally:
+        db.close()
+    print(f"✅ crear/editar/desactivar/eliminar actualizan el índice sin recargar el catálogo "
+          f"({total} consultas, {escrituras} del INSERT); la recarga por TTL reutiliza el índice")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Autocompletado CIE-10")
+    parser.add_argument("--repeticiones", type=int, default=200)
+    args = parser.parse_args()
+
+    crear_esquema(engine)
+    poblar(engine, incapacidades=10, diagnosticos=1)
+    print(f"Diagnósticos cargados: {cargar_cie10()}")
+    asyncio.run(verificar_orden())
+    verificar_incremental()
+    asyncio.run(medir(args.repeticiones))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Benchmark: respuestas condicionales (ETag / If-None-Match) de los catálogos.
+
+Para /parametros, /parametro_hijo, /parametro_hijo/papashijos/{id}, /tipo_incapacidad,
+/archivo y /relacion (app/core/http_cache.py) verifica:
+- 200 con ETag fuerte y Cache-Control,
+- If-None-Match con el ETag vigente -> 304 sin cuerpo y sin consultas a la BD,
+- sin If-None-Match -> los mismos bytes serializados, también sin consultas,
+- crear/editar/eliminar/cambiar_estado cambia el ETag solo de los catálogos afectados,
+y compara el tiempo de una respuesta generada (consulta + serialización) con la
+servida desde los bytes en caché y con el 304.
+
+Uso:
+    python benchmark_catalogos.py [--diagnosticos 2000] [--repeticiones 300]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from bench_db import ContadorConsultas, configurar_database_url, crear_esquema, poblar
+
+configurar_database_url()
+
+import httpx
+from sqlalchemy import text
+
+from app.api.main import app
+from app.core import http_cache
+from app.db import async_session
+from app.db.session import engine
+
+DIAGNOSTICOS = 7
+ENDPOINTS = [
+    "/api/parametros",
+    "/api/parametro_hijo",
+    f"/api/parametro_hijo/papashijos/{DIAGNOSTICOS}",
+    "/api/tipo_incapacidad",
+    "/api/archivo",
+    "/api/archivo/por_tipo/1",
+    "/api/relacion",
+    "/api/relacion/por_tipo/1",
+    "/api/relacion/por_tipo/1/archivos",
+]
+
+
+def _cliente() -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+
+
+def _contadores() -> tuple:
+    return ContadorConsultas(engine), ContadorConsultas(async_session.get_async_engine().sync_engine)
+
+
+async def _get(client: httpx.AsyncClient, url: str, etag: str = None) -> tuple:
+    """(respuesta, consultas a la BD) de un GET, opcionalmente condicional."""
+    sync, asincrono = _contadores()
+    with sync, asincrono:
+        r = await client.get(url, headers={"If-None-Match": etag} if etag else {})
+    return r, sync.total + asincrono.total
+
+
+async def verificar() -> None:
+    async with _cliente() as client:
+        etags = {}
+        for url in ENDPOINTS:
+            r, _ = await _get(client, url)
+            assert r.status_code == 200, (url, r.status_code, r.text[:200])
+            etag = r.headers["etag"]
+            assert etag.startswith('"') and r.headers["cache-control"] == http_cache.CATALOG_CACHE_CONTROL, r.headers
+            condicional, consultas = await _get(client, url, etag)
+            assert condicional.status_code == 304 and condicional.content == b"", (url, condicional.status_code)
+            assert condicional.headers["etag"] == etag and consultas == 0, (url, consultas)
+            # Comparación débil y lista de ETags, como las envían los navegadores y proxies
+            assert (await _get(client, url, f'"otro", W/{etag}'))[0].status_code == 304
+            otra, consultas = await _get(client, url)
+            assert otra.content == r.content and consultas == 0, (url, consultas)
+            etags[url] = etag
+        print(f"✅ {len(ENDPOINTS)} endpoints: 200 con ETag + Cache-Control, 304 y bytes en caché sin consultas a la BD")
+
+        async def cambiados() -> set:
+            return {url for url, etag in etags.items() if (await _get(client, url, etag))[0].status_code != 304}
+
+        async def escribir(metodo: str, url: str, **kwargs) -> set:
+            r = await client.request(metodo, url, **kwargs)
+            assert r.status_code < 300, (metodo, url, r.status_code, r.text[:200])
+            afectados = await cambiados()
+            for afectado in afectados:
+                etags[afectado] = (await client.get(afectado)).headers["etag"]
+            return afectados
+
+        generadas = http_cache.estadisticas()["generadas"]
+        nuevo = await escribir("POST", "/api/tipo_incapacidad", json={"nombre": "Bench", "descripcion": None, "estado": True})
+        # Las relaciones dependen de tipo_incapacidad y se regeneran, pero su contenido no cambió:
+        # el ETag (derivado del contenido) es el mismo y el cliente sigue recibiendo 304
+        assert nuevo == {"/api/tipo_incapacidad"}, nuevo
+        assert http_cache.estadisticas()["generadas"] - generadas == 3, http_cache.estadisticas()
+        hijo = (await client.get(f"/api/parametro_hijo/papashijos/{DIAGNOSTICOS}")).json()[0]["id_parametrohijo"]
+        estado = await escribir("PUT", f"/api/parametro_hijo/cambiar_estado/{hijo}")
+        assert estado == {"/api/parametro_hijo", f"/api/parametro_hijo/papashijos/{DIAGNOSTICOS}"}, estado
+        archivo = await escribir("PUT", "/api/archivo/1", json={"nombre": "Renombrado", "descripcion": None, "estado": True})
+        assert "/api/relacion" in archivo and "/api/parametros" not in archivo, archivo
+        relacion = await escribir("DELETE", "/api/relacion", params={"tipo_incapacidad_id": 1, "archivo_id": 1})
+        assert relacion >= {"/api/relacion", "/api/relacion/por_tipo/1", "/api/relacion/por_tipo/1/archivos"}, relacion
+        # Un 404 no cambia nada
+        assert (await client.delete("/api/parametros/999999")).status_code == 404
+        assert await cambiados() == set()
+    await async_session.dispose()
+    print("✅ las escrituras cambian el ETag solo de los catálogos que dependen de lo modificado")
+
+
+async def medir(repeticiones: int) -> None:
+    async with _cliente() as client:
+        for url in (f"/api/parametro_hijo/papashijos/{DIAGNOSTICOS}", "/api/relacion"):
+            etag = (await client.get(url)).headers["etag"]
+            modos = {
+                # Generada: se invalida la versión en cada vuelta (consulta + validación + serialización)
+                "generada": (lambda: http_cache.invalidar("parametro_hijo", "relacion"), None),
+                "bytes en caché": (lambda: None, None),
+                "304": (lambda: None, etag),
+            }
+            tamano = len((await client.get(url)).content)
+            print(f"📦 {url}: {tamano / 1024:.0f} KB")
+            for modo, (antes, condicional) in modos.items():
+                tiempos = []
+                for _ in range(repeticiones):
+                    antes()
+                    inicio = time.perf_counter()
+                    await client.get(url, headers={"If-None-Match": condicional} if condicional else {})
+                    tiempos.append((time.perf_counter() - inicio) * 1000)
+                tiempos.sort()
+                print(f"   {modo:<15} p50 {statistics.median(tiempos):7.2f} ms  p99 {tiempos[int(len(tiempos) * 0.99) - 1]:7.2f} ms")
+    await async_session.dispose()
+    print(f"   {http_cache.estadisticas()}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="ETag / If-None-Match en catálogos")
+    parser.add_argument("--diagnosticos", type=int, default=2000)
+    parser.add_argument("--repeticiones", type=int, default=300)
+    args = parser.parse_args()
+
+    crear_esquema(engine)
+    poblar(engine, incapacidades=10, diagnosticos=args.diagnosticos)
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM parametro"))
+        conn.execute(text("INSERT INTO parametro (id_parametro, nombre, descripcion, estado) VALUES "
+                          "(4, 'EPS', NULL, 1), (6, 'Cargos', NULL, 1), (7, 'Diagnósticos', NULL, 1)"))
+    http_cache.reset()
+    asyncio.run(verificar())
+    asyncio.run(medir(args.repeticiones))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Benchmark: documentos faltantes de todas las incapacidades pendientes (estado 11).
+
+Compara lo que hacía el administrador (abrir cada incapacidad: get_with_documents +
+get_documentos_cumplimiento por incapacidad) con GET /api/incapacidad/admin/cumplimiento
+(IncapacidadRepository.iter_documentos_faltantes: un anti-join incapacidad ⨝ relacion ▷
+incapacidad_archivo por página, enviado en streaming), y verifica que:
+- los faltantes coinciden con requeridos - subidos de la matriz de relaciones,
+- recorrer todas las páginas con next_cursor entrega las mismas incapacidades, sin repetir,
+- los filtros se aplican y un cursor inválido responde 400,
+- revisar todas las incapacidades pendientes cuesta una consulta.
+
+Uso:
+    python benchmark_cumplimiento.py [--pendientes 10000] [--pagina 700] [--repeticiones 5]
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from bench_db import ContadorConsultas, configurar_database_url, crear_esquema, poblar
+
+configurar_database_url()
+
+import httpx
+from sqlalchemy import text
+
+from app.api.main import app
+from app.core.security import create_access_token
+from app.db.migrate import INDEX_SPECS
+from app.db.session import SessionLocal, engine
+from app.models.version_principal import VersionPrincipal
+from app.repositories import relacion_matriz
+from app.repositories.incapacidad import IncapacidadRepository
+from app.services.incapacidad_cumplimiento_service import IncapacidadCumplimientoService
+
+URL = "/api/incapacidad/admin/cumplimiento"
+
+
+def _esperado(db, **filtros) -> dict:
+    """{id_incapacidad: [archivo_id faltantes]} calculado con la matriz y los documentos subidos."""
+    matriz = relacion_matriz.get_matriz(db)
+    where = " AND ".join(f"{columna} = :{columna}" for columna in filtros) or "1 = 1"
+    pendientes = db.execute(text(f"SELECT id_incapacidad, tipo_incapacidad_id FROM incapacidad WHERE {where}"), filtros).all()
+    subidos = {}
+    for inc_id, archivo_id in db.execute(text("SELECT incapacidad_id, archivo_id FROM incapacidad_archivo")):
+        subidos.setdefault(inc_id, set()).add(archivo_id)
+    esperado = {}
+    for inc_id, tipo_id in pendientes:
+        faltantes = matriz.faltantes(tipo_id, subidos.get(inc_id, set()))
+        if faltantes:
+            esperado[inc_id] = sorted(faltantes)
+    return esperado
+
+
+def _obtenidos(items: list) -> dict:
+    return {i["id_incapacidad"]: [f["archivo_id"] for f in i["faltantes"]] for i in items}
+
+
+async def _todas_las_paginas(client, headers, limit: int, **params) -> tuple:
+    items, paginas, cursor = [], 0, None
+    while True:
+        r = await client.get(URL, headers=headers, params={"limit": limit, **params, **({"cursor": cursor} if cursor else {})})
+        assert r.status_code == 200 and r.headers["content-type"] == "application/json", (r.status_code, r.text[:200])
+        cuerpo = r.json()
+        items.extend(cuerpo["incapacidades"])
+        paginas += 1
+        cursor = cuerpo["next_cursor"]
+        if cursor is None:
+            return items, paginas
+        assert len(cuerpo["incapacidades"]) == limit
+
+
+async def verificar(pagina: int) -> None:
+    db = SessionLocal()
+    try:
+        esperado = _esperado(db, estado=11)
+        esperado_tipo = _esperado(db, estado=11, tipo_incapacidad_id=2)
+    finally:
+        db.close()
+    headers = {"Authorization": f"Bearer {create_access_token(subject='1')}"}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=120) as client:
+        completo, _ = await _todas_las_paginas(client, headers, 10000)
+        assert _obtenidos(completo) == esperado, "faltantes distintos a requeridos - subidos"
+        ids = [i["id_incapacidad"] for i in completo]
+        assert ids == sorted(set(ids)) and all(i["estado"] == 11 for i in completo)
+        print(f"✅ {len(completo)} incapacidades pendientes con faltantes, iguales a requeridos - subidos de la matriz")
+
+        paginado, paginas = await _todas_las_paginas(client, headers, pagina)
+        assert paginado == completo
+        print(f"✅ {paginas} páginas de {pagina} con next_cursor: mismas incapacidades, sin repetir ni saltar")
+
+        por_tipo, _ = await _todas_las_paginas(client, headers, 10000, tipo_incapacidad_id=2)
+        assert _obtenidos(por_tipo) == esperado_tipo
+        assert (await client.get(URL, headers=headers, params={"cursor": "no-es-un-cursor"})).status_code == 400
+        print("✅ filtro por tipo aplicado; cursor inválido -> 400")
+
+
+def medir(repeticiones: int) -> None:
+    db = SessionLocal()
+    try:
+        relacion_matriz.get_matriz(db)
+        repo = IncapacidadRepository(db)
+        pendientes = db.execute(text("SELECT id_incapacidad, tipo_incapacidad_id FROM incapacidad WHERE estado = 11")).all()
+
+        def antes() -> dict:
+            # Abrir cada incapacidad: detalle con documentos + cumplimiento
+            resultado = {}
+            for inc_id, tipo_id in pendientes:
+                repo.get_with_documents(inc_id)
+                faltantes = [d["archivo_id"] for d in repo.get_documentos_cumplimiento(inc_id, tipo_id) if not d["subido"]]
+                if faltantes:
+                    resultado[inc_id] = faltantes
+            return resultado
+
+        def ahora() -> bytes:
+            return b"".join(IncapacidadCumplimientoService(db).json(limit=len(pendientes), estado=11))
+
+        with ContadorConsultas(engine) as consultas_antes:
+            inicio = time.perf_counter()
+            resultado_antes = antes()
+            ms_antes = (time.perf_counter() - inicio) * 1000
+        with ContadorConsultas(engine) as consultas_ahora:
+            cuerpo = ahora()
+        assert _obtenidos(json.loads(cuerpo)["incapacidades"]) == resultado_antes
+        assert consultas_ahora.total == 1, consultas_ahora.total
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            ahora()
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        print(f"📋 {len(pendientes)} incapacidades pendientes ({len(resultado_antes)} con faltantes, {len(cuerpo) / 1024:.0f} KB)")
+        print(f"   antes: {ms_antes:9.1f} ms  {consultas_antes.total} consultas")
+        print(f"   ahora: {statistics.median(tiempos):9.1f} ms  {consultas_ahora.total} consulta")
+    finally:
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Documentos faltantes de incapacidades pendientes")
+    parser.add_argument("--pendientes", type=int, default=10000)
+    parser.add_argument("--pagina", type=int, default=700)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    crear_esquema(engine)
+    with engine.begin() as conn:
+        # Los índices que align_indexes crea en MySQL (el anti-join busca por incapacidad_id, archivo_id)
+        for tabla, indices in INDEX_SPECS.items():
+            for nombre, columnas in indices.items():
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS {nombre} ON {tabla} ({', '.join(columnas)})"))
+    VersionPrincipal.__table__.create(bind=engine, checkfirst=True)
+    poblar(engine, incapacidades=args.pendientes + args.pendientes // 5)
+    with engine.begin() as conn:
+        # Exactamente `pendientes` incapacidades en estado 11; el resto queda en otros estados
+        conn.execute(text("UPDATE incapacidad SET estado = 11 WHERE id_incapacidad <= :n"), {"n": args.pendientes})
+        conn.execute(text("UPDATE incapacidad SET estado = 12 WHERE id_incapacidad > :n AND estado = 11"), {"n": args.pendientes})
+    relacion_matriz.invalidate()
+    asyncio.run(verificar(args.pagina))
+    medir(args.repeticiones)
+
+
+if __name__ == "__main__":
+    main()
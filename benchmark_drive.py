@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Benchmark de subidas a Google Drive contra fake_drive_server.py (en un proceso aparte):
+
+1. Latencia con el cliente compartido por proceso (gdrive_client) frente a
+   reconstruirlo en cada petición. Sin caché cada subida vuelve a leer credenciales,
+   construir el servicio y buscar la carpeta (files.list).
+2. Memoria pico al subir un archivo grande desde disco por bloques (subida
+   reanudable) frente a leerlo completo en memoria.
+3. Reanudación: el servidor corta cada tercer bloque con 503 y la subida debe
+   completarse sin reenviar el archivo desde el inicio.
+
+Uso:
+    python benchmark_drive.py [--subidas 50] [--latencia-ms 30] [--tamano-mb 10]
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from bench_db import configurar_database_url, crear_esquema
+
+configurar_database_url()
+
+import fake_drive_server
+
+# El servidor falso se usa con credenciales anónimas
+os.environ["GDRIVE_SERVICE_ACCOUNT_JSON"] = ""
+os.environ["GDRIVE_OAUTH_JSON"] = ""
+os.environ["GDRIVE_FOLDER_ID"] = ""
+
+from app.db.session import SessionLocal, engine
+from app.services import gdrive_client
+from app.services.upload_service import UploadService
+
+
+CONTENIDO = b"%PDF-1.4\n" + os.urandom(200 * 1024) + b"\n%%EOF"
+
+
+def usar_servidor(servidor) -> None:
+    os.environ["GDRIVE_API_ENDPOINT"] = servidor.url
+    gdrive_client.reset()
+
+
+def imprimir_peticiones(servidor) -> None:
+    for ruta, n in sorted(servidor.estadisticas(reset=True)["peticiones"].items()):
+        print(f"   {ruta:<45} {n}")
+
+
+def subir(db) -> float:
+    inicio = time.perf_counter()
+    service = UploadService(db)
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert service._ensure_gdrive(), "Google Drive no disponible"
+        url = service._gdrive_upload(CONTENIDO, original_name="bench.pdf", mime_type="application/pdf")
+    assert url, "La subida falló"
+    return (time.perf_counter() - inicio) * 1000
+
+
+def escenario(nombre: str, servidor, subidas: int, *, reiniciar: bool) -> None:
+    servidor.estadisticas(reset=True)
+    db = SessionLocal()
+    tiempos = []
+    try:
+        for _ in range(subidas):
+            if reiniciar:
+                gdrive_client.reset()
+            tiempos.append(subir(db))
+    finally:
+        db.close()
+    tiempos.sort()
+    p95 = tiempos[max(0, int(len(tiempos) * 0.95) - 1)]
+    print(f"\n{nombre}")
+    print("-" * 60)
+    print(f"p50={statistics.median(tiempos):7.1f} ms  p95={p95:7.1f} ms  max={tiempos[-1]:7.1f} ms")
+    imprimir_peticiones(servidor)
+
+
+def memoria(servidor, tamano_mb: int) -> None:
+    ruta = os.path.join(tempfile.mkdtemp(), "grande.pdf")
+    with open(ruta, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        for _ in range(tamano_mb):
+            f.write(os.urandom(1024 * 1024))
+        f.write(b"\n%%EOF")
+    db = SessionLocal()
+    try:
+        service = UploadService(db)
+        with contextlib.redirect_stdout(io.StringIO()):
+            service._ensure_gdrive()
+        print(f"\nMemoria pico subiendo {tamano_mb} MB")
+        print("-" * 60)
+        for nombre, fn in (
+            ("leído completo en memoria", lambda: service._gdrive_upload(
+                open(ruta, "rb").read(), original_name="grande.pdf", mime_type="application/pdf")),
+            ("por bloques desde disco", lambda: service.subir_archivo_local_drive(
+                ruta, original_name="grande.pdf", mime_type="application/pdf")),
+        ):
+            servidor.estadisticas(reset=True)
+            tracemalloc.start()
+            with contextlib.redirect_stdout(io.StringIO()):
+                url = fn()
+            _, pico = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            assert url, "La subida falló"
+            puts = sum(n for r, n in servidor.estadisticas()["peticiones"].items() if r.startswith("PUT"))
+            print(f"{nombre:<28} pico={pico / 1e6:7.2f} MB  bloques PUT={puts}")
+    finally:
+        db.close()
+        os.remove(ruta)
+
+
+def reanudacion(servidor, tamano_mb: int) -> None:
+    contenido = os.urandom(tamano_mb * 1024 * 1024)
+    client = gdrive_client.get_client()
+    sesiones = []
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        url = client.subir(io.BytesIO(contenido), nombre="reanudada.bin",
+                           mime_type="application/octet-stream", on_sesion=sesiones.append)
+    seg = time.perf_counter() - inicio
+    archivo = servidor.archivo(url.split("/d/")[1].split("/")[0])
+    integro = archivo.get("md5Checksum") == hashlib.md5(contenido).hexdigest()
+    puts = sum(n for r, n in servidor.estadisticas()["peticiones"].items() if r.startswith("PUT"))
+    print(f"\nReanudación con cortes cada 3 bloques ({tamano_mb} MB)")
+    print("-" * 60)
+    print(f"íntegro={integro}  peticiones PUT={puts}  sesiones={len(sesiones)}  tiempo={seg:5.2f} s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--subidas", type=int, default=50)
+    parser.add_argument("--latencia-ms", type=float, default=30.0)
+    parser.add_argument("--tamano-mb", type=int, default=10)
+    args = parser.parse_args()
+    crear_esquema(engine)
+
+    servidor = fake_drive_server.ProcesoDrive(latencia_ms=args.latencia_ms)
+    try:
+        usar_servidor(servidor)
+        print(f"☁️  Subidas a Drive falso (latencia {args.latencia_ms:.0f} ms por petición)")
+        print("=" * 60)
+        escenario("Cliente reconstruido en cada subida", servidor, args.subidas, reiniciar=True)
+        gdrive_client.reset()
+        escenario("Cliente compartido (gdrive_client)", servidor, args.subidas, reiniciar=False)
+        memoria(servidor, args.tamano_mb)
+    finally:
+        servidor.detener()
+
+    servidor = fake_drive_server.ProcesoDrive(fallar_put_cada=3)
+    try:
+        usar_servidor(servidor)
+        reanudacion(servidor, args.tamano_mb)
+    finally:
+        servidor.detener()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Benchmark: memoria pico y número de consultas de la exportación CSV de
+incapacidades a medida que crece el número de filas.
+
+Con el cursor del servidor (stream_results/yield_per) la memoria pico debe
+mantenerse prácticamente constante y las consultas no deben crecer por fila.
+
+Uso:
+    python benchmark_exportacion.py
+"""
+
+import time
+import tracemalloc
+
+from bench_db import ContadorConsultas, configurar_database_url, crear_esquema, poblar
+
+configurar_database_url()
+
+from app.db.session import SessionLocal, engine
+from app.models import password_reset_token as _password_reset_token  # noqa: F401  Registrar relaciones de Usuario
+from app.models import usuario as _usuario  # noqa: F401
+from app.services.incapacidad_export_service import IncapacidadExportService
+
+
+TAMANOS = (5000, 20000, 80000)
+
+
+def exportar() -> tuple[int, int]:
+    db = SessionLocal()
+    try:
+        filas = bytes_ = 0
+        for bloque in IncapacidadExportService(db).csv():
+            bytes_ += len(bloque)
+            filas += bloque.count(b"\n")
+        return filas - 1, bytes_
+    finally:
+        db.close()
+
+
+def main() -> None:
+    crear_esquema(engine)
+    print("📦 Exportación CSV en streaming")
+    print("=" * 60)
+    for n in TAMANOS:
+        poblar(engine, incapacidades=n)
+        exportar()  # calentar catálogos y reflexión
+        tracemalloc.start()
+        with ContadorConsultas(engine) as contador:
+            inicio = time.perf_counter()
+            filas, bytes_ = exportar()
+            seg = time.perf_counter() - inicio
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"filas={filas:<7} csv={bytes_ / 1e6:6.1f} MB consultas={contador.total:<3} "
+              f"pico={pico / 1e6:6.2f} MB tiempo={seg:6.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark: número de consultas SQL de los listados de incapacidades
+(empleado y administrador) a medida que crece `limit`.
+
+Con el enriquecimiento en bloque el número de consultas debe mantenerse
+constante entre limit=10 y limit=1000. Además verifica que recorrer el listado
+con next_cursor entrega todas las filas una sola vez, incluidas las que no
+tienen fecha_registro (van al final del orden).
+
+Uso:
+    python benchmark_listados.py
+"""
+
+import contextlib
+import io
+import time
+
+from sqlalchemy import text
+
+from bench_db import ContadorConsultas, configurar_database_url, crear_esquema, poblar
+
+configurar_database_url()
+
+from app.db.session import SessionLocal, engine
+from app.models import password_reset_token as _password_reset_token  # noqa: F401  Registrar relaciones de Usuario
+from app.services.incapacidad_service import IncapacidadService
+
+
+LIMITES = (10, 100, 1000)
+
+
+def medir(nombre: str, fn) -> None:
+    print(f"\n{nombre}")
+    print("-" * 60)
+    for limit in LIMITES:
+        db = SessionLocal()
+        try:
+            service = IncapacidadService(db)
+            with contextlib.redirect_stdout(io.StringIO()):
+                fn(service, 1)  # calentar catálogos y reflexión
+            with ContadorConsultas(engine) as contador, contextlib.redirect_stdout(io.StringIO()):
+                inicio = time.perf_counter()
+                filas = fn(service, limit)
+                ms = (time.perf_counter() - inicio) * 1000
+            print(f"limit={limit:<5} filas={filas:<5} consultas={contador.total:<4} tiempo={ms:8.1f} ms")
+        finally:
+            db.close()
+
+
+def verificar_cursor(pagina: int = 70) -> None:
+    """Páginas con next_cursor a través del límite entre filas con y sin fecha_registro."""
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE incapacidad SET fecha_registro = NULL WHERE id_incapacidad % 10 = 0"))
+        esperado = [r[0] for r in conn.execute(text(
+            "SELECT id_incapacidad FROM incapacidad ORDER BY fecha_registro DESC, id_incapacidad DESC"))]
+        sin_fecha = conn.execute(text("SELECT COUNT(*) FROM incapacidad WHERE fecha_registro IS NULL")).scalar()
+    db = SessionLocal()
+    try:
+        service = IncapacidadService(db)
+        ids, cursor, paginas = [], None, 0
+        with contextlib.redirect_stdout(io.StringIO()):
+            while True:
+                resultado = service.listar_admin(limit=pagina, cursor=cursor)
+                ids.extend(i["id_incapacidad"] for i in resultado["incapacidades"])
+                paginas += 1
+                cursor = resultado["next_cursor"]
+                if cursor is None:
+                    break
+    finally:
+        db.close()
+    assert ids == esperado, f"{len(ids)} filas por cursor, {len(esperado)} esperadas"
+    print(f"\n✅ {paginas} páginas de {pagina} con next_cursor: {len(ids)} filas "
+          f"({sin_fecha} sin fecha_registro), sin repetir ni saltar")
+
+
+def main() -> None:
+    crear_esquema(engine)
+    poblar(engine, incapacidades=2000, usuarios=1)
+
+    print("📊 Consultas por listado según limit")
+    print("=" * 60)
+    medir(
+        "Empleado (/mias)",
+        lambda s, limit: len(s.listar_mis_incapacidades(usuario_id=1, limit=limit)),
+    )
+    medir(
+        "Administrador (GET /)",
+        lambda s, limit: len(s.listar_admin(limit=limit)["incapacidades"]),
+    )
+    verificar_cursor()
+
+
+if __name__ == "__main__":
+    main()
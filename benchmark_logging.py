@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Benchmark: costo de los mensajes de diagnóstico en el request path.
+
+Compara, para el mismo lote de filas de list_all_with_details:
+- print(f"...{fila}") por fila (lo que hacían repositorio/servicio/routers),
+- logger.debug("... %s", fila) con el nivel de producción (INFO): no se formatea nada,
+- logger.info por la cola (app/core/logging_config.py): el hilo del request solo encola,
+  la serialización JSON y la escritura ocurren en el hilo del QueueListener,
+- logger.info con un StreamHandler síncrono (sin cola) como referencia,
+con un archivo local y con una salida lenta (cada escritura demora --lentitud-us):
+con un archivo rápido la cola cuesta lo mismo que escribir directo; su ventaja es
+que un stdout bloqueado no frena al request.
+
+También verifica que GET /api/incapacidad/{id} ya no ejecuta la consulta raw duplicada
+de get_with_documents y que cada línea emitida es JSON válido.
+
+Uso:
+    python benchmark_logging.py [--filas 2000] [--requests 200]
+"""
+
+import argparse
+import contextlib
+import json
+import logging
+import os
+import tempfile
+import time
+
+from bench_db import ContadorConsultas, configurar_database_url, crear_esquema, poblar
+
+configurar_database_url()
+
+from fastapi.testclient import TestClient
+
+from app.api.main import app
+from app.core import logging_config
+from app.core.security import create_access_token
+from app.db.session import SessionLocal, engine
+from app.models.version_principal import VersionPrincipal
+from app.repositories.incapacidad import IncapacidadRepository
+
+logger = logging.getLogger("benchmark_logging")
+
+
+def _filas(n: int) -> list:
+    db = SessionLocal()
+    try:
+        return IncapacidadRepository(db).list_all_with_details(skip=0, limit=n)
+    finally:
+        db.close()
+
+
+def _medir(filas: list, emitir) -> float:
+    inicio = time.perf_counter()
+    for fila in filas:
+        emitir(fila)
+    return (time.perf_counter() - inicio) / len(filas) * 1e6
+
+
+class _SalidaLenta:
+    """Stream que demora cada escritura (stdout hacia un pipe o agregador saturado)."""
+
+    def __init__(self, ruta: str, demora_s: float) -> None:
+        self._archivo = open(ruta, "w", encoding="utf-8")
+        self.demora_s = demora_s
+
+    def write(self, texto: str) -> int:
+        if self.demora_s:
+            time.sleep(self.demora_s)
+        return self._archivo.write(texto)
+
+    def flush(self) -> None:
+        self._archivo.flush()
+
+    def close(self) -> None:
+        self._archivo.close()
+
+
+def _por_cola(filas: list, destino: str, demora_s: float) -> tuple:
+    salida = _SalidaLenta(destino, demora_s)
+    logging_config.configurar(nivel="INFO", formato="json", stream=salida)
+    try:
+        us = _medir(filas, lambda f: logger.info("registro: %s", f))
+        inicio = time.perf_counter()
+    finally:
+        logging_config.detener()
+        salida.close()
+    drenado_ms = (time.perf_counter() - inicio) * 1000
+    with open(destino, encoding="utf-8") as f:
+        lineas = f.read().splitlines()
+    assert len(lineas) == len(filas), (len(lineas), len(filas))
+    assert all(json.loads(linea)["nivel"] == "INFO" for linea in lineas)
+    return us, drenado_ms
+
+
+def _sincrono(filas: list, destino: str, demora_s: float) -> float:
+    salida = _SalidaLenta(destino, demora_s)
+    directo = logging.StreamHandler(salida)
+    directo.setFormatter(logging_config.JsonFormatter())
+    raiz = logging.getLogger()
+    raiz.addHandler(directo)
+    raiz.setLevel(logging.INFO)
+    try:
+        return _medir(filas, lambda f: logger.info("registro: %s", f))
+    finally:
+        raiz.removeHandler(directo)
+        salida.close()
+
+
+def comparar(filas: list, destino: str, demora_s: float) -> None:
+    resultados = {}
+    with open(destino, "w", encoding="utf-8") as salida, contextlib.redirect_stdout(salida):
+        resultados["print por fila"] = _medir(filas, lambda f: print(f"DEBUG: registro: {f}"))
+
+    logging.getLogger().setLevel(logging.INFO)
+    resultados["logger.debug (nivel INFO)"] = _medir(filas, lambda f: logger.debug("registro: %s", f))
+
+    drenados = {}
+    for etiqueta, demora in (("archivo", 0.0), (f"salida lenta {demora_s * 1e6:.0f} µs", demora_s)):
+        us, drenados[etiqueta] = _por_cola(filas, destino, demora)
+        resultados[f"logger.info por cola ({etiqueta})"] = us
+        resultados[f"logger.info síncrono ({etiqueta})"] = _sincrono(filas, destino, demora)
+
+    print(f"{'modo (µs en el hilo que loguea)':<44} {'µs/mensaje':>11}")
+    for modo, us in resultados.items():
+        print(f"{modo:<44} {us:>11.2f}")
+    for etiqueta, ms in drenados.items():
+        print(f"   cola con {etiqueta}: el listener terminó de escribir {ms:.1f} ms después del último mensaje")
+    print(f"   {len(filas)} líneas JSON válidas por corrida")
+
+
+def detalle(requests: int) -> None:
+    admin = {"Authorization": f"Bearer {create_access_token(subject='1')}"}
+    client = TestClient(app)
+    with ContadorConsultas(engine) as contador:
+        assert client.get("/api/incapacidad/1", headers=admin).status_code == 200
+    db = SessionLocal()
+    try:
+        with ContadorConsultas(engine) as repo_contador:
+            IncapacidadRepository(db).get_with_documents(1)
+    finally:
+        db.close()
+    assert repo_contador.total == 2, repo_contador.total
+    print(f"🔎 get_with_documents: {repo_contador.total} consultas (incapacidad + documentos); "
+          f"GET /api/incapacidad/{{id}}: {contador.total} consultas")
+
+    inicio = time.perf_counter()
+    for i in range(requests):
+        client.get(f"/api/incapacidad/{1 + i % 500}", headers=admin)
+    total = time.perf_counter() - inicio
+    print(f"⏱️  GET /api/incapacidad/{{id}} a nivel {logging.getLevelName(logging.getLogger().level)}: "
+          f"{requests / total:.0f} req/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Costo de logging en el request path")
+    parser.add_argument("--filas", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--lentitud-us", type=float, default=100.0, help="Demora por escritura de la salida lenta")
+    args = parser.parse_args()
+
+    crear_esquema(engine)
+    VersionPrincipal.__table__.create(bind=engine, checkfirst=True)
+    poblar(engine, incapacidades=max(args.filas, 500))
+
+    filas = _filas(args.filas)
+    destino = os.path.join(tempfile.mkdtemp(), "log.jsonl")
+    comparar(filas, destino, args.lentitud_us / 1e6)
+    logging.getLogger().setLevel(logging.INFO)
+    detalle(args.requests)
+
+
+if __name__ == "__main__":
+    main()
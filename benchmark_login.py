@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Escenario de carga: 200 logins concurrentes (cambio de turno) mientras otros
+usuarios consultan GET /api/incapacidad/mias.
+
+Compara:
+- sincrono: bcrypt dentro de un endpoint sync (comportamiento anterior); cada login
+  ocupa un hilo del threadpool de FastAPI durante toda la verificación.
+- ejecutor: POST /api/auth/login actual; bcrypt corre en app/core/password_hasher.py
+  (ejecutor acotado, 503 + Retry-After al saturarse, rehash transparente).
+
+La mitad de los usuarios tiene hash bcrypt puro (esquema desactualizado): tras el
+escenario con ejecutor todos deben quedar en bcrypt_sha256.
+
+Uso:
+    python benchmark_login.py [--logins 200] [--rounds 12]
+"""
+
+import argparse
+import asyncio
+import time
+
+from bench_db import configurar_database_url, crear_esquema, poblar
+
+configurar_database_url()
+
+import httpx
+from passlib.hash import bcrypt, bcrypt_sha256
+from sqlalchemy import text
+
+from app.api.main import app
+from app.core import password_hasher
+from app.core.security import create_access_token, verify_password
+from app.db.session import SessionLocal, engine
+from app.models.version_principal import VersionPrincipal
+from app.services.usuario_service import UsuarioService
+
+PASSWORD = "Clave-Turno-2025"
+
+
+@app.post("/bench/login-sincrono")
+def login_sincrono(payload: dict):
+    # Flujo anterior: verificación bcrypt en el threadpool de FastAPI
+    db = SessionLocal()
+    try:
+        service = UsuarioService(db)
+        user = service._buscar_para_login(payload["correo_electronico"])
+        return service._completar_login(user, verify_password(payload["password"], user.password), None)
+    finally:
+        db.close()
+
+
+def _p(valores: list, q: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * q))] * 1000 if ordenados else 0.0
+
+
+def preparar(logins: int, rounds: int) -> None:
+    crear_esquema(engine)
+    VersionPrincipal.__table__.create(bind=engine, checkfirst=True)
+    poblar(engine, incapacidades=2000, usuarios=logins + 3)
+    moderno = bcrypt_sha256.using(rounds=rounds).hash(PASSWORD)
+    antiguo = bcrypt.using(rounds=rounds).hash(PASSWORD)
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE usuario SET password = :h WHERE id_usuario % 2 = 0"), {"h": moderno})
+        conn.execute(text("UPDATE usuario SET password = :h WHERE id_usuario % 2 = 1"), {"h": antiguo})
+
+
+async def escenario(client: httpx.AsyncClient, ruta: str, logins: int) -> dict:
+    lectura = {"Authorization": f"Bearer {create_access_token(subject='4')}"}
+    tiempos_login, tiempos_mias, rechazos = [], [], 0
+    terminado = asyncio.Event()
+
+    async def login(i: int) -> None:
+        nonlocal rechazos
+        inicio = time.perf_counter()
+        for _ in range(200):
+            r = await client.post(ruta, json={"correo_electronico": f"u{i}@example.com", "password": PASSWORD})
+            if r.status_code != 503:
+                break
+            rechazos += 1
+            await asyncio.sleep(float(r.headers.get("Retry-After", "1")))
+        assert r.status_code == 200, (r.status_code, r.text)
+        tiempos_login.append(time.perf_counter() - inicio)
+
+    async def lector() -> None:
+        while not terminado.is_set():
+            inicio = time.perf_counter()
+            r = await client.get("/api/incapacidad/mias?limit=10", headers=lectura)
+            assert r.status_code == 200, r.text
+            tiempos_mias.append(time.perf_counter() - inicio)
+            await asyncio.sleep(0.05)
+
+    lectores = [asyncio.create_task(lector()) for _ in range(3)]
+    inicio = time.perf_counter()
+    await asyncio.gather(*(login(i) for i in range(4, logins + 4)))
+    total = time.perf_counter() - inicio
+    terminado.set()
+    await asyncio.gather(*lectores)
+    return {"total": total, "login": tiempos_login, "mias": tiempos_mias, "rechazos": rechazos}
+
+
+def reporte(nombre: str, r: dict) -> None:
+    print(f"▶ {nombre}: {len(r['login'])} logins en {r['total']:.1f}s, 503 reintentados={r['rechazos']}")
+    print(f"   login p50 {_p(r['login'], .5):8.0f} ms  p99 {_p(r['login'], .99):8.0f} ms")
+    print(f"   /mias p50 {_p(r['mias'], .5):8.1f} ms  p99 {_p(r['mias'], .99):8.1f} ms  máx {_p(r['mias'], 1):8.1f} ms "
+          f"({len(r['mias'])} lecturas)")
+
+
+async def main_async(args) -> None:
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench", timeout=600) as client:
+        lectura = {"Authorization": f"Bearer {create_access_token(subject='4')}"}
+        reposo = []
+        for _ in range(20):
+            inicio = time.perf_counter()
+            await client.get("/api/incapacidad/mias?limit=10", headers=lectura)
+            reposo.append(time.perf_counter() - inicio)
+        print(f"💤 /mias en reposo: p50 {_p(reposo, .5):.1f} ms")
+
+        reporte("sincrono", await escenario(client, "/bench/login-sincrono", args.logins))
+        reporte("ejecutor", await escenario(client, "/api/auth/login", args.logins))
+    print(f"   hasher: {password_hasher.estadisticas()}")
+
+    with engine.connect() as conn:
+        antiguos = conn.execute(text("SELECT COUNT(*) FROM usuario WHERE id_usuario > 3 AND password NOT LIKE '$bcrypt-sha256$%'")).scalar()
+    print(f"🔁 hashes desactualizados tras el escenario: {antiguos}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Carga de logins concurrentes")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=12, help="Costo bcrypt de los hashes sembrados")
+    args = parser.parse_args()
+    preparar(args.logins, args.rounds)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
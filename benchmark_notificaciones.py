@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Benchmark y verificación de la bandeja de correos (notificacion_correo + email_worker)
+contra fake_smtp_server.py:
+
+1. Tiempo de respuesta de notify_new_incapacity enviando por SMTP dentro del request
+   (una conexión + login por administrador) frente a solo encolar.
+2. El worker envía el lote completo por una sola conexión autenticada.
+3. Idempotencia: notificar dos veces el mismo evento no duplica correos.
+4. Reintento: si el servidor corta la conexión el correo se reenvía por una conexión nueva.
+5. Transporte compartido (mail_transport): 50 correos con _send_email cuestan un solo
+   saludo + login, y un reinicio del servidor SMTP se detecta y se reconecta.
+
+Uso:
+    python benchmark_notificaciones.py [--incapacidades 20] [--latencia-ms 150]
+"""
+
+import argparse
+import contextlib
+import io
+import logging
+import os
+import smtplib
+import statistics
+import time
+
+from bench_db import configurar_database_url, crear_esquema, poblar
+
+configurar_database_url()
+
+import fake_smtp_server
+
+servidor = fake_smtp_server.iniciar()
+os.environ.update({
+    "SMTP_SERVER": servidor.host,
+    "SMTP_PORT": str(servidor.port),
+    "SMTP_STARTTLS": "false",
+    "SMTP_USERNAME": "bench",
+    "SMTP_PASSWORD": "bench",
+    "FROM_EMAIL": "incapacidades@example.com",
+    "SMTP_RETRY_BASE_SECONDS": "0",
+})
+
+from app.db.session import SessionLocal, engine
+from app.models import password_reset_token as _password_reset_token  # noqa: F401  Registrar relaciones de Usuario
+from app.models import usuario as _usuario  # noqa: F401
+from app.models.notificacion_correo import CORREO_ENVIADO, NotificacionCorreo
+from app.repositories.notificacion_correo_repository import NotificacionCorreoRepository
+from app.services import email_worker, mail_transport
+from app.services.notification_service import NotificationService
+
+
+def envio_directo(service: NotificationService, incapacidad_id: int) -> None:
+    # Comportamiento anterior: una conexión SMTP + login por cada administrador
+    service._encolar_correo = lambda **kw: _smtp_por_correo(kw["to_email"], kw["subject"], kw["html_content"])
+    service.notify_new_incapacity(incapacidad_id)
+
+
+def _smtp_por_correo(to_email: str, subject: str, html: str) -> bool:
+    config = mail_transport.configuracion()
+    with smtplib.SMTP(config.server, config.port) as server:
+        server.login(config.username, config.password)
+        server.sendmail(config.from_email, [to_email], f"Subject: {subject}\r\n\r\n{html}".encode())
+    return True
+
+
+def medir(nombre: str, fn, ids) -> None:
+    servidor.reiniciar_contadores()
+    tiempos = []
+    for incapacidad_id in ids:
+        db = SessionLocal()
+        try:
+            inicio = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                fn(NotificationService(db), incapacidad_id)
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        finally:
+            db.close()
+    print(f"{nombre:<36} p50={statistics.median(tiempos):7.1f} ms  max={max(tiempos):7.1f} ms  "
+          f"conexiones SMTP={servidor.conexiones}")
+
+
+def drenar() -> float:
+    inicio = time.perf_counter()
+    while email_worker.procesar_lote():
+        pass
+    return (time.perf_counter() - inicio) * 1000
+
+
+def main() -> None:
+    global servidor
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--incapacidades", type=int, default=20)
+    parser.add_argument("--latencia-ms", type=float, default=150.0)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    crear_esquema(engine)
+    NotificacionCorreo.__table__.create(bind=engine, checkfirst=True)
+    poblar(engine, incapacidades=args.incapacidades * 2)
+    servidor.estado.latencia = args.latencia_ms / 1000.0
+    print(f"📮 notify_new_incapacity con 3 administradores (SMTP con {args.latencia_ms:.0f} ms por saludo/login)")
+    print("=" * 78)
+
+    ids = range(1, args.incapacidades + 1)
+    medir("Envío SMTP dentro del request", envio_directo, ids)
+    medir("Solo encolar (notificacion_correo)", lambda s, i: s.notify_new_incapacity(i), ids)
+
+    mail_transport.reset()
+    servidor.reiniciar_contadores()
+    ms = drenar()
+    print(f"\nWorker: {len(servidor.mensajes)} correos en {ms:.0f} ms, "
+          f"conexiones={servidor.conexiones}, logins={servidor.logins}")
+
+    # Idempotencia: el frontend llama notify-admins después de crear (que ya notificó)
+    db = SessionLocal()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            NotificationService(db).notify_new_incapacity(1)
+            NotificationService(db).notify_new_incapacity(1)
+        correos = NotificacionCorreoRepository(db).list_by_incapacidad(1)
+        print(f"Idempotencia: {len(correos)} correos para la incapacidad 1 tras notificar 3 veces "
+              f"(esperado 3), pendientes={sum(c.estado != CORREO_ENVIADO for c in correos)}")
+    finally:
+        db.close()
+
+    # Reintento tras corte de conexión en el segundo correo
+    servidor.estado.latencia = 0.0
+    servidor.reiniciar_contadores()
+    servidor.estado.cortar_cada = 2
+    incapacidad_id = args.incapacidades + 1
+    db = SessionLocal()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            NotificationService(db).notify_new_incapacity(incapacidad_id)
+        email_worker.procesar_lote()
+        servidor.estado.cortar_cada = 0
+        drenar()
+        db.expire_all()
+        correos = NotificacionCorreoRepository(db).list_by_incapacidad(incapacidad_id)
+        print("Reintento: " + ", ".join(f"{c.destinatario}={c.estado}/{c.intentos}" for c in correos)
+              + f"  (mensajes recibidos={len(servidor.mensajes)}, conexiones={servidor.conexiones})")
+    finally:
+        db.close()
+
+    # Transporte compartido con envíos síncronos (p.ej. reset de contraseña)
+    mail_transport.reset()
+    servidor.reiniciar_contadores()
+    servidor.estado.latencia = args.latencia_ms / 1000.0
+    db = SessionLocal()
+    try:
+        service = NotificationService(db)
+        inicio = time.perf_counter()
+        ok = sum(service._send_email(f"admin{i}@example.com", f"Aviso {i}", "<p>Hola</p>", "Hola") for i in range(50))
+        ms = (time.perf_counter() - inicio) * 1000
+        print(f"\n_send_email x50: {ok} enviados en {ms:.0f} ms, conexiones={servidor.conexiones}, "
+              f"logins={servidor.logins}")
+
+        # Reinicio del servidor SMTP: la conexión del pool queda muerta y debe reemplazarse
+        port = servidor.port
+        servidor.detener()
+        servidor = fake_smtp_server.iniciar(port=port)
+        ok = service._send_email("admin@example.com", "Tras reinicio", "<p>Hola</p>")
+        print(f"Tras reiniciar el servidor SMTP: enviado={ok}, conexiones nuevas={servidor.conexiones}, "
+              f"saludos totales del transporte={mail_transport.get_transport().handshakes}")
+    finally:
+        db.close()
+    mail_transport.reset()
+    servidor.detener()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Pool de conexiones y réplica de lectura (app/db/session.py, app/db/pool_metrics.py).
+
+Verifica con dos BD SQLite (primario y "réplica" con datos marcados):
+- los métodos @lectura van a la réplica y el resto al primario,
+- tras una escritura la sesión lee del primario (lectura de lo propio),
+- si la réplica no responde la lectura se repite en el primario,
+- las métricas del pool (checkouts, espera, overflow) bajo contención,
+  también vía GET /health/db.
+
+Uso:
+    python benchmark_pool.py [--hilos 24] [--consultas 20]
+    DB_POOL_SIZE=2 DB_MAX_OVERFLOW=2 python benchmark_pool.py
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bench_db import configurar_database_url, crear_esquema, poblar
+
+configurar_database_url()
+os.environ.setdefault("DATABASE_REPLICA_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'replica.db')}")
+# Pool chico para que la contención se vea con pocos hilos
+os.environ.setdefault("DB_POOL_SIZE", "3")
+os.environ.setdefault("DB_MAX_OVERFLOW", "2")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.api.main import app
+from app.core.security import create_access_token
+from app.db import session as db_session
+from app.db.session import SessionLocal, engine, replica_engine
+from app.models.version_principal import VersionPrincipal
+from app.repositories.incapacidad import IncapacidadRepository
+from app.repositories.usuario_repository import UsuarioRepository
+
+
+def preparar() -> None:
+    for bind in (engine, replica_engine):
+        crear_esquema(bind)
+        VersionPrincipal.__table__.create(bind=bind, checkfirst=True)
+        poblar(bind, incapacidades=2000)
+    # Marca para distinguir de dónde viene cada lectura
+    with replica_engine.begin() as conn:
+        conn.execute(text("UPDATE usuario SET nombre_completo = 'REPLICA ' || nombre_completo"))
+
+
+def verificar_ruteo() -> None:
+    db = SessionLocal()
+    try:
+        repo = UsuarioRepository(db)
+        nombres = repo.get_nombres([4, 5])
+        assert all(n.startswith("REPLICA") for n in nombres.values()), nombres
+        # get() no está marcado (precede a escrituras): primario
+        assert not repo.get(4).nombre_completo.startswith("REPLICA")
+        print("✅ @lectura -> réplica; get() -> primario")
+
+        repo.set_estado(6, False)
+        nombres = repo.get_nombres([4, 5])
+        assert not any(n.startswith("REPLICA") for n in nombres.values()), nombres
+        print("✅ tras escribir, la misma sesión lee del primario")
+        repo.set_estado(6, True)
+    finally:
+        db.close()
+
+
+def verificar_fallback() -> None:
+    original = db_session.replica_engine
+    db_session.replica_engine = create_engine("sqlite:////no/existe/replica.db")
+    db = SessionLocal()
+    try:
+        antes = db_session.estadisticas()["ruteo"]["fallback_primario"]
+        nombres = UsuarioRepository(db).get_nombres([4])
+        assert not nombres[4].startswith("REPLICA")
+        assert db_session.estadisticas()["ruteo"]["fallback_primario"] == antes + 1
+        print("✅ réplica caída: la lectura se repite en el primario")
+    finally:
+        db.close()
+        db_session.replica_engine = original
+
+
+def contencion(hilos: int, consultas: int) -> None:
+    def trabajo(usuario_id: int) -> None:
+        for _ in range(consultas):
+            db = SessionLocal()
+            try:
+                # get() no está marcado @lectura: la contención se mide en el pool del primario
+                IncapacidadRepository(db).get(usuario_id)
+                time.sleep(0.002)  # simula el resto del request con la conexión tomada
+            finally:
+                db.close()
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=hilos) as ejecutor:
+        list(ejecutor.map(trabajo, range(1, hilos + 1)))
+    total = time.perf_counter() - inicio
+    m = db_session.estadisticas()["pools"]["primario"]
+    print(f"⏱️  {hilos} hilos x {consultas} consultas en {total:.2f}s con pool "
+          f"{db_session.DB_POOL_SIZE}+{db_session.DB_MAX_OVERFLOW}: "
+          f"espera promedio {m['espera_promedio_ms']} ms, máx {m['espera_max_ms']} ms, "
+          f"esperas >10ms {m['esperas_lentas']}, overflow máx {m['overflow_max']}, timeouts {m['timeouts']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Métricas del pool y réplica de lectura")
+    parser.add_argument("--hilos", type=int, default=24)
+    parser.add_argument("--consultas", type=int, default=20)
+    args = parser.parse_args()
+
+    preparar()
+    verificar_ruteo()
+    verificar_fallback()
+    contencion(args.hilos, args.consultas)
+
+    admin = {"Authorization": f"Bearer {create_access_token(subject='1')}"}
+    datos = TestClient(app).get("/health/db", headers=admin).json()
+    print(f"📊 /health/db ruteo={datos['ruteo']}")
+    for nombre, m in datos["pools"].items():
+        print(f"   {nombre}: checkouts={m['checkouts']} conexiones_nuevas={m['conexiones_nuevas']} "
+              f"en_uso={m.get('en_uso')} invalidaciones={m['invalidaciones']}")
+
+
+if __name__ == "__main__":
+    main()
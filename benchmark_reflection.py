@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark: latencia por petición de IncapacidadRepository con reflexión por instancia
+(comportamiento anterior) vs. registro compartido de tablas reflejadas.
+
+Simula una petición a /api/incapacidades/* que construye tres repositorios
+(IncapacidadService, UploadService y NotificationService) y un listado con detalles.
+
+Uso:
+    python benchmark_reflection.py            # SQLite temporal
+    DATABASE_URL=mysql+pymysql://... python benchmark_reflection.py
+"""
+
+import os
+import tempfile
+import time
+
+_tmp_db = None
+if not os.getenv("DATABASE_URL"):
+    _tmp_db = os.path.join(tempfile.mkdtemp(), "bench_reflection.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{_tmp_db}"
+
+from sqlalchemy import MetaData, create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.db import reflection
+from app.repositories.incapacidad import IncapacidadRepository
+
+
+ITERACIONES = 200
+
+
+def preparar_esquema(engine) -> None:
+    if not engine.dialect.name.startswith("sqlite"):
+        return
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE IF NOT EXISTS usuario (id_usuario INTEGER PRIMARY KEY, nombre_completo VARCHAR(150))"))
+        conn.execute(text("CREATE TABLE IF NOT EXISTS tipo_incapacidad (id_tipo_incapacidad INTEGER PRIMARY KEY, nombre VARCHAR(150))"))
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS incapacidad ("
+            "id_incapacidad INTEGER PRIMARY KEY, tipo_incapacidad_id INTEGER, usuario_id INTEGER, "
+            "fecha_inicio DATETIME, fecha_final DATETIME, dias INTEGER, salario VARCHAR(50), "
+            "estado INTEGER, fecha_registro DATETIME)"
+        ))
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS incapacidad_archivo ("
+            "id_incapacidad_archivo INTEGER PRIMARY KEY, incapacidad_id INTEGER, archivo_id INTEGER, "
+            "url_documento VARCHAR(500), fecha_subida DATETIME)"
+        ))
+
+
+def peticion_anterior(engine) -> None:
+    # Réplica del constructor previo: una reflexión por repositorio + la del listado
+    for _ in range(3):
+        md = MetaData()
+        md.reflect(bind=engine, only=["incapacidad", "incapacidad_archivo"])
+    md.reflect(bind=engine, only=["usuario", "tipo_incapacidad"])
+
+
+def peticion_actual(session) -> None:
+    repos = [IncapacidadRepository(session) for _ in range(3)]
+    repos[0].list_all_with_details(limit=1)
+
+
+def medir(nombre: str, fn) -> None:
+    tiempos = []
+    for _ in range(ITERACIONES):
+        inicio = time.perf_counter()
+        fn()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    tiempos.sort()
+    p50 = tiempos[len(tiempos) // 2]
+    p99 = tiempos[int(len(tiempos) * 0.99) - 1]
+    print(f"{nombre:<32} p50={p50:8.3f} ms   p99={p99:8.3f} ms")
+
+
+def main() -> None:
+    engine = create_engine(os.environ["DATABASE_URL"])
+    preparar_esquema(engine)
+    session = sessionmaker(bind=engine)()
+
+    print("📊 Benchmark de reflexión de esquema por petición")
+    print("=" * 60)
+    medir("Reflexión por repositorio", lambda: peticion_anterior(engine))
+
+    reflection.invalidate(engine)
+    reflection.warm_up(engine)
+    medir("Registro compartido", lambda: peticion_actual(session))
+
+    session.close()
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Benchmark: matriz de documentos requeridos (relacion) en memoria.
+
+Compara con lo que se hacía antes (app/repositories/relacion_matriz.py):
+- RelacionService.list: repo.list + tipo_repo.get + archivo_repo.get por fila (N+1),
+- cumplimiento del detalle de una incapacidad (GET /incapacidad/mias/{id}): consulta de
+  relaciones + consulta de archivos subidos en cada vista; ahora diferencia de conjuntos
+  contra los documentos que get_with_documents ya trajo,
+y verifica que:
+- los listados y el cumplimiento coinciden con los calculados desde la BD,
+- ninguna lectura consulta la tabla relacion con la matriz cargada,
+- crear/eliminar una relación o renombrar un archivo/tipo publica un snapshot nuevo
+  (el anterior no cambia) y editar un documento subido no recarga la matriz.
+
+Uso:
+    python benchmark_relacion.py [--relaciones 200] [--repeticiones 50]
+"""
+
+import argparse
+import contextlib
+import statistics
+import time
+from typing import List
+
+from bench_db import configurar_database_url, crear_esquema, poblar
+
+configurar_database_url()
+
+from sqlalchemy import event, text
+
+from app.api.main import app  # noqa: F401  Registrar todos los modelos
+from app.db.session import SessionLocal, engine
+from app.repositories import relacion_matriz
+from app.repositories.archivo_repository import ArchivoRepository
+from app.repositories.incapacidad import IncapacidadRepository
+from app.repositories.relacion_repository import RelacionRepository
+from app.repositories.tipo_incapacidad import TipoIncapacidadRepository
+from app.schemas.archivo import ArchivoUpdate
+from app.schemas.relacion import RelacionCreate
+from app.schemas.tipo_incapacidad import TipoIncapacidadUpdate
+from app.services.archivo_service import ArchivoService
+from app.services.incapacidad_service import IncapacidadService
+from app.services.relacion_service import RelacionService
+from app.services.tipo_incapacidad import TipoIncapacidadService
+
+
+@contextlib.contextmanager
+def sentencias():
+    """Lista de las sentencias SQL ejecutadas dentro del bloque."""
+    capturadas: List[str] = []
+
+    def registrar(conn, cursor, statement, *args):
+        capturadas.append(statement)
+
+    event.listen(engine, "before_cursor_execute", registrar)
+    try:
+        yield capturadas
+    finally:
+        event.remove(engine, "before_cursor_execute", registrar)
+
+
+def _antes_listar(db, skip: int = 0, limit: int = 1000) -> list:
+    # RelacionService.list anterior: una consulta para las relaciones y dos por fila
+    tipo_repo, archivo_repo = TipoIncapacidadRepository(db), ArchivoRepository(db)
+    resultado = []
+    for x in RelacionRepository(db).list(skip=skip, limit=limit):
+        tipo, arch = tipo_repo.get(x.tipo_incapacidad_id), archivo_repo.get(x.archivo_id)
+        resultado.append({
+            "tipo_incapacidad_id": x.tipo_incapacidad_id,
+            "tipo_incapacidad_nombre": getattr(tipo, "nombre", None) if tipo else None,
+            "archivo_id": x.archivo_id,
+            "archivo_nombre": getattr(arch, "nombre", None) if arch else None,
+        })
+    return resultado
+
+
+def _antes_cumplimiento(db, incapacidad_id: int, tipo_id: int) -> list:
+    requeridos = [r.archivo_id for r in RelacionRepository(db).list_by_tipo_incapacidad(tipo_incapacidad_id=tipo_id)]
+    subidos = IncapacidadRepository(db).list_archivo_ids_by_incapacidades([incapacidad_id]).get(incapacidad_id, set())
+    return [{"archivo_id": a, "requerido": True, "subido": a in subidos, "completo": a in subidos} for a in requeridos]
+
+
+def _orden(filas: list) -> list:
+    return sorted(filas, key=lambda f: (f["tipo_incapacidad_id"], f["archivo_id"]))
+
+
+def _ms(funcion, repeticiones: int) -> float:
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos)
+
+
+def verificar(db) -> None:
+    relacion_matriz.invalidate()
+    service = RelacionService(db)
+    assert service.list(limit=1000) == _orden(_antes_listar(db)), "listado distinto al de la BD"
+    pares = [tuple(r) for r in db.execute(text("SELECT id_incapacidad, tipo_incapacidad_id FROM incapacidad LIMIT 300"))]
+    repo = IncapacidadRepository(db)
+    lote = repo.get_documentos_cumplimiento_batch(pares)
+    for inc_id, tipo_id in pares:
+        assert lote[inc_id] == _antes_cumplimiento(db, inc_id, tipo_id), inc_id
+
+    incapacidad = IncapacidadService(db)
+    inc_id, usuario = db.execute(text("SELECT id_incapacidad, usuario_id FROM incapacidad LIMIT 1")).one()
+    with sentencias() as ejecutadas:
+        for tipo in range(1, 6):
+            service.list_by_tipo_incapacidad(tipo)
+            service.list_archivos_by_tipo_incapacidad(tipo)
+        detalle = incapacidad.obtener_mi_incapacidad(usuario_id=usuario, id_incapacidad=inc_id)
+        repo.get_documentos_cumplimiento_batch(pares)
+    assert not [s for s in ejecutadas if "relacion" in s.lower()], ejecutadas
+    assert detalle["documentos_cumplimiento"] == _antes_cumplimiento(db, inc_id, detalle["tipo_incapacidad_id"])
+    print(f"✅ listados y cumplimiento iguales a los de la BD; {len(ejecutadas)} consultas en 10 listados por tipo, "
+          f"un detalle y un lote de {len(pares)} incapacidades, ninguna a relacion")
+
+    anterior = relacion_matriz.get_matriz(db)
+    tipo, archivo = db.execute(text(
+        "SELECT t.id_tipo_incapacidad, a.id_archivo FROM tipo_incapacidad t, archivo a "
+        "WHERE NOT EXISTS (SELECT 1 FROM relacion r WHERE r.tipo_incapacidad_id = t.id_tipo_incapacidad "
+        "AND r.archivo_id = a.id_archivo) LIMIT 1"
+    )).one()
+    service.create(RelacionCreate(tipo_incapacidad_id=tipo, archivo_id=archivo))
+    nueva = relacion_matriz.get_matriz(db)
+    assert nueva is not anterior and archivo in nueva.requeridos(tipo) and archivo not in anterior.requeridos(tipo)
+    ArchivoService(db).update(archivo, ArchivoUpdate(nombre="Renombrado"))
+    assert any(r.archivo_nombre == "Renombrado" for r in relacion_matriz.get_matriz(db).por_tipo[tipo])
+    TipoIncapacidadService(db).update(tipo, TipoIncapacidadUpdate(nombre="Tipo renombrado"))
+    assert all(r["tipo_incapacidad_nombre"] == "Tipo renombrado" for r in service.list_by_tipo_incapacidad(tipo))
+    service.delete(tipo, archivo)
+    assert archivo not in relacion_matriz.get_matriz(db).requeridos(tipo)
+
+    # Un documento subido (archivo sin relaciones) no está en la matriz: editarlo no la recarga
+    db.execute(text("INSERT INTO archivo (id_archivo, nombre, descripcion, estado) VALUES (9001, 'subido.pdf', NULL, 1)"))
+    db.commit()
+    version = relacion_matriz.version()
+    ArchivoService(db).update(9001, ArchivoUpdate(nombre="subido-2.pdf"))
+    assert relacion_matriz.version() == version
+    print("✅ crear/eliminar relación y renombrar archivo/tipo publican un snapshot nuevo; "
+          "editar un documento subido no recarga la matriz")
+
+
+def medir(db, repeticiones: int) -> None:
+    service = RelacionService(db)
+    relacion_matriz.get_matriz(db)
+    n = len(service.list(limit=1000))
+    with sentencias() as antes:
+        _antes_listar(db)
+    print(f"📋 RelacionService.list ({n} relaciones): antes {_ms(lambda: _antes_listar(db), repeticiones):.2f} ms "
+          f"({len(antes)} consultas), ahora {_ms(lambda: service.list(limit=1000), repeticiones):.3f} ms (0 consultas)")
+
+    inc_id, tipo_id = db.execute(text("SELECT id_incapacidad, tipo_incapacidad_id FROM incapacidad LIMIT 1")).one()
+    matriz = relacion_matriz.get_matriz(db)
+    subidos = {d["archivo_id"] for d in IncapacidadRepository(db).get_with_documents(inc_id)["documentos"]}
+    print(f"📎 cumplimiento de una incapacidad: antes {_ms(lambda: _antes_cumplimiento(db, inc_id, tipo_id), repeticiones):.2f} ms "
+          f"(2 consultas), ahora {_ms(lambda: matriz.cumplimiento(tipo_id, subidos), repeticiones) * 1000:.1f} µs "
+          f"(faltantes = requeridos - subidos: {sorted(matriz.faltantes(tipo_id, subidos))})")
+
+    relacion_matriz.invalidate()
+    with sentencias() as carga:
+        inicio = time.perf_counter()
+        relacion_matriz.get_matriz(db)
+    print(f"🔄 recarga de la matriz: {(time.perf_counter() - inicio) * 1000:.2f} ms, {len(carga)} consultas")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Matriz de relaciones en memoria")
+    parser.add_argument("--relaciones", type=int, default=200, help="Relaciones adicionales (tipos 100+)")
+    parser.add_argument("--repeticiones", type=int, default=50)
+    args = parser.parse_args()
+
+    crear_esquema(engine)
+    poblar(engine, incapacidades=2000)
+    with engine.begin() as conn:
+        # Más tipos y archivos requeridos para que el N+1 anterior sea visible
+        tipos = max(1, args.relaciones // 10)
+        conn.execute(text("INSERT INTO tipo_incapacidad (id_tipo_incapacidad, nombre, descripcion, estado) VALUES (:id, :n, NULL, 1)"),
+                     [{"id": 100 + t, "n": f"Tipo extra {t}"} for t in range(tipos)])
+        conn.execute(text("INSERT INTO archivo (id_archivo, nombre, descripcion, estado) VALUES (:id, :n, NULL, 1)"),
+                     [{"id": 100 + a, "n": f"Requisito {a}"} for a in range(10)])
+        conn.execute(text("INSERT INTO relacion (tipo_incapacidad_id, archivo_id) VALUES (:t, :a)"),
+                     [{"t": 100 + i // 10, "a": 100 + i % 10} for i in range(tipos * 10)])
+    db = SessionLocal()
+    try:
+        verificar(db)
+        medir(db, args.repeticiones)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
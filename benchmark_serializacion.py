@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark: serialización JSON de los listados grandes (ms por 1000 filas).
+
+Compara, con las mismas filas del servicio:
+- GET /api/incapacidad/ (dict sin response_model): jsonable_encoder + json.dumps de
+  JSONResponse (antes) vs orjson directo (RespuestaJSON, app/core/json_response.py),
+- /incapacidad/admin/rechazadas y /incapacidad/mias (response_model): validación +
+  dump_json de pydantic (antes) vs proyección a los campos del schema + orjson
+  (SerializadorListado, sin volver a validar filas que vienen del repositorio),
+verificando que los bytes sean idénticos, y mide los endpoints de punta a punta.
+
+Uso:
+    python benchmark_serializacion.py [--filas 1000] [--repeticiones 20]
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import timeit
+from typing import List
+
+from bench_db import configurar_database_url, crear_esquema, poblar
+
+configurar_database_url()
+
+import httpx
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from sqlalchemy import text
+
+from app.api.main import app
+from app.core import json_response
+from app.core.security import create_access_token
+from app.db import async_session
+from app.db.session import SessionLocal, engine
+from app.models.version_principal import VersionPrincipal
+from app.schemas.incapacidad import IncapacidadAdminOut, IncapacidadOut
+from app.services.incapacidad_service import IncapacidadService
+
+
+def _antes_dict(contenido) -> bytes:
+    # Lo que hacía FastAPI sin response_model: jsonable_encoder y JSONResponse.render
+    return json.dumps(jsonable_encoder(contenido), ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def _antes_modelo(adapter: TypeAdapter):
+    # Lo que hace FastAPI con response_model: validar las filas y serializar con pydantic
+    return lambda filas: adapter.dump_json(adapter.validate_python(filas))
+
+
+def _ms(funcion, repeticiones: int) -> float:
+    return min(timeit.repeat(funcion, number=1, repeat=repeticiones)) * 1000
+
+
+def comparar(filas: int, repeticiones: int) -> None:
+    db = SessionLocal()
+    try:
+        service = IncapacidadService(db)
+        admin = service.listar_admin(skip=0, limit=filas)
+        rechazadas = service.listar_admin(skip=0, limit=filas, estado=50)["incapacidades"]
+        usuario = db.execute(text("SELECT usuario_id FROM incapacidad GROUP BY usuario_id ORDER BY COUNT(*) DESC LIMIT 1")).scalar()
+        mias, _ = service.listar_mis_incapacidades_pagina(usuario_id=usuario, limit=filas)
+    finally:
+        db.close()
+
+    casos = [
+        ("GET /incapacidad/ (dict)", admin, _antes_dict, json_response.dumps),
+        ("admin/rechazadas (IncapacidadAdminOut)", rechazadas,
+         _antes_modelo(TypeAdapter(List[IncapacidadAdminOut])), json_response.SerializadorListado(IncapacidadAdminOut).dump),
+        ("mias (IncapacidadOut)", mias,
+         _antes_modelo(TypeAdapter(List[IncapacidadOut])), json_response.SerializadorListado(IncapacidadOut).dump),
+    ]
+    print(f"{'listado':<40} {'filas':>6} {'antes ms':>9} {'ahora ms':>9} {'ms/1000 antes':>14} {'ms/1000 ahora':>14}")
+    for nombre, datos, antes, ahora in casos:
+        assert antes(datos) == ahora(datos), nombre
+        n = len(datos["incapacidades"]) if isinstance(datos, dict) else len(datos)
+        ms_antes, ms_ahora = _ms(lambda: antes(datos), repeticiones), _ms(lambda: ahora(datos), repeticiones)
+        print(f"{nombre:<40} {n:>6} {ms_antes:>9.2f} {ms_ahora:>9.2f} {ms_antes / n * 1000:>14.2f} {ms_ahora / n * 1000:>14.2f}")
+    print("✅ bytes idénticos a los de jsonable_encoder / response_model en los tres listados")
+
+
+async def endpoints(filas: int, repeticiones: int) -> None:
+    admin = {"Authorization": f"Bearer {create_access_token(subject='1')}"}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60) as client:
+        for url in (f"/api/incapacidad/?limit={filas}", f"/api/incapacidad/admin/rechazadas?limit={filas}"):
+            tiempos = []
+            for _ in range(repeticiones):
+                inicio = time.perf_counter()
+                r = await client.get(url, headers=admin)
+                tiempos.append((time.perf_counter() - inicio) * 1000)
+            assert r.status_code == 200 and r.headers["content-type"] == "application/json", (url, r.status_code)
+            print(f"⏱️  {url}: {len(r.content) / 1024:.0f} KB, p50 {statistics.median(tiempos):.1f} ms")
+    await async_session.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serialización JSON de listados")
+    parser.add_argument("--filas", type=int, default=1000)
+    parser.add_argument("--repeticiones", type=int, default=20)
+    args = parser.parse_args()
+
+    if json_response.orjson is None:
+        print("⚠️  orjson no está instalado: se mide el respaldo con json de la stdlib / pydantic")
+    crear_esquema(engine)
+    VersionPrincipal.__table__.create(bind=engine, checkfirst=True)
+    poblar(engine, incapacidades=max(3 * args.filas, 500))
+    with engine.begin() as conn:
+        # admin/rechazadas: estado 50 en la tercera parte de las filas
+        conn.execute(text("UPDATE incapacidad SET estado = 50 WHERE id_incapacidad % 3 = 0"))
+    comparar(args.filas, args.repeticiones)
+    asyncio.run(endpoints(args.filas, args.repeticiones))
+
+
+if __name__ == "__main__":
+    main()
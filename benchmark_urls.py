@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark: list_user_urls y get_file_url_metadata leyendo todos los JSON de
+uploads/urls frente al índice archivo_url, a medida que crece el número de archivos.
+
+Con el índice el tiempo por consulta no debe depender del total de archivos.
+
+Uso:
+    python benchmark_urls.py
+"""
+
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from bench_db import configurar_database_url, crear_esquema
+
+configurar_database_url()
+
+from app.db.session import SessionLocal, engine
+from app.models import password_reset_token as _password_reset_token  # noqa: F401  Registrar relaciones de Usuario
+from app.models import usuario as _usuario  # noqa: F401
+from app.models.archivo_url import ArchivoUrl
+from app.services.upload_service import UploadService
+
+
+TAMANOS = (1000, 5000, 20000)
+USUARIOS = 200
+REPETICIONES = 20
+
+
+def escaneo_json(urls_dir: str, user_id: int) -> list[dict]:
+    # Implementación anterior: abrir y filtrar cada JSON
+    results = []
+    for name in os.listdir(urls_dir):
+        if name.endswith(".json"):
+            with open(os.path.join(urls_dir, name), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("user_id") == user_id:
+                results.append(data)
+    return results
+
+
+def escribir_json(urls_dir: str, desde: int, hasta: int) -> None:
+    for archivo_id in range(desde, hasta):
+        metadata = {
+            "archivo_id": archivo_id,
+            "user_id": archivo_id % USUARIOS,
+            "file_path": f"uploads/{archivo_id}.pdf",
+            "file_size": 1024,
+            "url": f"/uploads/{archivo_id}.pdf",
+            "fecha_subida": datetime.now().isoformat(),
+        }
+        with open(os.path.join(urls_dir, f"{archivo_id}.json"), "w", encoding="utf-8") as f:
+            json.dump(metadata, f, ensure_ascii=False, indent=2)
+
+
+def medir(fn) -> float:
+    inicio = time.perf_counter()
+    for i in range(REPETICIONES):
+        fn(i)
+    return (time.perf_counter() - inicio) * 1000 / REPETICIONES
+
+
+def main() -> None:
+    crear_esquema(engine)
+    ArchivoUrl.__table__.create(bind=engine, checkfirst=True)
+    os.chdir(tempfile.mkdtemp())
+    db = SessionLocal()
+    try:
+        service = UploadService(db)
+        os.makedirs(service.urls_dir, exist_ok=True)
+        print(f"{'archivos':>9} {'escaneo JSON':>14} {'índice (lista)':>15} {'índice (id)':>12} {'importación':>12}")
+        previo = 0
+        for total in TAMANOS:
+            escribir_json(service.urls_dir, previo, total)
+            previo = total
+            inicio = time.perf_counter()
+            resumen = service.importar_metadatos_json()
+            importacion = (time.perf_counter() - inicio) * 1000
+            esperado = len(escaneo_json(service.urls_dir, 7))
+            assert len(service.list_user_urls(7)) == esperado
+            assert service.get_file_url_metadata(7)["url"] == "/uploads/7.pdf"
+            t_json = medir(lambda i: escaneo_json(service.urls_dir, i % USUARIOS))
+            t_lista = medir(lambda i: service.list_user_urls(i % USUARIOS))
+            t_id = medir(lambda i: service.get_file_url_metadata(i * 37 % total))
+            print(f"{total:>9} {t_json:>11.2f} ms {t_lista:>12.2f} ms {t_id:>9.2f} ms "
+                  f"{importacion:>9.0f} ms  (+{resumen['importados']})")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Servidor HTTP local que imita el subconjunto de la API de Google Drive v3 usado por
+app/services/gdrive_client.py, para pruebas y benchmarks sin credenciales reales.
+
+Soporta:
+    GET    /drive/v3/files?q=...                 búsqueda de carpeta por nombre
+    GET    /drive/v3/files/{id}                  metadatos
+    POST   /drive/v3/files                       crear carpeta (solo metadatos)
+    POST   /upload/drive/v3/files?uploadType=multipart
+    POST   /upload/drive/v3/files?uploadType=resumable  (+ PUT por bloques con Content-Range)
+    POST   /drive/v3/files/{id}/permissions
+    GET    /_stats                               contadores de peticiones por ruta
+
+Uso:
+    python fake_drive_server.py --port 8765 --latencia-ms 80
+    GDRIVE_API_ENDPOINT=http://127.0.0.1:8765/drive/v3/ uvicorn app.api.main:app
+
+Desde código: `servidor = iniciar(port=0, latencia_ms=50)` lo levanta en un hilo y
+`ProcesoDrive(latencia_ms=50)` en un proceso aparte; en ambos `servidor.url` es el valor
+para GDRIVE_API_ENDPOINT.
+"""
+
+import argparse
+import email.parser
+import email.policy
+import hashlib
+import json
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from urllib.request import urlopen
+
+
+class EstadoDrive:
+    def __init__(self, latencia_ms: float = 0.0, fallar_put_cada: int = 0) -> None:
+        self.latencia = latencia_ms / 1000.0
+        # Cada N bloques PUT se guardan los datos pero se responde 503 (corte a mitad de subida)
+        self.fallar_put_cada = fallar_put_cada
+        self.puts = 0
+        self.archivos: dict[str, dict] = {}
+        self.contenidos: dict[str, bytes] = {}
+        self.sesiones: dict[str, dict] = {}
+        self.peticiones: Counter = Counter()
+        self.lock = threading.Lock()
+
+    def crear(self, metadata: dict, contenido: bytes | None = None) -> dict:
+        file_id = uuid.uuid4().hex
+        archivo = {
+            "id": file_id,
+            "name": metadata.get("name", "sin_nombre"),
+            "mimeType": metadata.get("mimeType", "application/octet-stream"),
+            "parents": metadata.get("parents", []),
+            "webViewLink": f"https://drive.fake/file/d/{file_id}/view",
+            "webContentLink": f"https://drive.fake/uc?id={file_id}",
+        }
+        with self.lock:
+            self.archivos[file_id] = archivo
+            if contenido is not None:
+                self.contenidos[file_id] = contenido
+                archivo["size"] = str(len(contenido))
+                archivo["md5Checksum"] = hashlib.md5(contenido).hexdigest()
+        return archivo
+
+
+class ManejadorDrive(BaseHTTPRequestHandler):
+    estado: EstadoDrive
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args) -> None:  # silenciar salida por petición
+        pass
+
+    # ---------------- utilidades -----------------
+    def _leer_cuerpo(self) -> bytes:
+        largo = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(largo) if largo else b""
+
+    def _json(self, codigo: int, datos: dict, headers: dict | None = None) -> None:
+        cuerpo = json.dumps(datos).encode()
+        self.send_response(codigo)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def _vacio(self, codigo: int, headers: dict | None = None) -> None:
+        self.send_response(codigo)
+        self.send_header("Content-Length", "0")
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+
+    def _contar(self, metodo: str, ruta: str) -> None:
+        if ruta == "/_stats":
+            return
+        ruta = re.sub(r"/files/[0-9a-f]{32}", "/files/{id}", ruta)
+        with self.estado.lock:
+            self.estado.peticiones[f"{metodo} {ruta}"] += 1
+        if self.estado.latencia:
+            time.sleep(self.estado.latencia)
+
+    # ---------------- rutas -----------------
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        self._contar("GET", url.path)
+        if url.path == "/_stats":
+            datos = {"peticiones": dict(self.estado.peticiones), "archivos": len(self.estado.archivos)}
+            if parse_qs(url.query).get("reset"):
+                with self.estado.lock:
+                    self.estado.peticiones.clear()
+            return self._json(200, datos)
+        if url.path.rstrip("/") == "/drive/v3/files":
+            q = parse_qs(url.query).get("q", [""])[0]
+            nombre = re.search(r"name='([^']*)'", q)
+            carpeta = "application/vnd.google-apps.folder" in q
+            files = [
+                {"id": f["id"], "name": f["name"]}
+                for f in self.estado.archivos.values()
+                if (not nombre or f["name"] == nombre.group(1))
+                and (not carpeta or f["mimeType"] == "application/vnd.google-apps.folder")
+            ]
+            return self._json(200, {"files": files})
+        m = re.fullmatch(r"/drive/v3/files/([^/]+)", url.path)
+        if m and m.group(1) in self.estado.archivos:
+            return self._json(200, self.estado.archivos[m.group(1)])
+        return self._json(404, {"error": {"code": 404, "message": "File not found"}})
+
+    def do_POST(self) -> None:
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        self._contar("POST", url.path)
+        cuerpo = self._leer_cuerpo()
+
+        if url.path.rstrip("/") == "/drive/v3/files":
+            return self._json(200, self.estado.crear(json.loads(cuerpo or b"{}")))
+
+        m = re.fullmatch(r"/drive/v3/files/([^/]+)/permissions", url.path)
+        if m:
+            if m.group(1) not in self.estado.archivos:
+                return self._json(404, {"error": {"code": 404, "message": "File not found"}})
+            return self._json(200, {"id": "anyoneWithLink", "type": "anyone", "role": "reader"})
+
+        if url.path.rstrip("/") == "/upload/drive/v3/files":
+            tipo = params.get("uploadType", ["media"])[0]
+            if tipo == "multipart":
+                metadata, contenido = self._multipart(cuerpo)
+                return self._json(200, self.estado.crear(metadata, contenido))
+            if tipo == "resumable":
+                upload_id = uuid.uuid4().hex
+                with self.estado.lock:
+                    self.estado.sesiones[upload_id] = {
+                        "metadata": json.loads(cuerpo or b"{}"),
+                        "datos": bytearray(),
+                    }
+                host = self.headers.get("Host")
+                location = f"http://{host}/upload/drive/v3/files?uploadType=resumable&upload_id={upload_id}"
+                return self._vacio(200, {"Location": location})
+            if tipo == "media":
+                return self._json(200, self.estado.crear({}, cuerpo))
+        return self._json(404, {"error": {"code": 404, "message": "Not found"}})
+
+    def do_PUT(self) -> None:
+        url = urlparse(self.path)
+        self._contar("PUT", url.path)
+        upload_id = parse_qs(url.query).get("upload_id", [""])[0]
+        cuerpo = self._leer_cuerpo()
+        sesion = self.estado.sesiones.get(upload_id)
+        if sesion is None:
+            return self._json(404, {"error": {"code": 404, "message": "Upload session not found"}})
+
+        # Content-Range: bytes inicio-fin/total  |  bytes */total (consulta de estado)
+        rango = self.headers.get("Content-Range", "")
+        m = re.fullmatch(r"bytes (\*|(\d+)-(\d+))/(\*|\d+)", rango.strip()) if rango else None
+        total = int(m.group(4)) if m and m.group(4) != "*" else None
+        if m and m.group(1) != "*":
+            inicio = int(m.group(2))
+            if inicio != len(sesion["datos"]):
+                # Bloque fuera de orden: informar lo recibido para que el cliente reanude
+                return self._vacio(308, self._rango(sesion))
+            sesion["datos"].extend(cuerpo)
+            with self.estado.lock:
+                self.estado.puts += 1
+                fallar = self.estado.fallar_put_cada and self.estado.puts % self.estado.fallar_put_cada == 0
+            if fallar:
+                return self._json(503, {"error": {"code": 503, "message": "Backend Error"}})
+        elif not m:
+            sesion["datos"].extend(cuerpo)
+            total = len(sesion["datos"])
+
+        if total is not None and len(sesion["datos"]) >= total:
+            with self.estado.lock:
+                self.estado.sesiones.pop(upload_id, None)
+            return self._json(200, self.estado.crear(sesion["metadata"], bytes(sesion["datos"])))
+        return self._vacio(308, self._rango(sesion))
+
+    @staticmethod
+    def _rango(sesion: dict) -> dict:
+        recibidos = len(sesion["datos"])
+        return {"Range": f"bytes=0-{recibidos - 1}"} if recibidos else {}
+
+    def _multipart(self, cuerpo: bytes) -> tuple[dict, bytes]:
+        content_type = self.headers.get("Content-Type", "")
+        mensaje = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode() + cuerpo
+        )
+        partes = list(mensaje.iter_parts())
+        metadata = json.loads(partes[0].get_payload(decode=True) or b"{}") if partes else {}
+        contenido = partes[1].get_payload(decode=True) if len(partes) > 1 else b""
+        return metadata, contenido or b""
+
+
+class ServidorDrive:
+    def __init__(self, httpd: ThreadingHTTPServer, estado: EstadoDrive) -> None:
+        self.httpd = httpd
+        self.estado = estado
+        self.url = f"http://127.0.0.1:{httpd.server_address[1]}/drive/v3/"
+
+    def detener(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def iniciar(*, port: int = 0, latencia_ms: float = 0.0, fallar_put_cada: int = 0) -> ServidorDrive:
+    estado = EstadoDrive(latencia_ms, fallar_put_cada)
+    manejador = type("Manejador", (ManejadorDrive,), {"estado": estado})
+    httpd = ThreadingHTTPServer(("127.0.0.1", port), manejador)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return ServidorDrive(httpd, estado)
+
+
+class ProcesoDrive:
+    """Servidor en un proceso aparte (sus asignaciones de memoria no cuentan en el cliente)."""
+
+    def __init__(self, *, latencia_ms: float = 0.0, fallar_put_cada: int = 0) -> None:
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        self.proceso = subprocess.Popen(
+            [sys.executable, __file__, "--port", str(port), "--latencia-ms", str(latencia_ms),
+             "--fallar-put-cada", str(fallar_put_cada)],
+            stdout=subprocess.DEVNULL,
+        )
+        self.base = f"http://127.0.0.1:{port}"
+        self.url = f"{self.base}/drive/v3/"
+        for _ in range(100):
+            try:
+                self.estadisticas()
+                break
+            except OSError:
+                time.sleep(0.05)
+
+    def estadisticas(self, *, reset: bool = False) -> dict:
+        with urlopen(f"{self.base}/_stats" + ("?reset=1" if reset else "")) as resp:
+            return json.loads(resp.read())
+
+    def archivo(self, file_id: str) -> dict:
+        with urlopen(f"{self.url}files/{file_id}") as resp:
+            return json.loads(resp.read())
+
+    def detener(self) -> None:
+        self.proceso.terminate()
+        self.proceso.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Servidor local que imita Google Drive v3")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latencia-ms", type=float, default=0.0, help="Demora añadida a cada petición")
+    parser.add_argument("--fallar-put-cada", type=int, default=0, help="Responder 503 cada N bloques recibidos")
+    args = parser.parse_args()
+    servidor = iniciar(port=args.port, latencia_ms=args.latencia_ms, fallar_put_cada=args.fallar_put_cada)
+    print(f"🗂️  Drive falso escuchando; GDRIVE_API_ENDPOINT={servidor.url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        servidor.detener()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Servidor SMTP local para pruebas y benchmarks de la bandeja de correos
+(app/services/email_worker.py) sin enviar correos reales.
+
+Acepta EHLO/HELO, AUTH PLAIN/LOGIN (cualquier credencial), MAIL, RCPT, DATA, RSET,
+NOOP y QUIT. No ofrece STARTTLS: usar SMTP_STARTTLS=false.
+
+Uso:
+    python fake_smtp_server.py --port 2525 --latencia-ms 200
+    SMTP_SERVER=127.0.0.1 SMTP_PORT=2525 SMTP_STARTTLS=false SMTP_USERNAME=x SMTP_PASSWORD=x uvicorn app.api.main:app
+
+Desde código: `servidor = iniciar(port=0, latencia_ms=50)` lo levanta en un hilo;
+`servidor.mensajes`, `servidor.conexiones` y `servidor.logins` permiten verificar envíos.
+"""
+
+import argparse
+import email
+import email.policy
+import socket
+import socketserver
+import threading
+import time
+from dataclasses import dataclass, field
+
+
+@dataclass
+class EstadoSMTP:
+    latencia: float = 0.0
+    # Cerrar la conexión sin responder al recibir el mensaje número N, 2N, ... (0 = nunca)
+    cortar_cada: int = 0
+    mensajes: list = field(default_factory=list)
+    conexiones: int = 0
+    logins: int = 0
+    datas: int = 0
+    abiertas: set = field(default_factory=set)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class ManejadorSMTP(socketserver.StreamRequestHandler):
+    estado: EstadoSMTP
+
+    def _responder(self, linea: str) -> None:
+        self.wfile.write(f"{linea}\r\n".encode())
+        self.wfile.flush()
+
+    def _leer(self) -> str | None:
+        linea = self.rfile.readline()
+        if not linea:
+            return None
+        return linea.decode("utf-8", "replace").rstrip("\r\n")
+
+    def handle(self) -> None:
+        estado = self.estado
+        with estado.lock:
+            estado.conexiones += 1
+            estado.abiertas.add(self.connection)
+        try:
+            self._sesion()
+        finally:
+            with estado.lock:
+                estado.abiertas.discard(self.connection)
+
+    def _sesion(self) -> None:
+        estado = self.estado
+        if estado.latencia:
+            time.sleep(estado.latencia)
+        self._responder("220 fake-smtp listo")
+        remitente, destinatarios = None, []
+        while True:
+            linea = self._leer()
+            if linea is None:
+                return
+            comando = linea.split(" ", 1)[0].upper()
+            if comando == "EHLO":
+                self._responder("250-fake-smtp")
+                self._responder("250-8BITMIME")
+                self._responder("250 AUTH PLAIN LOGIN")
+            elif comando == "HELO":
+                self._responder("250 fake-smtp")
+            elif comando == "AUTH":
+                if estado.latencia:
+                    time.sleep(estado.latencia)
+                partes = linea.split()
+                if len(partes) >= 2 and partes[1].upper() == "LOGIN":
+                    # Usuario y contraseña en líneas separadas (base64)
+                    if len(partes) < 3:
+                        self._responder("334 VXNlcm5hbWU6")
+                        self._leer()
+                    self._responder("334 UGFzc3dvcmQ6")
+                    self._leer()
+                elif len(partes) < 3:
+                    self._responder("334 ")
+                    self._leer()
+                with estado.lock:
+                    estado.logins += 1
+                self._responder("235 2.7.0 Autenticado")
+            elif comando == "MAIL":
+                remitente, destinatarios = linea.split(":", 1)[1].strip(), []
+                self._responder("250 OK")
+            elif comando == "RCPT":
+                destinatarios.append(linea.split(":", 1)[1].strip().strip("<>"))
+                self._responder("250 OK")
+            elif comando == "DATA":
+                self._responder("354 Terminar con <CRLF>.<CRLF>")
+                datos = []
+                while True:
+                    fila = self.rfile.readline()
+                    if not fila or fila in (b".\r\n", b".\n"):
+                        break
+                    datos.append(fila[1:] if fila.startswith(b"..") else fila)
+                with estado.lock:
+                    estado.datas += 1
+                    cortar = estado.cortar_cada and estado.datas % estado.cortar_cada == 0
+                if cortar:
+                    return
+                mensaje = email.message_from_bytes(b"".join(datos), policy=email.policy.default)
+                with estado.lock:
+                    estado.mensajes.append({
+                        "from": remitente,
+                        "to": list(destinatarios),
+                        "subject": str(mensaje.get("Subject", "")),
+                        "mensaje": mensaje,
+                    })
+                self._responder("250 OK en cola")
+            elif comando == "RSET":
+                remitente, destinatarios = None, []
+                self._responder("250 OK")
+            elif comando == "NOOP":
+                self._responder("250 OK")
+            elif comando == "QUIT":
+                self._responder("221 Adiós")
+                return
+            else:
+                self._responder("502 Comando no implementado")
+
+
+class _ServidorTCP(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def handle_error(self, request, client_address) -> None:
+        # Conexiones cortadas por el cliente o por detener(): no imprimir traza
+        pass
+
+
+class ServidorSMTP:
+    def __init__(self, tcp: _ServidorTCP, estado: EstadoSMTP) -> None:
+        self.tcp = tcp
+        self.estado = estado
+        self.host, self.port = tcp.server_address[:2]
+
+    @property
+    def mensajes(self) -> list:
+        return self.estado.mensajes
+
+    @property
+    def conexiones(self) -> int:
+        return self.estado.conexiones
+
+    @property
+    def logins(self) -> int:
+        return self.estado.logins
+
+    def reiniciar_contadores(self) -> None:
+        with self.estado.lock:
+            self.estado.mensajes.clear()
+            self.estado.conexiones = self.estado.logins = self.estado.datas = 0
+
+    def detener(self) -> None:
+        self.tcp.shutdown()
+        self.tcp.server_close()
+        # Cortar también las sesiones abiertas (como un reinicio real del servidor)
+        with self.estado.lock:
+            abiertas = list(self.estado.abiertas)
+        for conexion in abiertas:
+            try:
+                conexion.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+def iniciar(*, port: int = 0, latencia_ms: float = 0.0, cortar_cada: int = 0) -> ServidorSMTP:
+    estado = EstadoSMTP(latencia=latencia_ms / 1000.0, cortar_cada=cortar_cada)
+    manejador = type("Manejador", (ManejadorSMTP,), {"estado": estado})
+    tcp = _ServidorTCP(("127.0.0.1", port), manejador)
+    threading.Thread(target=tcp.serve_forever, daemon=True).start()
+    return ServidorSMTP(tcp, estado)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Servidor SMTP local para pruebas")
+    parser.add_argument("--port", type=int, default=2525)
+    parser.add_argument("--latencia-ms", type=float, default=0.0, help="Demora del saludo y del login")
+    args = parser.parse_args()
+    servidor = iniciar(port=args.port, latencia_ms=args.latencia_ms)
+    print(f"📮 SMTP falso escuchando en {servidor.host}:{servidor.port}")
+    try:
+        while True:
+            time.sleep(5)
+            print(f"   conexiones={servidor.conexiones} logins={servidor.logins} mensajes={len(servidor.mensajes)}")
+    except KeyboardInterrupt:
+        servidor.detener()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Importa al índice archivo_url los metadatos heredados de uploads/urls/*.json.
+
+Es idempotente (los archivo_id ya indexados se omiten). El servidor también lo
+ejecuta al iniciar cuando el índice está vacío.
+
+Uso:
+    python importar_urls_json.py
+"""
+
+from app.db.session import SessionLocal, engine
+from app.models import password_reset_token as _password_reset_token  # noqa: F401  Registrar relaciones de Usuario
+from app.models import usuario as _usuario  # noqa: F401
+from app.models.archivo_url import ArchivoUrl
+from app.services.upload_service import UploadService
+
+
+def main() -> None:
+    ArchivoUrl.__table__.create(bind=engine, checkfirst=True)
+    db = SessionLocal()
+    try:
+        resumen = UploadService(db).importar_metadatos_json()
+    finally:
+        db.close()
+    print(f"Importados: {resumen['importados']}")
+    print(f"Ya indexados (omitidos): {resumen['omitidos']}")
+    print(f"Inválidos: {resumen['invalidos']}")
+
+
+if __name__ == "__main__":
+    main()
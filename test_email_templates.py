@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Pruebas de snapshot de las plantillas de correo (app/templates/email).
+
+Cada evento se renderiza con un contexto fijo y se compara con los archivos de
+snapshots/correo/. Tras cambiar una plantilla a propósito, regenerarlos con:
+
+    python test_email_templates.py --actualizar
+
+Uso:
+    python test_email_templates.py      (o pytest test_email_templates.py)
+"""
+
+import os
+import sys
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+from app.services.email_templates import PlantillasCorreo
+
+SNAPSHOTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "snapshots", "correo")
+
+INCAPACIDAD = {
+    "tipo_id": 2,
+    "fecha_inicio": "2025-03-10T00:00:00",
+    "fecha_final": "2025-03-14T00:00:00",
+    "dias": 5,
+    "eps": "EPS Sura",
+    "servicio": "Urgencias",
+    "diagnostico": "J00 Rinofaringitis aguda",
+}
+
+# (nombre del snapshot, evento, contexto)
+CASOS = [
+    ("nueva_incapacidad", "nueva_incapacidad", {
+        "tipo": "nueva_incapacidad",
+        "incapacidad_id": 123,
+        "empleado": {"id": 7, "nombre": "Juan Pérez", "email": "juan@example.com"},
+        "incapacidad": INCAPACIDAD,
+        "admin": {"id": 1, "nombre": "Ana Gómez", "email": "ana@example.com"},
+    }),
+    ("nueva_incapacidad_sin_datos", "nueva_incapacidad", {
+        "tipo": "nueva_incapacidad",
+        "incapacidad_id": 124,
+        "empleado": {"id": 8, "nombre": "María <Ruiz> & Cía", "email": "maria@example.com"},
+        "incapacidad": {"fecha_inicio": None, "fecha_final": None, "dias": 0},
+    }),
+    ("incapacidad_rechazada", "incapacidad_rechazada", {
+        "tipo": "incapacidad_rechazada",
+        "incapacidad_id": 123,
+        "empleado": {"id": 7, "nombre": "Juan Pérez", "email": "juan@example.com"},
+        "administrador": {"id": 1, "nombre": "Ana Gómez"},
+        "motivo_rechazo": "Falta la epicrisis <firmada>",
+        "fecha_rechazo": "2025-03-15T09:30:00",
+        "incapacidad": INCAPACIDAD,
+    }),
+    ("password_reset", "password_reset", {
+        "nombre": "Juan Pérez",
+        "reset_url": "http://localhost:8000/api/auth/reset-password-page?token=abc123&x=1",
+    }),
+    ("password_reset_confirmacion", "password_reset_confirmacion", {
+        "nombre": "Juan Pérez",
+    }),
+]
+
+PARTES = (("asunto", "asunto.txt"), ("html", "html"), ("texto", "txt"))
+
+
+def _renderizados():
+    plantillas = PlantillasCorreo()
+    for nombre, evento, contexto in CASOS:
+        yield nombre, plantillas.renderizar(evento, contexto)
+
+
+def test_todos_los_eventos_tienen_caso():
+    eventos = set(PlantillasCorreo().eventos())
+    cubiertos = {evento for _, evento, _ in CASOS}
+    assert eventos == cubiertos, f"Eventos sin snapshot: {sorted(eventos - cubiertos)}"
+
+
+def test_snapshots():
+    diferencias = []
+    for nombre, correo in _renderizados():
+        for atributo, extension in PARTES:
+            ruta = os.path.join(SNAPSHOTS_DIR, f"{nombre}.{extension}")
+            with open(ruta, "r", encoding="utf-8") as f:
+                esperado = f.read()
+            if getattr(correo, atributo) != esperado:
+                diferencias.append(ruta)
+    assert not diferencias, f"Snapshots distintos (regenerar con --actualizar si es intencional): {diferencias}"
+
+
+def test_html_escapado_y_texto_plano_literal():
+    correo = PlantillasCorreo().renderizar("incapacidad_rechazada", dict(CASOS[2][2]))
+    assert "Falta la epicrisis &lt;firmada&gt;" in correo.html
+    assert "Falta la epicrisis <firmada>" in correo.texto
+
+
+def test_lote_por_destinatario():
+    admins = [{"admin": {"nombre": f"Admin {i}"}} for i in range(3)]
+    correos = PlantillasCorreo().renderizar_lote("nueva_incapacidad", CASOS[1][2], admins)
+    assert [c.html.count(f"Admin {i}") for i, c in enumerate(correos)] == [1, 1, 1]
+    assert len({c.asunto for c in correos}) == 1
+
+
+def actualizar() -> None:
+    os.makedirs(SNAPSHOTS_DIR, exist_ok=True)
+    for nombre, correo in _renderizados():
+        for atributo, extension in PARTES:
+            with open(os.path.join(SNAPSHOTS_DIR, f"{nombre}.{extension}"), "w", encoding="utf-8") as f:
+                f.write(getattr(correo, atributo))
+    print(f"✅ Snapshots regenerados en {SNAPSHOTS_DIR}")
+
+
+def main() -> int:
+    if "--actualizar" in sys.argv:
+        actualizar()
+        return 0
+    fallos = 0
+    for nombre, fn in list(globals().items()):
+        if nombre.startswith("test_") and callable(fn):
+            try:
+                fn()
+                print(f"✅ {nombre}")
+            except AssertionError as e:
+                fallos += 1
+                print(f"❌ {nombre}: {e}")
+    # Costo por destinatario: solo sustitución de variables sobre plantillas ya compiladas
+    plantillas = PlantillasCorreo()
+    contexto = CASOS[0][2]
+    inicio = time.perf_counter()
+    plantillas.renderizar_lote("nueva_incapacidad", contexto, [{"admin": {"nombre": f"Admin {i}"}} for i in range(1000)])
+    print(f"⏱️  nueva_incapacidad: {(time.perf_counter() - inicio) * 1000:.3f} µs por destinatario (1000 variantes)")
+    return 1 if fallos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
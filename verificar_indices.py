@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Verifica con EXPLAIN que las consultas principales de listados de incapacidades
+usan los índices de app/db/migrate.py (INDEX_SPECS).
+
+Para cada consulta generada por IncapacidadRepository se captura el SQL real y se
+ejecuta EXPLAIN (MySQL) o EXPLAIN QUERY PLAN (SQLite). Se marca como fallo un
+recorrido completo de `incapacidad` o un ordenamiento en archivo temporal.
+
+Uso:
+    DATABASE_URL=mysql+pymysql://... python verificar_indices.py
+    python verificar_indices.py        # SQLite temporal con datos sintéticos
+
+Termina con código 1 si alguna consulta no usa índice.
+"""
+
+import contextlib
+import io
+import sys
+from datetime import datetime
+
+from bench_db import configurar_database_url, crear_esquema, poblar
+
+configurar_database_url()
+
+from sqlalchemy import event, text
+
+from app.core.pagination import decode_cursor, encode_cursor
+from app.db import reflection
+from app.db.migrate import INDEX_SPECS, align_indexes
+from app.db.session import SessionLocal, engine
+from app.repositories.incapacidad import IncapacidadRepository
+
+
+def escenarios(repo: IncapacidadRepository):
+    cursor = decode_cursor(encode_cursor(datetime(2025, 6, 1), 500))
+    return [
+        ("admin sin filtros", lambda: repo.list_all_with_details(limit=100)),
+        ("admin por estado", lambda: repo.list_all_with_details(limit=100, estado=11)),
+        ("admin por tipo", lambda: repo.list_all_with_details(limit=100, tipo_incapacidad_id=1)),
+        ("admin por usuario", lambda: repo.list_all_with_details(limit=100, usuario_id=1)),
+        ("admin estado + fechas", lambda: repo.list_all_with_details(
+            limit=100, estado=11, fecha_inicio=datetime(2025, 3, 1), fecha_final=datetime(2025, 9, 1))),
+        ("admin por estado (cursor)", lambda: repo.list_all_with_details(limit=100, estado=50, after=cursor)),
+        ("empleado /mias", lambda: repo.list_by_user(1, limit=100)),
+        ("empleado /mias (cursor)", lambda: repo.list_by_user(1, limit=100, after=cursor)),
+        ("documento por (incapacidad, archivo)", lambda: repo.get_archivo_by_ids(1, 1)),
+    ]
+
+
+def capturar(fn) -> list:
+    capturadas = []
+
+    def _on_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            capturadas.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", _on_execute)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", _on_execute)
+    return capturadas
+
+
+def explicar(statement: str, parameters) -> tuple[list[str], list[str]]:
+    """Retorna (líneas del plan, problemas detectados)."""
+    mysql = engine.dialect.name.startswith("mysql")
+    prefijo = "EXPLAIN " if mysql else "EXPLAIN QUERY PLAN "
+    with engine.connect() as conn:
+        filas = conn.exec_driver_sql(prefijo + statement, parameters).mappings().all()
+    plan, problemas = [], []
+    for fila in filas:
+        if mysql:
+            tabla, tipo = fila.get("table"), fila.get("type")
+            extra = fila.get("Extra") or ""
+            plan.append(f"{tabla}: type={tipo} key={fila.get('key')} rows={fila.get('rows')} {extra}")
+            if tabla == "incapacidad" and tipo == "ALL":
+                problemas.append("recorrido completo de incapacidad")
+            if "filesort" in extra.lower():
+                problemas.append("ordenamiento con filesort")
+        else:
+            detalle = fila.get("detail") or ""
+            plan.append(detalle)
+            if detalle.startswith("SCAN incapacidad") and "INDEX" not in detalle:
+                problemas.append("recorrido completo de incapacidad")
+            if "TEMP B-TREE FOR ORDER BY" in detalle:
+                problemas.append("ordenamiento en árbol temporal")
+    return plan, problemas
+
+
+def preparar_sqlite() -> None:
+    crear_esquema(engine)
+    poblar(engine, incapacidades=5000)
+    with engine.begin() as conn:
+        for table, specs in INDEX_SPECS.items():
+            for iname, cols in specs.items():
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS {iname} ON {table} ({', '.join(cols)})"))
+        conn.execute(text("ANALYZE"))
+
+
+def main() -> int:
+    print("🔎 Verificación de índices con EXPLAIN")
+    print("=" * 60)
+    if engine.dialect.name.startswith("sqlite"):
+        preparar_sqlite()
+    else:
+        report = align_indexes(engine, create=False)
+        for clave in ("present", "missing", "mismatched", "unused"):
+            for item in report[clave]:
+                print(f"[{clave}] {item['table']}.{item['index']}")
+
+    # Reflejar antes de capturar para no analizar consultas de introspección
+    reflection.warm_up(engine)
+    db = SessionLocal()
+    fallos = 0
+    try:
+        repo = IncapacidadRepository(db)
+        for nombre, fn in escenarios(repo):
+            for statement, parameters in capturar(fn):
+                plan, problemas = explicar(statement, parameters)
+                estado = "❌" if problemas else "✅"
+                print(f"\n{estado} {nombre}")
+                for linea in plan:
+                    print(f"   {linea}")
+                for problema in problemas:
+                    print(f"   -> {problema}")
+                fallos += bool(problemas)
+    finally:
+        db.close()
+
+    print("\n" + "=" * 60)
+    print(f"Consultas con problemas: {fallos}")
+    return 1 if fallos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())